@@ -1,4 +1,5 @@
 import asyncio
+import itertools
 import socket
 import struct
 import json
@@ -9,25 +10,38 @@ import datetime
 import traceback
 from typing import Dict, Optional
 
+from ...shared.state_delta import apply_patch, PatchError
+from ...shared.reliable_udp import ReliableChannel, ReliableEndpoint
+from ...shared.wire_codec import JSON, available_codecs, make_codec
+
 class MonopolyMulticastClient:
     def __init__(self, server_host='localhost', server_port=5050):
         self.server_host = server_host
         self.server_port = server_port
         self.player_name: Optional[str] = None
+        self.player_id: Optional[str] = None  # id server cấp khi JOIN (tên có thể trùng giữa các client)
         self.room_id: Optional[str] = None
         self.group_ip: Optional[str] = None
         self.port: Optional[int] = None
+        self.uplink: Optional[tuple] = None  # (server_host, uplink_port) khi server không join được group của phòng
         self.reader: Optional[asyncio.StreamReader] = None
         self.writer: Optional[asyncio.StreamWriter] = None
         self.udp_socket: Optional[socket.socket] = None
+        self.reliable: Optional[ReliableEndpoint] = None  # seq / ACK / phát lại cho lệnh game
+        self.codec = make_codec(JSON)  # codec datagram của phòng (server chọn khi JOIN / ROOM_CODEC)
         self.running = True
         self.is_host = False
         self.connected = False
         self.in_room = False
-        self._response_event = asyncio.Event()
-        self._last_response = None
         self._tcp_task = None
-        self._pending_commands = {}  # Track pending commands
+        self._handler_tasks = set()  # task xử lý response chạy nền (giữ tham chiếu để không bị GC giữa chừng)
+        self._pending_commands: Dict[int, asyncio.Future] = {}  # {req_id: future phản hồi}
+        self._req_ids = itertools.count(1)
+
+        # Trạng thái phòng đồng bộ theo version (snapshot khi join/resync + delta qua multicast)
+        self.room_state: Optional[dict] = None
+        self.state_version: Optional[int] = None
+        self._resync_task: Optional[asyncio.Task] = None
 
     async def connect_tcp(self):
         """Kết nối TCP đến server"""
@@ -46,79 +60,71 @@ class MonopolyMulticastClient:
             print(f"❌ Lỗi kết nối TCP: {e}")
             return False
 
-    async def send_tcp_command(self, command, data=None):
-        """Gửi lệnh TCP đến server và chờ response - ĐÃ SỬA TIMEOUT"""
+    async def send_tcp_command(self, command, data=None, timeout: float = 15.0):
+        """
+        Gửi lệnh TCP đến server và chờ response.
+        - Mỗi lệnh mang một req_id riêng và một future trong _pending_commands.
+        - Nhiều lệnh có thể chờ cùng lúc; response được ghép theo req_id khi về tới.
+        - Trả về None khi timeout hoặc mất kết nối trong lúc chờ.
+        """
         if not self.connected or not self.writer:
             print("❌ Không thể gửi - không kết nối đến server")
             return None
-            
+
+        req_id = next(self._req_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending_commands[req_id] = future
+
         try:
             packet = {
                 "cmd": command,
-                "data": data or {}
+                "data": data or {},
+                "req_id": req_id,
             }
-            message = json.dumps(packet) + "\n"
-            encoded_message = message.encode('utf-8')
-            
-            print(f"📤 Đang gửi lệnh: {command}")
-            
-            # Reset event và response
-            self._response_event.clear()
-            self._last_response = None
-            
-            # Gửi lệnh
+            encoded_message = (json.dumps(packet) + "\n").encode('utf-8')
+
+            print(f"📤 Đang gửi lệnh: {command} (#{req_id})")
             self.writer.write(encoded_message)
             await self.writer.drain()
-            print(f"✅ Đã gửi lệnh {command}")
-            
-            # Chờ response với timeout - TĂNG THỜI GIAN CHỜ
+
+            # Chờ response của riêng lệnh này với timeout
             try:
-                await asyncio.wait_for(self._response_event.wait(), timeout=15.0)  # Tăng từ 10 lên 15 giây
-                response = self._last_response
-                if response:
-                    print(f"📥 Nhận response: {response.get('cmd')} - {response.get('status')}")
+                response = await asyncio.wait_for(future, timeout=timeout)
+                print(f"📥 Nhận response: {response.get('cmd')} - {response.get('status')} (#{req_id})")
                 return response
             except asyncio.TimeoutError:
-                print(f"⏰ TIMEOUT: Không nhận được response sau 15 giây")
+                print(f"⏰ TIMEOUT: Không nhận được response cho {command} (#{req_id}) sau {timeout} giây")
                 return None
-                
+            except ConnectionError as e:
+                print(f"🔌 {command} (#{req_id}) không có response: {e}")
+                return None
+
         except Exception as e:
             print(f"❌ Lỗi gửi lệnh {command}: {e}")
             self.connected = False
             return None
+        finally:
+            self._pending_commands.pop(req_id, None)
 
     async def receive_tcp_messages(self):
         """Nhận message từ TCP server"""
         print(f"🔍 Bắt đầu nhận TCP messages...")
-        buffer = ""
-        
+
         while self.connected and self.reader and self.running:
             try:
-                # Đọc dữ liệu với timeout
-                data = await asyncio.wait_for(self.reader.read(4096), timeout=1.0)
-                
-                if not data:
-                    print("🔌 Server đã ngắt kết nối")
-                    self.connected = False
-                    break
+                # Đọc trọn một dòng NDJSON từ buffer của StreamReader
+                line = await asyncio.wait_for(self.reader.readuntil(b"\n"), timeout=1.0)
+                message_str = line.decode('utf-8').strip()
+                if message_str:
+                    await self.process_tcp_message(message_str)
 
-                chunk = data.decode('utf-8')
-                buffer += chunk
-                print(f"📨 Nhận {len(data)} bytes, buffer: {len(buffer)} chars")
-                
-                # Xử lý tất cả message hoàn chỉnh trong buffer
-                while '\n' in buffer:
-                    line_end = buffer.find('\n')
-                    message_str = buffer[:line_end].strip()
-                    buffer = buffer[line_end + 1:]
-                    
-                    if message_str:
-                        print(f"🔍 Xử lý message: {message_str[:100]}...")
-                        await self.process_tcp_message(message_str)
-                        
             except asyncio.TimeoutError:
                 # Timeout là bình thường, tiếp tục vòng lặp
                 continue
+            except asyncio.IncompleteReadError:
+                print("🔌 Server đã ngắt kết nối")
+                self.connected = False
+                break
             except asyncio.CancelledError:
                 print("🔍 TCP receiver bị cancelled")
                 break
@@ -129,6 +135,22 @@ class MonopolyMulticastClient:
                 else:
                     break
 
+        # Lệnh còn chờ nhận ConnectionError khi mất kết nối → send_tcp_command trả về None
+        for future in self._pending_commands.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Mất kết nối TCP đến server"))
+
+    def _resolve_pending(self, response: dict):
+        """Trả response cho future đang chờ theo req_id (không có req_id → lệnh chờ lâu nhất)."""
+        req_id = response.get("req_id")
+        if req_id is None:
+            if not self._pending_commands:
+                return
+            req_id = next(iter(self._pending_commands))
+        future = self._pending_commands.get(req_id)
+        if future and not future.done():
+            future.set_result(response)
+
     async def process_tcp_message(self, message_str: str):
         """Xử lý một message TCP hoàn chỉnh - ĐÃ SỬA XỬ LÝ RESPONSE"""
         try:
@@ -139,24 +161,27 @@ class MonopolyMulticastClient:
             message = response.get("message", "")
             
             print(f"📥 Nhận response: {cmd} - {status}")
-            
+
+            # Trả response cho lệnh đang chờ trước khi xử lý (handler có thể gửi lệnh mới)
+            self._resolve_pending(response)
+
             if status == "ERROR":
                 print(f"❌ Lỗi từ server: {message}")
             else:
                 if cmd == "ROOM_LIST":
                     self.display_room_list(data)
                 elif cmd == "ROOM_CREATED":
-                    await self.handle_room_created(data)
+                    # Chạy như task riêng: handler gửi JOIN_ROOM và chờ response,
+                    # không được chặn vòng nhận TCP
+                    task = asyncio.create_task(self.handle_room_created(data))
+                    self._handler_tasks.add(task)
+                    task.add_done_callback(self._handler_tasks.discard)
                 elif cmd == "JOIN_SUCCESS":
                     await self.handle_join_success(data)
                 elif cmd == "LEAVE_RESULT":
                     print("✅ Đã rời phòng")
                     await self.leave_room()
 
-            # QUAN TRỌNG: Set response ngay cả khi đã timeout
-            self._last_response = response
-            self._response_event.set()
-            
         except json.JSONDecodeError as e:
             print(f"❌ JSON decode error: {e}")
             print(f"🔍 Message: {message_str}")
@@ -190,7 +215,8 @@ class MonopolyMulticastClient:
         print(f"🔍 Tự động join phòng {self.room_id}")
         response = await self.send_tcp_command("JOIN_ROOM", {
             "room_id": self.room_id, 
-            "player_name": self.player_name
+            "player_name": self.player_name,
+            "codecs": available_codecs(),
         })
         
         if response and response.get('status') == 'OK':
@@ -205,6 +231,11 @@ class MonopolyMulticastClient:
         print(f"👥 Người chơi: {data.get('players', [])}")
         
         self.room_id = data.get('room_id')
+        self.player_id = data.get('player_id')
+        self.codec = make_codec(data.get('codec', JSON), self.room_id, data.get('room_no', 0))
+        self.uplink = (self.server_host, data['uplink_port']) if data.get('uplink_port') else None
+        if data.get('snapshot'):
+            self.apply_state_snapshot(data['snapshot'])
         multicast_ip = data.get('multicast_ip')
         multicast_port = data.get('port')
         
@@ -237,6 +268,7 @@ class MonopolyMulticastClient:
             self.udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
             self.udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
             self.udp_socket.setblocking(False)
+            self.reliable = ReliableEndpoint(ReliableChannel(self.sender_id), self._transmit_udp)
             
             print(f"✅ Đã tham gia multicast group {multicast_ip}:{multicast_port}")
             return True
@@ -354,7 +386,8 @@ class MonopolyMulticastClient:
             print(f"🔍 Đang tham gia phòng '{room_id}'...")
             response = await self.send_tcp_command("JOIN_ROOM", {
                 "room_id": room_id, 
-                "player_name": self.player_name
+                "player_name": self.player_name,
+                "codecs": available_codecs(),
             })
             
             if response:
@@ -437,38 +470,55 @@ class MonopolyMulticastClient:
             return
             
         packet = self.make_packet(action, args or {}, "SERVER", "COMMAND")
-        if await self.send_udp_packet(packet):
+        if await self.send_udp_packet(packet, reliable=True):
             print(f"✅ Đã gửi lệnh {action}")
 
     async def send_chat_message(self, message: str):
         """Gửi tin nhắn chat"""
         packet = self.make_packet("CHAT", {"message": message}, "ALL", "EVENT")
-        if await self.send_udp_packet(packet):
+        if await self.send_udp_packet(packet, reliable=True):
             print(f"💬 Đã gửi tin nhắn: {message}")
 
-    async def send_udp_packet(self, packet: Dict):
-        """Gửi packet UDP multicast"""
+    async def send_udp_packet(self, packet: Dict, reliable: bool = False):
+        """Gửi packet UDP multicast (reliable=True: có seq, chờ ACK và tự phát lại)"""
         if not self.udp_socket or not self.group_ip or not self.port:
             print("❌ Chưa kết nối multicast")
             return False
             
         try:
+            if reliable and self.reliable:
+                self.reliable.send(packet, reliable=True)
+                return True
             loop = asyncio.get_event_loop()
-            data = json.dumps(packet).encode('utf-8')
+            data = self.codec.encode(packet)
             await loop.sock_sendto(self.udp_socket, data, (self.group_ip, self.port))
+            if self.uplink:
+                await loop.sock_sendto(self.udp_socket, data, self.uplink)
             return True
         except Exception as e:
             print(f"❌ Lỗi gửi UDP: {e}")
             return False
 
+    def _transmit_udp(self, packet: Dict):
+        """Gửi đồng bộ một datagram vào group (dùng cho lớp tin cậy: gói mới, ACK, phát lại)."""
+        try:
+            data = self.codec.encode(packet)
+            self.udp_socket.sendto(data, (self.group_ip, self.port))
+            if self.uplink:
+                self.udp_socket.sendto(data, self.uplink)  # server nhận qua socket uplink (không join group)
+        except (OSError, AttributeError, TypeError):
+            pass  # socket đã đóng / đầy buffer: lớp tin cậy sẽ phát lại
+
     async def receive_multicast_messages(self):
         """Nhận message từ multicast group"""
         loop = asyncio.get_event_loop()
         while self.in_room and self.udp_socket and self.running:
             try:
                 data, addr = await loop.sock_recvfrom(self.udp_socket, 4096)
-                packet = json.loads(data.decode('utf-8'))
-                await self.handle_multicast_packet(packet, addr)
+                packet = self.codec.decode(data)  # JSON hoặc nhị phân (tự nhận dạng)
+                delivered = self.reliable.receive(packet) if self.reliable else [packet]
+                for ready in delivered:
+                    await self.handle_multicast_packet(ready, addr)
                 
             except BlockingIOError:
                 await asyncio.sleep(0.1)
@@ -481,6 +531,17 @@ class MonopolyMulticastClient:
     async def handle_multicast_packet(self, packet: Dict, addr):
         """Xử lý packet từ multicast"""
         try:
+            if packet.get("type") == "ROOM_CODEC":
+                if packet.get("room_id") == self.room_id:
+                    self.codec = make_codec(packet["codec"], self.room_id, packet.get("room_no", 0))
+                    print(f"🔀 Phòng chuyển codec: {packet['codec']}")
+                return
+
+            if packet.get("type") in ("ROOM_STATE_DELTA", "ROOM_STATE_SNAPSHOT"):
+                if packet.get("room_id") == self.room_id:
+                    self.handle_state_sync(packet)
+                return
+
             header = packet.get("header", {})
             if header:
                 room = header.get("room_id")
@@ -505,6 +566,53 @@ class MonopolyMulticastClient:
         except Exception as e:
             print(f"❌ Lỗi xử lý packet: {e}")
 
+    # ------------------------------------------------------------------
+    # 🔄 ĐỒNG BỘ TRẠNG THÁI PHÒNG (delta theo version)
+    # ------------------------------------------------------------------
+    def apply_state_snapshot(self, snapshot: Dict):
+        """Nhận snapshot đầy đủ {"version", "state"} (bỏ qua nếu cũ hơn bản đang giữ)."""
+        version = snapshot.get("version")
+        if version is None:
+            return
+        if self.state_version is None or version >= self.state_version:
+            self.room_state = snapshot.get("state")
+            self.state_version = version
+
+    def handle_state_sync(self, packet: Dict):
+        """Áp dụng delta nếu khớp version; lệch version thì xin snapshot mới qua TCP."""
+        if packet["type"] == "ROOM_STATE_SNAPSHOT":
+            self.apply_state_snapshot(packet)
+            return
+
+        version = packet.get("version")
+        if self.state_version is not None and version <= self.state_version:
+            return  # delta cũ / trùng lặp
+
+        if self.state_version is None or packet.get("base_version") != self.state_version:
+            self.request_state_resync()
+            return
+
+        try:
+            self.room_state = apply_patch(self.room_state, packet.get("patch", []))
+            self.state_version = version
+        except PatchError as e:
+            print(f"⚠️ Delta v{version} không áp dụng được: {e}")
+            self.request_state_resync()
+
+    def request_state_resync(self):
+        """Báo server lệch version (SYNC_STATE), chỉ một yêu cầu tại một thời điểm."""
+        if self._resync_task and not self._resync_task.done():
+            return
+        self._resync_task = asyncio.create_task(self._resync_state())
+
+    async def _resync_state(self):
+        response = await self.send_tcp_command("SYNC_STATE", {
+            "room_id": self.room_id,
+            "version": self.state_version,
+        })
+        if response and response.get("status") == "OK":
+            self.apply_state_snapshot(response.get("data", {}))
+
     def handle_game_event(self, action: str, payload: Dict):
         """Xử lý sự kiện game"""
         if action == "PLAYER_JOINED":
@@ -520,13 +628,18 @@ class MonopolyMulticastClient:
             message = payload.get("message")
             print(f"💬 {player}: {message}")
 
+    @property
+    def sender_id(self) -> Optional[str]:
+        """header.sender / id của kênh tin cậy: player_id server cấp; server cũ không gửi thì dùng tên"""
+        return self.player_id or self.player_name
+
     def make_packet(self, action: str, data: dict = None, target: str = "ALL", ptype: str = "COMMAND"):
         """Tạo packet"""
         return {
             "header": {
                 "packet_id": str(uuid.uuid4()),
                 "room_id": self.room_id,
-                "sender": self.player_name,
+                "sender": self.sender_id,
                 "target": target,
                 "type": ptype,
                 "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
@@ -567,6 +680,9 @@ class MonopolyMulticastClient:
     async def leave_room(self):
         """Rời phòng (cleanup)"""
         self.in_room = False
+        if self.reliable:
+            self.reliable.close()
+            self.reliable = None
         
         if self.udp_socket:
             try:
@@ -579,9 +695,14 @@ class MonopolyMulticastClient:
             self.udp_socket = None
         
         self.room_id = None
+        self.player_id = None
         self.group_ip = None
         self.port = None
+        self.uplink = None
         self.is_host = False
+        self.room_state = None
+        self.state_version = None
+        self.codec = make_codec(JSON)
         print("🚪 Đã rời phòng")
 
     def show_help(self):
@@ -612,6 +733,11 @@ class MonopolyMulticastClient:
                 await self._tcp_task
             except asyncio.CancelledError:
                 pass
+
+        # Hủy các handler còn đang chờ response
+        for task in list(self._handler_tasks):
+            task.cancel()
+        await asyncio.gather(*self._handler_tasks, return_exceptions=True)
         
         # Đóng writer
         if self.writer:
@@ -0,0 +1,374 @@
+"""
+board_probability.py — xác suất dừng ô, tiền thuê kỳ vọng và ROI nhóm màu
+-------------------------------------------------------------------------
+Mô hình đúng bàn cờ của server: board_config.json + hai bộ bài trong card_manager2.
+- Monte Carlo vector hóa: hàng trăm nghìn quân cờ chạy song song dưới dạng mảng NumPy.
+- Luật được mô hình hóa: đổ đôi (đổ lại), 3 lần đôi liên tiếp → vào tù, ô GoToJailTile,
+  thẻ di chuyển (move_to, move_back, nearest_utility, nearest_railroad, go_to_jail),
+  ra tù bằng đổ đôi / nộp phạt (chiến lược "long": ở tối đa 3 lượt, "short": nộp phạt ngay).
+- Chuỗi Markov chính xác (trạng thái = ô × số lần đôi liên tiếp + 3 trạng thái trong tù) để so sánh.
+- Rút thẻ được coi là rút ngẫu nhiên có hoàn lại (bỏ qua thứ tự bộ bài và thẻ ra tù đang bị giữ).
+
+NumPy là phụ thuộc tùy chọn (chỉ cần cho module này, đã khai báo trong requirements.txt):
+    pip install numpy
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m src.server.analytics.board_probability --games 200000 --throws 100 --markov
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn — chỉ báo lỗi khi thực sự dùng
+    np = None
+
+from ..game.board_template import BoardTemplate, get_board_template
+from ..game.card_manager2 import load_card_definitions
+
+DICE_OUTCOMES = [(a, b) for a in range(1, 7) for b in range(1, 7)]
+EXPECTED_DICE = 7
+MAX_CARD_CHAIN = 3  # số lần rút thẻ nối tiếp tối đa trong một lần đổ
+JAIL_STRATEGIES = ("long", "short")
+RENT_LEVELS = ("base", "monopoly", "1_house", "2_houses", "3_houses", "4_houses", "hotel")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("board_probability requires NumPy (pip install numpy)")
+
+
+# ======================================================
+# 1️⃣ MÔ HÌNH BÀN CỜ
+# ======================================================
+class BoardModel:
+    """
+    Bảng tra dùng chung cho Monte Carlo và Markov.
+    Trạng thái vị trí 0..N-1 là các ô, N (= jail_state) là "đang ở trong tù".
+    """
+
+    def __init__(self, template: Optional[BoardTemplate] = None):
+        _require_numpy()
+        self.template = template or get_board_template()
+        self.size = len(self.template)
+        self.jail_state = self.size
+        positions = self.template.positions_by_type
+        self.jail_position = positions["jail"][0]
+        self.goto_jail = np.zeros(self.size + 1, dtype=bool)
+        self.goto_jail[positions.get("goto_jail", [])] = True
+
+        # deck_at[pos] = chỉ số bộ bài (-1: không phải ô rút thẻ); card_dest[deck][card, pos] = ô đích
+        definitions = load_card_definitions()
+        self.deck_names: List[str] = [name for name in ("chance", "community") if definitions.get(name)]
+        self.deck_at = np.full(self.size + 1, -1, dtype=np.int8)
+        self.card_dest: List[Any] = []
+        for deck_index, name in enumerate(self.deck_names):
+            self.deck_at[positions.get(name, [])] = deck_index
+            cards = definitions[name]
+            table = np.tile(np.arange(self.size + 1, dtype=np.int16), (len(cards), 1))
+            for card_index, card in enumerate(cards):
+                for pos in positions.get(name, []):
+                    table[card_index, pos] = self.card_destination(card, pos)
+            self.card_dest.append(table)
+
+    def nearest(self, position: int, tile_type: str) -> int:
+        ahead = [p for p in self.template.positions_by_type.get(tile_type, []) if p > position]
+        return ahead[0] if ahead else self.template.positions_by_type[tile_type][0]
+
+    def card_destination(self, card: Dict[str, Any], position: int) -> int:
+        """Ô đích sau khi áp dụng thẻ tại position (jail_state nếu vào tù, position nếu không di chuyển)."""
+        action = card.get("action")
+        if action == "move_to":
+            return card["target"] % self.size
+        if action == "move_back":
+            return (position - card.get("steps", 3)) % self.size
+        if action == "nearest_utility":
+            return self.nearest(position, "utility")
+        if action == "nearest_railroad":
+            return self.nearest(position, "railroad")
+        if action == "go_to_jail":
+            return self.jail_state
+        return position
+
+    def resolve(self, position: int, depth: int = 0) -> Dict[int, float]:
+        """Phân phối ô cuối cùng sau khi xử lý GoToJail / thẻ (thẻ có thể đưa tới ô rút thẻ khác)."""
+        if position == self.jail_state or self.goto_jail[position]:
+            return {self.jail_state: 1.0}
+        deck_index = int(self.deck_at[position])
+        if deck_index < 0 or depth >= MAX_CARD_CHAIN:
+            return {position: 1.0}
+        table = self.card_dest[deck_index]
+        outcome: Dict[int, float] = {}
+        for card_index in range(table.shape[0]):
+            dest = int(table[card_index, position])
+            sub = {dest: 1.0} if dest == position else self.resolve(dest, depth + 1)
+            for final, prob in sub.items():
+                outcome[final] = outcome.get(final, 0.0) + prob / table.shape[0]
+        return outcome
+
+
+# ======================================================
+# 2️⃣ MONTE CARLO VECTOR HÓA
+# ======================================================
+def simulate(games: int = 100_000, throws: int = 100, burn_in: int = 20, seed: Optional[int] = None,
+             jail_strategy: str = "long", model: Optional[BoardModel] = None) -> Dict[str, Any]:
+    """
+    Chạy `games` quân cờ song song, mỗi quân `throws` lần đổ xúc xắc.
+    Trả về số lần dừng mỗi trạng thái (sau burn_in), số lượt và số lần đổ đã tính.
+    """
+    _require_numpy()
+    if jail_strategy not in JAIL_STRATEGIES:
+        raise ValueError(f"jail_strategy must be one of {JAIL_STRATEGIES}")
+    model = model or BoardModel()
+    rng = np.random.default_rng(seed)
+    size, jail = model.size, model.jail_state
+
+    pos = np.zeros(games, dtype=np.int16)
+    doubles = np.zeros(games, dtype=np.int8)
+    jail_turns = np.zeros(games, dtype=np.int8)
+    counts = np.zeros(size + 1, dtype=np.int64)
+    turns = 0
+
+    for throw in range(throws):
+        d1 = rng.integers(1, 7, games, dtype=np.int8)
+        d2 = rng.integers(1, 7, games, dtype=np.int8)
+        total = (d1 + d2).astype(np.int16)
+        double = d1 == d2
+
+        in_jail = pos == jail
+        if jail_strategy == "long":
+            leave = in_jail & (double | (jail_turns >= 3))
+        else:
+            leave = in_jail
+        stay = in_jail & ~leave
+        free = ~in_jail
+        speeding = free & double & (doubles == 2)
+        mover = (free & ~speeding) | leave
+
+        start = np.where(leave, model.jail_position, pos)
+        new = np.where(mover, (start + total) % size, pos).astype(np.int16)
+        new[speeding] = jail
+
+        # Ô GoToJail và thẻ — chỉ xử lý lại quân vừa bị thẻ đưa sang ô khác (vd. Chance → Community Chest)
+        pending = np.flatnonzero(mover)
+        for _ in range(MAX_CARD_CHAIN):
+            if not pending.size:
+                break
+            current = new[pending]
+            current[model.goto_jail[current]] = jail
+            deck_of = model.deck_at[current]
+            moved = np.zeros(pending.size, dtype=bool)
+            for deck_index, table in enumerate(model.card_dest):
+                drawing = np.flatnonzero(deck_of == deck_index)
+                if drawing.size:
+                    dest = table[rng.integers(0, table.shape[0], drawing.size), current[drawing]]
+                    moved[drawing] = dest != current[drawing]
+                    current[drawing] = dest
+            new[pending] = current
+            pending = pending[moved & (current != jail)]
+        if pending.size:
+            new[pending[model.goto_jail[new[pending]]]] = jail
+
+        jailed = (new == jail) & ~stay
+        extra_roll = free & double & ~speeding & (new != jail)
+        doubles = np.where(extra_roll, doubles + 1, 0).astype(np.int8)
+        jail_turns = np.where(jailed, 1, np.where(stay, jail_turns + 1, 0)).astype(np.int8)
+        pos = new
+
+        if throw >= burn_in:
+            counts += np.bincount(pos, minlength=size + 1)
+            turns += games - int(extra_roll.sum())
+
+    counted_throws = games * max(throws - burn_in, 0)
+    return {"counts": counts, "throws": counted_throws, "turns": turns, "jail_strategy": jail_strategy}
+
+
+# ======================================================
+# 3️⃣ CHUỖI MARKOV CHÍNH XÁC
+# ======================================================
+def markov_steady_state(jail_strategy: str = "long", model: Optional[BoardModel] = None) -> Dict[str, Any]:
+    """
+    Phân phối dừng chính xác theo từng lần đổ xúc xắc.
+    Trạng thái: (ô, số lần đôi liên tiếp 0..2) và J1..J3 (lượt thứ k trong tù).
+    """
+    _require_numpy()
+    if jail_strategy not in JAIL_STRATEGIES:
+        raise ValueError(f"jail_strategy must be one of {JAIL_STRATEGIES}")
+    model = model or BoardModel()
+    size, jail = model.size, model.jail_state
+    free_states = size * 3
+    n_states = free_states + 3
+    transition = np.zeros((n_states, n_states))
+    resolved = [model.resolve(p) for p in range(size)]
+
+    def jail_index(k: int) -> int:
+        return free_states + k - 1
+
+    def add_move(row: int, start: int, steps: int, next_doubles: int, prob: float):
+        for final, p in resolved[(start + steps) % size].items():
+            col = jail_index(1) if final == jail else final * 3 + next_doubles
+            transition[row, col] += prob * p
+
+    for position in range(size):
+        for streak in range(3):
+            row = position * 3 + streak
+            for a, b in DICE_OUTCOMES:
+                if a == b and streak == 2:
+                    transition[row, jail_index(1)] += 1 / 36
+                else:
+                    add_move(row, position, a + b, streak + 1 if a == b else 0, 1 / 36)
+
+    for k in (1, 2, 3):
+        row = jail_index(k)
+        for a, b in DICE_OUTCOMES:
+            if jail_strategy == "short" or a == b or k == 3:
+                add_move(row, model.jail_position, a + b, 0, 1 / 36)
+            else:
+                transition[row, jail_index(k + 1)] += 1 / 36
+
+    # π (T - I) = 0, Σπ = 1
+    system = transition.T - np.eye(n_states)
+    system[-1, :] = 1.0
+    rhs = np.zeros(n_states)
+    rhs[-1] = 1.0
+    stationary = np.linalg.solve(system, rhs)
+
+    by_state = np.zeros(size + 1)
+    by_state[:size] = stationary[:free_states].reshape(size, 3).sum(axis=1)
+    by_state[jail] = stationary[free_states:].sum()
+    # Số lần đổ mỗi lượt = 1 / P(lượt kết thúc sau lần đổ này)
+    extra = sum(stationary[p * 3 + s] * _extra_roll_prob(model, resolved, p, s)
+                for p in range(size) for s in range(3))
+    return {"distribution": by_state, "throws_per_turn": 1.0 / (1.0 - extra), "jail_strategy": jail_strategy}
+
+
+def _extra_roll_prob(model: BoardModel, resolved, position: int, streak: int) -> float:
+    """Xác suất lần đổ từ (ô, streak) được đổ tiếp (đôi, chưa đủ 3, không bị vào tù)."""
+    if streak == 2:
+        return 0.0
+    prob = 0.0
+    for face in range(1, 7):
+        not_jailed = 1.0 - resolved[(position + 2 * face) % model.size].get(model.jail_state, 0.0)
+        prob += not_jailed / 36
+    return prob
+
+
+# ======================================================
+# 4️⃣ TIỀN THUÊ KỲ VỌNG & ROI
+# ======================================================
+def _rent_at_level(spec, tile_type: str, level: str) -> float:
+    if tile_type == "railroad":
+        tiers = spec["rent_tiers"]
+        return tiers.get("1_owned" if level == "base" else f"{len(tiers)}_owned", 0)
+    if tile_type == "utility":
+        multipliers = spec["rent_multipliers"]
+        key = "1_owned" if level == "base" else f"{len(multipliers)}_owned"
+        return multipliers.get(key, 0) * EXPECTED_DICE
+    if level == "base":
+        return spec["base_rent"]
+    if level == "monopoly":
+        return spec["base_rent"] * 2
+    return spec["rents"][level]
+
+
+def _build_cost(spec, tile_type: str, level: str) -> int:
+    cost = spec["purchase_price"]
+    if tile_type == "property" and level not in ("base", "monopoly"):
+        houses = 4 if level == "hotel" else int(level.split("_")[0])
+        cost += houses * spec["house_cost"] + (spec["hotel_cost"] if level == "hotel" else 0)
+    return cost
+
+
+def rent_report(landings_per_turn, level: str = "base", opponents: int = 3,
+                model: Optional[BoardModel] = None) -> Dict[str, Any]:
+    """
+    Tiền thuê kỳ vọng mỗi lượt đối thủ cho từng ô và ROI theo nhóm màu.
+    landings_per_turn: số lần dừng kỳ vọng mỗi lượt (mảng size + 1, phần tử cuối là "trong tù").
+    """
+    if level not in RENT_LEVELS:
+        raise ValueError(f"level must be one of {RENT_LEVELS}")
+    model = model or BoardModel()
+    tiles, groups = [], {}
+    for spec in model.template.specs:
+        key = spec.ownership_key
+        if key is None:
+            continue
+        tile_type, colour = key
+        rent = _rent_at_level(spec.property_spec, tile_type, level)
+        expected = float(landings_per_turn[spec.position]) * rent
+        tiles.append({"id": spec.tile_id, "name": spec.name, "group": colour or tile_type,
+                      "landing": float(landings_per_turn[spec.position]), "rent": rent, "expected_rent": expected})
+        group = groups.setdefault(colour or tile_type, {"group": colour or tile_type, "cost": 0, "expected_rent": 0.0})
+        group["cost"] += _build_cost(spec.property_spec, tile_type, level)
+        group["expected_rent"] += expected
+
+    for group in groups.values():
+        income = group["expected_rent"] * opponents   # mỗi vòng: mọi đối thủ đi một lượt
+        group["roi_per_round"] = income / group["cost"] if group["cost"] else 0.0
+        group["breakeven_rounds"] = group["cost"] / income if income else float("inf")
+    return {"level": level, "opponents": opponents, "tiles": tiles,
+            "groups": sorted(groups.values(), key=lambda g: -g["roi_per_round"])}
+
+
+# ======================================================
+# 5️⃣ CLI
+# ======================================================
+def _format_report(model: BoardModel, mc: Dict[str, Any], report: Dict[str, Any],
+                   markov: Optional[Dict[str, Any]], elapsed: float) -> str:
+    distribution = mc["counts"] / max(mc["throws"], 1)
+    lines = [f"Monte Carlo: {mc['throws']:,} throws / {mc['turns']:,} turns in {elapsed:.2f}s "
+             f"({mc['turns'] / elapsed:,.0f} turns/s), jail strategy '{mc['jail_strategy']}'",
+             "", f"{'pos':>3}  {'tile':<24} {'landing %':>9} {'markov %':>9}"]
+    for spec in model.template.specs:
+        exact = f"{markov['distribution'][spec.position] * 100:>9.3f}" if markov else f"{'':>9}"
+        lines.append(f"{spec.position:>3}  {spec.name[:24]:<24} {distribution[spec.position] * 100:>9.3f} {exact}")
+    exact = f"{markov['distribution'][model.jail_state] * 100:>9.3f}" if markov else ""
+    lines.append(f"{'':>3}  {'(in jail)':<24} {distribution[model.jail_state] * 100:>9.3f} {exact}")
+    if markov:
+        error = abs(distribution - markov["distribution"]).max() * 100
+        lines.append(f"max |MC - Markov| = {error:.4f} percentage points")
+
+    lines += ["", f"Colour groups at level '{report['level']}', {report['opponents']} opponents:",
+              f"{'group':<12} {'cost':>6} {'E[rent]/turn':>12} {'ROI/round':>10} {'breakeven':>10}"]
+    for group in report["groups"]:
+        lines.append(f"{group['group']:<12} {group['cost']:>6} {group['expected_rent']:>12.2f} "
+                     f"{group['roi_per_round'] * 100:>9.2f}% {group['breakeven_rounds']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Landing probabilities, expected rent and ROI for the server board.")
+    parser.add_argument("--games", type=int, default=100_000, help="parallel tokens simulated")
+    parser.add_argument("--throws", type=int, default=100, help="dice throws per token")
+    parser.add_argument("--burn-in", type=int, default=20, help="throws discarded before counting")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--jail", choices=JAIL_STRATEGIES, default="long", help="jail exit strategy")
+    parser.add_argument("--level", choices=RENT_LEVELS, default="base", help="development level for rent/ROI")
+    parser.add_argument("--opponents", type=int, default=3)
+    parser.add_argument("--markov", action="store_true", help="also solve the exact Markov chain")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    model = BoardModel()
+    started = time.perf_counter()
+    mc = simulate(args.games, args.throws, args.burn_in, args.seed, args.jail, model)
+    elapsed = time.perf_counter() - started
+    markov = markov_steady_state(args.jail, model) if args.markov else None
+    landings_per_turn = mc["counts"] / max(mc["turns"], 1)
+    report = rent_report(landings_per_turn, args.level, args.opponents, model)
+
+    if args.json:
+        print(json.dumps({
+            "throws": mc["throws"], "turns": mc["turns"], "seconds": elapsed,
+            "landing": (mc["counts"] / max(mc["throws"], 1)).tolist(),
+            "markov": markov["distribution"].tolist() if markov else None,
+            **report,
+        }, indent=2))
+    else:
+        print(_format_report(model, mc, report, markov, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from typing import Dict, TYPE_CHECKING, List, Optional
+from typing import Dict, TYPE_CHECKING, List, Mapping, Optional
+
+from .room_store import PlayerBalances, RoomStore
 
 if TYPE_CHECKING:
     from .player import Player
@@ -15,24 +17,38 @@ class Bank:
     - Quản lý sở hữu Property, nhà, khách sạn
     """
 
-    def __init__(self):
+    __slots__ = ("store", "cash_pool", "free_parking_pool", "player_balances", "properties_owned",
+                 "_tiles_by_owner", "_type_counts", "_group_counts", "_tile_catalog", "_group_sizes",
+                 "available_houses", "available_hotels")
+
+    def __init__(self, store: Optional[RoomStore] = None):
+        # Mảng trạng thái của phòng (Board truyền vào); số dư & chủ sở hữu được ghi vào đây
+        self.store = store if store is not None else RoomStore({}, 0)
+
         # 💰 Quỹ của Bank và người chơi
         self.cash_pool: int = 100_000
         self.free_parking_pool: int = 0
-        self.player_balances: Dict[str, int] = {}
+        self.player_balances: PlayerBalances = PlayerBalances(self.store)  # player_id -> số dư (mảng balances)
 
         # 🏠 Sở hữu tài sản
         self.properties_owned: Dict[int, str] = {}  # property_id -> player_id
+        # Chỉ mục ngược: player_id -> {tile_id: None} (dict giữ thứ tự mua), luôn khớp properties_owned
+        self._tiles_by_owner: Dict[str, Dict[int, None]] = {}
+        # Số ô mỗi người sở hữu theo loại ô ("railroad", "utility", ...) và theo nhóm màu
+        self._type_counts: Dict[str, Dict[str, int]] = {}
+        self._group_counts: Dict[str, Dict[str, int]] = {}
+        # Danh mục tĩnh của bàn cờ (dùng chung từ BoardTemplate): tile_id -> (tile_type, nhóm màu), nhóm màu -> số ô
+        self._tile_catalog: Mapping[int, tuple] = {}
+        self._group_sizes: Mapping[str, int] = {}
         self.available_houses: int = 32
         self.available_hotels: int = 12
 
     # ======================================================
     # 🧾 QUẢN LÝ NGƯỜI CHƠI
     # ======================================================
-    def register_player(self, player: 'Player', initial_balance: int = 1500):
-        """Thêm người chơi mới vào hệ thống Bank."""
-        if player.id not in self.player_balances:
-            self.player_balances[player.id] = initial_balance
+    def register_player(self, player: 'Player', initial_balance: int = 1500) -> int:
+        """Thêm người chơi mới vào hệ thống Bank; trả về slot của người chơi trong RoomStore."""
+        return self.store.add_player(player.id, initial_balance)
 
     def get_balance(self, player: 'Player') -> int:
         """Lấy số dư của người chơi."""
@@ -108,23 +124,93 @@ class Bank:
         price = tile.price
         if self.get_balance(player) >= price:
             self.player_balances[player.id] -= price
-            self.properties_owned[tile.tile_id] = str(player.id)
-            tile.owner = player.id
+            self.cash_pool += price
+            self._assign_owner(tile.tile_id, player.id)
             return True
         return False
 
     def set_property_owner(self, property_id: int, player_id: int):
         """Gán property cho người chơi."""
-        self.properties_owned[property_id] = str(player_id)
+        self._assign_owner(property_id, player_id)
 
     def reset_property_owner(self, player_id: int):
         """Xóa toàn bộ property của người chơi (phá sản)."""
-        self.properties_owned = {pid: owner for pid, owner in self.properties_owned.items() if owner != str(player_id)}
+        owner = str(player_id)
+        for tile_id in self._tiles_by_owner.pop(owner, {}):
+            self.properties_owned.pop(tile_id, None)
+            self._set_store_owner(tile_id, None)
+        self._type_counts.pop(owner, None)
+        self._group_counts.pop(owner, None)
+
+    def _assign_owner(self, tile_id: int, player_id):
+        """Đổi chủ một ô, cập nhật mọi chiều của chỉ mục sở hữu."""
+        self._release_owner(tile_id)
+        owner = str(player_id)
+        self.properties_owned[tile_id] = owner
+        self._tiles_by_owner.setdefault(owner, {})[tile_id] = None
+        self._update_counts(owner, tile_id, +1)
+        self._set_store_owner(tile_id, owner)
+
+    def _release_owner(self, tile_id: int):
+        """Bỏ chủ hiện tại của một ô (nếu có) khỏi mọi chiều của chỉ mục."""
+        owner = self.properties_owned.pop(tile_id, None)
+        if owner is not None:
+            owned = self._tiles_by_owner.get(owner)
+            if owned is not None:
+                owned.pop(tile_id, None)
+                if not owned:
+                    del self._tiles_by_owner[owner]
+            self._update_counts(owner, tile_id, -1)
+            self._set_store_owner(tile_id, None)
+
+    def _set_store_owner(self, tile_id: int, owner: Optional[str]):
+        """Ghi chủ sở hữu vào mảng owners của phòng (tile.properties.owner đọc từ đây)."""
+        index = self.store.tile_index(tile_id)
+        if index is not None:
+            self.store.set_owner(index, owner)
+
+    def _update_counts(self, owner: str, tile_id: int, delta: int):
+        tile_type, group = self._tile_catalog.get(tile_id, (None, None))
+        for counts, key in ((self._type_counts, tile_type), (self._group_counts, group)):
+            if key is None:
+                continue
+            owner_counts = counts.setdefault(owner, {})
+            owner_counts[key] = owner_counts.get(key, 0) + delta
+            if owner_counts[key] <= 0:
+                del owner_counts[key]
+
+    # ======================================================
+    # 📊 CHỈ MỤC SỞ HỮU (O(1) cho tính tiền thuê)
+    # ======================================================
+    def register_catalog(self, catalog: Mapping[int, tuple], group_sizes: Mapping[str, int]):
+        """
+        Gắn danh mục tĩnh của bàn cờ (tile_id -> (loại ô, nhóm màu), nhóm màu -> số ô)
+        để đếm tài sản theo loại / nhóm. Danh mục thuộc BoardTemplate, dùng chung, chỉ đọc.
+        Gọi một lần khi tạo Board, trước khi có giao dịch sở hữu.
+        """
+        self._tile_catalog = catalog
+        self._group_sizes = group_sizes
+
+    def count_owned(self, player_id, tile_type: str) -> int:
+        """Số ô loại tile_type ("railroad", "utility", "property") mà player sở hữu."""
+        return self._type_counts.get(str(player_id), {}).get(tile_type, 0)
+
+    def count_owned_in_group(self, player_id, colour: str) -> int:
+        """Số ô thuộc nhóm màu colour mà player sở hữu."""
+        return self._group_counts.get(str(player_id), {}).get(colour, 0)
+
+    def owns_color_group(self, player_id, colour: str) -> bool:
+        """Player sở hữu trọn nhóm màu (monopoly → tiền thuê đất trống nhân đôi)."""
+        size = self._group_sizes.get(colour)
+        return bool(size) and self.count_owned_in_group(player_id, colour) == size
+
+    def get_tile_ids_by_owner(self, player_id) -> List[int]:
+        """Trả danh sách ID các ô mà player sở hữu (theo thứ tự mua)."""
+        return list(self._tiles_by_owner.get(str(player_id), ()))
 
     def get_properties_by_owner(self, player_id: int, board: 'Board') -> List['BaseTile']:
         """Trả danh sách Tile mà player sở hữu."""
-        owned_tile_ids = [pid for pid, owner in self.properties_owned.items() if owner == str(player_id)]
-        return [tile for tile in board.tiles if tile.tile_id in owned_tile_ids]
+        return [board.get_tile(tile_id) for tile_id in self._tiles_by_owner.get(str(player_id), ())]
 
     def get_owner_id(self, tile_id: int) -> Optional[int]:
         """Truy vấn người sở hữu của một tile."""
@@ -156,14 +242,10 @@ class Bank:
             print(f"Error: Player {player_id} does not own tile {tile_id}. Current owner: {current_owner_id}")
             return False
 
-        # 3. Xóa quyền sở hữu
-        try:
-            del self.properties_owned[tile_id]
-            print(f"Success: Tile {tile_id} ownership removed.")
-            return True
-        except KeyError:
-            # Nên được bắt bởi kiểm tra ban đầu, nhưng thêm vào để đảm bảo an toàn
-            return False
+        # 3. Xóa quyền sở hữu (cả chỉ mục ngược theo người chơi)
+        self._release_owner(tile_id)
+        print(f"Success: Tile {tile_id} ownership removed.")
+        return True
 
     # ======================================================
     # 🏗️ NHÀ & KHÁCH SẠN
@@ -193,3 +275,17 @@ class Bank:
             tile.properties.has_hotel = True
             return True
         return False
+
+    # ======================================================
+    # 🧾 SERIALIZATION
+    # ======================================================
+    def serialize_dict(self) -> Dict:
+        """Trạng thái Bank gửi cho client (key dạng chuỗi để khớp với JSON)."""
+        return {
+            "cash_pool": self.cash_pool,
+            "free_parking_pool": self.free_parking_pool,
+            "player_balances": {str(pid): balance for pid, balance in self.player_balances.items()},
+            "properties_owned": {str(tid): owner for tid, owner in self.properties_owned.items()},
+            "available_houses": self.available_houses,
+            "available_hotels": self.available_hotels,
+        }
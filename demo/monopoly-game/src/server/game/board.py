@@ -267,114 +267,155 @@ Nhiệm vụ:
 """
 
 from typing import List, Dict, Optional, Any
+from bisect import bisect_right
 import random, json
-from pathlib import Path
 
 from .player import Player
 from .Bank import Bank
 from .tiles.base_tile import BaseTile
-from .tiles.chance_tile import ChanceTile
-from .tiles.communityChestTile import CommunityTile
-from .tiles.property_tile import PropertyTile
-from .tiles.railroad_tile import RailroadTile
-from .tiles.utility_tile import UtilityTile
-from .tiles.tax_tile import TaxTile
-from .tiles.jail_tile import JailTile
-from .tiles.free_parking_title import FreeParkingTile
-from .tiles.goto_jail_tile import GoToJailTile
-from ..utils.load_data import load_property_data_from_file
+from .board_template import BOARD_JSON_PATH, BoardTemplate, get_board_template
+from .cardDeck import CardDeck, create_room_decks
 
-BOARD_JSON_PATH = r"demo/monopoly-game/src/server/game/board_config.json"
+GO_SALARY = 200
 
 
 class Board:
-    def __init__(self):
+    __slots__ = ("template", "store", "tiles", "decks", "bank", "_players", "_players_by_id", "board_path",
+                 "room_id", "_tiles_by_position", "_index_by_id", "_positions_by_type", "_jail_tile",
+                 "_card_handlers")
+
+    def __init__(self, template: Optional[BoardTemplate] = None, seed: Optional[int] = None,
+                 room_id: Optional[str] = None):
+        self.room_id = room_id  # tile rút bài dùng khi tạo packet draw_card
+        # Phần tĩnh (tên, giá, bảng tiền thuê, chỉ mục) dùng chung cho mọi phòng — không đọc file ở đây
+        self.template = template or get_board_template()
+        # Trạng thái nóng của phòng (chủ, nhà, cờ, vị trí, số dư) dạng struct-of-arrays
+        self.store = self.template.new_store()
         self.tiles: List[BaseTile] = self._create_board()
-        self.bank = Bank()
-        self.players: List[Player] = []
-        self.board_path = BOARD_JSON_PATH
+        # Bộ bài Chance / Community Chest của phòng (xáo theo seed, định nghĩa thẻ dùng chung)
+        self.decks: Dict[str, CardDeck] = create_room_decks(seed)
+        self.bank = Bank(self.store)
+        self.bank.register_catalog(self.template.ownership_catalog, self.template.group_sizes)
+        self._players: List[Player] = []
+        self._players_by_id: Dict[str, Player] = {}
+        self.board_path = self.template.path
+        self._build_tile_indexes()
+        self._card_handlers = self._build_card_handlers()
+
+    def _build_tile_indexes(self):
+        """Chỉ mục cố định của bàn cờ lấy từ template (tiles đã sắp theo vị trí)."""
+        self._tiles_by_position: List[BaseTile] = self.tiles
+        self._index_by_id = self.template.index_by_id
+        self._positions_by_type = self.template.positions_by_type
+        jail_positions = self._positions_by_type.get("jail")
+        self._jail_tile = self.tiles[jail_positions[0]] if jail_positions else None
 
     # ======================================================
     # 1️⃣ KHỞI TẠO BOARD
     # ======================================================
     def _create_board(self) -> List[BaseTile]:
-        config = load_property_data_from_file(BOARD_JSON_PATH)
-        tiles: List[BaseTile] = []
-
-        for tile_data in config.get("tiles", []):
-            tile_type = tile_data["type"]
-            tile_id = tile_data["id"]
-            name = tile_data["name"]
-            color = tile_data.get("color", None)
-            position = tile_id
-
-            if tile_type == "property":
-                if color == "utility":
-                    tile = UtilityTile(tile_id, name, position, tile_data["property_info"])
-                elif color == "railroad":
-                    tile = RailroadTile(tile_id, name, position, tile_data["property_info"])
-                else:
-                    tile = PropertyTile(tile_id, name, position, tile_data["property_info"], color)
-
-            elif tile_type == "chance":
-                tile = ChanceTile(tile_id, name, position, deck="chance")
-
-            elif tile_type == "community":
-                tile = CommunityTile(tile_id, name, position, deck="community")
-
-            elif tile_type == "tax":
-                tile = TaxTile(tile_id, name, position, amount=tile_data["amount"])
-
-            elif tile_type == "jail":
-                tile = JailTile(tile_id, name, position)
-
-            elif tile_type == "parking":
-                tile = FreeParkingTile(tile_id, name, position)
-
-            elif tile_type == "goto_jail":
-                tile = GoToJailTile(tile_id, name, position)
-
-            else:
-                tile = BaseTile(tile_id, name, position, tile_type)
-
-            tiles.append(tile)
-        return tiles
+        """Ô tĩnh dùng chung từ template; chỉ tài sản và ô rút bài được tạo mới cho phòng."""
+        return self.template.build_tiles(self.store)
 
     # ======================================================
     # 2️⃣ DI CHUYỂN & KÍCH HOẠT TILE
     # ======================================================
-    def move_player_and_trigger(self, player: Player, steps: int) -> Dict[str, Any]:
+    def move_player_and_trigger(self, player: Player, steps: int, dice_roll: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Di chuyển player `steps` ô, trả lương khi qua GO rồi xử lý ô đích.
+        dice_roll: tổng xúc xắc dùng cho tiền thuê Utility (mặc định = steps).
+        """
         old_pos = player.position
         new_pos = (old_pos + steps) % len(self.tiles)
         passed_go = (old_pos + steps) >= len(self.tiles)
 
         player.position = new_pos
-        tile = self.get_tile(new_pos)
-
         if passed_go:
-            self.bank.pay_player(player,200)
+            self.bank.pay_player(player, GO_SALARY)
 
-        # Gọi tile.on_land
-        raw_result = tile.on_land(player, self.bank)
+        final_event = self.land_player(player, dice_roll if dice_roll is not None else steps)
+        final_event["passed_go"] = passed_go
+        return final_event
+
+    def land_player(self, player: Player, dice_roll: int = 0) -> Dict[str, Any]:
+        """Gọi tile.on_land tại vị trí hiện tại của player và áp dụng hiệu ứng (dùng cả cho thẻ di chuyển)."""
+        tile = self.get_tile_at(player.position)
+
+        # Gọi tile.on_land (Utility cần tổng xúc xắc để tính tiền thuê)
+        if tile.tile_type == "utility":
+            raw_result = tile.on_land(player, self, dice_roll)
+        else:
+            raw_result = tile.on_land(player, self)
 
         # Áp dụng hiệu ứng vào hệ thống
-        applied_result = self.apply_tile_effect(player, raw_result)
+        applied_result = self.apply_tile_effect(player, raw_result, dice_roll)
 
         # Gộp thêm thông tin cơ bản
-        final_event = {
+        return {
             **applied_result,
             "tile_id": tile.tile_id,
             "tile_name": tile.name,
             "player": player.name,
         }
 
-        return final_event
+    def handle_buy_property(self, player: Player, tile_id: int) -> Dict[str, Any]:
+        """Người chơi quyết định mua ô đang được chào bán (ô chưa có chủ)."""
+        tile = self.get_tile(tile_id)
+        result_packet = {"event": "buy_property", "message": "", "updates": {}}
+        if tile is None or not hasattr(tile, "properties") or self.bank.get_owner_id(tile_id) is not None:
+            result_packet.update(event="error", message=f"Tile {tile_id} is not for sale.")
+        elif self.bank.buy_property(player, tile):
+            result_packet["message"] = f"{player.name} bought {tile.name} for ${tile.price}."
+            result_packet["updates"]["balance"] = player.balance
+        else:
+            result_packet.update(event="insufficient_funds", message=f"{player.name} cannot afford {tile.name}.")
+        return result_packet
+
+    def bankrupt_player(self, player: Player) -> Dict[str, Any]:
+        """Phá sản: trả nhà / khách sạn và tài sản về Bank, trả thẻ ra tù về bộ bài."""
+        for tile in self.get_tiles_owned_by(player.id):
+            props = tile.properties
+            if getattr(props, "has_hotel", False):
+                props.has_hotel = False
+                self.bank.available_hotels += 1
+            if getattr(props, "houses", 0):
+                self.bank.available_houses += props.houses
+                props.houses = 0
+            props.is_mortgaged = False
+        self.bank.reset_property_owner(player.id)
+        for deck in self.decks.values():
+            deck.release_player(player.id)
+        player.is_bankrupt = True
+        player.is_in_jail = False
+        return {"event": "bankrupt", "message": f"{player.name} has gone bankrupt."}
 
     # ======================================================
     # 3️⃣ TRUY VẤN BOARD
     # ======================================================
     def get_tile(self, tile_id: int) -> Optional[BaseTile]:
-        return next((t for t in self.tiles if t.tile_id == tile_id), None)
+        index = self._index_by_id.get(tile_id)
+        return self.tiles[index] if index is not None else None
+
+    def get_tile_at(self, position: int) -> Optional[BaseTile]:
+        if 0 <= position < len(self._tiles_by_position):
+            return self._tiles_by_position[position]
+        return None
+
+    def get_positions_by_type(self, tile_type: str) -> List[int]:
+        """Các vị trí (tăng dần) của loại ô tile_type — không sửa list trả về."""
+        return self._positions_by_type.get(tile_type, [])
+
+    def find_nearest_tile(self, position: int, tile_type: str) -> Optional[int]:
+        """Vị trí ô tile_type gần nhất phía trước position (vòng qua GO nếu cần)."""
+        positions = self._positions_by_type.get(tile_type)
+        if not positions:
+            return None
+        index = bisect_right(positions, position)
+        return positions[index] if index < len(positions) else positions[0]
+
+    def get_tiles_owned_by(self, player_id) -> List[BaseTile]:
+        """Các ô người chơi sở hữu (chỉ mục sở hữu nằm trong Bank)."""
+        return self.bank.get_properties_by_owner(player_id, self)
 
     def get_board_state(self) -> Dict[str, Any]:
         return {
@@ -383,15 +424,41 @@ class Board:
         }
 
     def get_player_by_id(self, player_id: str) -> Optional[Player]:
-        return next((p for p in self.players if p.id == player_id), None)
+        return self._players_by_id.get(player_id)
 
     def get_jail_tile(self):
-        return next((t for t in self.tiles if t.tile_type == "jail"), None)
+        return self._jail_tile
+
+    # ======================================================
+    # 👥 NGƯỜI CHƠI TRÊN BÀN CỜ
+    # ======================================================
+    @property
+    def players(self) -> List[Player]:
+        return self._players
+
+    @players.setter
+    def players(self, players: List[Player]):
+        self._players = list(players)
+        self._players_by_id = {p.id: p for p in self._players}
+
+    def add_player(self, player: Player):
+        if player.id in self._players_by_id:
+            return
+        self._players.append(player)
+        self._players_by_id[player.id] = player
+
+    def remove_player(self, player_id: str) -> Optional[Player]:
+        player = self._players_by_id.pop(player_id, None)
+        if player is not None:
+            self._players.remove(player)
+            for deck in self.decks.values():
+                deck.release_player(player_id)
+        return player
 
     def send_player_to_jail(self, player: Player) -> Dict[str, Any]:
         jail_tile = self.get_jail_tile()
         if jail_tile:
-            player.position = jail_tile.tile_id
+            player.position = jail_tile.position
             player.is_in_jail = True
             return {"event": "goto_jail", "message": f"{player.name} was sent to jail!"}
         return {"event": "error", "message": "Jail not found on board!"}
@@ -404,80 +471,145 @@ class Board:
 
     def serialize_json(self):
         return json.dumps(self.get_board_state(), indent=4)
-    def apply_tile_effect(self, player: Player, effect_data: Dict[str, Any]) -> Dict[str, Any]:
+    def apply_tile_effect(self, player: Player, effect_data: Dict[str, Any], dice_roll: int = 0) -> Dict[str, Any]:
         """
         Thực hiện hiệu ứng được trả về từ tile.on_land().
         - Không thay đổi logic của tile.
         - Cập nhật lại trạng thái Bank/Player/Board nếu có.
+        - Ô tài sản chưa có chủ: KHÔNG tự mua — trả về "offer" để người chơi quyết định (handle_buy_property).
         - Trả về event JSON chuẩn cho GameManager/Client.
         """
         event = effect_data.get("event")
-        result_packet = {"event": event, "message": "", "updates": {}}
+        effect = effect_data.get("effect") or {}
+        result_packet = {"event": event, "message": effect_data.get("message", ""), "updates": {}}
 
         # 1️⃣ Trường hợp: rút bài Chance / Community Chest
         if event == "DRAW_CARD":
-            # Hiệu ứng cụ thể nằm trong effect["effect"]
-            card_effect = effect_data.get("effect", {})
-            # Gửi packet rút bài (nếu có)
+            # Gửi packet rút bài (nếu có); effect là instruction do CardManager tạo
             result_packet["packets"] = effect_data.get("packets", [])
-            result_packet["message"] = effect_data.get("message", "")
-
-            # Xử lý hiệu ứng của thẻ (nếu có move_to, add_money, v.v.)
-            if "move_to" in card_effect:
-                new_pos = card_effect["move_to"]
-                player.position = new_pos
-                result_packet["updates"]["position"] = new_pos
-
-            if "amount" in card_effect:
-                amount = card_effect["amount"]
-                if amount < 0:
-                    self.bank.pay_bank(player, amount)
-                else:
-                    self.bank.pay_player(player, amount)
-                result_packet["updates"]["balance"] = player.balance
-
-        # 2️⃣ Ô nộp thuế
-        elif event == "pay_tax":
-            amount = effect_data.get("amount", 0)
-            self.bank.collect_tax_or_fee(player, amount)
+            action = effect.get("action", "none")
+            result_packet["action"] = action
+            handler = self._card_handlers.get(action)
+            if handler is not None:
+                handler(player, effect, result_packet, dice_roll)
+
+        # 2️⃣ Ô nộp thuế (tiền thuế vào quỹ Free Parking)
+        elif event == "TAX_PAYMENT":
+            amount = -effect.get("amount", 0)
+            if player.balance >= amount:
+                self.bank.collect_tax_or_fee(player, amount)
+            else:
+                self.bank.pay_bank(player, amount)   # không đủ tiền → phá sản
             result_packet["message"] = f"{player.name} paid ${amount} in tax."
             result_packet["updates"]["balance"] = player.balance
 
-        # 3️⃣ Ô nhận tiền Free Parking
-        elif event == "collect_free_parking_money":
-            amount = effect_data.get("amount", 0)
-            self.bank.pay_free_parking(player)
-            result_packet["message"] = f"{player.name} collected ${amount} from Free Parking."
+        # 3️⃣ Ô Free Parking (tile đã nhận tiền từ quỹ)
+        elif event in ("FREE_PARKING_COLLECT", "FREE_PARKING_EMPTY"):
             result_packet["updates"]["balance"] = player.balance
 
         # 4️⃣ Ô tài sản (Property / Utility / Railroad)
         elif event in ("land_on_property", "land_on_utility", "land_on_railroad"):
-            action = effect_data.get("action")
-            property_id = effect_data["data"]["property_id"]
-            tile = self.get_tile(property_id)
+            action = effect.get("action")
+            data = effect.get("data", {})
+            result_packet["action"] = action
 
             if action == "buy":
-                price = effect_data["data"]["price"]
-                self.bank.buy_property(player,tile)
-                result_packet["message"] = f"{player.name} bought {tile.name} for ${price}."
-                result_packet["updates"]["balance"] = player.balance
+                result_packet["offer"] = {"property_id": data["property_id"], "price": data["price"]}
 
             elif action == "pay_rent":
-                owner = effect_data["data"]["owner"]
-                rent = effect_data["data"]["rent"]
-                self.bank.transfer_between_players(player, owner, rent)
-                result_packet["message"] = f"{player.name} paid ${rent} rent to {owner.name}."
+                owner = data["owner"]
+                rent = data["rent"]
+                transfer = self.bank.transfer_between_players(player, owner, rent)
+                result_packet["message"] = transfer["message"]
                 result_packet["updates"]["balance"] = player.balance
 
         # 5️⃣ Ô "Go to Jail"
-        elif event == "goto_jail":
+        elif event == "GOTO_JAIL":
             jail_info = self.send_player_to_jail(player)
             result_packet.update(jail_info)
             result_packet["updates"]["position"] = player.position
 
-        # 6️⃣ Trường hợp mặc định
+        # 6️⃣ Trường hợp mặc định (Jail / GO / ô không có hiệu ứng)
         else:
             result_packet["message"] = effect_data.get("message", "No special effect.")
             result_packet["updates"]["none"] = True
 
         return result_packet
+
+    # ======================================================
+    # 🃏 HIỆU ỨNG THẺ (instruction từ CardManager → thay đổi trạng thái)
+    # ======================================================
+    def _build_card_handlers(self) -> Dict[str, Any]:
+        return {
+            "move_to": self._card_move_to,
+            "move_to_and_pay_special_rent": self._card_move_to,
+            "move_back": self._card_move_back,
+            "go_to_jail": self._card_go_to_jail,
+            "earn": self._card_earn,
+            "pay_bank": self._card_pay_bank,
+            "transfer_to_all": self._card_transfer_to_all,
+            "collect_from_all": self._card_collect_from_all,
+            "property_repair": self._card_property_repair,
+        }
+
+    def _land_after_card(self, player: Player, result_packet: Dict[str, Any], dice_roll: int):
+        """Thẻ đưa player tới ô mới: xử lý ô đó và gộp kết quả (kể cả lời chào mua)."""
+        landed = self.land_player(player, dice_roll)
+        result_packet["landed"] = landed
+        result_packet["updates"]["position"] = player.position
+        if "offer" in landed:
+            result_packet["offer"] = landed["offer"]
+
+    def _card_move_to(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any], dice_roll: int):
+        # Hệ số tiền thuê đặc biệt của thẻ nearest_* chưa được áp dụng — tính tiền thuê thường
+        target = effect["target_position"]
+        if target <= player.position:
+            self.bank.pay_player(player, GO_SALARY)
+            result_packet["passed_go"] = True
+        player.position = target
+        self._land_after_card(player, result_packet, dice_roll)
+
+    def _card_move_back(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any], dice_roll: int):
+        player.position = (player.position - effect.get("steps", 3)) % len(self.tiles)
+        self._land_after_card(player, result_packet, dice_roll)
+
+    def _card_go_to_jail(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any], dice_roll: int):
+        result_packet["message"] = self.send_player_to_jail(player)["message"]
+        result_packet["updates"]["position"] = player.position
+
+    def _card_earn(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any], dice_roll: int):
+        self.bank.pay_player(player, effect["amount"])
+        result_packet["updates"]["balance"] = player.balance
+
+    def _card_pay_bank(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any], dice_roll: int):
+        self.bank.pay_bank(player, effect["amount"])
+        result_packet["updates"]["balance"] = player.balance
+
+    def _card_transfer_to_all(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any],
+                              dice_roll: int):
+        for target_id in effect.get("target_ids", []):
+            target = self.get_player_by_id(target_id)
+            if target is None or target.is_bankrupt or player.is_bankrupt:
+                continue
+            self.bank.transfer_between_players(player, target, effect["amount"])
+        result_packet["updates"]["balance"] = player.balance
+
+    def _card_collect_from_all(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any],
+                               dice_roll: int):
+        for source_id in effect.get("source_ids", []):
+            source = self.get_player_by_id(source_id)
+            if source is None or source.is_bankrupt:
+                continue
+            self.bank.transfer_between_players(source, player, effect["amount"])
+        result_packet["updates"]["balance"] = player.balance
+
+    def _card_property_repair(self, player: Player, effect: Dict[str, Any], result_packet: Dict[str, Any],
+                              dice_roll: int):
+        houses = hotels = 0
+        for tile in self.get_tiles_owned_by(player.id):
+            houses += getattr(tile.properties, "houses", 0)
+            hotels += bool(getattr(tile.properties, "has_hotel", False))
+        cost = houses * effect.get("house_cost", 0) + hotels * effect.get("hotel_cost", 0)
+        if cost:
+            self.bank.pay_bank(player, cost)
+        result_packet["updates"]["balance"] = player.balance
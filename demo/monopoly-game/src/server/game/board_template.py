@@ -0,0 +1,153 @@
+"""
+board_template.py — cấu hình bàn cờ tĩnh, nạp một lần cho mỗi process
+---------------------------------------------------------------------
+- Đọc & parse board_config.json đúng một lần (get_board_template() được cache).
+- Giữ phần dữ liệu chỉ đọc: tên, giá, bảng tiền thuê, nhóm màu, chỉ mục theo loại ô.
+- Các ô không có trạng thái (GO, Jail, Free Parking, Go To Jail, Tax, Chance, Community Chest)
+  được tạo một lần và dùng chung cho mọi Board (bộ bài của phòng nằm ở Board.decks).
+- Mỗi phòng chỉ tạo phần overlay có thể thay đổi: tài sản (chủ, nhà, khách sạn, cầm cố),
+  lưu trong RoomStore (struct-of-arrays) của phòng.
+"""
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .tiles.base_tile import BaseTile
+from .tiles.chance_tile import ChanceTile
+from .tiles.communityChestTile import CommunityTile
+from .tiles.property_tile import PropertyTile
+from .tiles.railroad_tile import RailroadTile
+from .tiles.utility_tile import UtilityTile
+from .tiles.tax_tile import TaxTile
+from .tiles.jail_tile import JailTile
+from .tiles.free_parking_title import FreeParkingTile
+from .tiles.goto_jail_tile import GoToJailTile
+from .properties import ColorGroupProperty, RailroadProperty, UtilityProperty
+from .room_store import RoomStore
+from ..utils.load_data import load_property_data_from_file
+
+BOARD_JSON_PATH = Path(__file__).with_name("board_config.json")
+
+
+class TileSpec:
+    """Dữ liệu tĩnh của một ô; tạo tile cho từng phòng mà không parse lại cấu hình."""
+
+    def __init__(self, tile_data: Dict[str, Any]):
+        self.tile_id: int = tile_data["id"]
+        self.name: str = tile_data["name"]
+        self.position: int = tile_data["id"]  # Vị trí bằng ID trong Monopoly
+        self.tile_type: str = tile_data["type"]
+        self.colour: Optional[str] = tile_data.get("color")
+        self.deck: Optional[str] = tile_data.get("deck")
+        self.amount: Optional[int] = tile_data.get("amount")
+        self.property_cls = None
+        self.property_spec: Optional[Mapping[str, Any]] = None
+        self.shared_tile: Optional[BaseTile] = None
+
+        if self.tile_type == "property":
+            if self.colour == "utility":
+                self.property_cls, spec_data = UtilityProperty, tile_data
+            elif self.colour == "railroad":
+                self.property_cls, spec_data = RailroadProperty, tile_data
+            else:
+                self.property_cls, spec_data = ColorGroupProperty, tile_data["property_info"]
+            self.property_spec = self.property_cls.parse_spec(spec_data)
+        else:
+            # Ô không có trạng thái: một instance cho cả process
+            self.shared_tile = self._build_stateless_tile()
+
+    @property
+    def ownership_key(self) -> Optional[Tuple[str, Optional[str]]]:
+        """(loại ô, nhóm màu) dùng cho bộ đếm sở hữu của Bank; None nếu ô không mua được."""
+        if self.property_cls is None:
+            return None
+        tile_type = "property" if self.property_cls is ColorGroupProperty else self.colour
+        group = self.colour if tile_type == "property" else None
+        return tile_type, group
+
+    def _build_stateless_tile(self) -> BaseTile:
+        tile_id, name, position = self.tile_id, self.name, self.position
+        if self.tile_type == "tax":
+            return TaxTile(tile_id, name, position, tax_amount=self.amount)
+        if self.tile_type == "jail":
+            return JailTile(tile_id, name, position)
+        if self.tile_type == "parking":
+            return FreeParkingTile(tile_id, name, position)
+        if self.tile_type == "goto_jail":
+            return GoToJailTile(tile_id, name, position)
+        # board_config.json dùng type "chance" cho cả hai bộ bài, phân biệt bằng "deck"
+        if self.tile_type == "community" or (self.tile_type == "chance" and self.deck == "community"):
+            return CommunityTile(tile_id, name, position, deck="community")
+        if self.tile_type == "chance":
+            return ChanceTile(tile_id, name, position, deck="chance")
+        return BaseTile(tile_id, name, position, self.tile_type)
+
+    def build_tile(self, store: RoomStore) -> BaseTile:
+        """Tile cho một phòng: ô tĩnh dùng chung, ô tài sản tạo overlay trỏ vào store của phòng."""
+        if self.shared_tile is not None:
+            return self.shared_tile
+        tile_id, name, position = self.tile_id, self.name, self.position
+
+        properties = self.property_cls.from_spec(self.property_spec, store, position)
+        if self.property_cls is UtilityProperty:
+            return UtilityTile(tile_id, name, position, properties)
+        if self.property_cls is RailroadProperty:
+            return RailroadTile(tile_id, name, position, properties)
+        return PropertyTile(tile_id, name, position, self.colour, properties)
+
+
+class BoardTemplate:
+    """Toàn bộ phần tĩnh của bàn cờ — dùng chung, không sửa sau khi tạo."""
+
+    def __init__(self, config: Dict[str, Any], path: Path = BOARD_JSON_PATH):
+        self.path = path
+        self.specs: Tuple[TileSpec, ...] = tuple(
+            sorted((TileSpec(tile_data) for tile_data in config.get("tiles", [])), key=lambda s: s.position)
+        )
+        if [spec.position for spec in self.specs] != list(range(len(self.specs))):
+            raise ValueError(f"Board config {path} must define one tile per position 0..N-1")
+
+        # --- Chỉ mục cố định, dùng chung cho mọi Board ---
+        self.index_by_id: Mapping[int, int] = MappingProxyType(
+            {spec.tile_id: spec.position for spec in self.specs})
+        # Loại ô lấy theo tile thực tế (vd. ga có type "property" trong JSON nhưng tile_type "railroad")
+        positions_by_type: Dict[str, List[int]] = {}
+        for tile in self.build_tiles(self.new_store()):
+            positions_by_type.setdefault(tile.tile_type, []).append(tile.position)
+        self.positions_by_type: Mapping[str, List[int]] = MappingProxyType(positions_by_type)
+
+        # --- Danh mục sở hữu cho Bank: tile_id -> (loại ô, nhóm màu), nhóm màu -> số ô ---
+        catalog: Dict[int, Tuple[str, Optional[str]]] = {}
+        group_sizes: Dict[str, int] = {}
+        for spec in self.specs:
+            key = spec.ownership_key
+            if key is None:
+                continue
+            catalog[spec.tile_id] = key
+            if key[1] is not None:
+                group_sizes[key[1]] = group_sizes.get(key[1], 0) + 1
+        self.ownership_catalog: Mapping[int, Tuple[str, Optional[str]]] = MappingProxyType(catalog)
+        self.group_sizes: Mapping[str, int] = MappingProxyType(group_sizes)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    @classmethod
+    def load(cls, path: Path = BOARD_JSON_PATH) -> 'BoardTemplate':
+        """Đọc và parse file cấu hình (không cache — dùng get_board_template() trong server)."""
+        return cls(load_property_data_from_file(path), Path(path))
+
+    def new_store(self) -> RoomStore:
+        """Mảng trạng thái (struct-of-arrays) rỗng cho một phòng mới."""
+        return RoomStore(self.index_by_id, len(self.specs))
+
+    def build_tiles(self, store: RoomStore) -> List[BaseTile]:
+        """Danh sách tile cho một phòng mới, sắp theo vị trí."""
+        return [spec.build_tile(store) for spec in self.specs]
+
+
+@lru_cache(maxsize=None)
+def get_board_template(path: Path = BOARD_JSON_PATH) -> BoardTemplate:
+    """Template dùng chung của process; file cấu hình chỉ được đọc ở lần gọi đầu tiên."""
+    return BoardTemplate.load(path)
@@ -0,0 +1,72 @@
+# game/cardDeck.py
+"""
+Trạng thái bộ bài của một phòng
+-------------------------------
+- Định nghĩa thẻ dùng chung (load_card_definitions); mỗi phòng chỉ giữ thứ tự rút dạng index.
+- Rút bài: đọc đầu deque rồi rotate — O(1), không pop(0) trên list.
+- Thẻ "Get out of Jail Free" bị rút ra khỏi bộ bài và ghi nhận người giữ cho tới khi được dùng / trả lại.
+- Xáo bài theo seed để ván đấu có thể tái lập.
+"""
+import random
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+
+from .card_manager2 import JAIL_CARD_ACTION, load_card_definitions
+
+
+class CardDeck:
+    """Một bộ bài (Chance hoặc Community Chest) của một phòng."""
+
+    __slots__ = ("deck_type", "cards", "_order", "held")
+
+    def __init__(self, deck_type: str, cards: Sequence[Dict[str, Any]], rng: random.Random):
+        self.deck_type = deck_type
+        self.cards = cards                  # định nghĩa dùng chung (tuple), không sửa
+        order = list(range(len(cards)))
+        rng.shuffle(order)
+        self._order: deque = deque(order)   # index thẻ theo thứ tự rút
+        self.held: Dict[int, str] = {}      # index thẻ ra tù -> player_id đang giữ
+
+    def __len__(self) -> int:
+        """Số thẻ còn trong bộ bài (không tính thẻ đang bị giữ)."""
+        return len(self._order)
+
+    def draw(self, player_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Rút thẻ trên cùng. Thẻ thường được đưa xuống đáy (rotate),
+        thẻ ra tù được giữ lại bởi player_id cho tới khi return_jail_card().
+        """
+        if not self._order:
+            return None
+        index = self._order[0]
+        card = self.cards[index]
+        if card.get("action") == JAIL_CARD_ACTION and player_id is not None:
+            self._order.popleft()
+            self.held[index] = player_id
+        else:
+            self._order.rotate(-1)
+        return card
+
+    def holds_jail_card(self, player_id: str) -> bool:
+        return player_id in self.held.values()
+
+    def return_jail_card(self, player_id: str) -> bool:
+        """Người chơi dùng (hoặc mất) thẻ ra tù: thẻ quay về đáy bộ bài."""
+        for index, holder in self.held.items():
+            if holder == player_id:
+                del self.held[index]
+                self._order.append(index)
+                return True
+        return False
+
+    def release_player(self, player_id: str):
+        """Trả lại mọi thẻ người chơi đang giữ (rời phòng / phá sản)."""
+        while self.return_jail_card(player_id):
+            pass
+
+
+def create_room_decks(seed: Optional[int] = None) -> Dict[str, CardDeck]:
+    """Bộ bài của một phòng mới — không đọc file, chỉ xáo index trên định nghĩa dùng chung."""
+    rng = random.Random(seed)
+    return {deck_type: CardDeck(deck_type, cards, rng) for deck_type, cards in load_card_definitions().items()}
+
@@ -1,8 +1,9 @@
 # game/core/card_manager.py
 import json
-import random
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .player import Player
@@ -12,48 +13,59 @@ if TYPE_CHECKING:
 # ======================================================
 # ⚙️ CẤU HÌNH ĐƯỜNG DẪN FILE
 # ======================================================
-CHANCE_CARD_PATH = Path("chance_cards.json")
-COMMUNITY_CHEST_PATH = Path("community_chest.json")
+CHANCE_CARD_PATH = Path(__file__).with_name("chance_cards.json")
+COMMUNITY_CHEST_PATH = Path(__file__).with_name("community_chest.json")
+JAIL_CARD_ACTION = "get_out_of_jail_card"
+
+
+# ======================================================
+# 1️⃣ LOAD DỮ LIỆU THẺ (MỘT LẦN CHO MỖI PROCESS)
+# ======================================================
+def _load_deck(filepath: Path) -> Tuple[Dict[str, Any], ...]:
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"[CardManager] ⚠️ File not found: {filepath}")
+        return ()
+    return tuple(data.get("cards", []))
+
+
+@lru_cache(maxsize=None)
+def load_card_definitions() -> Mapping[str, Tuple[Dict[str, Any], ...]]:
+    """
+    Định nghĩa thẻ của cả hai bộ bài, đọc từ đĩa một lần và dùng chung cho mọi phòng.
+    Các dict thẻ là dùng chung — không sửa trực tiếp.
+    """
+    return MappingProxyType({
+        "chance": _load_deck(CHANCE_CARD_PATH),
+        "community": _load_deck(COMMUNITY_CHEST_PATH),
+    })
+
+
+@lru_cache(maxsize=None)
+def get_card_manager() -> 'CardManager':
+    """CardManager dùng chung của process (không giữ trạng thái bộ bài)."""
+    return CardManager()
 
 
 class CardManager:
     """
-    Quản lý logic rút và xử lý thẻ (Chance / Community Chest).
+    Quản lý logic xử lý thẻ (Chance / Community Chest).
     - CHỈ TẠO RA DICTIONARY (instruction).
     - KHÔNG trực tiếp thay đổi Player, Bank, hay Board.
+    - Không giữ trạng thái: thứ tự rút bài của từng phòng nằm trong CardDeck (Board.decks).
     """
 
     def __init__(self):
-        self.decks = {
-            "chance": self._load_deck(CHANCE_CARD_PATH),
-            "community": self._load_deck(COMMUNITY_CHEST_PATH)
-        }
-        # Cờ quản lý việc tồn tại của thẻ "Get out of Jail Free"
-        self.jail_card_in_chance = True
-        self.jail_card_in_community = True
-
-    # ======================================================
-    # 1️⃣ LOAD DỮ LIỆU THẺ
-    # ======================================================
-    def _load_deck(self, filepath: Path) -> List[Dict[str, Any]]:
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            print(f"[CardManager] ⚠️ File not found: {filepath}")
-            return []
-
-        cards = []
-        for card in data.get("cards", []):
-            card["effect_fn"] = self._map_effect(card["action"])
-            cards.append(card)
-        return cards
+        self.definitions = load_card_definitions()
+        self._handlers = self._build_handlers()
 
     # ======================================================
     # 2️⃣ MAP ACTION → HANDLER FUNCTION
     # ======================================================
-    def _map_effect(self, action: str):
-        mapping = {
+    def _build_handlers(self) -> Dict[str, Any]:
+        return {
             "move_to": self._handle_move_to,
             "move_back": self._handle_move_back,
             "nearest_utility": self._handle_nearest_utility,
@@ -64,35 +76,22 @@ class CardManager:
             "pay_others": self._handle_pay_others,
             "collect_from_others": self._handle_collect_from_others,
             "property_repair": self._handle_property_repair,
-            "get_out_of_jail_card": self._handle_get_out_of_jail_card,
+            JAIL_CARD_ACTION: self._handle_get_out_of_jail_card,
         }
-        return mapping.get(action, self._handle_default)
-
-    # ======================================================
-    # 3️⃣ RÚT NGẪU NHIÊN 1 THẺ
-    # ======================================================
-    def draw_card(self, deck_type: str = "chance") -> Optional[Dict[str, Any]]:
-        if deck_type not in self.decks or not self.decks[deck_type]:
-            return None
-
-        card = self.decks[deck_type].pop(0)
-        # Thẻ bình thường -> đưa xuống cuối
-        if card["action"] != "get_out_of_jail_card":
-            self.decks[deck_type].append(card)
-        return card
 
     # ======================================================
-    # 4️⃣ ÁP DỤNG HIỆU ỨNG (CHỈ TẠO INSTRUCTION)
+    # 3️⃣ ÁP DỤNG HIỆU ỨNG (CHỈ TẠO INSTRUCTION)
     # ======================================================
-    def apply_effect(self, card: Dict[str, Any], player: 'Player', board: 'Board', all_players: List['Player']):
-        fn = card.get("effect_fn")
-        if not fn:
-            return {"action": "none", "message": "No effect function found."}
+    def apply_effect(self, card: Optional[Dict[str, Any]], player: 'Player', board: 'Board',
+                     all_players: List['Player']):
+        if not card:
+            return {"action": "none", "message": "No card drawn."}
 
+        fn = self._handlers.get(card.get("action"), self._handle_default)
         return fn(card, player, board, all_players)
 
     # ======================================================
-    # 5️⃣ HANDLER CÁC LOẠI THẺ — CHỈ TRẢ VỀ INSTRUCTION
+    # 4️⃣ HANDLER CÁC LOẠI THẺ — CHỈ TRẢ VỀ INSTRUCTION
     # ======================================================
 
     def _handle_move_to(self, card, player, board, all_players):
@@ -293,11 +293,11 @@ class GameManager:
     def start_game(self):
         """Khởi động game và chọn người đi đầu tiên."""
         self.active = True
-        self.turn_order = list(self.room_state.players.keys())
+        self.turn_order = [p.id for p in self.room_state.players]
         self.turn_index = 0
         first_player = self.room_state.get_player(self.turn_order[0])
 
-        packet = PacketBuilder.game_start(self.room_state.room_id, first_player.id)
+        packet = PacketBuilder.start_game(self.room_state.room_id, first_player.id)
         self.network.send_packet(self.room_state.room_id, packet)
         self.logger.info(f"[GAME] Bắt đầu game tại phòng {self.room_state.room_id}")
 
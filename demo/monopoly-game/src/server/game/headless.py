@@ -0,0 +1,407 @@
+"""
+headless.py — chạy ván Monopoly không qua mạng, không ghi log
+-------------------------------------------------------------
+- Bot chơi trọn ván trực tiếp trên mô hình game: Board.move_player_and_trigger / apply_tile_effect,
+  Bank và TurnManager — không socket, không logger, không gói tin được gửi đi.
+- Luật lượt chơi: đổ đôi được đi tiếp, 3 lần đôi liên tiếp → vào tù; trong tù: dùng thẻ ra tù,
+  nộp phạt hoặc đổ đôi (tối đa 3 lượt rồi bắt buộc nộp phạt); phá sản → tài sản về Bank.
+- Mỗi ván có seed riêng (xúc xắc, quyết định của bot, thứ tự bộ bài) → lỗi có thể tái lập từ seed.
+- Sau mỗi lượt kiểm tra bất biến (tổng tiền, chỉ mục sở hữu, nhà/khách sạn, vị trí) — dùng làm fuzzer.
+- Chạy song song nhiều ván bằng ProcessPoolExecutor, báo cáo ván/giây, lượt/ván và các nhánh luật đã đi qua.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m src.server.game.headless --games 2000 --players 4 --policies greedy,random --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from .board import Board
+from .player import Player
+from .room_store import HOTEL
+from .TurnManager import TurnManager
+
+JAIL_FINE = 50
+MAX_JAIL_TURNS = 3
+MAX_TURNS = 1000          # ván chưa ngã ngũ sau số lượt này được tính là "hết giờ"
+BUILDING_LIMIT = 4        # 4 nhà → khách sạn
+
+
+class InvariantError(AssertionError):
+    """Trạng thái game vi phạm bất biến (lỗi logic game)."""
+
+
+# ======================================================
+# 1️⃣ CHÍNH SÁCH BOT
+# ======================================================
+class BotPolicy:
+    """Quyết định của bot; mặc định: không mua, không xây, ở tù tới khi bắt buộc nộp phạt."""
+
+    name = "passive"
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def should_buy(self, player: Player, price: int) -> bool:
+        return False
+
+    def leave_jail_early(self, player: Player) -> bool:
+        """Nộp phạt / dùng thẻ ngay thay vì thử đổ đôi."""
+        return False
+
+    def build_budget(self, player: Player) -> int:
+        """Số tiền tối đa được dùng để xây nhà trong lượt này."""
+        return 0
+
+
+class RandomPolicy(BotPolicy):
+    """Quyết định ngẫu nhiên — phủ nhiều nhánh luật nhất, dùng cho fuzzing."""
+
+    name = "random"
+
+    def should_buy(self, player: Player, price: int) -> bool:
+        return self.rng.random() < 0.7
+
+    def leave_jail_early(self, player: Player) -> bool:
+        return self.rng.random() < 0.5
+
+    def build_budget(self, player: Player) -> int:
+        return self.rng.randrange(player.balance + 1) if player.balance > 0 else 0
+
+
+class GreedyPolicy(BotPolicy):
+    """Mua mọi ô khi còn giữ được tiền dự phòng, xây nhà trên nhóm màu trọn bộ."""
+
+    name = "greedy"
+    reserve = 150
+
+    def should_buy(self, player: Player, price: int) -> bool:
+        return player.balance - price >= self.reserve
+
+    def leave_jail_early(self, player: Player) -> bool:
+        return True
+
+    def build_budget(self, player: Player) -> int:
+        return max(player.balance - self.reserve, 0)
+
+
+POLICIES = {cls.name: cls for cls in (BotPolicy, RandomPolicy, GreedyPolicy)}
+
+
+# ======================================================
+# 2️⃣ MỘT VÁN
+# ======================================================
+class HeadlessGame:
+    """Một ván đấu giữa các bot trên một Board riêng."""
+
+    def __init__(self, seed: int, policies: Sequence[str] = ("greedy", "random", "greedy", "random"),
+                 max_turns: int = MAX_TURNS, check_invariants: bool = True):
+        self.seed = seed
+        self.max_turns = max_turns
+        self.check = check_invariants
+        self.rng = random.Random(seed)
+        room_id = f"SIM-{seed}"
+        self.board = Board(seed=seed, room_id=room_id)
+        self.players: List[Player] = [Player(f"p{i}", f"Bot {i}", self.board.bank, room_id)
+                                      for i in range(len(policies))]
+        self.board.players = self.players
+        self.policies = {p.id: POLICIES[name](random.Random(self.rng.random())) for p, name in
+                         zip(self.players, policies)}
+        self.turn_manager = TurnManager(self.players)
+        self.jail_position = self.board.get_jail_tile().position
+        self._tile_ids = [spec.tile_id for spec in self.board.template.specs]
+        self.paths: Counter = Counter()
+        self.eliminated: set = set()
+        self.turns = 0
+        self.total_money = self._money_in_play()
+
+    # ------------------------------------------------------------------
+    # 🎲 VÒNG LẶP VÁN ĐẤU
+    # ------------------------------------------------------------------
+    def play(self) -> Dict[str, Any]:
+        error = None
+        try:
+            while self.turns < self.max_turns:
+                player = self.turn_manager.get_current_player()
+                if player is None or len(self.players) - len(self.eliminated) <= 1:
+                    break
+                self.play_turn(player)
+                self.turns += 1
+                self._settle_bankruptcies()
+                if self.check:
+                    self.check_invariants()
+                self.turn_manager.next_turn()
+        except Exception as exc:  # fuzzer: ghi lại lỗi kèm seed thay vì làm hỏng cả lô
+            error = f"{type(exc).__name__}: {exc}"
+
+        alive = [p.id for p in self.players if p.id not in self.eliminated]
+        return {
+            "seed": self.seed,
+            "turns": self.turns,
+            "finished": len(alive) <= 1,
+            "winner": alive[0] if len(alive) == 1 else None,
+            "paths": self.paths,
+            "error": error,
+        }
+
+    def play_turn(self, player: Player):
+        player.consecutive_doubles = 0
+        player.has_rolled_and_moved = False
+        if player.is_in_jail and not self._leave_jail(player):
+            return
+
+        while True:
+            d1, d2 = self.rng.randint(1, 6), self.rng.randint(1, 6)
+            if d1 == d2:
+                player.consecutive_doubles += 1
+                self.paths["doubles"] += 1
+                if player.consecutive_doubles == 3:
+                    self.paths["speeding_to_jail"] += 1
+                    self._jail(player)
+                    break
+            self._move(player, d1 + d2)
+            if player.is_bankrupt or player.is_in_jail or d1 != d2:
+                break
+
+        if not player.is_bankrupt:
+            self._build(player)
+
+    def _move(self, player: Player, steps: int):
+        event = self.board.move_player_and_trigger(player, steps)
+        player.has_rolled_and_moved = True
+        if event.get("passed_go"):
+            self.paths["passed_go"] += 1
+        self._record(event)
+
+        offer = event.get("offer")
+        if offer and not player.is_bankrupt:
+            if self.policies[player.id].should_buy(player, offer["price"]):
+                result = self.board.handle_buy_property(player, offer["property_id"])
+                self.paths[result["event"]] += 1
+            else:
+                self.paths["decline_property"] += 1
+        if player.is_in_jail:
+            player.jail_turns = 0
+
+    def _record(self, event: Dict[str, Any]):
+        """Đếm nhánh luật: event của tile (+ action của tài sản / thẻ), cả ô đích của thẻ di chuyển."""
+        action = event.get("action")
+        self.paths[f"{event.get('event')}:{action}" if action else str(event.get("event"))] += 1
+        if "landed" in event:
+            self._record(event["landed"])
+
+    # ------------------------------------------------------------------
+    # 🚔 NHÀ TÙ
+    # ------------------------------------------------------------------
+    def _jail(self, player: Player):
+        self.board.send_player_to_jail(player)
+        player.jail_turns = 0
+
+    def _leave_jail(self, player: Player) -> bool:
+        """True nếu người chơi ra tù và được đổ xúc xắc bình thường trong lượt này."""
+        forced = player.jail_turns >= MAX_JAIL_TURNS - 1   # lượt thứ 3 trong tù: bắt buộc ra
+        if forced or self.policies[player.id].leave_jail_early(player):
+            for deck in self.board.decks.values():
+                if deck.return_jail_card(player.id):
+                    self.paths["jail_card_used"] += 1
+                    return self._release(player)
+            self.paths["jail_fine_paid"] += 1
+            self.board.bank.pay_bank(player, JAIL_FINE)
+            return not player.is_bankrupt and self._release(player)
+
+        d1, d2 = self.rng.randint(1, 6), self.rng.randint(1, 6)
+        player.jail_turns += 1
+        if d1 == d2:
+            self.paths["jail_escape_doubles"] += 1
+            self._release(player)
+            self._move(player, d1 + d2)   # ra tù bằng đổ đôi: đi theo số vừa đổ, không đổ thêm
+        else:
+            self.paths["jail_wait"] += 1
+        return False
+
+    def _release(self, player: Player) -> bool:
+        player.is_in_jail = False
+        player.jail_turns = 0
+        return True
+
+    # ------------------------------------------------------------------
+    # 🏗️ XÂY NHÀ
+    # ------------------------------------------------------------------
+    def _build(self, player: Player):
+        budget = self.policies[player.id].build_budget(player)
+        bank = self.board.bank
+        while budget > 0:
+            candidates = [t for t in self.board.get_tiles_owned_by(player.id)
+                          if getattr(t, "colour", None) and bank.owns_color_group(player.id, t.colour)
+                          and not t.properties.has_hotel]
+            if not candidates:
+                return
+            tile = min(candidates, key=lambda t: t.properties.houses)   # xây đều trong nhóm
+            props = tile.properties
+            hotel = props.houses == BUILDING_LIMIT
+            cost = props.hotel_cost if hotel else props.house_cost
+            if cost > budget or cost > player.balance:
+                return
+            built = bank.build_hotel(player, tile) if hotel else bank.build_house(player, tile)
+            if not built:
+                self.paths["building_shortage"] += 1
+                return
+            bank.pay_bank(player, cost)
+            budget -= cost
+            self.paths["build_hotel" if hotel else "build_house"] += 1
+
+    # ------------------------------------------------------------------
+    # 💀 PHÁ SẢN & BẤT BIẾN
+    # ------------------------------------------------------------------
+    def _settle_bankruptcies(self):
+        # Phá sản có thể xảy ra với người không đến lượt (thẻ thu tiền mọi người chơi)
+        for player in self.players:
+            if player.is_bankrupt and player.id not in self.eliminated:
+                self.board.bankrupt_player(player)
+                self.eliminated.add(player.id)
+                self.paths["bankrupt"] += 1
+
+    def _money_in_play(self) -> int:
+        bank = self.board.bank
+        return bank.cash_pool + bank.free_parking_pool + sum(bank.store.balances)
+
+    def check_invariants(self):
+        bank = self.board.bank
+        money = self._money_in_play()
+        if money != self.total_money:
+            raise InvariantError(f"money not conserved: {money} != {self.total_money}")
+
+        # Chỉ mục sở hữu của Bank khớp mảng owners của RoomStore (đọc mảng trực tiếp, không qua tile)
+        store = bank.store
+        owners = {self._tile_ids[i]: owner for i, owner in enumerate(store.owners) if owner is not None}
+        if owners != bank.properties_owned:
+            raise InvariantError(f"store owners {owners} != bank owners {bank.properties_owned}")
+        if not self.eliminated.isdisjoint(owners.values()):
+            raise InvariantError("a bankrupt player still owns tiles")
+        houses = sum(store.houses)
+        hotels = sum(1 for flags in store.flags if flags & HOTEL)
+        if houses + bank.available_houses != 32 or hotels + bank.available_hotels != 12:
+            raise InvariantError(f"buildings not conserved: {houses} houses, {hotels} hotels on board")
+
+        for player in self.players:
+            if player.id in self.eliminated:
+                continue
+            if player.balance < 0:
+                raise InvariantError(f"{player.id} has negative balance {player.balance}")
+            if not 0 <= player.position < len(self._tile_ids):
+                raise InvariantError(f"{player.id} off board at {player.position}")
+            if player.is_in_jail and player.position != self.jail_position:
+                raise InvariantError(f"{player.id} in jail but at {player.position}")
+
+
+# ======================================================
+# 3️⃣ CHẠY NHIỀU VÁN (ProcessPoolExecutor)
+# ======================================================
+def run_batch(seeds: Sequence[int], policies: Sequence[str], max_turns: int = MAX_TURNS,
+              check_invariants: bool = True) -> Dict[str, Any]:
+    """Chạy một lô ván trong process hiện tại; kết quả gộp (picklable) để gửi về process cha."""
+    paths: Counter = Counter()
+    turns: List[int] = []
+    finished = 0
+    failures = []
+    for seed in seeds:
+        result = HeadlessGame(seed, policies, max_turns, check_invariants).play()
+        paths.update(result["paths"])
+        turns.append(result["turns"])
+        finished += result["finished"]
+        if result["error"]:
+            failures.append({"seed": seed, "turn": result["turns"], "error": result["error"]})
+    return {"games": len(seeds), "turns": turns, "finished": finished, "paths": paths, "failures": failures}
+
+
+def run_simulation(games: int = 1000, policies: Sequence[str] = ("greedy", "random", "greedy", "random"),
+                   workers: Optional[int] = None, seed: int = 0, max_turns: int = MAX_TURNS,
+                   check_invariants: bool = True) -> Dict[str, Any]:
+    """
+    Chạy `games` ván với seed seed..seed+games-1.
+    workers=0: chạy trong process hiện tại; None: số CPU.
+    """
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError(f"unknown policy {name!r}, expected one of {sorted(POLICIES)}")
+    seeds = list(range(seed, seed + games))
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    started = time.perf_counter()
+    if workers == 0:
+        batches = [run_batch(seeds, policies, max_turns, check_invariants)]
+    else:
+        chunks = [seeds[i::workers * 4] for i in range(workers * 4) if seeds[i::workers * 4]]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(run_batch, chunks, [policies] * len(chunks), [max_turns] * len(chunks),
+                                    [check_invariants] * len(chunks)))
+    elapsed = time.perf_counter() - started
+
+    paths: Counter = Counter()
+    turns: List[int] = []
+    for batch in batches:
+        paths.update(batch["paths"])
+        turns.extend(batch["turns"])
+    turns.sort()
+    total_turns = sum(turns)
+    return {
+        "games": games,
+        "workers": workers,
+        "seconds": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0.0,
+        "turns_per_sec": total_turns / elapsed if elapsed else 0.0,
+        "turns_per_game": total_turns / games if games else 0.0,
+        "median_turns": turns[len(turns) // 2] if turns else 0,
+        "finished": sum(batch["finished"] for batch in batches),
+        "paths": dict(paths.most_common()),
+        "failures": sorted((f for batch in batches for f in batch["failures"]), key=lambda f: f["seed"]),
+    }
+
+
+# ======================================================
+# 4️⃣ CLI
+# ======================================================
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['games']:,} games in {report['seconds']:.2f}s on {report['workers'] or 1} worker(s): "
+        f"{report['games_per_sec']:,.1f} games/s, {report['turns_per_sec']:,.0f} turns/s",
+        f"turns/game: mean {report['turns_per_game']:.1f}, median {report['median_turns']}, "
+        f"finished {report['finished']:,}/{report['games']:,}",
+        "", "rule paths hit:",
+    ]
+    lines += [f"  {path:<40} {count:>12,}" for path, count in report["paths"].items()]
+    lines.append("")
+    lines.append(f"invariant failures: {len(report['failures'])}")
+    lines += [f"  seed {f['seed']} turn {f['turn']}: {f['error']}" for f in report["failures"][:20]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Headless Monopoly simulation (throughput benchmark / fuzzer)")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--policies", default="greedy,random",
+                        help=f"comma-separated, cycled over players ({', '.join(POLICIES)})")
+    parser.add_argument("--workers", type=int, default=None, help="0 = run in this process")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    parser.add_argument("--no-invariants", action="store_true", help="skip per-turn invariant checks")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = args.policies.split(",")
+    policies = [names[i % len(names)] for i in range(args.players)]
+    report = run_simulation(args.games, policies, args.workers, args.seed, args.max_turns, not args.no_invariants)
+    print(json.dumps(report, indent=2) if args.json else _format_report(report))
+    if report["failures"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,5 @@
 from typing import Dict, TYPE_CHECKING
 from .Bank import Bank
-# Import PacketBuilder từ vị trí đã định nghĩa của bạn
-from ..network.packet_builder import PacketBuilder
 
 
 if TYPE_CHECKING:
@@ -9,12 +7,15 @@ if TYPE_CHECKING:
 class Player:
     """
     Đại diện cho một người chơi trong Monopoly.
+    Vị trí và số dư nằm trong mảng của RoomStore (bank.store) tại slot của người chơi.
     """
 
+    __slots__ = ("id", "name", "in_jail", "jail_turns", "is_bankrupt", "has_rolled_and_moved",
+                 "consecutive_doubles", "room_id", "bank", "slot")
+
     def __init__(self, player_id: str, name: str, bank_service: Bank, room_id: str, initial_balance: int = 1500):
         self.id = player_id
         self.name = name
-        self.position = 0
         self.in_jail = False
         self.jail_turns = 0
         self.is_bankrupt = False
@@ -22,23 +23,39 @@ class Player:
         self.consecutive_doubles = 0
         self.room_id = room_id
 
-        # 🔑 SOURCE OF TRUTH: Set chứa ID của các ô đất người chơi sở hữu
+        # 🔑 SOURCE OF TRUTH: quyền sở hữu nằm trong Bank, vị trí / số dư trong bank.store
 
         self.bank = bank_service
-        self.bank.register_player(self, initial_balance)
+        self.slot = self.bank.register_player(self, initial_balance)
+        self.position = 0
+
+    # ======================================================
+    # 📍 VỊ TRÍ & TRẠNG THÁI TÙ
+    # ======================================================
+    @property
+    def position(self) -> int:
+        return self.bank.store.positions[self.slot]
+
+    @position.setter
+    def position(self, value: int):
+        self.bank.store.positions[self.slot] = value
+
+    @property
+    def is_in_jail(self) -> bool:
+        """Tên khác của in_jail (Board / JailTile dùng tên này)."""
+        return self.in_jail
 
-        # 💥 Thêm PacketBuilder để tạo JSON packet hành động
-        # Lưu ý: PacketBuilder nên là static hoặc được truyền vào
-        # Tôi sẽ để nó là instance tạm thời, nhưng dùng @classmethod cho các hàm là tốt nhất.
-        self.packet_builder = PacketBuilder()
+    @is_in_jail.setter
+    def is_in_jail(self, value: bool):
+        self.in_jail = value
 
     # ======================================================
     # 💰 TIỀN VÀ GIAO DỊCH
     # ======================================================
     @property
     def balance(self) -> int:
-        """Lấy số dư từ Bank."""
-        return self.bank.get_balance(self)
+        """Lấy số dư từ mảng balances của phòng."""
+        return self.bank.store.balances[self.slot]
 
 
 
@@ -57,7 +74,7 @@ class Player:
             "name": self.name,
             "position": self.position,
             "balance": self.balance,
-            "owned_tiles": list(self.owned_tiles),  # Convert Set to List để JSON hóa
+            "owned_tiles": self.bank.get_tile_ids_by_owner(self.id),  # Bank là nguồn dữ liệu sở hữu
             "in_jail": self.in_jail,
             "jail_turns": self.jail_turns,
             "is_bankrupt": self.is_bankrupt
@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
+
+from ..room_store import MORTGAGED, RoomStore
+
+
+def spec_field(key: str) -> property:
+    """Thuộc tính chỉ đọc lấy từ spec tĩnh dùng chung."""
+    return property(lambda self: self.spec[key])
 
 
 class BaseProperty(ABC):
@@ -8,22 +16,68 @@ class BaseProperty(ABC):
     Lưu trữ thông tin tài chính và trạng thái sở hữu chung.
     """
 
+    # Không có __dict__: dữ liệu tĩnh ở spec (dùng chung), trạng thái ở RoomStore của phòng
+    __slots__ = ("spec", "_store", "_index")
+
     def __init__(self, data: Dict[str, Any]):
-        # --- Thông tin chung ---
-        self.name: str = data['name']
-        self.type: str = data.get('type', 'property')  # Ví dụ: 'property', 'railroad', 'utility'
-        self.color_group: str = data.get('color_group', data.get('color'))
+        self._init_state(self.parse_spec(data), RoomStore.standalone(), 0)
 
+    # --- Dữ liệu tĩnh (dùng chung giữa các phòng, chỉ đọc) ---
+    @classmethod
+    def parse_spec(cls, data: Dict[str, Any]) -> Mapping[str, Any]:
+        """
+        Tách phần dữ liệu tĩnh (tên, giá, bảng tiền thuê) từ cấu hình JSON.
+        Kết quả chỉ đọc, được parse một lần cho mỗi process và dùng chung cho mọi phòng.
+        """
         # Lấy thông tin từ trường 'property_info' nếu có (áp dụng cho RR/Utility)
         info = data.get('property_info', {})
+        return MappingProxyType({
+            "name": data['name'],
+            "type": data.get('type', 'property'),  # Ví dụ: 'property', 'railroad', 'utility'
+            "color_group": data.get('color_group', data.get('color')),
+            "purchase_price": data.get('price', data.get('purchase_price', info.get('purchase_price'))),
+            "mortgage_value": data.get('mortgage_value', info.get('mortgage_value', 0)),
+        })
+
+    @classmethod
+    def from_spec(cls, spec: Mapping[str, Any], store: RoomStore, index: int) -> 'BaseProperty':
+        """Tạo tài sản cho một phòng từ spec dùng chung — không đọc file, không parse lại."""
+        prop = cls.__new__(cls)
+        prop._init_state(spec, store, index)
+        return prop
+
+    def _init_state(self, spec: Mapping[str, Any], store: RoomStore, index: int):
+        """Trạng thái riêng của phòng (chủ, cầm cố, nhà...) nằm trong các mảng của store tại index."""
+        self.spec = spec
+        self._store = store
+        self._index = index
+
+    name = spec_field("name")
+    type = spec_field("type")
+    color_group = spec_field("color_group")
+    purchase_price = spec_field("purchase_price")
+    mortgage_value = spec_field("mortgage_value")
+
+    @property
+    def revision(self) -> int:
+        """Tăng mỗi khi trạng thái hiển thị cho client thay đổi — tile dùng để làm mới to_dict() đã cache."""
+        return self._store.revisions[self._index]
+
+    @property
+    def owner(self):
+        return self._store.owners[self._index]
+
+    @owner.setter
+    def owner(self, value):
+        self._store.set_owner(self._index, value)
 
-        # --- Tài chính chung (luôn có) ---
-        self.purchase_price: int = data.get('price', info.get('purchase_price'))
-        self.mortgage_value: int = info.get('mortgage_value', 0)
+    @property
+    def is_mortgaged(self) -> bool:
+        return bool(self._store.flags[self._index] & MORTGAGED)
 
-        # --- Trạng thái hiện tại ---
-        self.is_mortgaged: bool = False
-        self.owner = None
+    @is_mortgaged.setter
+    def is_mortgaged(self, value: bool):
+        self._store.set_flag(self._index, MORTGAGED, value)
 
     @abstractmethod
     def calculate_rent(self, **kwargs) -> int | None:
@@ -1,19 +1,46 @@
-from typing import Dict, Any
-from .BaseProperty import BaseProperty
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
+from .BaseProperty import BaseProperty, spec_field
+from ..room_store import HOTEL
 class ColorGroupProperty(BaseProperty):
     """Đại diện cho các ô đất màu có thể xây Nhà/Khách sạn."""
 
-    def __init__(self, data: Dict[str, Any]):
-        super().__init__(data)
+    __slots__ = ()
+
+    @classmethod
+    def parse_spec(cls, data: Dict[str, Any]) -> Mapping[str, Any]:
+        spec = dict(super().parse_spec(data))
         # --- Thuộc tính cụ thể của Color Group ---
-        self.base_rent: int = data['base_rent']
-        self.rents: Dict[str, int] = data['rents']
-        self.house_cost: int = data['building_costs']['house_cost']
-        self.hotel_cost: int = data['building_costs']['hotel_cost']
-
-        # --- Trạng thái xây dựng ---
-        self.houses: int = 0
-        self.has_hotel: bool = False
+        spec.update({
+            "base_rent": data['base_rent'],
+            "rents": MappingProxyType(dict(data['rents'])),
+            "house_cost": data['building_costs']['house_cost'],
+            "hotel_cost": data['building_costs']['hotel_cost'],
+        })
+        return MappingProxyType(spec)
+
+    base_rent = spec_field("base_rent")
+    rents = spec_field("rents")
+    house_cost = spec_field("house_cost")
+    hotel_cost = spec_field("hotel_cost")
+
+    # --- Trạng thái xây dựng (mảng houses / cờ HOTEL của RoomStore) ---
+    @property
+    def houses(self) -> int:
+        return self._store.houses[self._index]
+
+    @houses.setter
+    def houses(self, value: int):
+        self._store.houses[self._index] = value
+        self._store.revisions[self._index] += 1
+
+    @property
+    def has_hotel(self) -> bool:
+        return bool(self._store.flags[self._index] & HOTEL)
+
+    @has_hotel.setter
+    def has_hotel(self, value: bool):
+        self._store.set_flag(self._index, HOTEL, value)
 
     def calculate_rent(self, is_monopoly: bool = False, **kwargs) -> int:
         # Nếu đang cầm cố, tiền thuê là 0
@@ -1,18 +1,22 @@
-from typing import Dict,Any
-from .BaseProperty import BaseProperty
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
+from .BaseProperty import BaseProperty, spec_field
 class RailroadProperty(BaseProperty):
     """Đại diện cho các ô Ga Tàu Hỏa."""
 
-    def __init__(self, data: Dict[str, Any]):
-        super().__init__(data)
+    __slots__ = ()
 
+    @classmethod
+    def parse_spec(cls, data: Dict[str, Any]) -> Mapping[str, Any]:
+        spec = dict(super().parse_spec(data))
         # Thuộc tính cụ thể của Railroad (lấy từ property_info)
-        info = data.get('property_info', {})
         # Ví dụ: {"1_owned": 25, "2_owned": 50, ...}
-        self.rent_tiers: Dict[str, int] = info.get('rent_tiers', {})
+        spec["rent_tiers"] = MappingProxyType(dict(data.get('property_info', {}).get('rent_tiers', {})))
+        return MappingProxyType(spec)
 
-        # Cần truyền 'railroad_count' (số lượng ga mà chủ sở hữu nắm giữ)
+    rent_tiers = spec_field("rent_tiers")
 
+    # Cần truyền 'railroad_count' (số lượng ga mà chủ sở hữu nắm giữ)
     def calculate_rent(self, railroad_count: int, **kwargs) -> int:
         if self.is_mortgaged:
             return 0
@@ -1,15 +1,20 @@
-from typing import Dict,Any
-from .BaseProperty import BaseProperty
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
+from .BaseProperty import BaseProperty, spec_field
 class UtilityProperty(BaseProperty):
     """Đại diện cho các ô Công Ty Tiện Ích."""
 
-    def __init__(self, data: Dict[str, Any]):
-        super().__init__(data)
+    __slots__ = ()
 
+    @classmethod
+    def parse_spec(cls, data: Dict[str, Any]) -> Mapping[str, Any]:
+        spec = dict(super().parse_spec(data))
         # Thuộc tính cụ thể của Utility (lấy từ property_info)
-        info = data.get('property_info', {})
         # Ví dụ: {"1_owned": 4, "2_owned": 10}
-        self.rent_multipliers: Dict[str, int] = info.get('rent_multipliers', {})
+        spec["rent_multipliers"] = MappingProxyType(dict(data.get('property_info', {}).get('rent_multipliers', {})))
+        return MappingProxyType(spec)
+
+    rent_multipliers = spec_field("rent_multipliers")
 
     # Cần truyền 'utility_count' và 'dice_roll'
     def calculate_rent(self, utility_count: int, dice_roll: int, **kwargs) -> int:
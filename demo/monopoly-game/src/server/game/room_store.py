@@ -0,0 +1,98 @@
+"""
+room_store.py — trạng thái nóng của một phòng dạng struct-of-arrays
+-------------------------------------------------------------------
+- Mỗi phòng có một RoomStore: mỗi trường là một mảng theo vị trí ô / slot người chơi
+  thay vì một thuộc tính trên từng object.
+    owners    : list  — player_id chủ sở hữu (None = Bank)
+    houses    : array('b') — số nhà
+    flags     : array('B') — bit HOTEL / MORTGAGED
+    revisions : array('I') — revision hiển thị (cache to_dict của tile)
+    positions : array('b') — vị trí người chơi theo slot
+    balances  : array('q') — số dư người chơi theo slot
+- Player / tài sản chỉ giữ (store, index) và đọc ghi qua property — API object cũ giữ nguyên.
+"""
+from array import array
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional
+
+HOTEL = 1
+MORTGAGED = 2
+
+
+class RoomStore:
+    """Mảng trạng thái của một phòng (ô theo vị trí 0..N-1, người chơi theo slot)."""
+
+    __slots__ = ("index_by_id", "owners", "houses", "flags", "revisions",
+                 "player_slots", "positions", "balances")
+
+    def __init__(self, index_by_id: Mapping[int, int], tile_count: int):
+        self.index_by_id = index_by_id  # tile_id -> vị trí (dùng chung từ BoardTemplate)
+        self.owners: List[Optional[str]] = [None] * tile_count
+        self.houses = array("b", bytes(tile_count))
+        self.flags = array("B", bytes(tile_count))
+        self.revisions = array("I", bytes(4 * tile_count))
+
+        self.player_slots: Dict[str, int] = {}
+        self.positions = array("b")
+        self.balances = array("q")
+
+    @classmethod
+    def standalone(cls) -> 'RoomStore':
+        """Store một ô, cho tài sản tạo lẻ ngoài Board (vd. ColorGroupProperty(data))."""
+        return cls({}, 1)
+
+    # ------------------------------------------------------------------
+    # 🏠 Ô / TÀI SẢN
+    # ------------------------------------------------------------------
+    def tile_index(self, tile_id: int) -> Optional[int]:
+        return self.index_by_id.get(tile_id)
+
+    def set_owner(self, index: int, owner: Optional[str]):
+        self.owners[index] = owner
+        self.revisions[index] += 1
+
+    def set_flag(self, index: int, flag: int, value: bool):
+        if value:
+            self.flags[index] |= flag
+        else:
+            self.flags[index] &= ~flag & 0xFF
+        self.revisions[index] += 1
+
+    # ------------------------------------------------------------------
+    # 👥 NGƯỜI CHƠI
+    # ------------------------------------------------------------------
+    def add_player(self, player_id: str, balance: int = 0) -> int:
+        """Cấp slot cho người chơi (giữ slot cũ nếu đã có)."""
+        slot = self.player_slots.get(player_id)
+        if slot is None:
+            slot = self.player_slots[player_id] = len(self.positions)
+            self.positions.append(0)
+            self.balances.append(balance)
+        return slot
+
+
+class PlayerBalances(MutableMapping):
+    """Giao diện dict player_id -> số dư trên mảng balances (Bank.player_balances)."""
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store: RoomStore):
+        self._store = store
+
+    def __getitem__(self, player_id: str) -> int:
+        return self._store.balances[self._store.player_slots[player_id]]
+
+    def __setitem__(self, player_id: str, balance: int):
+        slot = self._store.player_slots.get(player_id)
+        if slot is None:
+            self._store.add_player(player_id, balance)
+        else:
+            self._store.balances[slot] = balance
+
+    def __delitem__(self, player_id: str):
+        raise TypeError("player slots are never removed from a room")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.player_slots)
+
+    def __len__(self) -> int:
+        return len(self._store.player_slots)
@@ -1,10 +1,15 @@
 # game/tiles/base_tile.py
 class BaseTile:
+    # Không có __dict__ — hàng chục nghìn phòng giữ tile, mỗi object càng nhỏ càng tốt
+    __slots__ = ("tile_id", "name", "position", "tile_type", "_dict_cache", "_dict_revision")
+
     def __init__(self, tile_id, name, position, tile_type):
         self.tile_id = tile_id
         self.name = name
         self.position = position
         self.tile_type = tile_type
+        self._dict_cache = None
+        self._dict_revision = 0
     def on_land(self, player, board):
         """Gọi khi người chơi dừng ở ô này."""
         return {
@@ -13,7 +18,27 @@ class BaseTile:
         }
 
     def to_dict(self):
-        """Serialize tile info để gửi về client."""
+        """
+        Serialize tile info để gửi về client.
+        Kết quả được cache và chỉ dựng lại khi revision của tài sản (chủ, nhà, cầm cố) thay đổi.
+        Dict trả về dùng chung — không sửa trực tiếp.
+        """
+        revision = self.state_revision()
+        if self._dict_cache is None or self._dict_revision != revision:
+            self._dict_cache = self._build_dict()
+            self._dict_revision = revision
+        return self._dict_cache
+
+    def state_revision(self) -> int:
+        """Revision trạng thái ảnh hưởng tới to_dict() (ô không có tài sản: luôn 0)."""
+        properties = getattr(self, "properties", None)
+        return properties.revision if properties is not None else 0
+
+    def invalidate(self):
+        """Bỏ cache to_dict() (dùng khi thay đổi trạng thái không đi qua tài sản)."""
+        self._dict_cache = None
+
+    def _build_dict(self):
         return {
             "id": self.tile_id,
             "name": self.name,
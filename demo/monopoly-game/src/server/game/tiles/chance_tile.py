@@ -1,14 +1,17 @@
 # game/tiles/chance_tile.py
-from ..card_manager2 import CardManager
+from ..card_manager2 import get_card_manager
 from .base_tile import BaseTile
 from ...network.packet_builder import PacketBuilder
 
 
 class ChanceTile(BaseTile):
+    __slots__ = ("deck_type", "manager")
+
     def __init__(self, tile_id, name, position, deck="chance"):
         super().__init__(tile_id, name, position, "chance")
         self.deck_type = deck
-        self.manager = CardManager()
+        # Không giữ bộ bài: thứ tự rút nằm ở board.decks (riêng từng phòng), tile dùng chung
+        self.manager = get_card_manager()
 
     def on_land(self, player, board):
         """
@@ -20,7 +23,7 @@ class ChanceTile(BaseTile):
         """
 
         # 1️⃣ Rút thẻ từ bộ bài Chance
-        card = self.manager.draw_card(self.deck_type)
+        card = board.decks[self.deck_type].draw(player.id)
 
         # 2️⃣ Tạo gói tin thông báo rút thẻ (để gửi qua network)
         draw_packet = PacketBuilder.draw_card(
@@ -39,7 +42,7 @@ class ChanceTile(BaseTile):
         # 4️⃣ Trả về event để GameManager xử lý và gửi đi
         return {
             "event": "DRAW_CARD",
-            "message": f"{player.name} drew a Chance card: {card["text"]}",
+            "message": f"{player.name} drew a Chance card: {card['text']}",
             "effect": result,   # hiệu ứng cụ thể: {"move_to": 24, "amount": -50, ...}
             "data": {
                 "tile_id": self.tile_id,
@@ -51,9 +54,9 @@ class ChanceTile(BaseTile):
             "packets": [draw_packet]  # Gợi ý để GameManager gửi trước khi apply effect
         }
 
-    def to_dict(self):
+    def _build_dict(self):
         """Trả về thông tin tile để client hiển thị"""
-        base = super().to_dict()
+        base = super()._build_dict()
         base.update({
             "deck_type": self.deck_type
         })
@@ -5,7 +5,7 @@ from ...network.packet_builder import PacketBuilder
 
 if TYPE_CHECKING:
     from ..player import Player
-    from ..Bank import Bank
+    from ..board import Board
 
 
 class FreeParkingTile(BaseTile):
@@ -15,17 +15,20 @@ class FreeParkingTile(BaseTile):
     - Theo luật tùy chọn (House Rule): nhận tiền từ quỹ Free Parking Pool.
     """
 
+    __slots__ = ()
+
     def __init__(self, tile_id: int, name: str, position: int):
         super().__init__(tile_id, name, position, tile_type="free_parking")
 
-    def on_land(self, player: 'Player', bank_service: 'Bank') -> Dict[str, Any]:
+    def on_land(self, player: 'Player', board: 'Board') -> Dict[str, Any]:
         """
         Khi người chơi dừng lại trên ô Free Parking:
         - Nếu pool có tiền: nhận toàn bộ và pool đặt lại 0.
         - Nếu trống: chỉ hiển thị thông báo.
         """
 
-        pool_amount = getattr(bank_service, "free_parking_pool", 0)
+        bank_service = board.bank
+        pool_amount = bank_service.free_parking_pool
         collected_amount = 0
 
         # 🏦 Nếu có tiền trong quỹ
@@ -34,7 +37,7 @@ class FreeParkingTile(BaseTile):
 
             # Gói tin cập nhật số dư
             balance_packet = PacketBuilder.update_balance(
-                room_id=getattr(bank_service, "room_id", None),
+                room_id=board.room_id,
                 player_id=player.id,
                 balance=player.balance
             )
@@ -70,9 +73,9 @@ class FreeParkingTile(BaseTile):
             }
         }
 
-    def to_dict(self) -> Dict[str, Any]:
+    def _build_dict(self) -> Dict[str, Any]:
         """Chuyển tile thành dict gửi client."""
-        base = super().to_dict()
+        base = super()._build_dict()
         base.update({
             "type": self.tile_type,
             "name": self.name,
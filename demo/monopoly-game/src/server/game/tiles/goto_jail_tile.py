@@ -12,6 +12,8 @@ class GoToJailTile(BaseTile):
     Ô Go To Jail. Người chơi bị đưa thẳng vào tù khi vào ô này.
     """
 
+    __slots__ = ()
+
     def __init__(self, tile_id: int, name: str, position: int):
         # ⚠️ Điều chỉnh tile_type thành "goto_jail" cho đúng chức năng
         super().__init__(tile_id, name, position, tile_type="goto_jail")
@@ -39,9 +41,9 @@ class GoToJailTile(BaseTile):
             }
         }
 
-    def to_dict(self) -> Dict[str, Any]:
+    def _build_dict(self) -> Dict[str, Any]:
         """Chuyển tile thành dict gửi client."""
-        base = super().to_dict()
+        base = super()._build_dict()
         base.update({
             "type": self.tile_type,
             "name": self.name,
@@ -11,17 +11,35 @@ if TYPE_CHECKING:
 class PropertyTile(BaseTile):
     """Đại diện cho ô đất có màu (Color Group Property)."""
 
+    __slots__ = ("properties", "colour")
+
     def __init__(self, tile_id, name, position, colour, properties_obj: ColorGroupProperty):
         super().__init__(tile_id, name, position, tile_type="property")
         self.properties = properties_obj
-        self.price = self.properties.purchase_price
         self.colour = colour
-        self.owner = self.properties.owner  # Player ID hoặc None
+
+    @property
+    def price(self):
+        """Giá mua (dữ liệu tĩnh của tài sản)."""
+        return self.properties.purchase_price
+
+    @property
+    def owner(self):
+        """Player ID hoặc None (lưu trên properties để to_dict() cache được làm mới)."""
+        return self.properties.owner
+
+    @owner.setter
+    def owner(self, value):
+        self.properties.owner = value
 
     def get_owner_id(self, bank_service) -> int | None:
         """Truy vấn Bank để tìm ID của chủ sở hữu ô đất này."""
         return bank_service.properties_owned.get(self.tile_id)
 
+    def calculate_rent(self, board: 'Board', owner_id) -> int:
+        """Tiền thuê hiện tại; đất trống nhân đôi khi chủ sở hữu trọn nhóm màu (O(1) qua Bank)."""
+        return self.properties.calculate_rent(is_monopoly=board.bank.owns_color_group(owner_id, self.colour))
+
     def on_land(self, player: 'Player', board: 'Board'):
         """
         Khi người chơi dừng tại ô đất:
@@ -63,7 +81,7 @@ class PropertyTile(BaseTile):
 
         # 🟥 3. Của người khác → Trả tiền thuê
         else:
-            rent = self.properties.calculate_rent()
+            rent = self.calculate_rent(board, owner_id)
             return {
                 "event": "land_on_property",
                 "message": f"{player.name} must pay ${rent} rent to {owner.name} for {self.name}.",
@@ -78,9 +96,9 @@ class PropertyTile(BaseTile):
                 "data": self.to_dict()
             }
 
-    def to_dict(self):
+    def _build_dict(self):
         """Serialize tile info (được gửi về client)."""
-        base = super().to_dict()
+        base = super()._build_dict()
         base.update({
             "price": self.price,
             "rent": self.properties.calculate_rent(),
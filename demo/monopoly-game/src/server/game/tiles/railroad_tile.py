@@ -12,25 +12,26 @@ if TYPE_CHECKING:
 class RailroadTile(BaseTile):
     """Đại diện cho 4 ô Ga Tàu Hỏa trên bàn cờ (Railroad)."""
 
+    __slots__ = ("properties",)
+
     def __init__(self, tile_id: int, name: str, position: int, properties_obj):
         super().__init__(tile_id, name, position, tile_type="railroad")
         self.properties = properties_obj
-        self.price = self.properties.purchase_price
+
+    @property
+    def price(self):
+        """Giá mua (dữ liệu tĩnh của tài sản)."""
+        return self.properties.purchase_price
 
     # ---------------------------------------------------------------------
     # 🔢 TÍNH TIỀN THUÊ
     # ---------------------------------------------------------------------
     def calculate_rent(self, board: 'Board', owner_id: int) -> int:
         """
-        Tiền thuê dựa trên số lượng Railroad mà chủ sở hữu nắm giữ.
+        Tiền thuê dựa trên số lượng Railroad mà chủ sở hữu nắm giữ (đếm sẵn trong Bank, O(1)).
         """
-        owner_properties = board.bank.get_properties_by_owner(owner_id)
-        railroad_count = sum(
-            1 for tile in owner_properties if tile.tile_type == "railroad"
-        )
-
-        rent_tiers = {1: 25, 2: 50, 3: 100, 4: 200}
-        return rent_tiers.get(railroad_count, 25)
+        railroad_count = board.bank.count_owned(owner_id, "railroad")
+        return self.properties.calculate_rent(railroad_count=railroad_count)
 
     # ---------------------------------------------------------------------
     # 🚂 KHI NGƯỜI CHƠI DỪNG LẠI TRÊN GA
@@ -92,9 +93,9 @@ class RailroadTile(BaseTile):
     # ---------------------------------------------------------------------
     # 🧾 SERIALIZE
     # ---------------------------------------------------------------------
-    def to_dict(self):
+    def _build_dict(self):
         """Chuyển đối tượng thành dict để gửi về client."""
-        base = super().to_dict()
+        base = super()._build_dict()
         base.update({
             "price": self.price,
             "owner_id": getattr(self.properties, "owner", None)
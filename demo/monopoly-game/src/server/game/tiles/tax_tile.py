@@ -8,6 +8,8 @@ if TYPE_CHECKING:
 
 
 class TaxTile(BaseTile):
+    __slots__ = ("tax_amount",)
+
     def __init__(self, tile_id, name, position, tax_amount):
         super().__init__(tile_id, name, position, tile_type="tax")
         self.tax_amount = tax_amount
@@ -34,7 +36,7 @@ class TaxTile(BaseTile):
             }
         }
 
-    def to_dict(self):
-        base = super().to_dict()
+    def _build_dict(self):
+        base = super()._build_dict()
         base.update({"tax_amount": self.tax_amount})
         return base
@@ -12,22 +12,21 @@ if TYPE_CHECKING:
 class UtilityTile(BaseTile):
     """Đại diện cho ô Công Ty Tiện Ích (Điện lực, Nước) trên bàn cờ."""
 
+    __slots__ = ("properties",)
+
     def __init__(self, tile_id: int, name: str, position: int, properties_obj):
         super().__init__(tile_id, name, position, tile_type="utility")
         self.properties = properties_obj
-        self.price = self.properties.purchase_price
 
-    def calculate_rent(self, board: 'Board', owner_id: int, dice_roll: int) -> int:
-        """Tính tiền thuê dựa trên số nút xúc xắc (dice_roll)."""
-        owner_properties = board.bank.get_properties_by_owner(owner_id)
-        utility_count = sum(
-            1 for tile in owner_properties
-            if tile.tile_type == "utility"
-        )
+    @property
+    def price(self):
+        """Giá mua (dữ liệu tĩnh của tài sản)."""
+        return self.properties.purchase_price
 
-        multiplier_tiers = {1: 4, 2: 10}
-        multiplier = multiplier_tiers.get(utility_count, 4)
-        return multiplier * dice_roll
+    def calculate_rent(self, board: 'Board', owner_id: int, dice_roll: int) -> int:
+        """Tính tiền thuê dựa trên số nút xúc xắc (dice_roll) và số Utility chủ sở hữu nắm giữ (O(1))."""
+        utility_count = board.bank.count_owned(owner_id, "utility")
+        return self.properties.calculate_rent(utility_count=utility_count, dice_roll=dice_roll)
 
     def on_land(self, player: 'Player', board: 'Board', last_dice_roll: int = 0):
         """
@@ -88,8 +87,8 @@ class UtilityTile(BaseTile):
                 "data": self.to_dict()
             }
 
-    def to_dict(self):
-        base = super().to_dict()
+    def _build_dict(self):
+        base = super()._build_dict()
         owner_id = self.properties.owner
         base.update({
             "price": self.price,
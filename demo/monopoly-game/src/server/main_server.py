@@ -386,13 +386,16 @@ import json
 import asyncio
 import signal
 import time
-from datetime import datetime
 from typing import Optional
 
 # Import các module cần thiết
 from .utils.logger import Logger
 from .rooms.room_manager import RoomManager
+from .rooms.heartbeat_scheduler import HeartbeatScheduler
 from .network.network_manager import NetworkManager  # <-- Đã thêm NetworkManager
+from .network.packet_builder import PacketBuilder
+from .network.framing import create_framing, decode_frame, FrameTooLargeError
+from .network.command_router import CommandRouter
 
 # ============================================================
 # GLOBAL CONFIGURATION
@@ -403,12 +406,21 @@ SERVER_CONFIG = {
     "tcp_port": 5050,
     "udp_ttl": 2,
     "tick_rate": 5.0,
+    "multicast_interface": None,  # vd. "127.0.0.1" để multicast chỉ chạy trên loopback (load test)
+    "multicast_range": "239.0.0.0",  # một /24 như cũ; vd. "239.1.0.0/16" hoặc list nhiều dải cho nhiều phòng hơn
+    "multicast_lease_ttl": 300.0,  # giây không có traffic trước khi group của phòng bị thu hồi
+    "socket_pool_size": 0,  # 0: mỗi phòng một socket; >0 (vd. os.cpu_count()): socket dùng chung cho mọi phòng
+    "heartbeat_max_backoff": 8,  # phòng nhàn rỗi / trống: heartbeat giãn dần tới tick_rate × 8
+    "room_inbox_size": 256,  # số hành động tối đa chờ xử lý trong mỗi phòng
+    "room_inbox_policy": "drop_newest",  # inbox đầy: "drop_newest" | "drop_oldest" | "block"
+    "network_inbox_limit": 4096,  # packet chờ phát tối đa; đầy → ngừng đọc socket ("block" chặn tới tận socket)
 }
 
 running = True
 # Khai báo các biến global cần thiết
 room_manager: Optional[RoomManager] = None
 network_manager: Optional[NetworkManager] = None
+heartbeats: Optional[HeartbeatScheduler] = None
 logger = Logger("Server")
 
 
@@ -422,15 +434,41 @@ async def initialize_system():
     """
     global room_manager
     global network_manager
+    global heartbeats
     logger.info("🚀 Initializing Monopoly Server...")
 
     # 0️⃣ Khởi tạo Network Manager (Bao gồm MulticastManager)
     # Giả định NetworkManager nhận logger trong __init__
-    network_manager = NetworkManager(logger_ins=logger)
+    network_manager = NetworkManager(
+        logger_ins=logger,
+        multicast_interface=SERVER_CONFIG["multicast_interface"],
+        multicast_range=SERVER_CONFIG["multicast_range"],
+        multicast_lease_ttl=SERVER_CONFIG["multicast_lease_ttl"],
+        socket_pool_size=SERVER_CONFIG["socket_pool_size"],
+        inbox_limit=SERVER_CONFIG["network_inbox_limit"],
+    )
+
+    # Heartbeat theo từng phòng: phòng được đăng ký / gỡ cùng lúc với group multicast của nó
+    heartbeats = HeartbeatScheduler(
+        SERVER_CONFIG["tick_rate"],
+        beat=send_heartbeat,
+        activity=network_manager.multicast.last_activity,
+        max_backoff=SERVER_CONFIG["heartbeat_max_backoff"],
+        logger=logger,
+    )
+    network_manager.multicast.watch_groups(
+        on_created=lambda room_id, group: heartbeats.add_room(room_id),
+        on_removed=lambda room_id, group: heartbeats.remove_room(room_id),
+    )
 
     # 1️⃣ Khởi tạo Room Manager
     # RoomManager cần NetworkManager để tạo group multicast cho phòng
-    room_manager = RoomManager(networkmanager=network_manager, logger=logger)
+    room_manager = RoomManager(
+        networkmanager=network_manager,
+        logger=logger,
+        inbox_size=SERVER_CONFIG["room_inbox_size"],
+        inbox_policy=SERVER_CONFIG["room_inbox_policy"],
+    )
 
     # 2️⃣ Tạo sẵn vài phòng mẫu
     await room_manager.create_room("ROOM_01", host_id=None)
@@ -439,44 +477,136 @@ async def initialize_system():
     logger.info(f"✅ {len(room_manager.rooms)} rooms initialized.")
 
 
+# ============================================================
+# TCP COMMANDS (bảng điều phối lệnh)
+# ============================================================
+
+command_router = CommandRouter()
+
+
+@command_router.route("PING")
+async def cmd_ping(payload: dict, conn: dict):
+    return {"cmd": "PONG", "status": "OK", "data": {"server_time": time.time()}}
+
+
+@command_router.route("NEGOTIATE_FRAMING", required={"framing": str})
+async def cmd_negotiate_framing(payload: dict, conn: dict):
+    framing_name = payload["framing"]
+    try:
+        # Phản hồi vẫn được mã hóa bằng framing cũ; kết nối chuyển framing ngay sau đó
+        conn["next_framing"] = create_framing(framing_name)
+    except ValueError as ee:
+        return {"cmd": "ERROR", "status": "ERROR", "message": str(ee)}
+    return {"cmd": "FRAMING_OK", "data": {"framing": framing_name}, "status": "OK"}
+
+
+@command_router.route("LIST_ROOMS")
+async def cmd_list_rooms(payload: dict, conn: dict):
+    rooms = await room_manager.list_rooms()
+    return {"cmd": "ROOM_LIST", "data": rooms, "status": "OK"}
+
+
+@command_router.route("ROOM_METRICS", optional={"room_id": str})
+async def cmd_room_metrics(payload: dict, conn: dict):
+    # Độ sâu inbox + thời gian chờ / xử lý hành động của từng phòng (hoặc một phòng)
+    metrics = room_manager.room_metrics()
+    room_id = payload.get("room_id")
+    if room_id is not None:
+        if room_id not in metrics:
+            return {"cmd": "ERROR", "status": "ERROR", "message": f"Room '{room_id}' not found."}
+        metrics = {room_id: metrics[room_id]}
+    return {"cmd": "ROOM_METRICS", "data": metrics, "status": "OK"}
+
+
+@command_router.route("CREATE_ROOM", optional={"room_id": str})
+async def cmd_create_room(payload: dict, conn: dict):
+    room_id = payload.get("room_id", f"ROOM_{int(time.time())}")
+    # host_id được giả định là None hoặc lấy từ payload
+    room_info = await room_manager.create_room(room_id, host_id=None)
+    if not room_info:
+        return {"cmd": "ERROR", "status": "ERROR", "message": f"Room '{room_id}' already exists."}
+    return {"cmd": "ROOM_CREATED", "data": room_info, "status": "OK"}
+
+
+@command_router.route("JOIN_ROOM", required={"room_id": str}, optional={"player_name": str, "codecs": list})
+async def cmd_join_room(payload: dict, conn: dict):
+    addr = conn["addr"]
+    room_id = payload["room_id"]
+    player_name = payload.get("player_name", f"Player_{addr[1]}")
+
+    # Giả định client_id (định danh duy nhất) được tạo ra từ đâu đó
+    client_id = f"{addr[0]}:{addr[1]}"
+
+    if room_id not in room_manager.rooms:
+        return {"cmd": "ERROR", "status": "ERROR", "message": f"Room '{room_id}' not found."}
+
+    # codecs: danh sách codec datagram client hỗ trợ; client cũ không gửi → phòng dùng JSON
+    room_info = await room_manager.add_player(room_id, client_id, player_name, payload.get("codecs"))
+    if not room_info:
+        return {"cmd": "ERROR", "status": "ERROR", "message": "Join room failed (Room full/In game)"}
+    # TƯƠNG LAI: network_manager.map_client_to_room(client_id, room_id)
+    return {"cmd": "JOIN_SUCCESS", "status": "OK", "data": {**room_info, "player_id": client_id}}
+
+
+@command_router.route("SYNC_STATE", required={"room_id": str}, optional={"version": int})
+async def cmd_sync_state(payload: dict, conn: dict):
+    # Client báo lệch version (mất delta) → gửi riêng snapshot đầy đủ
+    snapshot = await room_manager.get_state_snapshot(payload["room_id"], payload.get("version"))
+    if snapshot is None:
+        return {"cmd": "ERROR", "status": "ERROR", "message": f"Room '{payload['room_id']}' not found."}
+    return {"cmd": "STATE_SNAPSHOT", "status": "OK", "data": {"room_id": payload["room_id"], **snapshot}}
+
+
+@command_router.route("LEAVE_ROOM", required={"room_id": str, "player_id": (str, int)})
+async def cmd_leave_room(payload: dict, conn: dict):
+    success = await room_manager.remove_player(payload["room_id"], payload["player_id"])
+    return {"cmd": "LEAVE_RESULT", "status": "OK" if success else "ERROR"}
+
+
 # ============================================================
 # TCP SERVER HANDLER
 # ============================================================
 
 async def handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-    """Xử lý kết nối TCP từ client"""
+    """
+    Xử lý kết nối TCP từ client.
+    - Đọc lần lượt các message đã có trong buffer và xử lý ngay (hỗ trợ client gửi pipeline).
+    - Phản hồi được đưa vào outbox; task flush gửi cả lô bằng một writelines + một drain
+      khi vòng đọc phải chờ dữ liệu mới.
+    """
     addr = writer.get_extra_info("peername")
     logger.info(f"🔌 New TCP connection from {addr}")
 
-    client_buffer = ""
+    # Trạng thái theo kết nối: framing mặc định NDJSON, có thể đổi bằng NEGOTIATE_FRAMING
+    conn = {
+        "addr": addr,
+        "framing": create_framing("ndjson"),
+        "next_framing": None,
+        "outbox": [],
+        "outbox_ready": asyncio.Event(),
+    }
+    flush_task = asyncio.create_task(flush_responses(conn, writer))
 
     try:
-        while running:
+        while running and not flush_task.done():  # flush dừng (ghi lỗi) → đóng kết nối
             try:
-                data = await asyncio.wait_for(reader.read(1024), timeout=30.0)
+                # asyncio.timeout không tạo task mới → message đã có sẵn trong buffer được đọc
+                # liên tục mà không nhường event loop, phản hồi của cả lô được flush cùng lúc
+                async with asyncio.timeout(30.0):
+                    frame = await conn["framing"].read_frame(reader)
 
-                if not data:
+                if frame is None:
                     logger.info(f"🔌 Client {addr} disconnected (no data)")
                     break
 
-                chunk = data.decode('utf-8')
-                client_buffer += chunk
-
-                # Xử lý tất cả các message hoàn chỉnh trong buffer
-                while client_buffer:
-                    if '\n' in client_buffer:
-                        message_end = client_buffer.find('\n')
-                        message_str = client_buffer[:message_end]
-                        client_buffer = client_buffer[message_end + 1:]
-
-                        if message_str.strip():
-                            # Truyền writer để có thể gửi phản hồi trực tiếp qua TCP
-                            await process_single_message(message_str, addr, writer)
-                    else:
-                        break
+                if frame.strip():
+                    await process_single_message(frame, conn)
 
             except asyncio.TimeoutError:
                 continue
+            except FrameTooLargeError as ee:
+                logger.error(f"❌ Frame too large from {addr}: {ee}")
+                break
             except ConnectionResetError:
                 logger.info(f"🔌 Client {addr} disconnected forcibly")
                 break
@@ -486,7 +616,12 @@ async def handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.Stream
                 break
 
     finally:
+        flush_task.cancel()
         try:
+            # Gửi nốt các phản hồi còn trong outbox trước khi đóng
+            if conn["outbox"] and not writer.is_closing():
+                writer.writelines(conn["outbox"])
+                conn["outbox"] = []
             writer.close()
             await writer.wait_closed()
             logger.info(f"🔌 Client {addr} fully disconnected")
@@ -495,72 +630,55 @@ async def handle_tcp_client(reader: asyncio.StreamReader, writer: asyncio.Stream
             pass
 
 
-async def process_single_message(message_str: str, addr: tuple, writer: asyncio.StreamWriter):
-    """Xử lý một message JSON hoàn chỉnh"""
+async def flush_responses(conn: dict, writer: asyncio.StreamWriter):
+    """Gửi các phản hồi đang chờ theo lô: một writelines + một drain cho mỗi lần flush."""
+    while True:
+        await conn["outbox_ready"].wait()
+        conn["outbox_ready"].clear()
+        batch, conn["outbox"] = conn["outbox"], []
+        if not batch:
+            continue
+        try:
+            writer.writelines(batch)
+            await writer.drain()
+        except (ConnectionError, OSError) as ee:
+            # Client không còn nhận được: đóng kết nối để vòng đọc dừng, không để outbox dồn lên
+            logger.error(f"❌ Failed to flush {len(batch)} responses to {conn['addr']}: {ee}")
+            conn["outbox"] = []
+            writer.close()
+            return
+        logger.debug("📤 Flushed %d responses to %s", len(batch), conn["addr"])
+
+
+async def process_single_message(frame: bytes, conn: dict):
+    """Xử lý một message JSON hoàn chỉnh (bytes đã tách bởi framing của kết nối)"""
+    addr = conn["addr"]
+    data = None
     response = {"cmd": "ERROR", "status": "ERROR", "message": "Internal server error"}
 
     try:
-        # Parse JSON
-        data = json.loads(message_str)
-        cmd = data.get("cmd")
-        payload = data.get("data", {})
-
-        logger.info(f"📨 Received from {addr}: {cmd}")
-
-        # Xử lý commands
-        if cmd == "LIST_ROOMS":
-            rooms = await room_manager.list_rooms()
-            response = {"cmd": "ROOM_LIST", "data": rooms, "status": "OK"}
-
-        elif cmd == "CREATE_ROOM":
-            room_id = payload.get("room_id", f"ROOM_{int(time.time())}")
-            # host_id được giả định là None hoặc lấy từ payload
-            room_info = await room_manager.create_room(room_id, host_id=None)
-            response = {"cmd": "ROOM_CREATED", "data": room_info, "status": "OK"} if room_info else response
-
-        elif cmd == "JOIN_ROOM":
-            room_id = payload.get("room_id")
-            player_name = payload.get("player_name", f"Player_{addr[1]}")
-
-            # Giả định client_id (định danh duy nhất) được tạo ra từ đâu đó
-            client_id = f"{addr[0]}:{addr[1]}"
-
-            if room_id and room_id in room_manager.rooms:
-                room_info = await room_manager.add_player(room_id, player_name, client_id)
-                if room_info:
-                    response = {"cmd": "JOIN_SUCCESS", "status": "OK", "data": room_info}
-                    # TƯƠNG LAI: network_manager.map_client_to_room(client_id, room_id)
-                else:
-                    response = {"cmd": "ERROR", "status": "ERROR", "message": "Join room failed (Room full/In game)"}
-            else:
-                response = {"cmd": "ERROR", "status": "ERROR", "message": f"Room '{room_id}' not found."}
-
-        elif cmd == "LEAVE_ROOM":
-            room_id = payload.get("room_id")
-            player_id = payload.get("player_id")  # Giả định client gửi player_id/name
-
-            if room_id and player_id:
-                success = await room_manager.remove_player(room_id, player_id)
-                response = {"cmd": "LEAVE_RESULT", "status": "OK" if success else "ERROR"}
-            else:
-                response = {"cmd": "ERROR", "status": "ERROR", "message": "Missing room_id or player_id"}
-
-        else:
-            response = {"cmd": "ERROR", "status": "ERROR", "message": f"Unknown command: {cmd}"}
-
-    except json.JSONDecodeError as ee:
+        # Parse JSON trực tiếp từ bytes
+        data = decode_frame(frame)
+        if not isinstance(data, dict):
+            raise ValueError("Message must be a JSON object")
+        logger.info(f"📨 Received from {addr}: {data.get('cmd')}")
+        response = await command_router.dispatch(data, conn)
+
+    except (json.JSONDecodeError, UnicodeDecodeError) as ee:
         logger.error(f"❌ JSON decode error from {addr}: {ee}")
         response = {"cmd": "ERROR", "status": "ERROR", "message": "Invalid JSON format"}
     except Exception as ee:
         logger.error(f"❌ Error processing message from {addr}: {ee}")
         # response đã là Internal server error ở đầu hàm
+        response = command_router.tag_response(data, response)
 
     finally:
-        # Gửi phản hồi
-        response_str = json.dumps(response, ensure_ascii=False) + "\n"
-        writer.write(response_str.encode('utf-8'))
-        await writer.drain()
-        logger.debug(f"📤 Sent response: {response.get('cmd')} to {addr}")
+        # Mã hóa bằng framing hiện tại rồi mới chuyển framing (nếu vừa thương lượng)
+        conn["outbox"].append(conn["framing"].encode(response))
+        conn["outbox_ready"].set()
+        if conn["next_framing"] is not None:
+            conn["framing"], conn["next_framing"] = conn["next_framing"], None
+            logger.info(f"🔀 Client {addr} switched framing to {conn['framing'].name}")
 
 
 # ============================================================
@@ -588,6 +706,7 @@ async def shutdown():
 
     await asyncio.sleep(1)
     logger.info("✅ Server shutdown complete")
+    logger.flush()
 
 
 def signal_handler(sig, frame):
@@ -597,6 +716,23 @@ def signal_handler(sig, frame):
     running = False
 
 
+def send_heartbeat(room_id: str) -> int:
+    """Dựng + gửi heartbeat của một phòng (gọi bởi HeartbeatScheduler). Trả về số người chơi."""
+    room_info = room_manager.rooms.get(room_id)
+    if room_info is None:
+        return 0
+    players = room_info["state"].players  # Giả định RoomState có thuộc tính players
+    state_packet = PacketBuilder.heartbeat(
+        room_id,
+        [p.serialize() for p in players],
+        len(room_manager.rooms),
+    )
+    # NetworkManager sẽ tìm IP/Port của phòng và gửi Multicast
+    network_manager.send_packet(room_id, state_packet)
+    logger.debug("📤 Heartbeat sent to %s", room_id)
+    return len(players)
+
+
 async def main_loop():
     """Vòng lặp chính của server (Heartbeat/Game Tick)"""
     global running
@@ -605,33 +741,13 @@ async def main_loop():
 
     while running:
         try:
-            # Gửi Heartbeat cho TẤT CẢ các phòng
-            for room_id, room_info in room_manager.rooms.items():
-                try:
-                    # 1. Tạo Heartbeat Packet
-                    state_packet = {
-                        "header": {
-                            "room_id": room_id,
-                            "type": "STATE",
-                            "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                        },
-                        "command": {"action": "HEARTBEAT"},
-                        "payload": {
-                            "players": [p.to_dict() for p in room_info["state"].players],
-                            # Giả định RoomState có thuộc tính players
-                            "active_rooms": len(room_manager.rooms)
-                        }
-                    }
-
-                    # 2. 📤 Gửi qua NetworkManager 📤
-                    # NetworkManager sẽ tìm IP/Port của phòng và gửi Multicast
-                    network_manager.send_packet(room_id, state_packet)
-
-                    logger.debug(f"📤 Heartbeat sent to {room_id}")
-                except Exception as e:
-                    logger.error(f"❌ Error sending heartbeat to {room_id}: {e}")
-
-            await asyncio.sleep(SERVER_CONFIG["tick_rate"])
+            # Chỉ các phòng tới hạn heartbeat (hạn rải đều trong tick, phòng có traffic / nhàn rỗi được dời)
+            delay = heartbeats.run_due()
+
+            # Thu hồi địa chỉ multicast của phòng chết không dọn dẹp (lease hết hạn)
+            network_manager.multicast.reap_expired()
+
+            await asyncio.sleep(min(delay, SERVER_CONFIG["tick_rate"]))
 
         except Exception as e:
             logger.error(f"❌ Main loop error: {e}")
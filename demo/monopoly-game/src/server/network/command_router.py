@@ -0,0 +1,96 @@
+# server/network/command_router.py
+"""
+Command Router cho kênh điều khiển TCP
+-------------------------------------
+- Bảng ánh xạ cmd → handler (thay cho chuỗi if/elif).
+- Mỗi lệnh khai báo schema: trường bắt buộc / tùy chọn và kiểu dữ liệu.
+- Request ID: nếu message có "req_id", phản hồi sẽ mang lại đúng "req_id" đó
+  để client ghép phản hồi không theo thứ tự gửi.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+Handler = Callable[[dict, dict], Awaitable[dict]]
+FieldType = Union[type, Tuple[type, ...]]
+
+REQUEST_ID_FIELD = "req_id"
+
+
+class CommandRouter:
+    """Đăng ký và điều phối lệnh TCP: {"cmd": ..., "data": {...}, "req_id": ...}."""
+
+    def __init__(self):
+        self.routes: Dict[str, dict] = {}  # {cmd: {"handler", "required", "optional"}}
+
+    # ------------------------------------------------------------------
+    # 📝 ĐĂNG KÝ
+    # ------------------------------------------------------------------
+    def register(self, cmd: str, handler: Handler, required: Dict[str, FieldType] = None,
+                 optional: Dict[str, FieldType] = None):
+        """
+        Đăng ký handler cho một lệnh.
+        :param handler: async fn(payload, conn) -> response dict
+        :param required: {field: type} bắt buộc trong "data"
+        :param optional: {field: type} tùy chọn trong "data" (kiểm tra kiểu nếu có mặt)
+        """
+        if cmd in self.routes:
+            raise ValueError(f"Command '{cmd}' already registered")
+        self.routes[cmd] = {"handler": handler, "required": required or {}, "optional": optional or {}}
+
+    def route(self, cmd: str, required: Dict[str, FieldType] = None, optional: Dict[str, FieldType] = None):
+        """Decorator tương đương register()."""
+        def decorator(handler: Handler) -> Handler:
+            self.register(cmd, handler, required, optional)
+            return handler
+        return decorator
+
+    # ------------------------------------------------------------------
+    # 🔎 SCHEMA
+    # ------------------------------------------------------------------
+    @staticmethod
+    def validate(payload: Any, required: Dict[str, FieldType], optional: Dict[str, FieldType]) -> Optional[str]:
+        """Trả về thông báo lỗi nếu payload không khớp schema, None nếu hợp lệ."""
+        if not isinstance(payload, dict):
+            return "Field 'data' must be an object"
+        for field, field_type in required.items():
+            if payload.get(field) is None:
+                return f"Missing field '{field}'"
+            if not isinstance(payload[field], field_type):
+                return f"Field '{field}' must be {CommandRouter._type_name(field_type)}"
+        for field, field_type in optional.items():
+            value = payload.get(field)
+            if value is not None and not isinstance(value, field_type):
+                return f"Field '{field}' must be {CommandRouter._type_name(field_type)}"
+        return None
+
+    @staticmethod
+    def _type_name(field_type) -> str:
+        if isinstance(field_type, tuple):
+            return " | ".join(t.__name__ for t in field_type)
+        return field_type.__name__
+
+    # ------------------------------------------------------------------
+    # 🚦 DISPATCH
+    # ------------------------------------------------------------------
+    async def dispatch(self, message: dict, conn: dict) -> dict:
+        """Chạy handler tương ứng và gắn req_id (nếu có) vào phản hồi."""
+        cmd = message.get("cmd")
+        payload = message.get("data") or {}
+        route = self.routes.get(cmd)
+
+        if route is None:
+            response = {"cmd": "ERROR", "status": "ERROR", "message": f"Unknown command: {cmd}"}
+        else:
+            error = self.validate(payload, route["required"], route["optional"])
+            if error:
+                response = {"cmd": "ERROR", "status": "ERROR", "message": error}
+            else:
+                response = await route["handler"](payload, conn)
+
+        return self.tag_response(message, response)
+
+    @staticmethod
+    def tag_response(message: Any, response: dict) -> dict:
+        """Gắn lại req_id của request vào phản hồi."""
+        if isinstance(message, dict) and message.get(REQUEST_ID_FIELD) is not None:
+            response[REQUEST_ID_FIELD] = message[REQUEST_ID_FIELD]
+        return response
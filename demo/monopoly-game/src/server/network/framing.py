@@ -0,0 +1,97 @@
+# server/network/framing.py
+"""
+Framing Layer cho kênh điều khiển TCP
+------------------------------------
+Tách message từ luồng TCP, đọc thẳng từ bộ đệm của StreamReader (bytes),
+không decode sang str và không nối chuỗi trung gian.
+
+- NDJSONFraming: mỗi message là một dòng JSON kết thúc bằng '\\n' (mặc định, tương thích client cũ).
+- LengthPrefixedFraming: 4 byte big-endian độ dài + JSON UTF-8.
+
+Mỗi kết nối giữ một instance framing riêng; client có thể chuyển framing bằng lệnh
+NEGOTIATE_FRAMING (phản hồi được gửi bằng framing cũ, sau đó mới chuyển).
+"""
+import asyncio
+import json
+import struct
+from typing import Optional
+
+
+MAX_FRAME_SIZE = 1024 * 1024  # 1 MiB
+
+
+class FrameTooLargeError(ValueError):
+    """Message vượt quá MAX_FRAME_SIZE."""
+
+
+class NDJSONFraming:
+    """Message phân tách bằng '\\n'."""
+
+    name = "ndjson"
+    DELIMITER = b"\n"
+
+    async def read_frame(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Đọc một message hoàn chỉnh (không gồm '\\n').
+        Trả về None khi client đóng kết nối.
+        """
+        try:
+            line = await reader.readuntil(self.DELIMITER)
+        except asyncio.IncompleteReadError as e:
+            # EOF: phần dư không có '\n' vẫn được xử lý như message cuối cùng
+            return e.partial or None
+        except asyncio.LimitOverrunError as e:
+            raise FrameTooLargeError(f"NDJSON line vượt quá giới hạn buffer ({e.consumed} bytes)")
+        return line[:-1]
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message, ensure_ascii=False).encode("utf-8") + self.DELIMITER
+
+
+class LengthPrefixedFraming:
+    """Message = header 4 byte (độ dài, big-endian) + JSON UTF-8."""
+
+    name = "length_prefixed"
+    HEADER = struct.Struct("!I")
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        # Độ dài đã đọc nhưng chưa đọc body (giữ lại nếu read_frame bị cancel giữa chừng)
+        self._pending_length: Optional[int] = None
+
+    async def read_frame(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        try:
+            if self._pending_length is None:
+                header = await reader.readexactly(self.HEADER.size)
+                (length,) = self.HEADER.unpack(header)
+                if length > self.max_frame_size:
+                    raise FrameTooLargeError(f"Frame {length} bytes vượt quá giới hạn {self.max_frame_size}")
+                self._pending_length = length
+            body = await reader.readexactly(self._pending_length)
+        except asyncio.IncompleteReadError:
+            return None
+        self._pending_length = None
+        return body
+
+    def encode(self, message: dict) -> bytes:
+        body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        return self.HEADER.pack(len(body)) + body
+
+
+FRAMINGS = {
+    NDJSONFraming.name: NDJSONFraming,
+    LengthPrefixedFraming.name: LengthPrefixedFraming,
+}
+
+
+def create_framing(name: str = NDJSONFraming.name):
+    """Tạo framing theo tên ("ndjson" | "length_prefixed")."""
+    framing_cls = FRAMINGS.get(name)
+    if framing_cls is None:
+        raise ValueError(f"Unknown framing '{name}'. Supported: {', '.join(FRAMINGS)}")
+    return framing_cls()
+
+
+def decode_frame(frame: bytes) -> dict:
+    """Parse JSON trực tiếp từ bytes (json tự nhận diện UTF-8)."""
+    return json.loads(frame)
@@ -0,0 +1,191 @@
+"""
+multicast_allocator.py — cấp phát địa chỉ (ip, port) multicast cho phòng
+------------------------------------------------------------------------
+- Không gian địa chỉ = các dải IP multicast × port_count port, mỗi cặp (ip, port) là một slot.
+  Slot i ↔ (ip thứ i // port_count, base_port + i % port_count): hết port của IP đầu mới sang IP kế
+  (cùng thứ tự với cách cấp cũ, các phòng không dùng chung port khi còn port trống).
+- allocate / release O(1): slot chưa dùng lấy theo con trỏ tăng dần, slot trả về vào hàng đợi FIFO
+  (địa chỉ vừa trả được dùng lại muộn nhất có thể → client cũ còn nghe group cũ ít bị lẫn phòng mới).
+- Lease có TTL: phòng chết mà không ai gọi release thì lease hết hạn và slot được thu hồi
+  trong reap() (heap theo thời điểm hết hạn, renew chỉ ghi lại mốc thời gian — O(1)).
+"""
+import heapq
+import ipaddress
+import socket
+import struct
+import time
+from bisect import bisect_right
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Union
+
+LEGACY_HOSTS = 253  # base_ip không có prefix: x.y.z.1 .. x.y.z.253 như pool cũ
+
+
+class AddressExhausted(RuntimeError):
+    """Không còn cặp (ip, port) multicast nào trống."""
+
+
+class Lease:
+    """Quyền dùng một slot (ip, port) của một phòng."""
+
+    __slots__ = ("index", "ip", "port", "owner", "expires", "active")
+
+    def __init__(self, index: int, ip: str, port: int, owner, expires: Optional[float]):
+        self.index = index
+        self.ip = ip
+        self.port = port
+        self.owner = owner
+        self.expires = expires  # None: không hết hạn
+        self.active = True
+
+    def __repr__(self):
+        return f"Lease({self.owner!r}, {self.ip}:{self.port})"
+
+
+def parse_ip_ranges(base_ip: Union[str, Iterable[str]]) -> List[tuple]:
+    """
+    Dải IP multicast → [(ip đầu dạng int, số IP)].
+    - "239.0.0.0"       : như cũ, một /24 (239.0.0.1 .. 239.0.0.253).
+    - "239.1.0.0/16"    : cả mạng trừ địa chỉ mạng (239.1.0.1 .. 239.1.255.255).
+    - ["239.1.0.0/16", "239.2.0.0/24", ...]: ghép nhiều dải theo thứ tự.
+    """
+    specs = [base_ip] if isinstance(base_ip, str) else list(base_ip)
+    ranges = []
+    for spec in specs:
+        if "/" in spec:
+            net = ipaddress.IPv4Network(spec, strict=False)
+            first, count = int(net.network_address), net.num_addresses
+            if count > 1:
+                first, count = first + 1, count - 1
+        else:
+            net = ipaddress.IPv4Network(f"{spec}/24", strict=False)
+            first, count = int(net.network_address) + 1, LEGACY_HOSTS
+        if not net.is_multicast:
+            raise ValueError(f"{spec} không phải dải IP multicast")
+        ranges.append((first, count))
+    if not ranges:
+        raise ValueError("Cần ít nhất một dải IP multicast")
+    return ranges
+
+
+class MulticastAllocator:
+    """Cấp phát (ip, port) multicast O(1) với lease có TTL."""
+
+    def __init__(self, base_ip: Union[str, Iterable[str]] = "239.0.0.0", base_port: int = 5000,
+                 port_count: int = 1000, lease_ttl: Optional[float] = None,
+                 on_expire: Callable[[Lease], None] = None, clock: Callable[[], float] = time.monotonic):
+        self.base_port = base_port
+        self.port_count = port_count
+        self.lease_ttl = lease_ttl  # None: lease không hết hạn (chỉ trả bằng release)
+        self.on_expire = on_expire
+        self.clock = clock
+
+        self._ranges = parse_ip_ranges(base_ip)
+        self._range_starts = []  # chỉ số IP đầu tiên của mỗi dải (bisect)
+        total = 0
+        for _, count in self._ranges:
+            self._range_starts.append(total)
+            total += count
+        self.ip_count = total
+        self.capacity = total * port_count
+
+        self._next = 0            # slot chưa từng cấp tiếp theo
+        self._free = deque()      # slot đã trả, FIFO
+        self.leases = {}          # {slot: Lease}
+        self._expiry = []         # heap (expires, thứ tự, Lease); entry cũ bỏ qua khi pop
+        self._order = 0
+        self._stale = 0           # entry trong heap của lease đã release
+        self.stats = {"allocated": 0, "released": 0, "expired": 0}
+
+    # ------------------------------------------------------------------
+    # 🧮 SLOT ↔ ĐỊA CHỈ
+    # ------------------------------------------------------------------
+    def address_of(self, index: int) -> tuple:
+        ip_index, port_offset = divmod(index, self.port_count)
+        r = bisect_right(self._range_starts, ip_index) - 1
+        ip_int = self._ranges[r][0] + ip_index - self._range_starts[r]
+        return socket.inet_ntoa(struct.pack("!I", ip_int)), self.base_port + port_offset
+
+    @property
+    def in_use(self) -> int:
+        return len(self.leases)
+
+    # ------------------------------------------------------------------
+    # 📦 CẤP / TRẢ
+    # ------------------------------------------------------------------
+    def allocate(self, owner=None) -> Lease:
+        now = self.clock()
+        if self._expiry and self._expiry[0][0] <= now:
+            self.reap(now)
+        if self._next < self.capacity:
+            index = self._next
+            self._next += 1
+        elif self._free:
+            index = self._free.popleft()
+        else:
+            raise AddressExhausted("Không còn IP/Port multicast khả dụng!")
+
+        ip, port = self.address_of(index)
+        lease = Lease(index, ip, port, owner, None if self.lease_ttl is None else now + self.lease_ttl)
+        self.leases[index] = lease
+        if lease.expires is not None:
+            self._push(lease)
+        self.stats["allocated"] += 1
+        return lease
+
+    def release(self, lease: Lease) -> bool:
+        """Trả slot về pool. Gọi lại trên lease đã trả / đã hết hạn thì bỏ qua."""
+        if not lease.active or self.leases.get(lease.index) is not lease:
+            return False
+        lease.active = False
+        del self.leases[lease.index]
+        self._free.append(lease.index)
+        self.stats["released"] += 1
+        if lease.expires is not None:
+            self._stale += 1
+            if self._stale > 64 and self._stale > len(self.leases):
+                self._compact()
+        return True
+
+    def renew(self, lease: Lease):
+        """Gia hạn lease (phòng còn hoạt động). Chỉ ghi mốc mới; heap được sửa lười trong reap()."""
+        if lease.active and self.lease_ttl is not None:
+            lease.expires = self.clock() + self.lease_ttl
+
+    # ------------------------------------------------------------------
+    # ⏳ HẾT HẠN
+    # ------------------------------------------------------------------
+    def reap(self, now: float = None) -> List[Lease]:
+        """Thu hồi các lease đã hết hạn; gọi on_expire(lease) cho từng lease (slot đã về pool)."""
+        now = self.clock() if now is None else now
+        expired = []
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            _, _, lease = heapq.heappop(heap)
+            if not lease.active:
+                self._stale -= 1
+            elif lease.expires > now:
+                self._push(lease)  # đã được renew sau lần push trước
+            else:
+                lease.active = False
+                del self.leases[lease.index]
+                self._free.append(lease.index)
+                self.stats["expired"] += 1
+                expired.append(lease)
+        for lease in expired:
+            if self.on_expire:
+                self.on_expire(lease)
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        """Mốc hết hạn sớm nhất có thể (để hẹn giờ reap); None nếu không có lease nào có TTL."""
+        return self._expiry[0][0] if self._expiry else None
+
+    def _push(self, lease: Lease):
+        self._order += 1
+        heapq.heappush(self._expiry, (lease.expires, self._order, lease))
+
+    def _compact(self):
+        self._expiry = [entry for entry in self._expiry if entry[2].active]
+        heapq.heapify(self._expiry)
+        self._stale = 0
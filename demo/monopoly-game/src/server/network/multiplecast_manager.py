@@ -1,7 +1,11 @@
 import socket
 import struct
+import time
 from ..utils import logger
-from .network_utils import udp_send
+from .multicast_allocator import MulticastAllocator
+from .socket_pool import SocketPool
+from .send_batch import DatagramBatcher
+from ...shared.wire_codec import JSON, make_codec, negotiate
 
 
 class MulticastManager:
@@ -13,30 +17,58 @@ class MulticastManager:
     - Hỗ trợ phân loại client: host, player, observer.
     """
 
-    def __init__(self,logger_ins : 'logger', base_ip="239.0.0.0", base_port=5000):
-        self.groups = {}  # { room_id: { "ip", "port", "socket", "clients": {id: info}} }
-        self.base_ip = base_ip
+    def __init__(self,logger_ins : 'logger', base_ip="239.0.0.0", base_port=5000, interface_ip=None,
+                 port_count=1000, lease_ttl=None, socket_pool_size=0):
+        # { room_id: { "ip", "port", "socket", "room_no", "codec", "lease", "shared", "uplink", "active_at", "clients": {id: info}} }
+        self.groups = {}
+        self.base_ip = base_ip  # "239.0.0.0" (một /24 như cũ) | "239.1.0.0/16" | list nhiều dải
         self.base_port = base_port
-        self.ip_pool = self._generate_multicast_ip_pool()
+        self.interface_ip = interface_ip  # None: interface mặc định của hệ thống; "127.0.0.1": chỉ loopback
+        self._next_room_no = 1  # số phòng trong header codec nhị phân (không dùng lại trong một process)
         self.logger =logger_ins
-        self.logger.info(message=f"[MULTICAST MANAGER] Initialized base={self.base_ip}:{self.base_port}")
+        # lease_ttl: phòng không có traffic gửi / nhận trong lease_ttl giây bị coi là chết → thu hồi group
+        # socket_pool_size > 0: mọi phòng dùng chung socket_pool_size socket group (+1 uplink) thay vì mỗi phòng một socket;
+        # port của phòng quyết định socket nên allocator chỉ cấp đúng các port của pool
+        self.pool = SocketPool(socket_pool_size, base_port, interface_ip) if socket_pool_size > 0 else None
+        if self.pool is not None:
+            port_count = socket_pool_size
+        self.allocator = MulticastAllocator(base_ip, base_port, port_count, lease_ttl, on_expire=self._on_lease_expired)
+        self.sender = DatagramBatcher(logger_ins)  # datagram gom theo socket, xả mỗi vòng event loop
+        self.group_watchers = {"on_group_created": [], "on_group_removed": [], "on_group_expired": []}  # {"event": [callback_fn(room_id, group)]}
+        self.pool_watchers = []  # [callback_fn(pool)] gọi trước khi socket của pool bị đóng
+        self.logger.info(message=f"[MULTICAST MANAGER] Initialized base={self.base_ip}:{self.base_port} "
+                                 f"({self.allocator.capacity} địa chỉ)")
 
     # --------------------------------------------------------------------------
     # 🧱 IP/Port Pool
     # --------------------------------------------------------------------------
-    def _generate_multicast_ip_pool(self, start=1, end=254):
-        """Sinh danh sách IP multicast khả dụng (239.x.x.x)."""
-        base_parts = self.base_ip.split(".")
-        base_prefix = ".".join(base_parts[:3])
-        return [f"{base_prefix}.{i}" for i in range(start, end)]
-
-    def _get_next_available_group(self):
-        """Lấy IP + Port khả dụng cho phòng mới."""
-        for ip in self.ip_pool:
-            for port in range(self.base_port, self.base_port + 1000):
-                if all((g["ip"], g["port"]) != (ip, port) for g in self.groups.values()):
-                    return ip, port
-        raise RuntimeError("Không còn IP/Port multicast khả dụng!")
+    def renew_lease(self, room_id: str):
+        """Đánh dấu phòng còn hoạt động (gia hạn lease địa chỉ multicast)."""
+        group = self.groups.get(room_id)
+        if group:
+            self.allocator.renew(group["lease"])
+
+    def mark_active(self, group: dict):
+        """Phòng vừa có traffic (gửi / nhận): ghi mốc hoạt động (time.monotonic) và gia hạn lease."""
+        group["active_at"] = time.monotonic()
+        self.allocator.renew(group["lease"])
+
+    def last_activity(self, room_id: str):
+        """Mốc traffic gần nhất của phòng (time.monotonic), None nếu phòng không tồn tại."""
+        group = self.groups.get(room_id)
+        return group["active_at"] if group else None
+
+    def reap_expired(self):
+        """Thu hồi group của các phòng hết hạn lease (chết mà không gọi remove_group)."""
+        return self.allocator.reap()
+
+    def _on_lease_expired(self, lease):
+        group = self.groups.get(lease.owner)
+        if group is not None and group["lease"] is lease:
+            self.logger.warning(f"[MULTICAST] Lease {lease.owner} ({lease.ip}:{lease.port}) hết hạn, thu hồi group.")
+            # Địa chỉ đã về pool → gỡ group ngay; chủ phòng (RoomManager) được báo để dọn phòng
+            self.remove_group(lease.owner)
+            self._notify_watchers("on_group_expired", lease.owner, group)
 
     # --------------------------------------------------------------------------
     # 🏠 Group Management
@@ -46,23 +78,45 @@ class MulticastManager:
         if room_id in self.groups:
             return self.groups[room_id]
 
-        ip, port = self._get_next_available_group()
+        lease = self.allocator.allocate(room_id)
+        ip, port = lease.ip, lease.port
+        room_no, self._next_room_no = self._next_room_no, self._next_room_no + 1
+        if self.pool is not None:
+            return self._create_shared_group(room_id, ip, port, room_no, lease)
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             sock.bind(('', port))
 
             # Join multicast group
-            mreq = struct.pack("4sl", socket.inet_aton(ip), socket.INADDR_ANY)
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, self._membership(ip))
             sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            if self.interface_ip:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface_ip))
 
             self.logger.info(message =f"[MULTICAST] Room {room_id} joined group {ip}:{port}")
         except OSError as e:
             self.logger.warning(f"[MULTICAST FALLBACK] Không thể join multicast ({e}). Dùng UDP thường.")
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-        self.groups[room_id] = {"ip": ip, "port": port, "socket": sock, "clients": {}}
+        self.groups[room_id] = {
+            "ip": ip, "port": port, "socket": sock, "clients": {},
+            "room_no": room_no, "codec": make_codec(negotiate([]), room_id, room_no), "lease": lease,
+            "shared": False, "uplink": False, "active_at": 0.0,
+        }
+        self._notify_watchers("on_group_created", room_id, self.groups[room_id])
+        return self.groups[room_id]
+
+    def _create_shared_group(self, room_id: str, ip: str, port: int, room_no: int, lease):
+        """Group trên socket dùng chung của pool; uplink=True khi socket không join thêm được group."""
+        joined = self.pool.attach(room_id, ip, port, room_no)
+        self.groups[room_id] = {
+            "ip": ip, "port": port, "socket": self.pool.socket_for(port), "clients": {},
+            "room_no": room_no, "codec": make_codec(negotiate([]), room_id, room_no), "lease": lease,
+            "shared": True, "uplink": not joined, "active_at": 0.0,
+        }
+        self.logger.debug(f"[MULTICAST] Room {room_id} -> {ip}:{port} (pool, {'joined' if joined else 'uplink'})")
+        self._notify_watchers("on_group_created", room_id, self.groups[room_id])
         return self.groups[room_id]
 
     def remove_group(self, room_id: str):
@@ -72,20 +126,68 @@ class MulticastManager:
             self.logger.warning(f"[MULTICAST] Group {room_id} không tồn tại để xóa.")
             return
 
+        self._notify_watchers("on_group_removed", room_id, group)
+        self.allocator.release(group["lease"])
         ip, port, sock = group["ip"], group["port"], group["socket"]
+        if group["shared"]:
+            self.pool.detach(room_id)  # socket dùng chung: chỉ bỏ group, không đóng
+            self.logger.debug(f"[MULTICAST] Removed group {room_id} ({ip}:{port}) khỏi pool")
+            return
+        self.sender.flush_socket(sock)  # datagram còn trong hàng đợi đi trước khi đóng socket
         try:
-            mreq = struct.pack("4sl", socket.inet_aton(ip), socket.INADDR_ANY)
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, self._membership(ip))
         except OSError:
             pass
         finally:
             sock.close()
             self.logger.info(message=f"[MULTICAST] Removed group {room_id} ({ip}:{port})")
 
+    def set_codec(self, room_id: str, codec_name: str):
+        """
+        Đổi codec gửi của phòng. Thông báo ROOM_CODEC luôn gửi bằng JSON để mọi client
+        (kể cả client cũ) đọc được; bên nhận tự nhận dạng JSON / nhị phân theo byte đầu.
+        """
+        group = self.groups.get(room_id)
+        if not group or group["codec"].name == codec_name:
+            return
+        group["codec"] = make_codec(codec_name, room_id, group["room_no"])
+        notice = {"type": "ROOM_CODEC", "room_id": room_id, "codec": codec_name, "room_no": group["room_no"]}
+        self.sender.queue(group["socket"], make_codec(JSON).encode(notice), (group["ip"], group["port"]))
+        self.logger.info(message=f"[MULTICAST] Room {room_id} codec -> {codec_name}")
+
+    def _membership(self, ip: str) -> bytes:
+        """ip_mreq cho IP_ADD/DROP_MEMBERSHIP trên interface đã cấu hình (hoặc INADDR_ANY)."""
+        if self.interface_ip:
+            return socket.inet_aton(ip) + socket.inet_aton(self.interface_ip)
+        return struct.pack("4sl", socket.inet_aton(ip), socket.INADDR_ANY)
+
+    def watch_groups(self, on_created=None, on_removed=None, on_pool_closing=None, on_expired=None):
+        """
+        Đăng ký callback khi group được tạo / xóa (vd: NetworkManager gắn socket vào event loop).
+        Callback nhận (room_id, group) và được gọi đồng bộ, trước khi socket bị đóng.
+        on_pool_closing(pool): gọi một lần trước khi các socket dùng chung của pool bị đóng.
+        on_expired(room_id, group): group vừa bị thu hồi vì lease hết hạn (sau on_removed).
+        """
+        if on_created:
+            self.group_watchers["on_group_created"].append(on_created)
+        if on_removed:
+            self.group_watchers["on_group_removed"].append(on_removed)
+        if on_pool_closing:
+            self.pool_watchers.append(on_pool_closing)
+        if on_expired:
+            self.group_watchers["on_group_expired"].append(on_expired)
+
+    def _notify_watchers(self, event_name: str, room_id: str, group: dict):
+        for cb in self.group_watchers.get(event_name, []):
+            try:
+                cb(room_id, group)
+            except Exception as e:
+                self.logger.error(f"[MULTICAST] Watcher '{event_name}' lỗi cho {room_id}: {e}")
+
     def list_groups(self):
         """Liệt kê tất cả group hiện có."""
         return {
-            rid: {"ip": info["ip"], "port": info["port"], "client_count": len(info["clients"])}
+            rid: {"ip": info["ip"], "port": info["port"], "codec": info["codec"].name, "client_count": len(info["clients"])}
             for rid, info in self.groups.items()
         }
 
@@ -131,19 +233,25 @@ class MulticastManager:
         if not group:
             self.logger.error(f"[MULTICAST SEND] Room {room_id} chưa có group.")
             return
+        self.mark_active(group)
+
+        try:
+            data = group["codec"].encode(packet)  # encode một lần cho mọi người nhận
+        except Exception as e:
+            self.logger.error(f"[MULTICAST SEND] Không encode được packet cho {room_id}: {e}")
+            return
 
         # Gửi multicast toàn phòng
         if target == "all":
-            udp_send(group["socket"],packet, (group["ip"], group["port"]))
-            self.logger.debug(message=f"[MULTICAST] Broadcast room {room_id} -> {group['ip']}:{group['port']}")
+            self.sender.queue(group["socket"], data, (group["ip"], group["port"]))
+            self.logger.debug("[MULTICAST] Broadcast room %s -> %s:%s", room_id, group["ip"], group["port"])
             return
 
-
         # Gửi unicast đến 1 client cụ thể hoặc theo vai trò
-        for cid, info in group["clients"].items():
-            if (target != "all" and cid == target) or (role and info["role"] == role):
-                udp_send(group["socket"],packet, info["addr"])
-                self.logger.debug(message=f"[UNICAST] {room_id} -> {cid} ({info['role']}) {info['addr']}")
+        addrs = [info["addr"] for cid, info in group["clients"].items()
+                 if cid == target or (role and info["role"] == role)]
+        self.sender.queue_many(group["socket"], data, addrs)
+        self.logger.debug("[UNICAST] %s -> %s (%s): %d client", room_id, target, role, len(addrs))
 
     # --------------------------------------------------------------------------
     # 🧪 Debug
@@ -153,14 +261,24 @@ class MulticastManager:
         self.send_packet(room_id, packet)
 
     def close_all_multicast_groups(self):
-        """Đóng tất cả các socket multicast đã đăng ký."""
-        for room_id, group in list(self.groups.items()):  # Dùng list() để duyệt và pop an toàn
+        """
+        Đóng tất cả các group multicast (khi tắt server).
+        Mỗi phòng đi qua remove_group (watcher, trả lease, gỡ khỏi pool hoặc đóng socket riêng);
+        socket dùng chung của pool + uplink chỉ được đóng một lần, sau khi watcher gỡ reader.
+        """
+        for room_id in list(self.groups):  # Dùng list() để duyệt và pop an toàn
             try:
-                sock = group.get("socket")
-                if sock:
-                    sock.close()
-                    self.logger.debug(f"[MULTICAST] Closed socket for room {room_id}")
-                # Xóa khỏi danh sách group
-                self.groups.pop(room_id, None)
+                self.remove_group(room_id)
             except Exception as e:
+                self.groups.pop(room_id, None)
                 self.logger.error(f"❌ Error closing socket for {room_id}: {e}")
+        if self.pool is None:
+            return
+        self.sender.flush()  # datagram còn trong hàng đợi của socket pool
+        for cb in self.pool_watchers:
+            try:
+                cb(self.pool)
+            except Exception as e:
+                self.logger.error(f"[MULTICAST] Pool watcher lỗi: {e}")
+        self.pool.close()
+        self.logger.debug(f"[MULTICAST] Closed socket pool ({self.pool.fd_count} sockets)")
@@ -4,6 +4,8 @@ import json
 from json import JSONDecodeError
 
 from .multiplecast_manager import MulticastManager
+from ...shared.reliable_udp import ReliableChannel, ReliableEndpoint, is_transport_packet
+from ...shared.wire_codec import CodecError
 
 
 class NetworkManager:
@@ -13,14 +15,35 @@ class NetworkManager:
     - Nhận: async listener cho multicast.
     - Quản lý: mapping client_id ↔ room_id.
     - Phát sự kiện: cho phép đăng ký callback (on_packet, on_join, on_leave, ...).
+    - Tin cậy chọn lọc: packet gửi với reliable=True đi qua ReliableEndpoint của phòng
+      (seq / ACK / phát lại); packet thường không có thêm chi phí nào.
+    - Backpressure: hàng đợi nhận có giới hạn (inbox_limit); khi đầy mọi reader tạm gỡ khỏi
+      event loop → datagram nằm lại (rồi bị bỏ) trong buffer của kernel thay vì dồn vào bộ nhớ.
     """
 
-    def __init__(self, logger_ins):
+    RECV_BATCH = 64  # Số datagram tối đa đọc cho mỗi lần socket sẵn sàng (tránh một phòng chiếm loop)
+    SENDER_ID = "SERVER"  # header.sender của server trong lớp tin cậy
+
+    def __init__(self, logger_ins, multicast_interface: str = None, multicast_range="239.0.0.0",
+                 multicast_lease_ttl: float = None, socket_pool_size: int = 0, inbox_limit: int = 4096):
         self.client_room_map = {}      # {client_id: room_id}
         self.event_listeners = {}      # {"event_name": [callback_fn]}
         self._listening = False
+        self._loop = None
+        self._inbox = None             # asyncio.Queue các packet đã nhận, chờ phát on_packet
+        self.inbox_limit = inbox_limit # đủ số packet chờ → ngừng đọc socket tới khi còn một nửa
+        self.inbox_pauses = 0          # số lần phải ngừng đọc vì hàng đợi đầy
+        self._paused = False
+        self._callbacks = {}           # {fd: (callback, args)} mọi reader đang đăng ký (kể cả lúc tạm gỡ)
+        self._readers = {}             # {room_id: fd} socket đang được event loop theo dõi
+        self._pool_fds = []            # fd các socket dùng chung của pool đang được event loop theo dõi
+        self._reliable = {}            # {room_id: ReliableEndpoint} tạo khi phòng có traffic tin cậy
         self.logger = logger_ins
-        self.multicast = MulticastManager(logger_ins=self.logger)
+        self.multicast = MulticastManager(logger_ins=self.logger, base_ip=multicast_range,
+                                          interface_ip=multicast_interface, lease_ttl=multicast_lease_ttl,
+                                          socket_pool_size=socket_pool_size)
+        self.multicast.watch_groups(on_created=self._attach_room_socket, on_removed=self._detach_room_socket,
+                                    on_pool_closing=self._detach_pool_sockets)
 
     # ------------------------------------------------------------------
     # 🔌 CLIENT - ROOM MAPPING
@@ -39,30 +62,52 @@ class NetworkManager:
     # ------------------------------------------------------------------
     # 📨 SEND
     # ------------------------------------------------------------------
-    def send_packet(self, room_id: str, packet: dict, target="all", role=None):
+    def send_packet(self, room_id: str, packet: dict, target="all", role=None, reliable=False):
         """
         Gửi packet đến một phòng, một client hoặc theo vai trò.
         :param room_id: Mã phòng
         :param packet: Dữ liệu dạng dict
         :param target: "all" | client_id
         :param role: Nếu chỉ muốn gửi cho "host"/"observer"/"player"
+        :param reliable: True → gán seq, chờ ACK và phát lại (chỉ cho multicast toàn phòng)
         """
         group = self.multicast.groups.get(room_id)
         if not group:
             self.logger.warning(f"[NETWORK] Room '{room_id}' chưa có group multicast.")
             return
 
+        if reliable and target == "all" and role is None:
+            # Endpoint phát (và phát lại) qua _transmit; ACK / phát lại cũng đi đường đó
+            self._reliable_endpoint(room_id).send(packet, reliable=True)
+            return
+
         try:
             self.multicast.send_packet(room_id, packet, target=target, role=role)
             if target == "all":
-                self.logger.debug(f"[NETWORK SEND] Broadcast → Room {room_id}: {packet.get('type', '?')}")
+                self.logger.debug("[NETWORK SEND] Broadcast → Room %s: %s", room_id, packet.get("type", "?"))
             elif role:
-                self.logger.debug(f"[NETWORK SEND] Role '{role}' → Room {room_id}: {packet.get('type', '?')}")
+                self.logger.debug("[NETWORK SEND] Role '%s' → Room %s: %s", role, room_id, packet.get("type", "?"))
             else:
-                self.logger.debug(f"[NETWORK SEND] To Client {target} in Room {room_id}: {packet.get('type', '?')}")
+                self.logger.debug("[NETWORK SEND] To Client %s in Room %s: %s", target, room_id, packet.get("type", "?"))
+        except Exception as e:
+            self.logger.error(f"[NETWORK SEND ERROR] {e}")
+
+    def _transmit(self, room_id: str, packet: dict):
+        try:
+            self.multicast.send_packet(room_id, packet)
         except Exception as e:
             self.logger.error(f"[NETWORK SEND ERROR] {e}")
 
+    def _reliable_endpoint(self, room_id: str) -> ReliableEndpoint:
+        endpoint = self._reliable.get(room_id)
+        if endpoint is None:
+            channel = ReliableChannel(self.SENDER_ID)
+            channel.on_peer_lost = lambda peer: self.logger.warning(
+                f"[NETWORK] Peer {peer} không ACK trong {room_id}, ngừng chờ.")
+            endpoint = self._reliable[room_id] = ReliableEndpoint(
+                channel, lambda packet: self._transmit(room_id, packet))
+        return endpoint
+
     def send_to_client(self, client_id: str, packet: dict):
         """Gửi packet đến client cụ thể."""
         room_id = self.client_room_map.get(client_id)
@@ -83,36 +128,190 @@ class NetworkManager:
     # 📡 LISTEN LOOP (RECEIVE)
     # ------------------------------------------------------------------
     async def listen_loop(self):
-        """Lắng nghe tất cả group multicast và phát sự kiện on_packet."""
+        """
+        Lắng nghe tất cả group multicast và phát sự kiện on_packet.
+        - Mỗi socket phòng được đăng ký với event loop (add_reader), không quét lần lượt.
+        - Datagram được đưa vào hàng đợi ngay khi đến → phòng im lặng không chặn phòng khác.
+        - Socket được gắn / gỡ tự động khi MulticastManager tạo / xóa group.
+        """
         if self._listening:
             return
         self._listening = True
-        loop = asyncio.get_event_loop()
-        self.logger.info("[NETWORK] Listening for incoming packets...")
+        self._loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+
+        pool = self.multicast.pool
+        if pool is not None:
+            readers = [(sock, pool.base_port + i) for i, sock in enumerate(pool.sockets)] + [(pool.uplink, None)]
+            for sock, port in readers:
+                self._add_reader(sock.fileno(), self._on_pool_readable, sock, port)
+                self._pool_fds.append(sock.fileno())
+        for room_id, group in list(self.multicast.groups.items()):
+            self._attach_room_socket(room_id, group)
+        self.logger.info(f"[NETWORK] Listening for incoming packets on "
+                         f"{len(self._readers) + (pool.fd_count if pool else 0)} sockets...")
+
+        try:
+            while True:
+                message = await self._inbox.get()
+                await self.emit_event("on_packet", message)
+                if self._paused and self._inbox.qsize() <= self.inbox_limit // 2:
+                    self._resume_readers()
+        finally:
+            for room_id in list(self._readers):
+                self._detach_room_socket(room_id, self.multicast.groups.get(room_id))
+            self._detach_pool_sockets()
+            self._callbacks.clear()
+            self._paused = False
+            self._listening = False
+            self._loop = None
+
+    def _attach_room_socket(self, room_id: str, group: dict):
+        """Đăng ký socket của phòng với event loop (gọi khi group được tạo)."""
+        if not self._listening or self._loop is None or room_id in self._readers or group["shared"]:
+            return
+        sock = group["socket"]
+        try:
+            sock.setblocking(False)
+            self._add_reader(sock.fileno(), self._on_socket_readable, room_id, sock)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"[NETWORK] Không thể đăng ký socket của {room_id}: {e}")
+            return
+        self._readers[room_id] = sock.fileno()
+        self.logger.debug(f"[NETWORK] Attached reader for {room_id}")
+
+    def _detach_room_socket(self, room_id: str, group: dict = None):
+        """Gỡ socket của phòng khỏi event loop (gọi trước khi socket bị đóng)."""
+        endpoint = self._reliable.pop(room_id, None)
+        if endpoint is not None:
+            endpoint.close()
+        fd = self._readers.pop(room_id, None)
+        if fd is None or self._loop is None:
+            return
+        self._remove_reader(fd)
+        self.logger.debug(f"[NETWORK] Detached reader for {room_id}")
+
+    def _detach_pool_sockets(self, pool=None):
+        """Gỡ các socket dùng chung của pool khỏi event loop (trước khi pool bị đóng)."""
+        if self._loop is not None:
+            for fd in self._pool_fds:
+                self._remove_reader(fd)
+        self._pool_fds.clear()
 
-        while True:
-            for room_id, group in list(self.multicast.groups.items()):
-                sock = group["socket"]
-                sock.setblocking(False)
+    def _add_reader(self, fd: int, callback, *args):
+        if not self._paused:
+            self._loop.add_reader(fd, callback, *args)
+        self._callbacks[fd] = (callback, args)
+
+    def _remove_reader(self, fd: int):
+        if self._callbacks.pop(fd, None) is not None and not self._paused:
+            self._loop.remove_reader(fd)
+
+    def _pause_readers(self):
+        """Hàng đợi nhận đầy (vd. actor phòng policy "block" đang chờ): ngừng đọc mọi socket."""
+        self._paused = True
+        self.inbox_pauses += 1
+        for fd in self._callbacks:
+            self._loop.remove_reader(fd)
+        self.logger.warning(f"[NETWORK] Inbox đầy ({self._inbox.qsize()} packet), tạm ngừng đọc socket")
+
+    def _resume_readers(self):
+        self._paused = False
+        for fd, (callback, args) in self._callbacks.items():
+            self._loop.add_reader(fd, callback, *args)
+        self.logger.debug(f"[NETWORK] Inbox còn {self._inbox.qsize()} packet, đọc socket trở lại")
+
+    def _on_socket_readable(self, room_id: str, sock):
+        """Đọc hết datagram đang chờ trên socket (tối đa RECV_BATCH) và đưa vào hàng đợi."""
+        group = self.multicast.groups.get(room_id)
+        if group is None:
+            return
+        for _ in range(self.RECV_BATCH):
+            if self._paused:
+                return
+            try:
+                data, addr = sock.recvfrom(8192)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.logger.debug(f"[NETWORK] Socket error in {room_id}: {e}")
+                return
+            self._handle_datagram(room_id, group, data, addr)
+
+    def _on_pool_readable(self, sock, port):
+        """
+        Socket dùng chung của pool: tách datagram về phòng theo group đích (IP_PKTINFO),
+        room_no của header bin1, hoặc room_id trong header JSON (uplink unicast).
+        """
+        pool = self.multicast.pool
+        for _ in range(self.RECV_BATCH):
+            if self._paused:
+                return
+            try:
+                data, addr, dst_ip = pool.recv(sock)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.logger.debug(f"[NETWORK] Pool socket error on port {port}: {e}")
+                return
+
+            message = None
+            room_id = pool.room_for(data, dst_ip, port)
+            if room_id is None:
                 try:
-                    data, addr = await loop.sock_recv(sock, 8192)
-                    message = json.loads(data.decode("utf-8"))
-                    message["room_id"] = room_id
-                    message["addr"] = addr
-                    await self.emit_event("on_packet", message)
-
-                except OSError as e:
-                    self.logger.debug(f"[NETWORK] Socket error in {room_id}: {e}")
-                    continue
-                except JSONDecodeError as e:
-                    self.logger.error(f"[NETWORK] JSON decode error in {room_id} from {addr}: {e}")
+                    message = json.loads(data)
+                except (JSONDecodeError, UnicodeDecodeError) as e:
+                    self.logger.error(f"[NETWORK] Datagram không rõ phòng từ {addr}: {e}")
                     continue
-                except UnicodeDecodeError as e:
-                    self.logger.error(f"[NETWORK] Decode error from {addr}: {e}")
-                    continue
-                except Exception as e:
-                    self.logger.error(f"[NETWORK ERROR] Unexpected: {e}")
-            await asyncio.sleep(0.01)
+                if isinstance(message, dict):
+                    header = message.get("header")
+                    room_id = header.get("room_id") if isinstance(header, dict) else message.get("room_id")
+            group = self.multicast.groups.get(room_id) if isinstance(room_id, str) else None
+            if group is None:
+                pool.stats["unknown"] += 1
+                continue
+            self._handle_datagram(room_id, group, data, addr, message)
+
+    def _handle_datagram(self, room_id: str, group: dict, data: bytes, addr, message=None):
+        """Giải mã (nếu chưa) rồi đưa packet vào hàng đợi, qua lớp tin cậy nếu có meta."""
+        if message is None:
+            try:
+                message = group["codec"].decode(data)  # tự nhận dạng JSON / nhị phân theo byte đầu
+            except CodecError as e:
+                self.logger.error(f"[NETWORK] Codec error in {room_id} from {addr}: {e}")
+                return
+            except JSONDecodeError as e:
+                self.logger.error(f"[NETWORK] JSON decode error in {room_id} from {addr}: {e}")
+                return
+            except UnicodeDecodeError as e:
+                self.logger.error(f"[NETWORK] Decode error from {addr}: {e}")
+                return
+        if not isinstance(message, dict):
+            self.logger.error(f"[NETWORK] Packet không phải object JSON trong {room_id} từ {addr}")
+            return
+
+        # Chỉ packet từ client mới là traffic của phòng: heartbeat / packet tin cậy của chính server
+        # vọng lại qua IP_MULTICAST_LOOP không được giữ phòng ở interval gốc
+        if not self._is_own_packet(message):
+            self.multicast.mark_active(group)
+        message["room_id"] = room_id
+        message["addr"] = addr
+        if not is_transport_packet(message):
+            self._inbox.put_nowait(message)
+        else:
+            # seq / ACK: khử trùng lặp, sắp thứ tự, gửi ACK; chỉ packet đã sẵn sàng mới được phát
+            for delivered in self._reliable_endpoint(room_id).receive(message):
+                self._inbox.put_nowait(delivered)
+        if not self._paused and self._inbox.qsize() >= self.inbox_limit:
+            self._pause_readers()
+
+    def _is_own_packet(self, message: dict) -> bool:
+        """Packet do server phát: heartbeat, hoặc header.sender == SENDER_ID (DATA / ACK tin cậy)."""
+        header = message.get("header")
+        if isinstance(header, dict) and header.get("sender") == self.SENDER_ID:
+            return True
+        command = message.get("command")
+        return isinstance(command, dict) and command.get("action") == "HEARTBEAT"
 
     # ------------------------------------------------------------------
     # ⚡ EVENT SYSTEM
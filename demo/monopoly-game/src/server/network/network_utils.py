@@ -16,7 +16,7 @@ from json import JSONDecodeError
 from ..utils import packetformat
 from ..utils import logger
 
-logger = logger("network_utils")
+logger = logger.Logger("network_utils")
 
 
 # ============================================================
@@ -121,7 +121,7 @@ def tcp_receive(sock: socket.socket, buffer_size=4096) -> dict | None:
 # ============================================================
 # 📡 UDP / MULTICAST FUNCTIONS
 # ============================================================
-def udp_send(sock: socket.socket, packet: dict, addr: tuple):
+def udp_send(sock: socket.socket, packet: dict, addr: tuple, codec=None):
     """
     Gửi packet qua UDP hoặc Multicast.
 
@@ -129,15 +129,16 @@ def udp_send(sock: socket.socket, packet: dict, addr: tuple):
         sock: socket UDP đã bind / join multicast.
         packet: dict packet theo chuẩn PacketFormat.
         addr: tuple(IP, port) của đích đến.
+        codec: codec của phòng (shared.wire_codec); None → JSON theo packet_format.
 
     Notes for deployment:
-        - packet được encode sang JSON trước khi gửi.
+        - packet được encode bằng codec của phòng (mặc định JSON) trước khi gửi.
         - Sau khi gửi, packet được log để dễ quan sát
           luồng dữ liệu trong môi trường production.
         - Giữ log để debug các lỗi multicast / UDP.
     """
     try:
-        encoded = packetformat.encode_packet(packet)  # encode packet
+        encoded = codec.encode(packet) if codec is not None else packetformat.encode_packet(packet)
         sock.sendto(encoded, addr)
         # Log packet gửi: nội dung + địa chỉ
         logger.log_packet("SEND", addr, packet)
@@ -1,25 +1,108 @@
 # server/network/packet_builder.py
-import uuid
-import datetime
+import itertools
 import json
+import time
+from typing import Dict, Tuple
+
+_dumps = json.JSONEncoder().encode  # cùng định dạng với json.dumps mặc định (codec JSON của phòng)
+
+
+def now_ms() -> int:
+    """Timestamp packet: mili giây epoch (UTC), số nguyên."""
+    return time.time_ns() // 1_000_000
+
+
+class Packet(dict):
+    """
+    Packet do PacketBuilder tạo: vẫn là dict bình thường cho game logic / codec nhị phân,
+    kèm phần đầu JSON đã mã hóa sẵn (type, room_id, sender_id) để codec JSON chỉ còn
+    ghép packet_id, timestamp và payload lúc gửi.
+    """
+
+    __slots__ = ("_prefix", "_static")
+
+    def to_json(self) -> bytes:
+        """
+        Bytes JSON y hệt json.dumps(self).encode("utf-8").
+        Packet bị sửa phần tĩnh (thêm key, đổi type/room/sender) thì mã hóa lại toàn bộ.
+        """
+        pid, ts = self.get("packet_id"), self.get("timestamp")
+        if (len(self) != 6 or type(pid) is not int or type(ts) is not int
+                or (self.get("type"), self.get("room_id"), self.get("sender_id")) != self._static):
+            return _dumps(self).encode("utf-8")
+        return b"%s%d, \"timestamp\": %d, \"payload\": %s}" % (
+            self._prefix, pid, ts, _dumps(self["payload"]).encode("utf-8"))
 
 
 class PacketBuilder:
     """
     Xây dựng packet JSON chuẩn cho hệ thống Monopoly.
     Dùng để gửi/nhận qua multicast hoặc direct socket.
+
+    packet_id là bộ đếm tăng dần theo từng phòng (bắt đầu từ 1), timestamp là mili giây epoch.
+    Phần đầu JSON tĩnh của mỗi (phòng, loại event, người gửi) được mã hóa một lần rồi cache;
+    gọi reset_room() khi phòng bị xóa để giải phóng bộ đếm và cache.
     """
 
-    @staticmethod
-    def _base_packet(event_type: str, room_id: str = None, sender_id: str = None, payload: dict = None) -> dict:
+    _counters: Dict[str, "itertools.count"] = {}
+    _templates: Dict[str, Dict[Tuple[str, str], bytes]] = {}
+
+    @classmethod
+    def _base_packet(cls, event_type: str, room_id: str = None, sender_id: str = None, payload: dict = None) -> dict:
         """Khởi tạo gói cơ bản"""
+        counter = cls._counters.get(room_id)
+        if counter is None:
+            counter = cls._counters[room_id] = itertools.count(1)
+        templates = cls._templates.get(room_id)
+        if templates is None:
+            templates = cls._templates[room_id] = {}
+        prefix = templates.get((event_type, sender_id))
+        if prefix is None:
+            prefix = templates[(event_type, sender_id)] = (
+                '{"type": %s, "room_id": %s, "sender_id": %s, "packet_id": '
+                % (_dumps(event_type), _dumps(room_id), _dumps(sender_id))
+            ).encode("utf-8")
+
+        packet = Packet(
+            type=event_type,                 # Loại sự kiện (join_room, move, buy_property, ...)
+            room_id=room_id,
+            sender_id=sender_id,
+            packet_id=next(counter),         # Mã định danh gói (tăng dần trong phòng)
+            timestamp=now_ms(),
+            payload=payload or {},
+        )
+        packet._prefix = prefix
+        packet._static = (event_type, room_id, sender_id)
+        return packet
+
+    @classmethod
+    def reset_room(cls, room_id: str):
+        """Bỏ bộ đếm packet_id và template JSON của phòng (gọi khi xóa phòng)."""
+        cls._counters.pop(room_id, None)
+        cls._templates.pop(room_id, None)
+
+    # ------------------------------------------------------------------
+    # 💓 HEARTBEAT
+    # ------------------------------------------------------------------
+    _stamp_second = None
+    _stamp_text = None
+
+    @classmethod
+    def heartbeat_stamp(cls) -> str:
+        """Timestamp heartbeat ("%Y-%m-%dT%H:%M:%SZ"): chỉ strftime lại khi sang giây mới."""
+        second = int(time.time())
+        if second != cls._stamp_second:
+            cls._stamp_text = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.localtime(second))
+            cls._stamp_second = second
+        return cls._stamp_text
+
+    @staticmethod
+    def heartbeat(room_id: str, players: list, active_rooms: int, stamp: str = None) -> dict:
+        """Heartbeat STATE của main_loop; stamp tính một lần mỗi tick cho mọi phòng."""
         return {
-            "packet_id": str(uuid.uuid4()),  # Mã định danh gói
-            "timestamp": datetime.datetime.utcnow().isoformat(),
-            "type": event_type,              # Loại sự kiện (join_room, move, buy_property, ...)
-            "room_id": room_id,
-            "sender_id": sender_id,
-            "payload": payload or {},
+            "header": {"room_id": room_id, "type": "STATE", "timestamp": stamp or PacketBuilder.heartbeat_stamp()},
+            "command": {"action": "HEARTBEAT"},
+            "payload": {"players": players, "active_rooms": active_rooms},
         }
 
     # ------------------------------------------------------------------
@@ -0,0 +1,225 @@
+"""
+send_batch.py — hàng đợi datagram gửi đi, xả theo lô mỗi vòng event loop
+------------------------------------------------------------------------
+- Packet được encode một lần ở MulticastManager; ở đây chỉ còn (socket, bytes, địa chỉ).
+- queue() gom datagram theo socket và hẹn flush() bằng loop.call_soon: mọi packet phát ra
+  trong cùng một vòng loop (heartbeat nhiều phòng, fan-out theo vai trò, ACK...) đi chung một lô.
+  Không có event loop đang chạy thì gửi ngay (giữ hành vi cũ cho code đồng bộ).
+- Mặc định mỗi datagram một sendto (Python không có sendmmsg; sendmsg không gộp được
+  datagram khác đích nên không giảm syscall).
+- Linux, use_sendmmsg=True: sendmmsg(2) qua ctypes — tối đa UIO_MAXIOV datagram mỗi syscall.
+  Chỉ bật khi đo được lợi: với tests/bench_send_batch.py, chi phí dựng mảng mmsghdr bằng ctypes
+  đang ăn hết phần syscall tiết kiệm được, sendto theo lô vẫn nhanh hơn.
+- Một datagram lỗi (đích không hợp lệ, không tới được...) chỉ làm mất chính nó (tính vào dropped).
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import socket
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+UIO_MAXIOV = 1024  # số mmsghdr tối đa mỗi lần sendmmsg
+_ADDR_CACHE_LIMIT = 65536
+_SEND_ERRORS = (OSError, TypeError, ValueError, OverflowError, struct.error)  # lỗi của một datagram / một đích
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.c_void_p),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    """struct mmsghdr — chỉ dùng để kiểm tra layout của _MMSG trên nền tảng hiện tại."""
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+# Dựng mảng mmsghdr / iovec bằng struct.pack_into (nhanh hơn gán từng field ctypes)
+_MMSG = struct.Struct("@PI4xPNPNi4xI4x")
+_IOV = struct.Struct("@PN")
+_SOCKADDR_LEN = 16
+
+def _load_sendmmsg():
+    if not sys.platform.startswith("linux") or _MMSG.size != ctypes.sizeof(_MMsgHdr):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fn = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_sendmmsg = _load_sendmmsg()
+_MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0)
+
+
+class DatagramBatcher:
+    """Gom datagram theo socket, xả một lần mỗi vòng event loop (sendmmsg nếu được bật)."""
+
+    def __init__(self, logger=None, use_sendmmsg: bool = False):
+        self.logger = logger
+        self.use_sendmmsg = use_sendmmsg
+        if self.use_sendmmsg and _sendmmsg is None:
+            raise ValueError("sendmmsg không có trên nền tảng này")
+        self.queues: Dict[socket.socket, List[Tuple[bytes, tuple]]] = {}
+        self._scheduled = False
+        self._addrs: Dict[tuple, ctypes.Array] = {}  # (ip, port) → sockaddr_in dựng sẵn
+        self._msgs = self._iovs = None
+        self.stats = {"datagrams": 0, "syscalls": 0, "flushes": 0, "dropped": 0}
+
+    # ------------------------------------------------------------------
+    # 📤 QUEUE / FLUSH
+    # ------------------------------------------------------------------
+    def queue(self, sock: socket.socket, data: bytes, addr: tuple):
+        """Xếp một datagram; gửi ở cuối vòng loop hiện tại (hoặc ngay nếu không có loop)."""
+        batch = self.queues.get(sock)
+        if batch is None:
+            batch = self.queues[sock] = []
+        batch.append((data, addr))
+        self._schedule()
+
+    def queue_many(self, sock: socket.socket, data: bytes, addrs):
+        """Cùng một datagram (đã encode) cho nhiều đích — đi chung một lô."""
+        batch = self.queues.get(sock)
+        if batch is None:
+            batch = self.queues[sock] = []
+        batch.extend((data, addr) for addr in addrs)
+        if batch:
+            self._schedule()
+
+    def _schedule(self):
+        if self._scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._scheduled = True
+        loop.call_soon(self.flush)
+
+    def flush(self):
+        self._scheduled = False
+        queues, self.queues = self.queues, {}
+        for sock, batch in queues.items():
+            self._send_guarded(sock, batch)
+        self.stats["flushes"] += 1
+
+    def flush_socket(self, sock: socket.socket):
+        """Xả ngay hàng đợi của một socket (vd. trước khi đóng socket của phòng)."""
+        batch = self.queues.pop(sock, None)
+        if batch:
+            self._send_guarded(sock, batch)
+
+    def _send_guarded(self, sock: socket.socket, batch: List[Tuple[bytes, tuple]]):
+        """Lỗi bất ngờ của một socket không được làm mất hàng đợi của các socket khác."""
+        sent = self.stats["datagrams"] + self.stats["dropped"]
+        try:
+            self._send(sock, batch)
+        except Exception as e:
+            done = self.stats["datagrams"] + self.stats["dropped"] - sent
+            self._drop(len(batch) - done, None, e)
+
+    def _send(self, sock: socket.socket, batch: List[Tuple[bytes, tuple]]):
+        if sock.fileno() < 0:
+            self.stats["dropped"] += len(batch)
+            return
+        if self.use_sendmmsg and len(batch) > 1:
+            self._sendmmsg(sock, batch)
+        else:
+            self._sendto(sock, batch)
+
+    def _sendto(self, sock: socket.socket, batch: List[Tuple[bytes, tuple]]):
+        for data, addr in batch:
+            try:
+                sock.sendto(data, addr)
+                self.stats["datagrams"] += 1
+            except _SEND_ERRORS as e:
+                self._drop(1, addr, e)
+            self.stats["syscalls"] += 1
+
+    # ------------------------------------------------------------------
+    # ⚙️ SENDMMSG
+    # ------------------------------------------------------------------
+    def _sockaddr(self, addr: tuple) -> int:
+        """Địa chỉ (con trỏ) của sockaddr_in dựng sẵn cho (ip, port); lỗi nếu ip không phải IPv4 dạng số."""
+        cached = self._addrs.get(addr)
+        if cached is None:
+            if len(self._addrs) >= _ADDR_CACHE_LIMIT:
+                self._addrs.clear()
+            packed = struct.pack("=H", socket.AF_INET) + struct.pack("!H", addr[1]) + socket.inet_aton(addr[0])
+            raw = ctypes.create_string_buffer(packed + bytes(8), _SOCKADDR_LEN)
+            cached = self._addrs[addr] = (raw, ctypes.addressof(raw))
+        return cached[1]
+
+    def _buffers(self):
+        if self._msgs is None:
+            self._msgs = ctypes.create_string_buffer(_MMSG.size * UIO_MAXIOV)
+            self._iovs = ctypes.create_string_buffer(_IOV.size * UIO_MAXIOV)
+        return self._msgs, self._iovs
+
+    def _sendmmsg(self, sock: socket.socket, batch: List[Tuple[bytes, tuple]]):
+        msgs, iovs = self._buffers()
+        msgs_addr, iovs_addr = ctypes.addressof(msgs), ctypes.addressof(iovs)
+        pack_msg, pack_iov, sockaddr = _MMSG.pack_into, _IOV.pack_into, self._sockaddr
+        fd = sock.fileno()
+        # Dựng sockaddr trước: đích không dựng được (vd. tên host "localhost") gửi riêng bằng sendto
+        # như đường cũ (tự phân giải tên), không làm hỏng cả lô
+        resolved = []
+        for data, addr in batch:
+            try:
+                resolved.append((data, addr, sockaddr(addr)))
+            except _SEND_ERRORS:
+                self._sendto(sock, [(data, addr)])
+        batch = resolved
+        for start in range(0, len(batch), UIO_MAXIOV):
+            chunk = batch[start:start + UIO_MAXIOV]
+            # Mọi payload khác nhau được chép liền vào một vùng nhớ → một lần lấy địa chỉ cho cả lô;
+            # fan-out cùng bytes dùng chung một iovec
+            payloads, iov_of = [], {}
+            offset = 0
+            for data, _, _ in chunk:
+                if id(data) not in iov_of:
+                    iov_of[id(data)] = (len(payloads), offset, len(data))
+                    payloads.append(data)
+                    offset += len(data)
+            arena = ctypes.create_string_buffer(b"".join(payloads), offset or 1)
+            base = ctypes.addressof(arena)
+            for index, off, size in iov_of.values():
+                pack_iov(iovs, index * _IOV.size, base + off, size)
+            for i, (data, _, name) in enumerate(chunk):
+                pack_msg(msgs, i * _MMSG.size, name, _SOCKADDR_LEN,
+                         iovs_addr + iov_of[id(data)][0] * _IOV.size, 1, 0, 0, 0, 0)
+
+            sent, total = 0, len(chunk)
+            while sent < total:
+                n = _sendmmsg(fd, msgs_addr + sent * _MMSG.size, total - sent, _MSG_DONTWAIT)
+                self.stats["syscalls"] += 1
+                if n < 0:
+                    err = ctypes.get_errno()
+                    if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS):  # buffer gửi đầy: bỏ phần còn lại
+                        self._drop(total - sent, chunk[sent][1], OSError(err, "sendmmsg"))
+                        break
+                    # datagram đầu tiên của phần còn lại lỗi (vd. đích không tới được): bỏ nó, gửi tiếp
+                    self._drop(1, chunk[sent][1], OSError(err, "sendmmsg"))
+                    sent += 1
+                    continue
+                sent += n
+                self.stats["datagrams"] += n
+
+    def _drop(self, count: int, addr: Optional[tuple], error: Exception):
+        self.stats["dropped"] += count
+        if self.logger:
+            self.logger.error(f"Lỗi UDP send tới {addr}: {error}")
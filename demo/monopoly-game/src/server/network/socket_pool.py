@@ -0,0 +1,156 @@
+"""
+socket_pool.py — socket UDP dùng chung cho nhiều phòng
+------------------------------------------------------
+Thay vì mỗi phòng một socket (bind + join riêng), server giữ một số socket cố định:
+- `size` socket group: socket i bind port base_port + i và join group của mọi phòng được cấp port đó.
+  Datagram đến được tách về phòng theo địa chỉ đích (IP_PKTINFO) — không cần một socket mỗi phòng.
+- 1 socket uplink (unicast): kernel giới hạn số group mỗi socket được join
+  (net.ipv4.igmp_max_memberships, mặc định 20). Phòng vượt giới hạn vẫn chạy: client gửi thêm
+  một bản unicast tới uplink, server tách về phòng theo room_no (bin1) hoặc room_id trong header (JSON).
+Số FD của server vì vậy là size + 1, không phụ thuộc số phòng.
+"""
+import socket
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from ...shared.wire_codec import HEADER, MAGIC
+
+IP_PKTINFO = getattr(socket, "IP_PKTINFO", 8)
+IP_MULTICAST_ALL = getattr(socket, "IP_MULTICAST_ALL", 49)  # Linux: chỉ nhận group mà chính socket đã join
+_PKTINFO = struct.Struct("=i4s4s")  # in_pktinfo: ifindex, spec_dst, addr (địa chỉ đích trong IP header)
+_ANCBUF = socket.CMSG_SPACE(_PKTINFO.size) if hasattr(socket, "CMSG_SPACE") else 0
+_ROOM_NO_OFFSET = 4  # magic, version, ptype, flags | room_no u32
+
+
+def kernel_membership_limit(default: int = 20) -> int:
+    """Số group tối đa một socket được join (Linux: net.ipv4.igmp_max_memberships)."""
+    try:
+        with open("/proc/sys/net/ipv4/igmp_max_memberships") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return default
+
+
+class SocketPool:
+    """Socket UDP dùng chung: gửi / nhận cho mọi phòng qua size + 1 file descriptor."""
+
+    def __init__(self, size: int, base_port: int, interface_ip: str = None, ttl: int = 2,
+                 uplink_port: int = 0, max_memberships: int = None):
+        self.size = size
+        self.base_port = base_port
+        self.interface_ip = interface_ip
+        self.max_memberships = max_memberships or kernel_membership_limit()
+        self.sockets: List[socket.socket] = [self._open(base_port + i, ttl, group=True) for i in range(size)]
+        self.uplink = self._open(uplink_port, ttl, group=False)
+        self.uplink_port = self.uplink.getsockname()[1]
+
+        self.rooms_by_group: Dict[Tuple[str, int], str] = {}  # (group ip, port) → room_id
+        self.rooms_by_no: Dict[int, str] = {}                 # room_no (header bin1) → room_id
+        self.joined: Dict[str, Tuple[int, str]] = {}          # room_id → (socket index, group ip) đã join
+        self.attached: Dict[str, Tuple[str, int, int]] = {}   # room_id → (ip, port, room_no)
+        self.memberships = [0] * size
+        self.stats = {"joined": 0, "uplink_only": 0, "unknown": 0}
+
+    def _open(self, port: int, ttl: int, group: bool) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", port))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        if self.interface_ip:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface_ip))
+        if group and sys.platform.startswith("linux"):
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, IP_PKTINFO, 1)
+                sock.setsockopt(socket.IPPROTO_IP, IP_MULTICAST_ALL, 0)
+            except OSError:
+                pass
+        sock.setblocking(False)
+        return sock
+
+    @property
+    def fd_count(self) -> int:
+        return len(self.sockets) + 1
+
+    def socket_for(self, port: int) -> socket.socket:
+        return self.sockets[port - self.base_port]
+
+    # ------------------------------------------------------------------
+    # 🏠 GẮN / GỠ PHÒNG
+    # ------------------------------------------------------------------
+    def attach(self, room_id: str, ip: str, port: int, room_no: int) -> bool:
+        """
+        Gắn phòng vào socket của port. Trả về True nếu socket đã join group
+        (server nhận trực tiếp từ group), False nếu phòng chỉ nhận qua uplink.
+        """
+        index = port - self.base_port
+        self.rooms_by_group[(ip, port)] = room_id
+        self.rooms_by_no[room_no] = room_id
+        self.attached[room_id] = (ip, port, room_no)
+        if self.memberships[index] < self.max_memberships:
+            try:
+                self.sockets[index].setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, self._membership(ip))
+            except OSError:
+                self.memberships[index] = self.max_memberships  # kernel từ chối: coi như socket đã đầy
+            else:
+                self.memberships[index] += 1
+                self.joined[room_id] = (index, ip)
+                self.stats["joined"] += 1
+                return True
+        self.stats["uplink_only"] += 1
+        return False
+
+    def detach(self, room_id: str):
+        attached = self.attached.pop(room_id, None)
+        if attached is None:
+            return
+        ip, port, room_no = attached
+        self.rooms_by_group.pop((ip, port), None)
+        self.rooms_by_no.pop(room_no, None)
+        joined = self.joined.pop(room_id, None)
+        if joined is not None:
+            index, _ = joined
+            self.memberships[index] -= 1
+            try:
+                self.sockets[index].setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, self._membership(ip))
+            except OSError:
+                pass
+
+    def _membership(self, ip: str) -> bytes:
+        if self.interface_ip:
+            return socket.inet_aton(ip) + socket.inet_aton(self.interface_ip)
+        return struct.pack("4sl", socket.inet_aton(ip), socket.INADDR_ANY)
+
+    # ------------------------------------------------------------------
+    # 📥 NHẬN + TÁCH PHÒNG
+    # ------------------------------------------------------------------
+    @staticmethod
+    def recv(sock: socket.socket, bufsize: int = 8192) -> Tuple[bytes, tuple, Optional[str]]:
+        """(data, addr nguồn, IP đích) — IP đích lấy từ IP_PKTINFO, None nếu không có."""
+        if not _ANCBUF:
+            data, addr = sock.recvfrom(bufsize)
+            return data, addr, None
+        data, ancdata, _, addr = sock.recvmsg(bufsize, _ANCBUF)
+        for level, kind, cdata in ancdata:
+            if level == socket.IPPROTO_IP and kind == IP_PKTINFO and len(cdata) >= _PKTINFO.size:
+                return data, addr, socket.inet_ntoa(_PKTINFO.unpack_from(cdata)[2])
+        return data, addr, None
+
+    def room_for(self, data: bytes, dst_ip: Optional[str], port: Optional[int]) -> Optional[str]:
+        """
+        Phòng của datagram theo địa chỉ group đích, rồi theo room_no của header bin1.
+        None: datagram JSON qua uplink — bên gọi đọc room_id trong header sau khi giải mã.
+        """
+        if dst_ip is not None:
+            room_id = self.rooms_by_group.get((dst_ip, port))
+            if room_id is not None:
+                return room_id
+        if len(data) >= HEADER.size and data[0] == MAGIC:
+            return self.rooms_by_no.get(int.from_bytes(data[_ROOM_NO_OFFSET:_ROOM_NO_OFFSET + 4], "big"))
+        return None
+
+    def close(self):
+        for room_id in list(self.attached):
+            self.detach(room_id)
+        for sock in self.sockets + [self.uplink]:
+            sock.close()
@@ -0,0 +1,134 @@
+# server/rooms/heartbeat_scheduler.py
+"""
+Heartbeat Scheduler — heartbeat theo từng phòng thay cho vòng quét cố định
+--------------------------------------------------------------------------
+- Mỗi phòng có hạn kế tiếp riêng trong một heap (due, thứ tự, room_id); hạn đầu tiên được rải
+  đều trong cửa sổ interval theo room_id → không còn cả nghìn phòng cùng phát trong một tick.
+- Suppress: phòng vừa có traffic (gửi hoặc nhận) trong interval thì heartbeat là thừa —
+  chỉ dời hạn tới (lần hoạt động cuối + interval), không dựng / gửi packet.
+- Backoff: phòng không có traffic nào ngoài heartbeat thì interval nhân đôi sau mỗi lần
+  (tối đa max_backoff lần); phòng không còn người nghe nhảy thẳng lên mức tối đa.
+  Có traffic trở lại thì về interval gốc.
+→ Chi phí mỗi giây tỉ lệ với số phòng đang hoạt động (+ phòng nhàn rỗi / max_backoff).
+"""
+import heapq
+import itertools
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+
+class _RoomTimer:
+    __slots__ = ("due", "level", "last_beat", "generation")
+
+    def __init__(self, due: float, generation: int):
+        self.due = due
+        self.level = 0          # interval hiện tại = interval * 2**level
+        self.last_beat = 0.0    # thời điểm heartbeat gần nhất (clock của scheduler)
+        self.generation = generation
+
+
+class HeartbeatScheduler:
+    """
+    beat(room_id) dựng + gửi heartbeat, trả về số người nghe (0: phòng trống).
+    activity(room_id) trả về thời điểm có traffic gần nhất của phòng (cùng clock), None nếu chưa có.
+    """
+
+    def __init__(self, interval: float, beat: Callable[[str], int],
+                 activity: Callable[[str], Optional[float]] = None, max_backoff: int = 8,
+                 resolution: float = 0.05, clock: Callable[[], float] = time.monotonic, logger=None):
+        self.interval = interval
+        self.beat = beat
+        self.activity = activity or (lambda room_id: None)
+        self.max_level = max(0, max_backoff.bit_length() - 1)  # 8 → interval tối đa 8×
+        self.resolution = resolution  # gộp các hạn cách nhau < resolution vào một lần thức
+        self.clock = clock
+        self.logger = logger
+        self.rooms: Dict[str, _RoomTimer] = {}
+        self._heap = []
+        self._order = itertools.count()
+        self._generation = itertools.count(1)
+        self.stats = {"sent": 0, "suppressed": 0, "backed_off": 0, "errors": 0, "wakeups": 0}
+
+    # ------------------------------------------------------------------
+    # 🏠 PHÒNG
+    # ------------------------------------------------------------------
+    def add_room(self, room_id: str):
+        """Đăng ký phòng; hạn đầu tiên rải trong [now, now + interval) theo room_id."""
+        if room_id in self.rooms:
+            return
+        spread = (zlib.crc32(room_id.encode("utf-8")) % 1000) / 1000 * self.interval
+        timer = self.rooms[room_id] = _RoomTimer(self.clock() + spread, next(self._generation))
+        timer.last_beat = self.clock()
+        self._push(room_id, timer)
+
+    def remove_room(self, room_id: str):
+        """Bỏ phòng; entry còn trong heap bị bỏ qua khi tới hạn (generation không khớp)."""
+        self.rooms.pop(room_id, None)
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self.rooms):
+            self._heap = [e for e in self._heap if self._live(e)]
+            heapq.heapify(self._heap)
+
+    def _live(self, entry) -> bool:
+        timer = self.rooms.get(entry[2])
+        return timer is not None and timer.generation == entry[3]
+
+    def _push(self, room_id: str, timer: _RoomTimer):
+        heapq.heappush(self._heap, (timer.due, next(self._order), room_id, timer.generation))
+
+    # ------------------------------------------------------------------
+    # ⏱️ CHẠY
+    # ------------------------------------------------------------------
+    def next_due(self) -> Optional[float]:
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: float = None) -> float:
+        """
+        Xử lý mọi phòng tới hạn (trong khoảng resolution), trả về số giây tới hạn kế tiếp
+        (interval nếu không còn phòng nào).
+        """
+        now = self.clock() if now is None else now
+        horizon = now + self.resolution
+        heap = self._heap
+        self.stats["wakeups"] += 1
+        while heap and heap[0][0] <= horizon:
+            _, _, room_id, generation = heapq.heappop(heap)
+            timer = self.rooms.get(room_id)
+            if timer is None or timer.generation != generation:
+                continue
+            self._run_room(room_id, timer, now)
+            self._push(room_id, timer)
+        due = self.next_due()
+        return self.interval if due is None else max(0.0, due - now)
+
+    def _run_room(self, room_id: str, timer: _RoomTimer, now: float):
+        active_at = self.activity(room_id)
+        had_traffic = active_at is not None and active_at > timer.last_beat
+        if had_traffic and now + self.resolution - active_at < self.interval:
+            timer.level = 0
+            timer.due = active_at + self.interval
+            self.stats["suppressed"] += 1
+            return
+
+        try:
+            listeners = self.beat(room_id)
+        except Exception as e:
+            # Không gửi được: không tính là heartbeat, thử lại sau một interval (giữ nguyên mức backoff)
+            if self.logger:
+                self.logger.error(f"❌ Error sending heartbeat to {room_id}: {e}")
+            self.stats["errors"] += 1
+            timer.due = now + self.interval
+            return
+        timer.last_beat = self.clock()
+        self.stats["sent"] += 1
+        if not listeners:
+            timer.level = self.max_level
+        elif had_traffic:
+            timer.level = 0
+        else:
+            timer.level = min(timer.level + 1, self.max_level)
+        if timer.level:
+            self.stats["backed_off"] += 1
+        timer.due = now + self.interval * (1 << timer.level)
@@ -0,0 +1,195 @@
+# server/rooms/room_actor.py
+"""
+Room Actor — mỗi phòng một task asyncio với hộp thư (inbox) giới hạn
+--------------------------------------------------------------------
+- Hành động của một phòng được xử lý tuần tự theo thứ tự nhận; các phòng chạy song song
+  → một phòng xử lý chậm không còn chặn listen_loop / các phòng khác.
+- Inbox đầy (maxsize) thì áp dụng policy:
+    "drop_newest" : bỏ hành động mới đến (thứ tự các hành động đã nhận giữ nguyên) — mặc định
+    "drop_oldest" : bỏ hành động cũ nhất đang chờ để nhận hành động mới
+    "block"       : bên gửi chờ tới khi inbox có chỗ (backpressure cho producer chờ được, vd. lệnh TCP).
+                    Với UDP, dispatch của listen_loop dừng theo; khi hàng đợi nhận của NetworkManager
+                    đầy (inbox_limit) các socket ngừng được đọc → datagram bị bỏ ở buffer kernel.
+- Metrics mỗi phòng: độ sâu inbox (hiện tại / tối đa), số đã xử lý / bị bỏ / lỗi,
+  thời gian chờ trong inbox và thời gian xử lý (trung bình, p99 của cửa sổ gần nhất, tối đa).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+POLICIES = ("drop_newest", "drop_oldest", "block")
+LATENCY_WINDOW = 512  # số mẫu gần nhất dùng để tính p99
+
+
+def _summary(samples: deque, total: float, count: int, peak: float) -> dict:
+    """Thống kê thời gian (ms): trung bình toàn bộ, p99 của cửa sổ gần nhất, tối đa."""
+    if not count:
+        return {"avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return {"avg_ms": round(total / count * 1e3, 3), "p99_ms": round(p99 * 1e3, 3), "max_ms": round(peak * 1e3, 3)}
+
+
+class RoomActor:
+    """
+    handler(item) là coroutine xử lý một phần tử của inbox (vd. một hành động của người chơi).
+    Task được tạo khi có phần tử đầu tiên (cần event loop đang chạy).
+    """
+
+    def __init__(self, room_id: str, handler: Callable[[Any], Awaitable], maxsize: int = 256,
+                 policy: str = "drop_newest", logger=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Policy inbox không hợp lệ: {policy!r} (chọn {', '.join(POLICIES)})")
+        if maxsize <= 0:
+            raise ValueError("Inbox phải có giới hạn (maxsize > 0)")
+        self.room_id = room_id
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.logger = logger
+        self.inbox: deque = deque()  # (thời điểm nhận, item)
+        self._wakeup: Optional[asyncio.Event] = None   # có item mới
+        self._space: Optional[asyncio.Event] = None    # inbox có chỗ (policy "block")
+        self._task: Optional[asyncio.Task] = None
+        self._draining = False
+        self.closed = False
+
+        self.stats = {"received": 0, "processed": 0, "dropped": 0, "errors": 0, "max_depth": 0}
+        self._wait = deque(maxlen=LATENCY_WINDOW)
+        self._run = deque(maxlen=LATENCY_WINDOW)
+        self._wait_total = self._run_total = 0.0
+        self._wait_max = self._run_max = 0.0
+
+    # ------------------------------------------------------------------
+    # 📥 INBOX
+    # ------------------------------------------------------------------
+    @property
+    def depth(self) -> int:
+        return len(self.inbox)
+
+    def submit(self, item) -> bool:
+        """
+        Đưa item vào inbox, không chờ. Trả về False nếu item bị bỏ
+        (actor đã đóng, hoặc inbox đầy với policy "drop_newest" / "block").
+        """
+        if self.closed or self._draining:
+            self.stats["dropped"] += 1
+            return False
+        if len(self.inbox) >= self.maxsize:
+            if self.policy != "drop_oldest":
+                self._drop("inbox đầy, bỏ hành động mới")
+                return False
+            self.inbox.popleft()
+            self._drop("inbox đầy, bỏ hành động cũ nhất")
+        self._enqueue(item)
+        return True
+
+    async def put(self, item) -> bool:
+        """
+        Như submit, nhưng với policy "block" thì chờ tới khi inbox có chỗ (backpressure).
+        Các policy khác xử lý y như submit.
+        """
+        if self.policy == "block":
+            while not self.closed and len(self.inbox) >= self.maxsize:
+                self._events()[1].clear()
+                await self._space.wait()
+        return self.submit(item)
+
+    def _enqueue(self, item):
+        self.inbox.append((time.perf_counter(), item))
+        self.stats["received"] += 1
+        if len(self.inbox) > self.stats["max_depth"]:
+            self.stats["max_depth"] = len(self.inbox)
+        wakeup, _ = self._events()
+        wakeup.set()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name=f"room-actor-{self.room_id}")
+
+    def _events(self):
+        if self._wakeup is None:
+            self._wakeup, self._space = asyncio.Event(), asyncio.Event()
+        return self._wakeup, self._space
+
+    def _drop(self, reason: str):
+        self.stats["dropped"] += 1
+        if self.logger:
+            self.logger.warning(f"[ROOM ACTOR] {self.room_id}: {reason} (depth={len(self.inbox)})")
+
+    # ------------------------------------------------------------------
+    # ⚙️ XỬ LÝ
+    # ------------------------------------------------------------------
+    async def _loop(self):
+        wakeup, space = self._events()
+        inbox = self.inbox
+        while not self.closed:
+            if not inbox:
+                if self._draining:
+                    return
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            enqueued_at, item = inbox.popleft()
+            space.set()
+            started = time.perf_counter()
+            try:
+                await self.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                if self.logger:
+                    self.logger.error(f"[ROOM ACTOR] {self.room_id}: lỗi xử lý {item!r}: {e}")
+            finished = time.perf_counter()
+            self._record(started - enqueued_at, finished - started)
+            # Nhường loop sau mỗi item: phòng có inbox dài không chiếm trọn một vòng event loop
+            await asyncio.sleep(0)
+
+    def _record(self, waited: float, ran: float):
+        self.stats["processed"] += 1
+        self._wait.append(waited)
+        self._run.append(ran)
+        self._wait_total += waited
+        self._run_total += ran
+        if waited > self._wait_max:
+            self._wait_max = waited
+        if ran > self._run_max:
+            self._run_max = ran
+
+    async def close(self, drain: bool = False):
+        """
+        Dừng actor. drain=True: xử lý nốt các item đang chờ trước khi dừng;
+        ngược lại item còn trong inbox bị bỏ (tính vào dropped).
+        Gọi từ chính handler của actor thì chỉ đánh dấu đóng, task tự dừng sau item hiện tại.
+        """
+        task = self._task
+        if drain and task is not None and task is not asyncio.current_task() and not task.done():
+            self._draining = True
+            self._wakeup.set()
+            await task  # _loop tự dừng khi inbox rỗng
+        self.closed = True
+        self.stats["dropped"] += len(self.inbox)
+        self.inbox.clear()
+        if self._space is not None:
+            self._space.set()  # giải phóng các put() đang chờ
+        if task is not None and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # ------------------------------------------------------------------
+    # 📊 METRICS
+    # ------------------------------------------------------------------
+    def metrics(self) -> dict:
+        processed = self.stats["processed"]
+        return {
+            "room_id": self.room_id,
+            "depth": len(self.inbox),
+            "capacity": self.maxsize,
+            "policy": self.policy,
+            **self.stats,
+            "queue_wait": _summary(self._wait, self._wait_total, processed, self._wait_max),
+            "processing": _summary(self._run, self._run_total, processed, self._run_max),
+        }
@@ -1,11 +1,14 @@
-from datetime import datetime
+import asyncio
+
 from ..network.network_manager import NetworkManager
+from ..network.packet_builder import PacketBuilder
 from ..game.game_manager import GameManager
 from ..rooms.room_state import RoomState
+from ..rooms.room_actor import RoomActor
 from ..utils.logger import Logger
 from ..game.player import Player
 from ..game.board import Board
-from ..game.card_manager2 import CardManager
+from ...shared.wire_codec import negotiate
 
 class RoomManager:
     """
@@ -13,15 +16,23 @@ class RoomManager:
       - Kết nối GameManager ↔ RoomState ↔ NetworkManager
       - Tạo / xóa / quản lý phòng
       - Trung gian xử lý hành động từ client (roll, buy, end_turn, ...)
+        qua RoomActor của từng phòng: tuần tự trong một phòng, song song giữa các phòng
     """
 
-    def __init__(self, networkmanager: 'NetworkManager',logger: Logger):
+    def __init__(self, networkmanager: 'NetworkManager',logger: Logger,
+                 inbox_size: int = 256, inbox_policy: str = "drop_newest"):
         self.logger = logger
         self.network = networkmanager
         self.rooms: dict[str, dict] = {}
+        self.actors: dict[str, RoomActor] = {}  # {room_id: RoomActor} inbox hành động của phòng
+        self.inbox_size = inbox_size
+        self.inbox_policy = inbox_policy
+        self._expiry_tasks = set()  # remove_room của các phòng có lease multicast hết hạn
 
         # Đăng ký callback cho các packet đến từ client
         self.network.register_listener("on_packet", self.handle_network_packet)
+        # Lease hết hạn: group đã bị thu hồi → phòng không còn dùng được, xóa luôn phòng
+        self.network.multicast.watch_groups(on_expired=self._on_group_expired)
 
     # ----------------------------------------------------------------------
     # 📡 1️⃣ NHẬN DỮ LIỆU TỪ CLIENT
@@ -29,6 +40,8 @@ class RoomManager:
     async def handle_network_packet(self, packet: dict):
         """
         Callback cho NetworkManager mỗi khi có packet mới đến.
+        Chỉ kiểm tra rồi chuyển hành động vào inbox của phòng — không chờ xử lý xong,
+        nên listen_loop không bị một phòng chậm chặn lại (trừ policy "block" khi inbox đầy).
         """
         room_id = packet.get("room_id")
         data = packet.get("data", {})
@@ -43,8 +56,21 @@ class RoomManager:
         if player_id is None:  # player_id có thể là 0, nên kiểm tra None thay vì not
             self.logger.warning(f"Invalid packet received: Missing player_id. Skipping.")
             return
+        actor = self.actors.get(room_id)
+        if actor is None:
+            self.logger.warning(f"Invalid packet received: room '{room_id}' not found. Skipping.")
+            return
+        await actor.put((player_id, action))
+
+    async def _run_action(self, room_id: str, item: tuple):
+        """Handler của RoomActor: xử lý một hành động đã xếp hàng của phòng."""
+        player_id, action = item
         data = await self.handle_action(room_id, player_id, action)
-        print(f"data của handle_network_packet ham handle_action  {data} :" )
+        self.logger.debug("[ACTION] Room %s: %s của %s → %s", room_id, action, player_id, data)
+
+    def room_metrics(self) -> dict:
+        """Metrics inbox theo phòng: độ sâu hàng đợi, số bị bỏ, thời gian chờ / xử lý."""
+        return {room_id: actor.metrics() for room_id, actor in self.actors.items()}
 
     # ----------------------------------------------------------------------
     # 🏠 2️⃣ QUẢN LÝ PHÒNG
@@ -62,11 +88,12 @@ class RoomManager:
         room_board = Board()
         host_player = Player(player_id=host_id, name="Host Player",room_id=room_id,bank_service=room_board.bank)  # Giả định Player nhận id và name
         room_players = [host_player]
-        card_manager = CardManager()
         state = RoomState(room_id=room_id, host_id=host_id, network=self.network, logger=self.logger,players =room_players,board = room_board )
-        game_mgr = GameManager(state,room_board,card_manager,self.network, self.logger)
+        game_mgr = GameManager(state, room_board, self.network, self.logger)
 
         # Đăng ký vào danh sách phòng
+        self.actors[room_id] = RoomActor(room_id, lambda item: self._run_action(room_id, item),
+                                         maxsize=self.inbox_size, policy=self.inbox_policy, logger=self.logger)
         self.rooms[room_id] = {
             "room_id": room_id,
             "host_id": host_id,
@@ -74,6 +101,7 @@ class RoomManager:
             "game_mgr": game_mgr,
             "multicast_ip": group["ip"],
             "port": group["port"],
+            "member_codecs": {},  # {player_id: danh sách codec client hỗ trợ (None: client cũ, chỉ JSON)}
         }
 
         self.logger.success(f"[ROOM CREATED] {room_id} ({group['ip']}:{group['port']})")
@@ -84,18 +112,35 @@ class RoomManager:
         if room_id not in self.rooms:
             return False
 
-        self.network.multicast.remove_group(room_id)
+        # Dừng actor trước (hủy hành động đang chạy, bỏ hàng đợi) rồi mới gỡ phòng / group,
+        # để không hành động nào còn chạy trên phòng đã bị xóa
+        actor = self.actors.pop(room_id, None)
+        if actor is not None:
+            await actor.close(drain=False)
+        if room_id not in self.rooms:  # đã bị xóa bởi lời gọi khác trong lúc chờ actor dừng
+            return False
+        if room_id in self.network.multicast.groups:  # group có thể đã bị thu hồi do lease hết hạn
+            self.network.multicast.remove_group(room_id)
+        PacketBuilder.reset_room(room_id)
         del self.rooms[room_id]
         self.logger.info(f"[ROOM REMOVED] {room_id}")
         return True
 
+    def _on_group_expired(self, room_id: str, group: dict):
+        if room_id not in self.rooms:
+            return
+        self.logger.warning(f"[ROOM] {room_id}: lease multicast hết hạn, xóa phòng.")
+        task = asyncio.get_running_loop().create_task(self.remove_room(room_id))
+        self._expiry_tasks.add(task)
+        task.add_done_callback(self._expiry_tasks.discard)
+
     async def list_rooms(self):
         """Trả danh sách phòng cho client."""
         return {
             rid: {
                 "ip": info["multicast_ip"],
                 "port": info["port"],
-                "players": list(info["state"].players.keys()),
+                "players": [p.id for p in info["state"].players],
                 "status": info["state"].status,
             }
             for rid, info in self.rooms.items()
@@ -104,21 +149,38 @@ class RoomManager:
     # ----------------------------------------------------------------------
     # 👥 3️⃣ NGƯỜI CHƠI
     # ----------------------------------------------------------------------
-    async def add_player(self, room_id: str, player_id: str, name: str):
+    async def add_player(self, room_id: str, player_id: str, name: str, codecs: list = None):
         room = self.rooms.get(room_id)
-        if not room:
+        group = self.network.multicast.groups.get(room_id)
+        if not room or group is None:  # group bị thu hồi (lease hết hạn) trước khi phòng kịp bị xóa
             return {"error": "Room not found"}
 
         state = room["state"]
-        state.add_player(player_id, name)
+        if state.get_player(player_id) is None:
+            state.add_player(Player(player_id, name, state.board.bank, room_id))
+        room["member_codecs"][player_id] = codecs
+        self._renegotiate_codec(room_id)
 
         if len(state.players) == state.max_players and state.status == RoomState.LOBBY:
             room["game_mgr"].start_game()
             state.status = RoomState.INGAME
             self.logger.info(f"[GAME START] Room {room_id} has begun!")
 # start game ở chỗ này
+        # Người trong phòng nhận patch (người chơi mới), người vừa join nhận snapshot đầy đủ qua TCP
         await self.sync_room_state(room_id)
-        return state.serialize()
+        info = {
+            "room_id": room_id,
+            "multicast_ip": room["multicast_ip"],
+            "port": room["port"],
+            "codec": group["codec"].name,
+            "room_no": group["room_no"],
+            "players": [p.name for p in state.players],
+            "snapshot": state.snapshot_payload(),
+        }
+        if group["uplink"]:
+            # Socket pool của server không join được group này: client gửi thêm bản unicast tới uplink
+            info["uplink_port"] = self.network.multicast.pool.uplink_port
+        return info
 
 
 # nếu remove thì game asset tính sau ?
@@ -129,9 +191,16 @@ class RoomManager:
 
         state = room["state"]
         state.remove_player(player_id)
+        if room["member_codecs"].pop(player_id, False) is not False:
+            self._renegotiate_codec(room_id)
         await self.sync_room_state(room_id)
         return {"ok": True}
 
+    def _renegotiate_codec(self, room_id: str):
+        """Codec gửi của phòng = codec tốt nhất mà mọi thành viên hiện tại đều giải mã được."""
+        room = self.rooms[room_id]
+        self.network.multicast.set_codec(room_id, negotiate(room["member_codecs"].values()))
+
     # ----------------------------------------------------------------------
     # 🎲 4️⃣ HÀNH ĐỘNG GAMEPLAY
     # ----------------------------------------------------------------------
@@ -190,18 +259,41 @@ class RoomManager:
     # ----------------------------------------------------------------------
     # 🔄 5️⃣ ĐỒNG BỘ DỮ LIỆU
     # ----------------------------------------------------------------------
-    async def sync_room_state(self, room_id: str):
-        """Gửi toàn bộ snapshot của RoomState qua NetworkManager."""
+    async def sync_room_state(self, room_id: str, full: bool = False):
+        """
+        Đồng bộ RoomState qua multicast.
+        - Mặc định chỉ gửi patch theo trường (ROOM_STATE_DELTA) từ version trước lên version mới;
+          không có thay đổi thì không gửi gì.
+        - full=True: gửi snapshot đầy đủ (ROOM_STATE_SNAPSHOT) của version hiện tại.
+        """
         room = self.rooms.get(room_id)
         if not room:
             return
-        packet = {
-            "type": "ROOM_STATE_UPDATE",
-            "room_id": room_id,
-            "timestamp": datetime.now().isoformat(),
-            "data": room["state"].serialize(),
-        }
+        state: RoomState = room["state"]
+        patch = state.commit_sync_state()
+
+        if full:
+            packet = state.snapshot_packet()
+        elif patch is None:
+            self.logger.debug("[SYNC] Room %s unchanged at v%s, nothing to send.", room_id, state.version)
+            return
+        else:
+            packet = state.delta_packet(patch)
 
         # Gửi qua tầng mạng (multicast)
         self.network.send_packet(room_id, packet)
-        self.logger.debug(f"[SYNC] Room {room_id} → broadcasted to group.")
+        self.logger.debug("[SYNC] Room %s → %s v%s broadcasted to group.", room_id, packet["type"], state.version)
+
+    async def get_state_snapshot(self, room_id: str, client_version: int = None):
+        """
+        Snapshot đầy đủ cho một client (gửi riêng qua TCP) khi client báo lệch version.
+        Các thay đổi chưa phát được chốt và multicast trước, để snapshot khớp với luồng delta chung.
+        """
+        room = self.rooms.get(room_id)
+        if not room:
+            return None
+
+        await self.sync_room_state(room_id)
+        state: RoomState = room["state"]
+        self.logger.info("[SYNC] Room %s: resync client from v%s to v%s.", room_id, client_version, state.version)
+        return state.snapshot_payload()
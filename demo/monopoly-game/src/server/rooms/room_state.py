@@ -1,9 +1,10 @@
 from datetime import datetime
-import copy
 from ..game.player import Player
 from ..game.board import Board
-from typing import List
+from typing import List, Optional
 from ..game.TurnManager import TurnManager
+from ...shared.state_delta import diff_state
+from .snapshot_store import SnapshotStore
 
 
 class RoomState:
@@ -27,7 +28,8 @@ class RoomState:
     # 3. Trạng thái Kết thúc (Finished)
     # Trò chơi đã hoàn thành, chờ giải tán phòng.
     FINISHED = "finished"
-    def __init__(self, room_id: str, host_id: str, network, logger, players: List['Player'], board: 'Board'):
+    def __init__(self, room_id: str, host_id: str, network, logger, players: List['Player'], board: 'Board',
+                 history_size: int = 256, keyframe_interval: int = 32):
 
         self.room_id = room_id
         self.host_id = host_id
@@ -36,8 +38,9 @@ class RoomState:
 
 
         # Gán danh sách người chơi và Board đã được tạo bên ngoài
-        self.players = players
+        # (players là property: gán lại sẽ dựng lại chỉ mục id → player ở đây và trên Board)
         self.board = board
+        self.players = players
 
         # --- CÁC THUỘC TÍNH ĐỘNG/MẶC ĐỊNH ---
         self.turn_manager = TurnManager(self.players)
@@ -47,11 +50,18 @@ class RoomState:
         # --- METADATA/DEBUG ---
         self.start_time = None
         self.end_time = None
-        self.snapshots = []
+        # Lịch sử version có giới hạn (keyframe + patch, dùng chung nhánh không đổi)
+        self.history = SnapshotStore(max_versions=history_size, keyframe_interval=keyframe_interval)
 
         # Cached previous snapshot
         self._last_snapshot = {}
 
+        # --- ĐỒNG BỘ DELTA ---
+        # version tăng dần mỗi khi trạng thái gửi cho client thay đổi;
+        # _synced_state là trạng thái đã chốt ở version hiện tại (gốc để tính patch kế tiếp)
+        self.version = 0
+        self._synced_state = {}
+
         self.logger.info(f"[STATE] Room '{self.room_id}' initialized by Host ID: {self.host_id}")
 
     # ---------------------------------------------------------
@@ -63,26 +73,98 @@ class RoomState:
             self.logger.warning(f"[STATE:{self.room_id}] Player ID {player.id} is already in the room.")
             return
 
-        self.players.append(player)
+        self._players.append(player)
+        self._players_by_id[player.id] = player
+        if self.board:
+            self.board.add_player(player)
         self.logger.info(f"[STATE:{self.room_id}] Player '{player.id}' joined. Total players: {len(self.players)}")
 
+    def remove_player(self, player_id) -> Optional['Player']:
+        """Xóa người chơi khỏi phòng (và khỏi chỉ mục của Board)."""
+        player = self._players_by_id.pop(player_id, None)
+        if player is None:
+            self.logger.warning(f"[STATE:{self.room_id}] Player ID {player_id} is not in the room.")
+            return None
+
+        self._players.remove(player)
+        if self.board:
+            self.board.remove_player(player_id)
+        self.logger.info(f"[STATE:{self.room_id}] Player '{player_id}' left. Total players: {len(self.players)}")
+        return player
+
     def get_player(self, player_id):
-        return next((p for p in self.players if p.id == player_id), None)
+        return self._players_by_id.get(player_id)
+
+    @property
+    def players(self) -> List['Player']:
+        return self._players
+
+    @players.setter
+    def players(self, players: List['Player']):
+        self._players = players
+        self._players_by_id = {p.id: p for p in players}
+        if self.board:
+            self.board.players = players
 
     def serialize(self):
-        """Trả về bản JSON hóa của RoomState"""
+        """
+        Trả về bản JSON hóa của RoomState.
+        Board ở dạng dict có cấu trúc (tile dict được cache), chỉ được encode JSON một lần khi gửi.
+        """
+        return {**self.sync_state(), "timestamp": datetime.now().isoformat()}
+
+    # ---------------------------------------------------------
+    # Đồng bộ delta (version tăng dần theo từng phòng)
+    # ---------------------------------------------------------
+    def sync_state(self) -> dict:
+        """Trạng thái đồng bộ cho client: dict thuần JSON, board có cấu trúc, không có timestamp."""
+        current = self.turn_manager.get_current_player()
         return {
             "room_id": self.room_id,
             "status": self.status,
             "winner": self.winner,
-            "current_turn": self.turn_manager.get_current_player(),
-            "start_time": self.start_time.isoformat() if self.start_time else None,  # Xử lý datetime
-            "end_time": self.end_time.isoformat() if self.end_time else None,  # Xử lý datetime
+            "current_turn": current.id if current else None,
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "end_time": self.end_time.isoformat() if self.end_time else None,
             "players": [p.serialize() for p in self.players],
-            "board": self.board.serialize_json() if self.board else None,
-            "timestamp": datetime.now().isoformat(),
+            "board": self.board.serialize_dict() if self.board else None,
+        }
+
+    def commit_sync_state(self) -> Optional[list]:
+        """
+        Chốt trạng thái hiện tại thành version mới.
+        Trả về patch so với version trước, hoặc None nếu không có gì thay đổi (version giữ nguyên).
+        """
+        current = self.sync_state()
+        patch = diff_state(self._synced_state, current)
+        if not patch:
+            return None
+        self.version += 1
+        self._synced_state = self.history.record(self.version, current, patch)
+        self.logger.debug("[STATE:%s] Committed v%s (%s ops).", self.room_id, self.version, len(patch))
+        return patch
+
+    def state_at(self, version: int) -> Optional[dict]:
+        """Trạng thái đồng bộ tại một version cũ (None nếu đã bị loại khỏi lịch sử)."""
+        return self.history.rebuild(version)
+
+    def delta_packet(self, patch: list) -> dict:
+        """Packet patch từ version trước lên version hiện tại."""
+        return {
+            "type": "ROOM_STATE_DELTA",
+            "room_id": self.room_id,
+            "base_version": self.version - 1,
+            "version": self.version,
+            "patch": patch,
         }
 
+    def snapshot_payload(self) -> dict:
+        """Snapshot đầy đủ của version đã chốt (chỉ gửi khi join hoặc khi client báo lệch version)."""
+        return {"version": self.version, "state": self._synced_state}
+
+    def snapshot_packet(self) -> dict:
+        return {"type": "ROOM_STATE_SNAPSHOT", "room_id": self.room_id, **self.snapshot_payload()}
+
     # ---------------------------------------------------------
     # Cập nhật từ game (tương thích GameManager)
     # ---------------------------------------------------------
@@ -134,10 +216,9 @@ class RoomState:
         return changes
 
     def _commit_snapshot(self, snapshot):
-        """Ghi lại snapshot vào lịch sử"""
-        self.snapshots.append(copy.deepcopy(snapshot))
+        """Giữ snapshot làm mốc so sánh (lịch sử version nằm trong self.history)."""
         self._last_snapshot = snapshot
-        self.logger.debug(f"[STATE:{self.room_id}] Snapshot committed. Total snapshots: {len(self.snapshots)}")
+        self.logger.debug("[STATE:%s] Snapshot committed. Versions retained: %s", self.room_id, len(self.history))
 
     def _emit_room_update(self, diff):
         """Phát sự kiện cập nhật trạng thái"""
@@ -0,0 +1,115 @@
+# server/rooms/snapshot_store.py
+"""
+Snapshot Store — lịch sử trạng thái phòng có giới hạn
+----------------------------------------------------
+- Ring buffer các segment: mỗi segment = 1 snapshot đầy đủ (keyframe) + các patch nối tiếp.
+- Structural sharing: nhánh con không đổi giữa hai version dùng chung object
+  (không deepcopy cả board mỗi lần commit).
+- Giới hạn số version giữ lại; segment cũ nhất bị bỏ khi phần còn lại đã đủ max_versions.
+- rebuild(version) dựng lại trạng thái ở bất kỳ version nào còn được giữ.
+
+Các snapshot/patch lưu trong store là dùng chung — không sửa trực tiếp.
+"""
+import copy
+from collections import deque
+from typing import Any, List, Optional
+
+from ...shared.state_delta import KEY_FIELD, apply_patch
+
+
+def share_structure(old: Any, new: Any) -> Any:
+    """
+    Trả về cây bằng với new, nhưng tái sử dụng object của old ở mọi nhánh không đổi.
+    """
+    if old is new:
+        return old
+    if type(old) is type(new) and old == new:
+        return old
+    if isinstance(old, dict) and isinstance(new, dict):
+        return {key: share_structure(old[key], value) if key in old else value for key, value in new.items()}
+    if isinstance(old, list) and isinstance(new, list):
+        if all(isinstance(item, dict) and KEY_FIELD in item for item in old + new):
+            old_items = {item[KEY_FIELD]: item for item in old}
+            return [share_structure(old_items[item[KEY_FIELD]], item) if item[KEY_FIELD] in old_items else item
+                    for item in new]
+        return [share_structure(old[i], item) if i < len(old) else item for i, item in enumerate(new)]
+    return new
+
+
+class SnapshotStore:
+    """Lịch sử version của một phòng: keyframe + patch, giới hạn theo số version."""
+
+    def __init__(self, max_versions: int = 256, keyframe_interval: int = 32):
+        """
+        :param max_versions: Số version tối thiểu được giữ lại (có thể nhiều hơn tối đa keyframe_interval - 1)
+        :param keyframe_interval: Cứ bao nhiêu version thì lưu một snapshot đầy đủ
+        """
+        if max_versions < 1 or keyframe_interval < 1:
+            raise ValueError("max_versions and keyframe_interval must be >= 1")
+        self.max_versions = max_versions
+        self.keyframe_interval = keyframe_interval
+        self._segments: deque = deque()  # [{"version", "keyframe", "patches": [...]}]
+        self._latest: Any = None
+        self.latest_version: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # 📝 GHI
+    # ------------------------------------------------------------------
+    def record(self, version: int, state: Any, patch: Optional[List[list]] = None) -> Any:
+        """
+        Lưu trạng thái của version (patch = thay đổi so với version liền trước, nếu có).
+        Trả về bản structurally shared của state (có thể dùng thay cho state).
+        """
+        shared = share_structure(self._latest, state)
+        segment = self._segments[-1] if self._segments else None
+        contiguous = self.latest_version is not None and version == self.latest_version + 1
+
+        if segment is None or patch is None or not contiguous \
+                or len(segment["patches"]) + 1 >= self.keyframe_interval:
+            self._segments.append({"version": version, "keyframe": shared, "patches": []})
+        else:
+            segment["patches"].append(patch)
+
+        self._latest = shared
+        self.latest_version = version
+        self._evict()
+        return shared
+
+    def _evict(self):
+        """Bỏ segment cũ nhất khi các segment còn lại vẫn đủ max_versions."""
+        while len(self._segments) > 1 and self.latest_version - self._segments[1]["version"] + 1 >= self.max_versions:
+            self._segments.popleft()
+
+    # ------------------------------------------------------------------
+    # 🔎 TRUY VẤN
+    # ------------------------------------------------------------------
+    @property
+    def oldest_version(self) -> Optional[int]:
+        return self._segments[0]["version"] if self._segments else None
+
+    def __len__(self) -> int:
+        """Số version đang được giữ."""
+        return sum(1 + len(segment["patches"]) for segment in self._segments)
+
+    def __contains__(self, version: int) -> bool:
+        return self._find_segment(version) is not None
+
+    def latest(self) -> Any:
+        """Trạng thái version mới nhất (dùng chung, không sửa)."""
+        return self._latest
+
+    def rebuild(self, version: int) -> Optional[Any]:
+        """Dựng lại (bản sao độc lập) trạng thái ở version; None nếu version không còn được giữ."""
+        segment = self._find_segment(version)
+        if segment is None:
+            return None
+        state = copy.deepcopy(segment["keyframe"])
+        for patch in segment["patches"][:version - segment["version"]]:
+            state = apply_patch(state, copy.deepcopy(patch))
+        return state
+
+    def _find_segment(self, version: int) -> Optional[dict]:
+        for segment in reversed(self._segments):
+            if segment["version"] <= version:
+                return segment if version - segment["version"] <= len(segment["patches"]) else None
+        return None
@@ -1,16 +1,25 @@
 import json
 import os
+import sys
+import time
+import queue
+import atexit
 import datetime
 import threading
-import inspect
 
 class Logger:
     """
     Logger hỗ trợ:
       - Ghi log ra console với màu sắc theo cấp độ.
       - Ghi log vào file JSON và TXT.
-      - Thread-safe: hỗ trợ nhiều luồng.
-      - Debug: in thêm thông tin caller, thread.
+      - Không chặn event loop: caller chỉ đưa record vào hàng đợi, một thread nền
+        giữ file mở sẵn, ghi theo lô và flush định kỳ.
+      - Ngưỡng cấp độ (level): record bị lọc được bỏ qua hoàn toàn, không format.
+      - Message lười: callable (lambda: f"...") hoặc kiểu %-format ("%s", arg) chỉ được
+        format khi record vượt ngưỡng cấp độ — ngay trong lời gọi (giá trị tại thời điểm gọi,
+        như QueueHandler.prepare), thread nền chỉ làm I/O.
+      - Xoay vòng file theo kích thước (max_bytes) hoặc thời gian (rotate_interval).
+      - Debug: in thêm thông tin caller, thread khi bật capture_caller (sys._getframe).
     """
 
     LOG_DIR = "logs"
@@ -24,64 +33,194 @@ class Logger:
         "RESET": "\033[0m"      # Reset màu
     }
 
-    def __init__(self, room_id=None):
+    LEVELS = {"DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40}
+
+    def __init__(self, room_id=None, level="DEBUG", console=True, capture_caller=False,
+                 max_bytes=10 * 1024 * 1024, backup_count=3, rotate_interval=None, flush_interval=0.5):
+        """
+        :param level: Ngưỡng cấp độ tối thiểu được ghi ("DEBUG" | "INFO" | ...)
+        :param capture_caller: Gắn tên thread + hàm gọi vào record DEBUG (tốn thêm chi phí)
+        :param console: In log ra console hay không
+        :param max_bytes: Xoay vòng file khi vượt kích thước này (0 = tắt)
+        :param backup_count: Số file cũ giữ lại (.1, .2, ...)
+        :param rotate_interval: Xoay vòng file sau mỗi N giây (None = tắt)
+        :param flush_interval: Khoảng thời gian tối đa (giây) dữ liệu nằm trong buffer trước khi flush
+        """
         self.room_id = room_id
         os.makedirs(self.LOG_DIR, exist_ok=True)
         self.log_file = os.path.join(self.LOG_DIR, f"{room_id or 'server'}.log.json")
         self.log_txt_file = os.path.join(self.LOG_DIR, f"{room_id or 'server'}.log.txt")
         self.lock = threading.Lock()
 
-    def _get_timestamp(self):
-        return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.level_no = self.LEVELS[level]
+        self.console = console
+        self.capture_caller = capture_caller
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.flush_interval = flush_interval
+
+        # File handle chỉ được dùng trong thread ghi log
+        self._json_fh = None
+        self._txt_fh = None
+        self._opened_at = 0.0
+
+        self._writer = _LogWriter.instance()
+
+    # ===== Level =====
+    def set_level(self, level: str):
+        self.level_no = self.LEVELS[level]
+
+    def is_enabled(self, level: str) -> bool:
+        return self.LEVELS[level] >= self.level_no
+
+    def _get_timestamp(self, created=None):
+        return datetime.datetime.fromtimestamp(created or time.time()).strftime("%Y-%m-%d %H:%M:%S")
+
+    # ===== Writer thread side =====
+    def _open_files(self):
+        self._json_fh = open(self.log_file, "a", encoding="utf-8")
+        self._txt_fh = open(self.log_txt_file, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _close_files(self):
+        for fh in (self._json_fh, self._txt_fh):
+            if fh:
+                fh.close()
+        self._json_fh = self._txt_fh = None
+
+    def _file_size(self) -> int:
+        """Kích thước file lớn hơn trong cặp JSON / TXT (file JSON thường dài hơn)."""
+        return max(self._json_fh.tell(), self._txt_fh.tell())
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._file_size() >= self.max_bytes:
+            return True
+        if self.rotate_interval and time.time() - self._opened_at >= self.rotate_interval:
+            return True
+        return False
+
+    def _rotate(self):
+        """Đổi tên file hiện tại thành .1, .2, ... và mở file mới."""
+        self._close_files()
+        for path in (self.log_file, self.log_txt_file):
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{path}.{i + 1}")
+            if self.backup_count > 0 and os.path.exists(path):
+                os.replace(path, f"{path}.1")
+            elif os.path.exists(path):
+                os.remove(path)
+        self._open_files()
+
+    def _write_batch(self, records: list):
+        """Ghi một lô record ra file JSON và TXT (+ console) — chỉ chạy trong thread ghi log."""
+        with self.lock:
+            if self._txt_fh is None:
+                self._open_files()
+
+            scope = self.room_id or 'GLOBAL'
+            reset = self.COLOR_MAP["RESET"]
+            console_lines = []
+            start = 0
+            while start < len(records):
+                if self._should_rotate():
+                    self._rotate()
+                # Ghi theo đoạn, dừng khi file JSON hoặc TXT chạm max_bytes để xoay vòng giữa lô
+                budget = self.max_bytes - self._file_size() if self.max_bytes else None
+                json_lines, txt_lines = [], []
+                for level, created, message, extra in records[start:]:
+                    ts = self._get_timestamp(created)
+                    json_lines.append(self._json_line(ts, level, message, extra))
+                    txt_line = f"[{ts}] [{level}] [{scope}] {message}\n"
+                    txt_lines.append(txt_line)
+                    if self.console:
+                        console_lines.append(f"{self.COLOR_MAP.get(level, '')}[{level}] [{scope}] {message}{reset}\n")
+                    if budget is not None:
+                        budget -= max(len(json_lines[-1]), len(txt_line))
+                        if budget <= 0:
+                            break
+                self._json_fh.writelines(json_lines)
+                self._txt_fh.writelines(txt_lines)
+                start += len(txt_lines)
+
+            if console_lines:
+                sys.stdout.writelines(console_lines)
+
+    def _json_line(self, ts: str, level: str, message: str, extra: dict) -> str:
+        entry = {"timestamp": ts, "level": level, "room_id": self.room_id, "message": message}
+        try:
+            return json.dumps({**entry, **extra}, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            # extra không serialize được (vd. bị sửa đồng thời): vẫn giữ record, bỏ phần extra
+            return json.dumps({**entry, "extra_error": repr(e)}, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _render(message, args, origin) -> str:
+        """Format message (%-style) và gắn thông tin caller — chạy ở caller, sau khi qua ngưỡng cấp độ."""
+        if callable(message):
+            message = message()
+        if args:
+            try:
+                message = message % args
+            except Exception as e:
+                try:
+                    message = f"{message} {args!r}"
+                except Exception:
+                    message = f"{message} [format error: {e!r}]"
+        elif not isinstance(message, str):
+            message = str(message)
+        if origin:
+            message = f"{message} (Thread: {origin[0]}, Func: {origin[1]})"
+        return message
 
-    def _write_to_file(self, entry: dict):
-        """Ghi log ra file JSON và TXT"""
+    def _flush_files(self):
         with self.lock:
-            # JSON
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                json.dump(entry, f, ensure_ascii=False)
-                f.write("\n")
-            # TXT
-            with open(self.log_txt_file, "a", encoding="utf-8") as f:
-                ts = entry.get("timestamp")
-                level = entry.get("level")
-                msg = entry.get("message")
-                f.write(f"[{ts}] [{level}] [{self.room_id or 'GLOBAL'}] {msg}\n")
-
-    def _print_to_console(self, level: str, message: str):
-        color = self.COLOR_MAP.get(level, "")
-        reset = self.COLOR_MAP["RESET"]
-        print(f"{color}[{level}] {message}{reset}")
-
-    def log(self, level: str, message: str, **extra):
-        entry = {
-            "timestamp": self._get_timestamp(),
-            "level": level,
-            "room_id": self.room_id,
-            "message": message,
-            **extra
-        }
-        self._print_to_console(level, f"[{self.room_id or 'GLOBAL'}] {message}")
-        self._write_to_file(entry)
+            for fh in (self._json_fh, self._txt_fh):
+                if fh:
+                    fh.flush()
+        if self.console:
+            sys.stdout.flush()
+
+    # ===== Caller side =====
+    def log(self, level: str, message, *args, _origin=None, **extra):
+        """
+        Đưa record vào hàng đợi.
+        :param message: str (có thể chứa %s với *args) hoặc callable trả về str
+        """
+        if self.LEVELS[level] < self.level_no:
+            return
+        self._writer.submit(self, (level, time.time(), self._render(message, args, _origin), extra))
+
+    def flush(self, timeout: float = 5.0):
+        """Chờ thread nền ghi hết các record đang chờ (dùng khi tắt server / trong test)."""
+        self._writer.flush(timeout)
 
     # ===== Shortcut Methods =====
-    def debug(self, message, **extra):
-        caller = inspect.stack()[1].function
-        thread_name = threading.current_thread().name
-        full_message = f"{message} (Thread: {thread_name}, Func: {caller})"
-        self.log("DEBUG", full_message, **extra)
+    def debug(self, message, *args, **extra):
+        """
+        Log DEBUG. Khi DEBUG bị tắt, hàm trả về ngay: không lấy frame, không format message.
+        Dùng debug("... %s", value) hoặc debug(lambda: f"...") để trì hoãn việc format.
+        """
+        if self.LEVELS["DEBUG"] < self.level_no:
+            return
+        origin = None
+        if self.capture_caller:
+            origin = (threading.current_thread().name, sys._getframe(1).f_code.co_name)
+        self.log("DEBUG", message, *args, _origin=origin, **extra)
 
-    def info(self, message, **extra):
-        self.log("INFO", message, **extra)
+    def info(self, message, *args, **extra):
+        self.log("INFO", message, *args, **extra)
 
-    def success(self, message, **extra):
-        self.log("SUCCESS", message, **extra)
+    def success(self, message, *args, **extra):
+        self.log("SUCCESS", message, *args, **extra)
 
-    def warning(self, message, **extra):
-        self.log("WARNING", message, **extra)
+    def warning(self, message, *args, **extra):
+        self.log("WARNING", message, *args, **extra)
 
-    def error(self, message, **extra):
-        self.log("ERROR", message, **extra)
+    def error(self, message, *args, **extra):
+        self.log("ERROR", message, *args, **extra)
     def log_packet(self, direction: str, addr: tuple, packet: dict):
         """
         Ghi log packet gửi/nhận.
@@ -89,12 +228,100 @@ class Logger:
         addr: địa chỉ IP:port
         packet: dict packet
         """
+        if self.LEVELS["DEBUG"] < self.level_no:
+            return
         try:
             # Chuyển packet thành string gọn gàng (JSON pretty)
             packet_str = json.dumps(packet, ensure_ascii=False, indent=2)
-            message = f"[{direction}] {addr}\n{packet_str}"
-            self.debug(message)
+            self.debug("[%s] %s\n%s", direction, addr, packet_str)
         except Exception as e:
             self.error(f"Failed to log packet: {e}")
 
 
+class _LogWriter(threading.Thread):
+    """
+    Thread nền dùng chung cho mọi Logger trong process.
+    - Nhận (logger, record) qua SimpleQueue (put không khóa, rất rẻ cho caller).
+    - Gom các record đang chờ thành lô theo từng logger rồi ghi một lần.
+    - Flush khi hàng đợi rỗng hoặc khi đã quá flush_interval kể từ lần flush trước.
+    """
+
+    MAX_BATCH = 1024
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__(name="LogWriter", daemon=True)
+        self.queue = queue.SimpleQueue()
+        self._dirty = {}  # {logger: thời điểm ghi chưa flush đầu tiên}
+
+    @classmethod
+    def instance(cls) -> "_LogWriter":
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.is_alive():
+                cls._instance = cls()
+                cls._instance.start()
+                atexit.register(cls._instance.flush)
+            return cls._instance
+
+    def submit(self, logger: Logger, record: tuple):
+        self.queue.put((logger, record))
+
+    def flush(self, timeout: float = 5.0):
+        done = threading.Event()
+        self.queue.put((None, done))
+        done.wait(timeout)
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self._next_wait())
+            except queue.Empty:
+                self._flush_dirty(force=False)
+                continue
+
+            batch = [item]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+            self._flush_dirty(force=self.queue.empty())
+
+    def _next_wait(self) -> float:
+        if not self._dirty:
+            return 1.0
+        return max(0.0, min(lg.flush_interval - (time.time() - t) for lg, t in self._dirty.items()))
+
+    def _process(self, batch: list):
+        grouped = {}
+        for logger, record in batch:
+            if logger is None:
+                # Yêu cầu flush đồng bộ: ghi các record trước đó rồi báo hoàn tất
+                self._write_grouped(grouped)
+                grouped = {}
+                self._flush_dirty(force=True)
+                record.set()
+                continue
+            grouped.setdefault(logger, []).append(record)
+        self._write_grouped(grouped)
+
+    def _write_grouped(self, grouped: dict):
+        now = time.time()
+        for logger, records in grouped.items():
+            try:
+                logger._write_batch(records)
+                self._dirty.setdefault(logger, now)
+            except Exception as e:
+                print(f"[LOGGER] Write failed for {logger.log_file}: {e}", file=sys.stderr)
+
+    def _flush_dirty(self, force: bool):
+        now = time.time()
+        for logger, first_write in list(self._dirty.items()):
+            if force or now - first_write >= logger.flush_interval:
+                try:
+                    logger._flush_files()
+                except Exception as e:
+                    print(f"[LOGGER] Flush failed for {logger.log_file}: {e}", file=sys.stderr)
+                del self._dirty[logger]
@@ -1,4 +1,4 @@
-# src/utils/packet_format.py
+# server/utils/packet_format.py
 import json
 import uuid
 import time
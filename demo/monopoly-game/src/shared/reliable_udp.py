@@ -0,0 +1,348 @@
+# src/shared/reliable_udp.py
+"""
+Reliable UDP (chọn lọc theo packet)
+-----------------------------------
+Lớp truyền tin cậy đặt trên socket UDP multicast của phòng, dùng lại các trường meta có sẵn
+trong PacketFormat (seq_id / ack / reliable):
+
+- Packet gửi với reliable=True được gán seq_id tăng dần theo từng người gửi, được phát lại
+  với timeout thích nghi theo RTT (SRTT/RTTVAR kiểu RFC 6298, Karn: bỏ mẫu của gói phát lại)
+  cho đến khi mọi peer đã ACK, và được giao cho ứng dụng đúng thứ tự, không trùng lặp.
+- Packet không tin cậy (heartbeat, ...) đi thẳng: không thêm trường nào, không có trạng thái.
+
+Trường meta của packet tin cậy:
+  {"seq_id": n, "reliable": True, "ack": False, "session": s, "base": b}
+  session: id ngẫu nhiên của kênh gửi (người gửi khởi động lại → bên nhận reset trạng thái).
+  base: mọi seq < base đã được ACK đủ hoặc bị bỏ → bên nhận không chờ các seq đó nữa.
+
+Packet ACK (multicast vào group, chỉ peer có header.target trùng mới xử lý):
+  {"header": {"type": "ACK", "sender": me, "target": peer},
+   "meta": {"ack": True, "session": s, "seq_id": cum, "sack": [seq, ...]}}
+  cum: ACK tích lũy (đã nhận đủ mọi seq <= cum); sack: các seq > cum đã nhận (chọn lọc).
+
+ReliableChannel không làm I/O (dễ kiểm thử với đồng hồ ảo và mạng mất gói giả lập);
+ReliableEndpoint gắn kênh vào event loop asyncio và hàm gửi datagram thật.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+ACK_TYPE = "ACK"
+
+
+def is_transport_packet(packet: dict) -> bool:
+    """Packet thuộc lớp tin cậy (data có seq hoặc ACK) — packet thường trả về False."""
+    meta = packet.get("meta")
+    return isinstance(meta, dict) and "session" in meta
+
+
+class RttEstimator:
+    """Ước lượng RTT và RTO theo RFC 6298."""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial_rto: float = 0.2, min_rto: float = 0.03, max_rto: float = 2.0):
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.rto = initial_rto
+
+    def sample(self, rtt: float):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + 4 * self.rttvar))
+
+
+class _Outgoing:
+    """Một packet tin cậy đang chờ ACK."""
+
+    __slots__ = ("packet", "first_sent", "deadline", "rto", "retries", "awaiting")
+
+    def __init__(self, packet: dict, now: float, rto: float, awaiting: Optional[set]):
+        self.packet = packet
+        self.first_sent = now
+        self.rto = rto
+        self.deadline = now + rto
+        self.retries = 0
+        self.awaiting = awaiting  # None: chưa biết peer nào → ACK đầu tiên là đủ
+
+
+class _Incoming:
+    """Trạng thái nhận theo một người gửi: seq kế tiếp cần giao + bộ đệm gói đến sớm."""
+
+    __slots__ = ("session", "expected", "buffer", "ack_due")
+
+    def __init__(self, session):
+        self.session = session
+        self.expected = 1
+        self.buffer: Dict[int, dict] = {}
+        self.ack_due: Optional[float] = None
+
+
+class ReliableChannel:
+    """
+    Kênh tin cậy của một endpoint (client hoặc server) trong một phòng.
+    - send(): gán seq cho packet tin cậy, trả về packet cần phát (None nếu cửa sổ gửi đang đầy).
+    - receive(): xử lý packet đến, trả về các packet giao cho ứng dụng theo đúng thứ tự.
+    - poll(): các packet cần phát ngay (phát lại khi hết RTO, ACK đến hạn, gói chờ cửa sổ).
+    - next_timeout(): thời điểm cần gọi poll() tiếp theo.
+    """
+
+    def __init__(self, local_id: str, window: int = 256, max_retries: int = 8, ack_delay: float = 0.01,
+                 initial_rto: float = 0.2, min_rto: float = 0.03, max_rto: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.local_id = local_id
+        self.session = random.getrandbits(31)
+        self.window = window
+        self.max_retries = max_retries
+        self.ack_delay = ack_delay
+        self.clock = clock
+        self.rtt = RttEstimator(initial_rto, min_rto, max_rto)
+
+        self.peers: set = set()
+        self.next_seq = 1
+        self.pending: Dict[int, _Outgoing] = {}   # {seq: gói đang chờ ACK}
+        self.backlog: deque = deque()             # gói tin cậy chờ cửa sổ gửi
+        self.incoming: Dict[str, _Incoming] = {}  # {sender: trạng thái nhận}
+        self.on_peer_lost: Optional[Callable[[str], None]] = None
+        self.stats = {
+            "sent": 0, "retransmits": 0, "acks_sent": 0, "acks_received": 0,
+            "delivered": 0, "duplicates": 0, "out_of_order": 0, "peers_lost": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # 👥 PEERS
+    # ------------------------------------------------------------------
+    def add_peer(self, peer_id: str):
+        if peer_id != self.local_id:
+            self.peers.add(peer_id)
+
+    def remove_peer(self, peer_id: str):
+        """Peer rời phòng: không chờ ACK của peer đó nữa."""
+        self.peers.discard(peer_id)
+        self.incoming.pop(peer_id, None)
+        for seq, entry in list(self.pending.items()):
+            if entry.awaiting is not None:
+                entry.awaiting.discard(peer_id)
+                if not entry.awaiting:
+                    del self.pending[seq]
+
+    # ------------------------------------------------------------------
+    # 📤 SEND
+    # ------------------------------------------------------------------
+    def send(self, packet: dict, reliable: bool = False) -> Optional[dict]:
+        """Chuẩn bị packet để phát. Packet không tin cậy được trả về nguyên vẹn."""
+        if not reliable:
+            return packet
+        if len(self.pending) >= self.window:
+            self.backlog.append(packet)
+            return None
+        return self._track(packet)
+
+    def _track(self, packet: dict) -> dict:
+        seq = self.next_seq
+        self.next_seq += 1
+        meta = dict(packet.get("meta") or {})
+        meta.update(seq_id=seq, reliable=True, ack=False, session=self.session, base=self._base(seq))
+        packet = {**packet, "meta": meta}
+        awaiting = set(self.peers) if self.peers else None
+        self.pending[seq] = _Outgoing(packet, self.clock(), self.rtt.rto, awaiting)
+        self.stats["sent"] += 1
+        return packet
+
+    def _base(self, default: int) -> int:
+        # pending được thêm theo seq tăng dần → key đầu tiên là seq nhỏ nhất chưa được ACK đủ
+        return next(iter(self.pending)) if self.pending else default
+
+    # ------------------------------------------------------------------
+    # 📥 RECEIVE
+    # ------------------------------------------------------------------
+    def receive(self, packet: dict) -> List[dict]:
+        """Xử lý packet đến; trả về các packet giao cho ứng dụng (có thể rỗng)."""
+        meta = packet.get("meta")
+        if not isinstance(meta, dict) or "session" not in meta:
+            return [packet]  # packet không tin cậy: giao ngay
+
+        header = packet.get("header") or {}
+        sender = header.get("sender")
+        if sender == self.local_id or sender is None:
+            return []  # gói của chính mình quay về qua multicast loop
+        self.add_peer(sender)
+
+        if meta.get("ack"):
+            if header.get("target") == self.local_id and meta["session"] == self.session:
+                self._on_ack(sender, meta)
+            return []
+        return self._on_data(sender, meta, packet)
+
+    def _on_ack(self, peer: str, meta: dict):
+        self.stats["acks_received"] += 1
+        cumulative = meta.get("seq_id") or 0
+        selective = set(meta.get("sack") or ())
+        now = self.clock()
+        rtt_sample = None
+        for seq in [s for s in self.pending if s <= cumulative or s in selective]:
+            entry = self.pending[seq]
+            if entry.awaiting is not None:
+                if peer not in entry.awaiting:
+                    continue
+                entry.awaiting.discard(peer)
+            if entry.retries == 0:
+                rtt_sample = now - entry.first_sent  # Karn: chỉ lấy mẫu từ gói chưa phát lại
+            if not entry.awaiting:
+                del self.pending[seq]
+        if rtt_sample is not None:
+            self.rtt.sample(rtt_sample)
+
+    def _on_data(self, sender: str, meta: dict, packet: dict) -> List[dict]:
+        state = self.incoming.get(sender)
+        if state is None or state.session != meta["session"]:
+            state = self.incoming[sender] = _Incoming(meta["session"])
+
+        now = self.clock()
+        seq = meta.get("seq_id") or 0
+        delivered = []
+
+        base = meta.get("base") or 1
+        if base > state.expected:
+            # Người gửi đã bỏ các seq < base (đã ACK đủ / hết lượt phát lại) → không chờ nữa
+            state.expected = base
+            for old in sorted(s for s in state.buffer if s < base):
+                delivered.append(state.buffer.pop(old))
+            self._drain(state, delivered)
+
+        if seq < state.expected or seq in state.buffer:
+            self.stats["duplicates"] += 1
+            state.ack_due = now  # ACK lại ngay: ACK trước có thể đã mất
+        elif seq >= state.expected + self.window:
+            return delivered  # ngoài cửa sổ nhận: bỏ, người gửi sẽ phát lại
+        elif seq == state.expected:
+            delivered.append(packet)
+            state.expected += 1
+            self._drain(state, delivered)
+            if state.ack_due is None:
+                state.ack_due = now + self.ack_delay
+        else:
+            self.stats["out_of_order"] += 1
+            state.buffer[seq] = packet
+            state.ack_due = now  # báo lỗ hổng ngay để người gửi chỉ phát lại gói thiếu
+
+        self.stats["delivered"] += len(delivered)
+        return delivered
+
+    @staticmethod
+    def _drain(state: _Incoming, delivered: List[dict]):
+        while state.expected in state.buffer:
+            delivered.append(state.buffer.pop(state.expected))
+            state.expected += 1
+
+    # ------------------------------------------------------------------
+    # ⏱️ TIMERS
+    # ------------------------------------------------------------------
+    def poll(self) -> List[dict]:
+        """Các packet cần phát ngay: ACK đến hạn, phát lại khi hết RTO, gói chờ cửa sổ."""
+        now = self.clock()
+        out = []
+
+        for sender, state in self.incoming.items():
+            if state.ack_due is not None and state.ack_due <= now:
+                out.append(self._ack_packet(sender, state))
+                state.ack_due = None
+
+        for seq, entry in list(self.pending.items()):
+            if entry.deadline > now:
+                continue
+            if entry.retries >= self.max_retries:
+                del self.pending[seq]
+                self._give_up(entry)
+                continue
+            entry.retries += 1
+            entry.rto = min(self.rtt.max_rto, entry.rto * 2)  # backoff theo từng gói
+            entry.deadline = now + entry.rto
+            self.stats["retransmits"] += 1
+            out.append(entry.packet)
+
+        while self.backlog and len(self.pending) < self.window:
+            out.append(self._track(self.backlog.popleft()))
+        return out
+
+    def _give_up(self, entry: _Outgoing):
+        """Hết lượt phát lại: peer chưa ACK được coi là đã mất kết nối."""
+        for peer in entry.awaiting or ():
+            if peer in self.peers:
+                self.stats["peers_lost"] += 1
+                self.remove_peer(peer)
+                if self.on_peer_lost:
+                    self.on_peer_lost(peer)
+
+    def _ack_packet(self, sender: str, state: _Incoming) -> dict:
+        self.stats["acks_sent"] += 1
+        return {
+            "header": {"type": ACK_TYPE, "sender": self.local_id, "target": sender},
+            "meta": {"ack": True, "session": state.session, "seq_id": state.expected - 1,
+                     "sack": sorted(state.buffer)[:32]},
+        }
+
+    def next_timeout(self) -> Optional[float]:
+        """Thời điểm (theo clock) cần gọi poll() kế tiếp, None nếu không có việc chờ."""
+        deadlines = [e.deadline for e in self.pending.values()]
+        deadlines.extend(s.ack_due for s in self.incoming.values() if s.ack_due is not None)
+        return min(deadlines) if deadlines else None
+
+
+class ReliableEndpoint:
+    """
+    Gắn ReliableChannel vào event loop asyncio.
+    transmit(packet) gửi một packet (dict) vào group; được gọi đồng bộ từ send / receive / timer.
+    """
+
+    def __init__(self, channel: ReliableChannel, transmit: Callable[[dict], None]):
+        self.channel = channel
+        self.transmit = transmit
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at: Optional[float] = None
+
+    def send(self, packet: dict, reliable: bool = False):
+        out = self.channel.send(packet, reliable)
+        if out is not None:
+            self.transmit(out)
+        if reliable:
+            self._reschedule()
+
+    def receive(self, packet: dict) -> List[dict]:
+        if not is_transport_packet(packet):
+            return [packet]
+        delivered = self.channel.receive(packet)
+        self._reschedule()
+        return delivered
+
+    def _on_timer(self):
+        self._timer = self._timer_at = None
+        for packet in self.channel.poll():
+            self.transmit(packet)
+        self._reschedule()
+
+    def _reschedule(self):
+        deadline = self.channel.next_timeout()
+        if deadline is None or (self._timer is not None and self._timer_at <= deadline):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # ngoài event loop: không có timer phát lại
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = deadline
+        self._timer = loop.call_later(max(0.0, deadline - self.channel.clock()), self._on_timer)
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_at = None
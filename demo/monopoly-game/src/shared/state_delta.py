@@ -0,0 +1,146 @@
+# src/shared/state_delta.py
+"""
+Delta State Sync
+----------------
+Tính patch theo từng trường giữa hai version trạng thái phòng (server) và áp dụng patch (client).
+
+Trạng thái là dict thuần JSON. Patch là list các op:
+  ["set", path, value]   gán giá trị mới tại path
+  ["del", path]          xóa key (dict) hoặc phần tử (list theo "id")
+  ["add", path, value]   thêm phần tử mới vào cuối list tại path
+
+path là list các key. Với list mà mọi phần tử là dict có "id" (players, tiles) thì bước path
+tương ứng là id của phần tử, nhờ vậy patch không phụ thuộc vị trí phần tử trong list.
+"""
+from typing import Any, List
+
+KEY_FIELD = "id"
+
+
+class PatchError(ValueError):
+    """Patch không khớp với trạng thái đang giữ (client cần xin snapshot mới)."""
+
+
+# ------------------------------------------------------------------
+# 🧮 DIFF (server)
+# ------------------------------------------------------------------
+def diff_state(old: Any, new: Any) -> List[list]:
+    """Trả về list op biến old thành new (list rỗng nếu không có thay đổi)."""
+    ops: List[list] = []
+    _diff(old, new, [], ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: list, ops: List[list]):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", path + [key], value])
+            elif old[key] != value:
+                _diff(old[key], value, path + [key], ops)
+        for key in old:
+            if key not in new:
+                ops.append(["del", path + [key]])
+    elif _is_keyed_list(old) and _is_keyed_list(new) and _diff_keyed_list(old, new, path, ops):
+        return
+    else:
+        ops.append(["set", path, new])
+
+
+def _is_keyed_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) and KEY_FIELD in item for item in value)
+
+
+def _diff_keyed_list(old: list, new: list, path: list, ops: List[list]) -> bool:
+    """
+    Diff list theo "id": chỉ gửi trường thay đổi của từng phần tử, del phần tử bị bỏ,
+    add phần tử mới ở cuối. Trả về False nếu thứ tự bị đảo (khi đó gán lại cả list).
+    """
+    old_items = {item[KEY_FIELD]: item for item in old}
+    new_items = {item[KEY_FIELD]: item for item in new}
+    if len(old_items) != len(old) or len(new_items) != len(new):
+        return False  # id trùng lặp → không diff theo id được
+
+    kept_old = [key for key in old_items if key in new_items]
+    kept_new = [item[KEY_FIELD] for item in new if item[KEY_FIELD] in old_items]
+    if kept_old != kept_new:
+        return False
+
+    sub_ops: List[list] = []
+    added = False
+    for item in new:
+        key = item[KEY_FIELD]
+        if key not in old_items:
+            added = True
+        elif added:
+            return False  # phần tử mới chen giữa các phần tử cũ
+    for key in old_items:
+        if key not in new_items:
+            sub_ops.append(["del", path + [key]])
+    for item in new:
+        key = item[KEY_FIELD]
+        if key not in old_items:
+            sub_ops.append(["add", path, item])
+        elif old_items[key] != item:
+            _diff(old_items[key], item, path + [key], sub_ops)
+
+    ops.extend(sub_ops)
+    return True
+
+
+# ------------------------------------------------------------------
+# 🩹 APPLY (client)
+# ------------------------------------------------------------------
+def apply_patch(state: Any, patch: List[list]) -> Any:
+    """
+    Áp dụng patch lên state (sửa tại chỗ) và trả về state mới.
+    Raise PatchError nếu path không tồn tại.
+    """
+    for op in patch:
+        kind, path = op[0], op[1]
+        if kind == "add":
+            target = _resolve(state, path)
+            if not isinstance(target, list):
+                raise PatchError(f"Path {path} is not a list")
+            target.append(op[2])
+        elif not path:
+            if kind != "set":
+                raise PatchError("Cannot delete the root state")
+            state = op[2]
+        else:
+            parent = _resolve(state, path[:-1])
+            if kind == "set":
+                if isinstance(parent, list):
+                    parent[_index_of(parent, path[-1])] = op[2]
+                else:
+                    parent[path[-1]] = op[2]
+            elif kind == "del":
+                try:
+                    if isinstance(parent, list):
+                        del parent[_index_of(parent, path[-1])]
+                    else:
+                        del parent[path[-1]]
+                except KeyError:
+                    raise PatchError(f"Path {path} not found")
+            else:
+                raise PatchError(f"Unknown patch op '{kind}'")
+    return state
+
+
+def _resolve(state: Any, path: list) -> Any:
+    node = state
+    for step in path:
+        if isinstance(node, list):
+            node = node[_index_of(node, step)]
+        elif isinstance(node, dict) and step in node:
+            node = node[step]
+        else:
+            raise PatchError(f"Path {path} not found")
+    return node
+
+
+def _index_of(items: list, key: Any) -> int:
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and item.get(KEY_FIELD) == key:
+            return index
+    raise PatchError(f"No item with {KEY_FIELD}={key!r}")
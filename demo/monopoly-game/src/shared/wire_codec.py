@@ -0,0 +1,594 @@
+# src/shared/wire_codec.py
+"""
+Wire Codec cho datagram của phòng
+---------------------------------
+Mã hóa packet (dict) thành datagram UDP. Hai họ codec, chọn theo từng phòng:
+
+- "json": JSON UTF-8 như trước (mặc định, client cũ chỉ hiểu loại này).
+- "bin1" / "bin1+msgpack": header cố định đóng gói bằng struct + thân gọn.
+  Thân của các loại packet nóng (di chuyển, số dư, xúc xắc, heartbeat, ACK, lệnh client,
+  delta trạng thái) theo layout struct cố định. Phần còn lại (payload tự do) dùng msgpack
+  nếu có cài, không thì dùng JSON gọn (không khoảng trắng).
+
+Header nhị phân (20 byte, big-endian):
+  magic u8 | version u8 | ptype u8 | flags u8 | room_no u32 | seq u32 | ts_us u64
+  ptype: loại layout (PT_*); room_no: số phòng do server cấp (chặn datagram lạc phòng);
+  seq: meta.seq_id / version; ts_us: timestamp (micro giây epoch UTC).
+
+Datagram tự mô tả: byte đầu là MAGIC → nhị phân, '{' → JSON. Vì vậy mọi codec đều giải mã được
+cả hai dạng; codec của phòng chỉ quyết định dạng gửi đi. Giải mã luôn trả về đúng dict mà
+json.loads(json.dumps(packet)) trả về (tuple → list).
+"""
+import json
+import struct
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack là tùy chọn — bin1 dùng JSON gọn cho phần thân
+    msgpack = None
+
+MAGIC = 0xB7
+VERSION = 1
+
+JSON = "json"
+BIN1 = "bin1"
+BIN1_MSGPACK = "bin1+msgpack"
+CODEC_PREFERENCE = [BIN1_MSGPACK, BIN1, JSON]  # tốt nhất trước
+
+HEADER = struct.Struct("!BBBBIIQ")
+U8 = struct.Struct("!B")
+U32 = struct.Struct("!I")
+
+FLAG_MSGPACK = 0x01  # thân tự do mã hóa bằng msgpack (không có: JSON gọn)
+
+# Loại layout
+PT_GENERIC = 0
+PT_EVENT = 1       # PacketBuilder._base_packet (packet_id → seq, timestamp ms → ts_us)
+PT_HEARTBEAT = 2   # heartbeat của main_loop
+PT_ACK = 3         # ACK của reliable_udp
+PT_COMMAND = 4     # packet header/command/payload của client / PacketFormat
+PT_DELTA = 5       # ROOM_STATE_DELTA
+
+NONE_STR = 0xFF    # độ dài đặc biệt: chuỗi None
+EPOCH = datetime(1970, 1, 1)
+
+
+class CodecError(ValueError):
+    """Datagram nhị phân không hợp lệ, sai phiên bản hoặc không thuộc phòng này."""
+
+
+def available_codecs() -> List[str]:
+    """Các codec process này mã hóa / giải mã được, tốt nhất trước."""
+    return [name for name in CODEC_PREFERENCE if name != BIN1_MSGPACK or msgpack is not None]
+
+
+def negotiate(offers: Iterable[Optional[Iterable[str]]]) -> str:
+    """
+    Codec tốt nhất mà mọi thành viên đều hỗ trợ.
+    offer None (client cũ không gửi danh sách codec) nghĩa là chỉ hiểu JSON.
+    """
+    common = set(available_codecs())
+    for offer in offers:
+        common &= set(offer) if offer is not None else {JSON}
+    for name in CODEC_PREFERENCE:
+        if name in common:
+            return name
+    return JSON
+
+
+def make_codec(name: str, room_id: str = None, room_no: int = 0):
+    if name == JSON:
+        return JsonCodec(room_id, room_no)
+    if name == BIN1:
+        return BinaryCodec(room_id, room_no, use_msgpack=False)
+    if name == BIN1_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Codec 'bin1+msgpack' cần cài msgpack")
+        return BinaryCodec(room_id, room_no, use_msgpack=True)
+    raise ValueError(f"Unknown codec '{name}'. Available: {available_codecs()}")
+
+
+# ------------------------------------------------------------------
+# 🧩 JSON
+# ------------------------------------------------------------------
+class JsonCodec:
+    """Codec JSON (tương thích ngược). decode() vẫn nhận được datagram nhị phân của phòng."""
+
+    name = JSON
+
+    def __init__(self, room_id: str = None, room_no: int = 0):
+        self.room_id = room_id
+        self.room_no = room_no
+        self._binary = None
+
+    def encode(self, packet: dict) -> bytes:
+        to_json = getattr(packet, "to_json", None)  # Packet của PacketBuilder: phần đầu JSON mã hóa sẵn
+        if to_json is not None:
+            return to_json()
+        return json.dumps(packet).encode("utf-8")
+
+    def decode(self, data: bytes) -> dict:
+        if data[:1] == b"{":
+            return json.loads(data)
+        if self._binary is None:
+            self._binary = BinaryCodec(self.room_id, self.room_no, use_msgpack=msgpack is not None)
+        return self._binary.decode(data)
+
+
+# ------------------------------------------------------------------
+# ⚙️ BINARY
+# ------------------------------------------------------------------
+class _Writer:
+    __slots__ = ("parts",)
+
+    def __init__(self):
+        self.parts = []
+
+    def raw(self, data: bytes):
+        self.parts.append(data)
+
+    def u8(self, value: int):
+        self.parts.append(U8.pack(value))
+
+    def u32(self, value: int):
+        self.parts.append(U32.pack(value))
+
+    def str(self, value: Optional[str]):
+        if value is None:
+            self.parts.append(b"\xff")
+            return
+        if not isinstance(value, str):
+            raise _NoMatch
+        data = value.encode("utf-8")
+        if len(data) >= NONE_STR:
+            raise _NoMatch
+        self.parts.append(U8.pack(len(data)) + data)
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes, pos: int):
+        self.data = data
+        self.pos = pos
+
+    def take(self, size: int) -> bytes:
+        end = self.pos + size
+        if end > len(self.data):
+            raise CodecError("Datagram bị cắt cụt")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def u8(self) -> int:
+        return self.take(1)[0]
+
+    def u32(self) -> int:
+        return U32.unpack(self.take(4))[0]
+
+    def str(self) -> Optional[str]:
+        size = self.u8()
+        if size == NONE_STR:
+            return None
+        return self.take(size).decode("utf-8")
+
+    def rest(self) -> bytes:
+        chunk = self.data[self.pos:]
+        self.pos = len(self.data)
+        return chunk
+
+
+class _NoMatch(Exception):
+    """Packet không khớp layout nóng → dùng PT_GENERIC."""
+
+
+def _is_u8(value) -> bool:
+    return type(value) is int and 0 <= value < 256
+
+
+def _is_u32(value) -> bool:
+    return type(value) is int and 0 <= value < 2 ** 32
+
+
+_ONE_US = timedelta(microseconds=1)
+
+
+def _iso_to_us(text) -> int:
+    """
+    ISO 8601 đúng dạng datetime.isoformat() (không múi giờ) → micro giây epoch.
+    _NoMatch nếu chuỗi không khôi phục lại y hệt được (dạng khác, micro giây "000000", ...).
+    """
+    if not isinstance(text, str) or text[10:11] != "T":
+        raise _NoMatch
+    size = len(text)
+    if size != 19 and (size != 26 or text[19] != "." or text.endswith("000000")):
+        raise _NoMatch
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        raise _NoMatch
+    if moment < EPOCH:
+        raise _NoMatch
+    return (moment - EPOCH) // _ONE_US
+
+
+def _us_to_iso(value: int) -> str:
+    return (EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+# Định dạng timestamp trong header: 0 = isoformat(), 1 = isoformat() + "Z"
+# ("%Y-%m-%dT%H:%M:%SZ" của PacketFormat chính là dạng 1 khi không có micro giây)
+def _encode_header_ts(text):
+    if isinstance(text, str) and text.endswith("Z"):
+        return 1, _iso_to_us(text[:-1])
+    return 0, _iso_to_us(text)
+
+
+def _decode_header_ts(kind: int, us: int) -> str:
+    text = _us_to_iso(us)
+    return text if kind == 0 else text + "Z"
+
+
+def _uuid_bytes(text) -> bytes:
+    """UUID dạng chuẩn str(uuid) (chữ thường, có gạch) → 16 byte."""
+    if (not isinstance(text, str) or len(text) != 36 or text[8] != "-" or text[13] != "-"
+            or text[18] != "-" or text[23] != "-" or text != text.lower()):
+        raise _NoMatch
+    try:
+        return bytes.fromhex(text[:8] + text[9:13] + text[14:18] + text[19:23] + text[24:])
+    except ValueError:
+        raise _NoMatch
+
+
+def _uuid_str(data: bytes) -> str:
+    h = data.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Payload struct cố định cho các event nóng của PacketBuilder (theo "type")
+_MOVE = struct.Struct("!BBB")          # position, dice[0], dice[1]
+_BALANCE = struct.Struct("!i")         # balance (có thể âm khi phá sản)
+_ROLL = struct.Struct("!BBB?")         # dice[0], dice[1], total_steps, is_double
+
+_META_KEYS = ["seq_id", "ack", "reliable", "hop_count", "session", "base"]
+
+
+class BinaryCodec:
+    """Codec nhị phân bin1 của một phòng (room_id / room_no cố định)."""
+
+    def __init__(self, room_id: str = None, room_no: int = 0, use_msgpack: bool = None):
+        self.room_id = room_id
+        self.room_no = room_no
+        self.use_msgpack = (msgpack is not None) if use_msgpack is None else use_msgpack
+        if self.use_msgpack and msgpack is None:
+            raise ValueError("msgpack chưa được cài")
+        self.name = BIN1_MSGPACK if self.use_msgpack else BIN1
+        self._flags = FLAG_MSGPACK if self.use_msgpack else 0
+        self._decoders = {
+            PT_GENERIC: self._dec_generic,
+            PT_EVENT: self._dec_event,
+            PT_HEARTBEAT: self._dec_heartbeat,
+            PT_ACK: self._dec_ack,
+            PT_COMMAND: self._dec_command,
+            PT_DELTA: self._dec_delta,
+        }
+
+    # -------------------------------------------------------------- thân tự do
+    def _body(self, value) -> bytes:
+        if self.use_msgpack:
+            return msgpack.packb(value, use_bin_type=True)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _unbody(data: bytes, flags: int):
+        if flags & FLAG_MSGPACK:
+            if msgpack is None:
+                raise CodecError("Datagram dùng msgpack nhưng msgpack chưa được cài")
+            return msgpack.unpackb(data, raw=False)
+        return json.loads(data)
+
+    def _sized_body(self, writer: _Writer, value):
+        body = self._body(value)
+        writer.u32(len(body))
+        writer.raw(body)
+
+    def _read_sized_body(self, reader: _Reader, flags: int):
+        return self._unbody(reader.take(reader.u32()), flags)
+
+    # -------------------------------------------------------------- API
+    def _layout_for(self, packet: dict):
+        """Chọn layout nóng theo hình dạng packet (một lần tra cứu, không thử lần lượt)."""
+        header = packet.get("header")
+        if header is not None:
+            if "command" not in packet:
+                return PT_ACK, self._enc_ack
+            if "packet_id" in header:
+                return PT_COMMAND, self._enc_command
+            return PT_HEARTBEAT, self._enc_heartbeat
+        if "packet_id" in packet:
+            return PT_EVENT, self._enc_event
+        if packet.get("type") == "ROOM_STATE_DELTA":
+            return PT_DELTA, self._enc_delta
+        return PT_GENERIC, None
+
+    def encode(self, packet: dict) -> bytes:
+        ptype, encoder = self._layout_for(packet)
+        if encoder is not None:
+            try:
+                seq, ts_us, body = encoder(packet)
+                return HEADER.pack(MAGIC, VERSION, ptype, self._flags, self.room_no, seq, ts_us) + body
+            except (_NoMatch, AttributeError, TypeError, KeyError):
+                pass
+        # Packet tự do (không khớp layout nóng nào): cả dict vào thân msgpack,
+        # không có msgpack thì JSON gọn không header (tự mô tả bằng '{', nhỏ hơn header 20 byte)
+        if not self.use_msgpack:
+            return self._body(packet)
+        return HEADER.pack(MAGIC, VERSION, PT_GENERIC, self._flags, self.room_no, 0, 0) + self._body(packet)
+
+    def decode(self, data: bytes) -> dict:
+        if data[:1] == b"{":
+            return json.loads(data)
+        if len(data) < HEADER.size or data[0] != MAGIC:
+            raise CodecError("Không phải datagram bin1")
+        magic, version, ptype, flags, room_no, seq, ts_us = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise CodecError(f"Phiên bản codec {version} không được hỗ trợ")
+        if room_no != self.room_no:
+            raise CodecError(f"Datagram của phòng #{room_no}, không phải #{self.room_no}")
+        decoder = self._decoders.get(ptype)
+        if decoder is None:
+            raise CodecError(f"Loại packet {ptype} không xác định")
+        try:
+            return decoder(_Reader(data, HEADER.size), flags, seq, ts_us)
+        except (ValueError, KeyError, IndexError, struct.error) as e:
+            if isinstance(e, CodecError):
+                raise
+            raise CodecError(f"Datagram bin1 hỏng: {e}")
+
+    # -------------------------------------------------------------- GENERIC
+    def _dec_generic(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        return self._unbody(reader.rest(), flags)
+
+    # -------------------------------------------------------------- EVENT (PacketBuilder)
+    _EVENT_KEYS = {"packet_id", "timestamp", "type", "room_id", "sender_id", "payload"}
+
+    def _enc_event(self, packet: dict):
+        if packet.keys() != self._EVENT_KEYS or packet["room_id"] != self.room_id:
+            raise _NoMatch
+        event_type, payload = packet["type"], packet["payload"]
+        if not isinstance(event_type, str) or not isinstance(payload, dict):
+            raise _NoMatch
+        packet_id, ts_ms = packet["packet_id"], packet["timestamp"]
+        if not _is_u32(packet_id) or type(ts_ms) is not int or not 0 <= ts_ms < 2 ** 64 // 1000:
+            raise _NoMatch
+        w = _Writer()
+        w.str(event_type)
+        w.str(packet["sender_id"])
+
+        kind = self._event_payload_kind(event_type, payload)
+        w.u8(kind)
+        if kind == 0:
+            w.raw(_MOVE.pack(payload["position"], *payload["dice"]))
+        elif kind == 1:
+            w.raw(_BALANCE.pack(payload["balance"]))
+        elif kind == 2:
+            w.raw(_ROLL.pack(payload["dice"][0], payload["dice"][1], payload["total_steps"], payload["is_double"]))
+        elif kind == 3:
+            w.str(payload["next_player_id"])
+        else:
+            w.raw(self._body(payload))
+        return packet_id, ts_ms * 1000, b"".join(w.parts)
+
+    @staticmethod
+    def _event_payload_kind(event_type: str, payload: dict) -> int:
+        """Chỉ số layout struct của payload (0..3), 255 = thân tự do."""
+        try:
+            if event_type == "player_move" and payload.keys() == {"position", "dice"}:
+                dice = payload["dice"]
+                if _is_u8(payload["position"]) and len(dice) == 2 and all(_is_u8(d) for d in dice):
+                    return 0
+            elif event_type == "update_balance" and payload.keys() == {"balance"}:
+                if type(payload["balance"]) is int and -2 ** 31 <= payload["balance"] < 2 ** 31:
+                    return 1
+            elif event_type == "roll_dice_result" and payload.keys() == {"dice", "total_steps", "is_double"}:
+                dice = payload["dice"]
+                if (len(dice) == 2 and all(_is_u8(d) for d in dice) and _is_u8(payload["total_steps"])
+                        and type(payload["is_double"]) is bool):
+                    return 2
+            elif event_type == "next_turn" and payload.keys() == {"next_player_id"}:
+                value = payload["next_player_id"]
+                if isinstance(value, str) and len(value.encode("utf-8")) < NONE_STR:
+                    return 3
+        except TypeError:
+            pass
+        return 255
+
+    def _dec_event(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        event_type = reader.str()
+        sender_id = reader.str()
+        kind = reader.u8()
+        if kind == 0:
+            position, d1, d2 = _MOVE.unpack(reader.take(_MOVE.size))
+            payload = {"position": position, "dice": [d1, d2]}
+        elif kind == 1:
+            payload = {"balance": _BALANCE.unpack(reader.take(_BALANCE.size))[0]}
+        elif kind == 2:
+            d1, d2, total, is_double = _ROLL.unpack(reader.take(_ROLL.size))
+            payload = {"dice": [d1, d2], "total_steps": total, "is_double": is_double}
+        elif kind == 3:
+            payload = {"next_player_id": reader.str()}
+        else:
+            payload = self._unbody(reader.rest(), flags)
+        return {
+            "type": event_type,
+            "room_id": self.room_id,
+            "sender_id": sender_id,
+            "packet_id": seq,
+            "timestamp": ts_us // 1000,
+            "payload": payload,
+        }
+
+    # -------------------------------------------------------------- HEARTBEAT (main_loop)
+    def _enc_heartbeat(self, packet: dict):
+        header, command, payload = packet.get("header"), packet.get("command"), packet.get("payload")
+        if (len(packet) != 3 or not isinstance(header, dict) or header.keys() != {"room_id", "type", "timestamp"}
+                or header["room_id"] != self.room_id or header["type"] != "STATE"
+                or command != {"action": "HEARTBEAT"}
+                or not isinstance(payload, dict) or payload.keys() != {"players", "active_rooms"}
+                or not _is_u32(payload["active_rooms"])):
+            raise _NoMatch
+        kind, ts_us = _encode_header_ts(header["timestamp"])
+        if kind != 1:
+            raise _NoMatch
+        return 0, ts_us, U32.pack(payload["active_rooms"]) + self._body(payload["players"])
+
+    def _dec_heartbeat(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        active_rooms = reader.u32()
+        return {
+            "header": {"room_id": self.room_id, "type": "STATE", "timestamp": _decode_header_ts(1, ts_us)},
+            "command": {"action": "HEARTBEAT"},
+            "payload": {"players": self._unbody(reader.rest(), flags), "active_rooms": active_rooms},
+        }
+
+    # -------------------------------------------------------------- ACK (reliable_udp)
+    def _enc_ack(self, packet: dict):
+        header, meta = packet.get("header"), packet.get("meta")
+        if (len(packet) != 2 or not isinstance(header, dict) or header.get("type") != "ACK"
+                or header.keys() != {"type", "sender", "target"}
+                or not isinstance(meta, dict) or meta.keys() != {"ack", "session", "seq_id", "sack"}
+                or meta["ack"] is not True or not _is_u32(meta["session"]) or not _is_u32(meta["seq_id"])
+                or not isinstance(meta["sack"], list) or len(meta["sack"]) > 255
+                or not all(_is_u32(s) for s in meta["sack"])):
+            raise _NoMatch
+        w = _Writer()
+        w.str(header["sender"])
+        w.str(header["target"])
+        w.u32(meta["session"])
+        w.u8(len(meta["sack"]))
+        w.raw(struct.pack(f"!{len(meta['sack'])}I", *meta["sack"]))
+        return meta["seq_id"], 0, b"".join(w.parts)
+
+    def _dec_ack(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        sender = reader.str()
+        target = reader.str()
+        session = reader.u32()
+        count = reader.u8()
+        sack = list(struct.unpack(f"!{count}I", reader.take(4 * count)))
+        return {
+            "header": {"type": "ACK", "sender": sender, "target": target},
+            "meta": {"ack": True, "session": session, "seq_id": seq, "sack": sack},
+        }
+
+    # -------------------------------------------------------------- COMMAND (client / PacketFormat)
+    _COMMAND_HEADER = ("packet_id", "room_id", "sender", "target", "type", "timestamp", "version")
+
+    def _enc_command(self, packet: dict):
+        header, command = packet.get("header"), packet.get("command")
+        keys = packet.keys()
+        if not (keys == {"header", "command", "payload"} or keys == {"header", "meta", "command", "payload"}):
+            raise _NoMatch
+        if (not isinstance(header, dict) or tuple(header) != self._COMMAND_HEADER
+                or header["room_id"] != self.room_id
+                or not isinstance(command, dict) or command.keys() != {"action", "args"}):
+            raise _NoMatch
+
+        w = _Writer()
+        # packet_id: uuid (client) | "<sender>-<uuid>" (PacketFormat) | chuỗi bất kỳ
+        packet_id, sender = header["packet_id"], header["sender"]
+        try:
+            if isinstance(sender, str) and isinstance(packet_id, str) and packet_id.startswith(sender + "-"):
+                id_bytes, id_kind = _uuid_bytes(packet_id[len(sender) + 1:]), 1
+            else:
+                id_bytes, id_kind = _uuid_bytes(packet_id), 0
+        except _NoMatch:
+            id_bytes, id_kind = None, 2
+        ts_kind, ts_us = _encode_header_ts(header["timestamp"])
+
+        meta = packet.get("meta")
+        seq, meta_mask = 0, 0
+        if meta is not None:
+            if not isinstance(meta, dict) or not meta.keys() <= set(_META_KEYS):
+                raise _NoMatch
+            for bit, key in enumerate(_META_KEYS):
+                if key in meta:
+                    meta_mask |= 1 << bit
+            seq = meta.get("seq_id", 0)
+            if not _is_u32(seq) or not all(type(meta[k]) is bool for k in ("ack", "reliable") if k in meta):
+                raise _NoMatch
+            if not all(_is_u32(meta[k]) for k in ("session", "base") if k in meta):
+                raise _NoMatch
+            if "hop_count" in meta and not _is_u8(meta["hop_count"]):
+                raise _NoMatch
+        # bit 7: có meta (mask 0 vẫn phân biệt được meta rỗng)
+        w.u8(id_kind | (ts_kind << 2) | (0x80 if meta is not None else 0))
+        if id_kind == 2:
+            w.str(packet_id)
+        else:
+            w.raw(id_bytes)
+        w.str(sender)
+        w.str(header["target"])
+        w.str(header["type"])
+        w.str(header["version"])
+        w.str(command["action"])
+        if meta is not None:
+            w.u8(meta_mask)
+            w.u8((1 if meta.get("ack") else 0) | (2 if meta.get("reliable") else 0))
+            w.u8(meta.get("hop_count", 0))
+            w.u32(meta.get("session", 0))
+            w.u32(meta.get("base", 0))
+        # Client gửi cùng một dict cho args và payload → chỉ mã hóa một lần
+        same = packet["payload"] == command["args"]
+        w.u8(1 if same else 0)
+        self._sized_body(w, command["args"])
+        if not same:
+            self._sized_body(w, packet["payload"])
+        return seq, ts_us, b"".join(w.parts)
+
+    def _dec_command(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        bits = reader.u8()
+        id_kind, ts_kind, has_meta = bits & 0x03, (bits >> 2) & 0x03, bool(bits & 0x80)
+        raw_id = reader.str() if id_kind == 2 else _uuid_str(reader.take(16))
+        sender = reader.str()
+        packet_id = f"{sender}-{raw_id}" if id_kind == 1 else raw_id
+        header = {
+            "packet_id": packet_id,
+            "room_id": self.room_id,
+            "sender": sender,
+            "target": reader.str(),
+            "type": reader.str(),
+            "timestamp": _decode_header_ts(ts_kind, ts_us),
+            "version": reader.str(),
+        }
+        action = reader.str()
+        packet = {"header": header}
+        if has_meta:
+            mask, bools, hop_count = reader.u8(), reader.u8(), reader.u8()
+            session, base = reader.u32(), reader.u32()
+            values = {"seq_id": seq, "ack": bool(bools & 1), "reliable": bool(bools & 2),
+                      "hop_count": hop_count, "session": session, "base": base}
+            packet["meta"] = {key: values[key] for bit, key in enumerate(_META_KEYS) if mask & (1 << bit)}
+        same = reader.u8()
+        args_body = reader.take(reader.u32())
+        packet["command"] = {"action": action, "args": self._unbody(args_body, flags)}
+        packet["payload"] = self._unbody(args_body, flags) if same else self._read_sized_body(reader, flags)
+        return packet
+
+    # -------------------------------------------------------------- DELTA (RoomState)
+    def _enc_delta(self, packet: dict):
+        if (packet.get("type") != "ROOM_STATE_DELTA" or len(packet) != 5 or packet.get("room_id") != self.room_id
+                or not _is_u32(packet.get("version")) or not _is_u32(packet.get("base_version"))
+                or "patch" not in packet):
+            raise _NoMatch
+        return packet["version"], 0, U32.pack(packet["base_version"]) + self._body(packet["patch"])
+
+    def _dec_delta(self, reader: _Reader, flags: int, seq: int, ts_us: int) -> dict:
+        base_version = reader.u32()
+        return {
+            "type": "ROOM_STATE_DELTA",
+            "room_id": self.room_id,
+            "base_version": base_version,
+            "version": seq,
+            "patch": self._unbody(reader.rest(), flags),
+        }
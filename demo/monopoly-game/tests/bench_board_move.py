@@ -0,0 +1,116 @@
+# tests/bench_board_move.py
+"""
+Microbenchmark một nước đi đầy đủ trên server Board: chỉ mục O(1) so với quét tuyến tính.
+Một nước đi thực hiện đúng chuỗi truy vấn của RoomManager → move_player_and_trigger →
+tile.on_land → apply_tile_effect:
+  RoomState.get_player → tile tại vị trí mới → chủ sở hữu → Player của chủ
+  → get_tile(property_id) → tài sản của chủ (tiền thuê ga/tiện ích)
+  → ô ga / tiện ích gần nhất (thẻ Chance) → ô Jail (Go To Jail).
+- legacy : các hàm next(... for ...) / quét list như trước đây.
+- indexed: Board / Bank / RoomState với chỉ mục.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_board_move
+"""
+import random
+import time
+
+from src.server.game.board import Board
+from src.server.game.player import Player
+from src.server.rooms.room_state import RoomState
+from tests.conftest import QuietLogger
+
+MOVES = 200_000
+PLAYER_COUNT = 4
+
+
+class LegacyLookups:
+    """Các truy vấn tuyến tính như phiên bản trước."""
+
+    def __init__(self, state: RoomState):
+        self.state, self.board = state, state.board
+
+    def get_player(self, player_id):
+        return next((p for p in self.state.players if p.id == player_id), None)
+
+    def get_tile(self, tile_id):
+        return next((t for t in self.board.tiles if t.tile_id == tile_id), None)
+
+    def get_player_by_id(self, player_id):
+        return next((p for p in self.board.players if p.id == player_id), None)
+
+    def get_properties_by_owner(self, player_id):
+        owned = [pid for pid, owner in self.board.bank.properties_owned.items() if owner == str(player_id)]
+        return [tile for tile in self.board.tiles if tile.tile_id in owned]
+
+    def find_nearest_tile(self, position, tile_type):
+        tiles = self.board.tiles
+        for step in range(1, len(tiles) + 1):
+            tile = tiles[(position + step) % len(tiles)]
+            if tile.tile_type == tile_type:
+                return tile.position
+        return None
+
+    def get_jail_tile(self):
+        return next((t for t in self.board.tiles if t.tile_type == "jail"), None)
+
+
+class IndexedLookups:
+    """Các truy vấn qua chỉ mục của Board / Bank / RoomState."""
+
+    def __init__(self, state: RoomState):
+        board = state.board
+        self.get_player = state.get_player
+        self.get_tile = board.get_tile
+        self.get_player_by_id = board.get_player_by_id
+        self.get_properties_by_owner = board.get_tiles_owned_by
+        self.find_nearest_tile = board.find_nearest_tile
+        self.get_jail_tile = board.get_jail_tile
+
+
+def build_room() -> RoomState:
+    board = Board()
+    players = [Player(f"p{i}", f"Player {i}", board.bank, "ROOM_BENCH") for i in range(PLAYER_COUNT)]
+    state = RoomState("ROOM_BENCH", "p0", network=None, logger=QuietLogger(), players=players, board=board)
+    # Cuối ván: gần như mọi ô đã có chủ
+    buyable = [t for t in board.tiles if hasattr(t, "properties")]
+    for i, tile in enumerate(buyable):
+        board.bank.set_property_owner(tile.tile_id, players[i % PLAYER_COUNT].id)
+    return state
+
+
+def full_move(lookups, board: Board, player_id: str, steps: int):
+    player = lookups.get_player(player_id)
+    player.position = (player.position + steps) % len(board.tiles)
+    tile = board.get_tile_at(player.position) if isinstance(lookups, IndexedLookups) \
+        else lookups.get_tile(player.position)
+    owner_id = board.bank.get_owner_id(tile.tile_id)
+    if owner_id is not None:
+        owner = lookups.get_player_by_id(owner_id)
+        rent_tile = lookups.get_tile(tile.tile_id)
+        owned = lookups.get_properties_by_owner(owner.id)
+        sum(1 for t in owned if t.tile_type == rent_tile.tile_type)
+    lookups.find_nearest_tile(player.position, "railroad")
+    lookups.get_jail_tile()
+
+
+def bench(lookups, state: RoomState) -> float:
+    rng = random.Random(1)
+    moves = [(f"p{i % PLAYER_COUNT}", rng.randint(2, 12)) for i in range(MOVES)]
+    started = time.perf_counter()
+    for player_id, steps in moves:
+        full_move(lookups, state.board, player_id, steps)
+    return (time.perf_counter() - started) / MOVES * 1e6
+
+
+def main():
+    state = build_room()
+    legacy_us = bench(LegacyLookups(state), state)
+    indexed_us = bench(IndexedLookups(state), state)
+    print(f"legacy : {legacy_us:>7.2f} µs/move")
+    print(f"indexed: {indexed_us:>7.2f} µs/move")
+    print(f"speed-up: {legacy_us / indexed_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
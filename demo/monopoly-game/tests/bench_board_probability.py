@@ -0,0 +1,37 @@
+# tests/bench_board_probability.py
+"""
+Benchmark Monte Carlo vector hóa của analytics.board_probability (NumPy).
+- Thông lượng: số lượt / số lần đổ xúc xắc mỗi giây với số quân chạy song song khác nhau.
+- Độ chính xác: sai lệch lớn nhất giữa Monte Carlo và chuỗi Markov chính xác (điểm %).
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_board_probability
+"""
+import time
+
+from src.server.analytics import board_probability
+
+BATCHES = (1_000, 10_000, 100_000, 500_000)
+THROWS = 100
+
+
+def main():
+    if board_probability.np is None:
+        print("NumPy chưa được cài — bỏ qua benchmark (pip install numpy)")
+        return
+    model = board_probability.BoardModel()
+    exact = board_probability.markov_steady_state(model=model)["distribution"]
+
+    print(f"{'games':>8} {'throws/s':>14} {'turns/s':>14} {'max err %':>10}")
+    for games in BATCHES:
+        start = time.perf_counter()
+        result = board_probability.simulate(games=games, throws=THROWS, burn_in=20, seed=1, model=model)
+        elapsed = time.perf_counter() - start
+        measured = result["counts"] / result["counts"].sum()
+        error = float(abs(measured - exact).max()) * 100
+        print(f"{games:>8,} {games * THROWS / elapsed:>14,.0f} "
+              f"{result['turns'] / elapsed * THROWS / (THROWS - 20):>14,.0f} {error:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
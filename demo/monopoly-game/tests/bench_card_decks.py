@@ -0,0 +1,86 @@
+# tests/bench_card_decks.py
+"""
+Benchmark phần bộ bài khi tạo phòng và khi rút thẻ.
+- legacy: mỗi phòng có 7 CardManager (6 ô Chance / Community Chest + 1 trong RoomManager.create_room),
+          mỗi cái đọc lại cả hai file JSON; rút thẻ bằng list.pop(0) + append.
+- shared: định nghĩa thẻ nạp một lần, mỗi phòng chỉ có 2 CardDeck (deque index, xáo theo seed).
+Đo thời gian / bộ nhớ (tracemalloc) cho mỗi phòng và thời gian mỗi lần rút.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_card_decks
+"""
+import json
+import time
+import tracemalloc
+
+from src.server.game.card_manager2 import CHANCE_CARD_PATH, COMMUNITY_CHEST_PATH, load_card_definitions
+from src.server.game.cardDeck import create_room_decks
+
+ROOMS = 2_000
+DRAWS = 200_000
+MANAGERS_PER_ROOM = 7
+
+
+class LegacyCardManager:
+    """Phần load / rút thẻ của CardManager trước đây (mỗi instance đọc lại file)."""
+
+    def __init__(self):
+        self.decks = {"chance": self._load_deck(CHANCE_CARD_PATH),
+                      "community": self._load_deck(COMMUNITY_CHEST_PATH)}
+
+    def _load_deck(self, filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        cards = []
+        for card in data.get("cards", []):
+            card["effect_fn"] = self._handle_default
+            cards.append(card)
+        return cards
+
+    def _handle_default(self, *args):
+        return None
+
+    def draw_card(self, deck_type):
+        card = self.decks[deck_type].pop(0)
+        if card["action"] != "get_out_of_jail_card":
+            self.decks[deck_type].append(card)
+        return card
+
+
+def measure_rooms(create_room):
+    rooms = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for index in range(ROOMS):
+        rooms.append(create_room(index))
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed / ROOMS * 1e6, retained / ROOMS
+
+
+def measure_draws(draw):
+    started = time.perf_counter()
+    for _ in range(DRAWS):
+        draw()
+    return (time.perf_counter() - started) / DRAWS * 1e9
+
+
+def main():
+    load_card_definitions()  # nạp một lần cho process (ngoài phần đo)
+    legacy_us, legacy_bytes = measure_rooms(lambda i: [LegacyCardManager() for _ in range(MANAGERS_PER_ROOM)])
+    shared_us, shared_bytes = measure_rooms(create_room_decks)
+    print(f"legacy room setup: {legacy_us:>8.1f} µs/room  {legacy_bytes / 1024:>6.1f} KiB/room")
+    print(f"shared room setup: {shared_us:>8.1f} µs/room  {shared_bytes / 1024:>6.1f} KiB/room")
+
+    legacy_manager = LegacyCardManager()
+    decks = create_room_decks(seed=1)
+    legacy_ns = measure_draws(lambda: legacy_manager.draw_card("chance"))
+    shared_ns = measure_draws(lambda: decks["chance"].draw())
+    print(f"legacy draw      : {legacy_ns:>8.0f} ns/draw")
+    print(f"shared draw      : {shared_ns:>8.0f} ns/draw")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# tests/bench_headless.py
+"""
+Benchmark thông lượng chế độ headless (src.server.game.headless).
+- Một process (workers=0) và ProcessPoolExecutor với số CPU của máy.
+- Có / không kiểm tra bất biến sau mỗi lượt (chi phí của chế độ fuzzer).
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_headless
+"""
+import os
+
+from src.server.game.headless import run_simulation
+
+GAMES = 400
+POLICIES = ("greedy", "random", "greedy", "random")
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    print(f"{'mode':<28} {'games/s':>10} {'turns/s':>12} {'turns/game':>11}")
+    for label, workers, check in (("1 process, invariants", 0, True),
+                                  ("1 process, no invariants", 0, False),
+                                  (f"{cpus} workers, invariants", cpus, True)):
+        report = run_simulation(GAMES, POLICIES, workers=workers, seed=1, check_invariants=check)
+        assert not report["failures"], report["failures"][:3]
+        print(f"{label:<28} {report['games_per_sec']:>10,.1f} {report['turns_per_sec']:>12,.0f} "
+              f"{report['turns_per_game']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
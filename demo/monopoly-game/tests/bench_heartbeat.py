@@ -0,0 +1,126 @@
+# tests/bench_heartbeat.py
+"""
+Benchmark heartbeat với nhiều phòng phần lớn nhàn rỗi (đồng hồ ảo, không gửi socket thật).
+- legacy   : vòng quét cũ của main_loop — mỗi tick_rate giây dựng + mã hóa JSON heartbeat cho MỌI phòng.
+- scheduler: HeartbeatScheduler — hạn rải đều trong tick, bỏ heartbeat của phòng vừa có traffic,
+             phòng nhàn rỗi / trống giãn dần tới tick_rate × max_backoff.
+Mô hình phòng: `--active` phần trăm phòng có traffic mỗi giây; phòng còn lại nhàn rỗi,
+một nửa có người chơi (ngồi chờ), một nửa trống.
+In ra: số heartbeat mỗi giây (cả lượt và sau khi backoff ổn định), heartbeat nhiều nhất trong
+một lần thức (độ "dồn cục"), và thời gian CPU cho mỗi giây ảo.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_heartbeat [--rooms 10000] [--active 1] [--seconds 300]
+"""
+import argparse
+import json
+import time
+
+from src.server.network.packet_builder import PacketBuilder
+from src.server.rooms.heartbeat_scheduler import HeartbeatScheduler
+from tests.conftest import FakeClock
+
+TICK = 5.0
+PLAYERS = [{"id": f"p{i}", "name": f"Player{i}", "balance": 1500, "position": i} for i in range(2)]
+
+
+def make_rooms(count: int, active_percent: float):
+    """room_id → (có traffic?, danh sách người chơi)."""
+    active_every = max(1, round(100 / active_percent)) if active_percent > 0 else 0
+    rooms = {}
+    for i in range(count):
+        active = bool(active_every) and i % active_every == 0
+        rooms[f"ROOM_{i:05d}"] = (active, PLAYERS if active or i % 2 else [])
+    return rooms
+
+
+def beat_packet(room_id: str, players: list, active_rooms: int, stamp: str = None) -> bytes:
+    """Chi phí một heartbeat như main_loop: dựng packet + json.dumps (codec JSON mặc định)."""
+    return json.dumps(PacketBuilder.heartbeat(room_id, [dict(p) for p in players], active_rooms, stamp)).encode("utf-8")
+
+
+def bench_legacy(rooms: dict, seconds: float) -> dict:
+    sent, peak, cpu = 0, 0, 0.0
+    ticks = int(seconds // TICK)
+    for _ in range(ticks):
+        start = time.process_time()
+        stamp = PacketBuilder.heartbeat_stamp()
+        for room_id, (_, players) in rooms.items():
+            beat_packet(room_id, players, len(rooms), stamp)
+        cpu += time.process_time() - start
+        sent += len(rooms)
+        peak = max(peak, len(rooms))
+    return {"sent": sent, "steady": len(rooms) / TICK * seconds / 2, "peak": peak, "wakeups": ticks, "cpu": cpu}
+
+
+def bench_scheduler(rooms: dict, seconds: float, max_backoff: int) -> dict:
+    clock = FakeClock()
+    activity = {}
+    per_wakeup = [0]
+
+    def beat(room_id):
+        players = rooms[room_id][1]
+        beat_packet(room_id, players, len(rooms))
+        per_wakeup[0] += 1
+        activity[room_id] = clock.now  # chính heartbeat cũng là traffic (như MulticastManager.mark_active)
+        return len(players)
+
+    scheduler = HeartbeatScheduler(TICK, beat=beat, activity=activity.get, max_backoff=max_backoff, clock=clock)
+    for room_id in rooms:
+        scheduler.add_room(room_id)
+    active_rooms = [room_id for room_id, (active, _) in rooms.items() if active]
+
+    sent_half, peak, cpu = 0, 0, 0.0
+    next_traffic = 0.0
+    while clock.now < seconds:
+        if clock.now >= next_traffic:
+            # Phòng đang chơi gửi packet game mỗi giây
+            for room_id in active_rooms:
+                activity[room_id] = clock.now
+            next_traffic += 1.0
+        per_wakeup[0] = 0
+        start = time.process_time()
+        delay = scheduler.run_due()
+        cpu += time.process_time() - start
+        peak = max(peak, per_wakeup[0])
+        if clock.now < seconds / 2 <= clock.now + delay:
+            sent_half = scheduler.stats["sent"]
+        clock.now += min(delay, TICK, max(next_traffic - clock.now, 0.0)) or scheduler.resolution
+    stats = scheduler.stats
+    return {"sent": stats["sent"], "steady": stats["sent"] - sent_half, "peak": peak,
+            "wakeups": stats["wakeups"], "cpu": cpu, "suppressed": stats["suppressed"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--active", type=float, nargs="+", default=[1.0, 10.0, 100.0],
+                        help="phần trăm phòng có traffic mỗi giây")
+    parser.add_argument("--seconds", type=float, default=300.0, help="thời gian ảo")
+    parser.add_argument("--max-backoff", type=int, default=8)
+    args = parser.parse_args()
+
+    half = args.seconds / 2
+    print(f"{args.rooms} phòng, tick {TICK:g}s, {args.seconds:g}s ảo "
+          f"(steady = nửa sau, sau khi backoff ổn định)\n")
+    print(f"{'active':>7} {'mode':<10}{'hb/s':>9}{'steady hb/s':>13}{'peak/wake':>11}"
+          f"{'wakeups':>9}{'suppressed':>12}{'CPU ms/s':>10}")
+    for percent in args.active:
+        rooms = make_rooms(args.rooms, percent)
+        results = {
+            "legacy": bench_legacy(rooms, args.seconds),
+            "scheduler": bench_scheduler(rooms, args.seconds, args.max_backoff),
+        }
+        for mode, r in results.items():
+            print(f"{percent:>6g}% {mode:<10}{r['sent'] / args.seconds:>9.0f}{r['steady'] / half:>13.0f}"
+                  f"{r['peak']:>11}{r['wakeups']:>9}{r.get('suppressed', 0):>12}"
+                  f"{r['cpu'] / args.seconds * 1e3:>10.2f}")
+        legacy, sched = results["legacy"], results["scheduler"]
+        fewer = f"giảm {legacy['steady'] / sched['steady']:.1f}×" if sched["steady"] else "0/s (toàn bộ bị suppress)"
+        print(f"{'':>8}→ heartbeat ổn định {fewer}, "
+              f"CPU giảm {legacy['cpu'] / max(sched['cpu'], 1e-9):.1f}×, "
+              f"đỉnh mỗi lần thức giảm {legacy['peak'] / max(sched['peak'], 1):.0f}×\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# tests/bench_listen_loop.py
+"""
+Benchmark NetworkManager.listen_loop với N phòng cùng lúc.
+- Mỗi phòng nhận MESSAGES_PER_ROOM datagram qua loopback.
+- Đo độ trễ từ lúc gửi → lúc on_packet được gọi (p50 / p99) và throughput.
+- Kịch bản "1 phòng hoạt động": chỉ 1 phòng có traffic, các phòng khác im lặng
+  → độ trễ không được tăng theo số phòng.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_listen_loop
+"""
+import asyncio
+import json
+import socket
+import statistics
+import time
+
+from src.server.network.network_manager import NetworkManager
+from tests.conftest import QuietLogger
+
+ROOM_COUNTS = [1, 10, 100, 500]
+MESSAGES_PER_ROOM = 20
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_case(room_count: int, active_rooms: int):
+    network = NetworkManager(logger_ins=QuietLogger())
+    for i in range(room_count):
+        network.multicast.create_group(f"ROOM_{i}")
+
+    latencies = []
+    expected = active_rooms * MESSAGES_PER_ROOM
+    done = asyncio.Event()
+
+    async def on_packet(packet):
+        latencies.append(time.perf_counter_ns() - packet["sent_ns"])
+        if len(latencies) >= expected:
+            done.set()
+
+    network.register_listener("on_packet", on_packet)
+    listener = asyncio.create_task(network.listen_loop())
+    await asyncio.sleep(0.05)
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    ports = [g["port"] for g in list(network.multicast.groups.values())[:active_rooms]]
+    started = time.perf_counter()
+    for _ in range(MESSAGES_PER_ROOM):
+        for port in ports:
+            data = json.dumps({"sent_ns": time.perf_counter_ns(), "data": {}}).encode("utf-8")
+            sender.sendto(data, ("127.0.0.1", port))
+        await asyncio.sleep(0)
+    await asyncio.wait_for(done.wait(), timeout=10)
+    elapsed = time.perf_counter() - started
+
+    listener.cancel()
+    try:
+        await listener
+    except asyncio.CancelledError:
+        pass
+    sender.close()
+    network.multicast.close_all_multicast_groups()
+
+    return {
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "mean_us": statistics.fmean(latencies) / 1000,
+        "pkt_per_s": expected / elapsed,
+    }
+
+
+async def main():
+    print(f"{'rooms':>6} {'active':>6} {'p50 µs':>10} {'p99 µs':>10} {'mean µs':>10} {'pkt/s':>10}")
+    for room_count in ROOM_COUNTS:
+        for active in sorted({1, room_count}):
+            r = await run_case(room_count, active)
+            print(f"{room_count:>6} {active:>6} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} "
+                  f"{r['mean_us']:>10.1f} {r['pkt_per_s']:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
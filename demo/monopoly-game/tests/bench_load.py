@@ -0,0 +1,524 @@
+# tests/bench_load.py
+"""
+Load test cho server TCP + multicast với hàng nghìn bot bất đồng bộ (chỉ loopback).
+
+Kịch bản mỗi bot:
+    connect → PING × N → LIST_ROOMS → CREATE_ROOM (bot đầu phòng) → JOIN_ROOM → SYNC_STATE
+    → pha UDP: gửi lệnh game (định dạng packet của client) vào group multicast của phòng
+    → LEAVE_ROOM → đóng kết nối.
+
+Đo theo từng thao tác (histogram log-bucket, gộp được): p50 / p99 / p999 / max, số lỗi.
+- Lệnh TCP: thời gian từ lúc gửi đến lúc nhận phản hồi cùng req_id.
+- udp_delivery: độ trễ một chiều bot → group → các bot khác trong phòng (và tỉ lệ mất gói).
+- state_fanout: từ lúc gửi JOIN_ROOM đến lúc mỗi bot trong phòng nhận ROOM_STATE_DELTA của version đó.
+Server chưa phản hồi lệnh game qua UDP nên pha UDP đo đường phát multicast, không đo xử lý lệnh.
+
+Server mặc định được chạy trong process riêng trên 127.0.0.1 (multicast chỉ qua interface lo).
+Kết quả được so với tests/bench_load_baseline.json; --write-baseline để ghi lại baseline mới.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_load
+    python -m tests.bench_load --bots 2000 --room-size 4 --check
+    python -m tests.bench_load --server 127.0.0.1:5050      # server đang chạy sẵn
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import time
+import uuid
+from collections import Counter
+
+from tests.conftest import QuietLogger
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "bench_load_baseline.json")
+
+TCP_OPS = ["connect", "PING", "LIST_ROOMS", "CREATE_ROOM", "JOIN_ROOM", "SYNC_STATE", "LEAVE_ROOM"]
+UDP_OPS = ["udp_delivery", "state_fanout"]
+
+# Ngưỡng coi là regression so với baseline
+P99_RATIO = 1.5          # p99 mới > 1.5 × baseline (+ P99_SLACK_MS)
+P99_SLACK_MS = 1.0
+ERROR_RATE_DELTA = 0.01  # tỉ lệ lỗi tăng quá 1 điểm phần trăm
+THROUGHPUT_RATIO = 0.7   # cmd/s mới < 0.7 × baseline
+
+
+# ======================================================================
+# 1️⃣ HISTOGRAM
+# ======================================================================
+class LatencyHistogram:
+    """
+    Histogram độ trễ theo bucket log2 (BUCKETS_PER_OCTAVE bucket mỗi lần gấp đôi, sai số ~4%).
+    Bộ nhớ cố định theo dải giá trị, không lưu từng mẫu → gộp được giữa nhiều bot / nhiều lần chạy.
+    """
+
+    BUCKETS_PER_OCTAVE = 16
+
+    def __init__(self):
+        self.buckets = Counter()  # {bucket_index: count}
+        self.count = 0
+        self.errors = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        value_ns = max(1, int(value_ns))
+        self.buckets[int(math.log2(value_ns) * self.BUCKETS_PER_OCTAVE)] += 1
+        self.count += 1
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def record_error(self):
+        self.errors += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.errors += other.errors
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, pct: float) -> int:
+        """Giá trị (ns, cận trên của bucket) mà pct% mẫu không vượt quá."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max_ns, int(2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE)))
+        return self.max_ns
+
+    def summary(self) -> dict:
+        total = self.count + self.errors
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "p50_ms": round(self.percentile(50) / 1e6, 3),
+            "p99_ms": round(self.percentile(99) / 1e6, 3),
+            "p999_ms": round(self.percentile(99.9) / 1e6, 3),
+            "max_ms": round(self.max_ns / 1e6, 3),
+        }
+
+
+class LoadStats:
+    """Histogram theo tên thao tác + bộ đếm gói UDP để tính tỉ lệ mất."""
+
+    def __init__(self):
+        self.ops = {op: LatencyHistogram() for op in TCP_OPS + UDP_OPS}
+        self.udp_expected = 0
+        self.commands = 0  # số lệnh TCP nhận được phản hồi
+
+    def record(self, op: str, value_ns: int):
+        self.ops[op].record(value_ns)
+
+    def error(self, op: str):
+        self.ops[op].record_error()
+
+
+# ======================================================================
+# 2️⃣ SERVER (process riêng)
+# ======================================================================
+def _serve(host: str, port: int, multicast_interface: str, show_logs: bool):
+    """Chạy server thật (main_server) với multicast giới hạn trên interface cho trước."""
+    from src.server import main_server
+    from src.server.network import network_utils
+
+    if not show_logs:
+        main_server.logger = QuietLogger()
+        network_utils.logger = QuietLogger()
+    main_server.SERVER_CONFIG.update(tcp_host=host, tcp_port=port, multicast_interface=multicast_interface)
+
+    async def run():
+        await main_server.initialize_system()
+        server = await asyncio.start_server(main_server.handle_tcp_client, host, port, backlog=1024)
+        asyncio.create_task(main_server.network_manager.listen_loop())
+        asyncio.create_task(main_server.main_loop())
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+async def _wait_for_server(host: str, port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server {host}:{port} không sẵn sàng sau {timeout}s")
+            await asyncio.sleep(0.05)
+
+
+# ======================================================================
+# 3️⃣ BOT
+# ======================================================================
+class RoomPlan:
+    """Điều phối các bot cùng phòng: phòng đã được tạo chưa, hàng rào trước pha UDP."""
+
+    def __init__(self, room_id: str, size: int):
+        self.room_id = room_id
+        self.created = asyncio.Event()
+        self.group = None       # (ip, port) lấy từ phản hồi CREATE_ROOM
+        self.barrier = asyncio.Barrier(size)
+        self.join_sent_ns = {}  # {version: thời điểm gửi JOIN_ROOM tạo ra version đó}
+        self.delta_recv = []    # [(version, recv_ns)] các ROOM_STATE_DELTA bot nhận được
+
+
+class LoadBot:
+    """Một client mô phỏng: kênh điều khiển TCP (NDJSON + req_id) và socket multicast của phòng."""
+
+    def __init__(self, index: int, plan: RoomPlan, is_creator: bool, stats: LoadStats, args):
+        self.index = index
+        self.name = f"bot{index}"
+        self.plan = plan
+        self.is_creator = is_creator
+        self.stats = stats
+        self.args = args
+        self.reader = None
+        self.writer = None
+        self.pending = {}  # {req_id: future}
+        self.next_req_id = 0
+        self.player_id = None
+        self.group = None  # (ip, port)
+        self.udp_sock = None
+        self.udp_received = 0
+
+    # ---------------------------------------------------------------- TCP
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.pending.pop(response.get("req_id"), None)
+                if future and not future.done():
+                    future.set_result(response)
+        except (OSError, ValueError):
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection closed"))
+            self.pending.clear()
+
+    async def command(self, cmd: str, data: dict = None):
+        """Gửi một lệnh và chờ phản hồi; ghi độ trễ hoặc lỗi vào histogram của lệnh."""
+        self.next_req_id += 1
+        req_id = self.next_req_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = future
+        started = time.perf_counter_ns()
+        try:
+            self.writer.write((json.dumps({"cmd": cmd, "data": data or {}, "req_id": req_id}) + "\n").encode("utf-8"))
+            response = await asyncio.wait_for(future, self.args.timeout)
+        except (OSError, ConnectionError, asyncio.TimeoutError):
+            self.pending.pop(req_id, None)
+            self.stats.error(cmd)
+            return None, started
+        if response.get("status") != "OK":
+            self.stats.error(cmd)
+            return None, started
+        self.stats.record(cmd, time.perf_counter_ns() - started)
+        self.stats.commands += 1
+        return response, started
+
+    # ---------------------------------------------------------------- UDP
+    def _open_group(self, ip: str, port: int):
+        """Tham gia group multicast của phòng trên interface loopback, nhận qua event loop."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", port))
+        iface = socket.inet_aton(self.args.mcast_if)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(ip) + iface)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, iface)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_datagram)
+        self.udp_sock = sock
+        self.group = (ip, port)
+
+    def _close_group(self):
+        if self.udp_sock is not None:
+            asyncio.get_running_loop().remove_reader(self.udp_sock.fileno())
+            self.udp_sock.close()
+            self.udp_sock = None
+
+    def _on_datagram(self):
+        while True:
+            try:
+                data, _ = self.udp_sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            now = time.perf_counter_ns()
+            try:
+                packet = json.loads(data)
+            except ValueError:
+                continue
+            if packet.get("type") == "ROOM_STATE_DELTA":
+                self.plan.delta_recv.append((packet.get("version"), now))
+                continue
+            header = packet.get("header") or {}
+            if header.get("type") != "COMMAND" or header.get("sender") == self.name:
+                continue
+            sent_ns = (packet.get("payload") or {}).get("sent_ns")
+            if sent_ns:
+                self.stats.record("udp_delivery", now - sent_ns)
+                self.udp_received += 1
+
+    def make_packet(self, action: str, data: dict):
+        """Cùng dạng packet với client (client/network/multicast_manager.make_packet)."""
+        return {
+            "header": {
+                "packet_id": str(uuid.uuid4()),
+                "room_id": self.plan.room_id,
+                "sender": self.name,
+                "target": "ALL",
+                "type": "COMMAND",
+                "timestamp": time.time(),
+                "version": "1.0",
+            },
+            "command": {"action": action, "args": data},
+            "payload": data,
+        }
+
+    async def udp_phase(self):
+        actions = ("roll_dice", "buy_property", "end_turn")
+        for i in range(self.args.udp_commands):
+            packet = self.make_packet(actions[i % len(actions)], {"player_id": self.player_id, "sent_ns": time.perf_counter_ns()})
+            try:
+                self.udp_sock.sendto(json.dumps(packet).encode("utf-8"), self.group)
+            except OSError:
+                self.stats.error("udp_delivery")
+            await asyncio.sleep(self.args.udp_interval)
+
+    # ---------------------------------------------------------------- kịch bản
+    async def setup(self) -> bool:
+        """Kết nối → PING → LIST_ROOMS → CREATE/JOIN → SYNC_STATE. Trả False nếu bot không vào được phòng."""
+        started = time.perf_counter_ns()
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.args.host, self.args.port), self.args.timeout)
+        except (OSError, asyncio.TimeoutError):
+            self.stats.error("connect")
+            if self.is_creator:
+                self.plan.created.set()
+            return False
+        self.stats.record("connect", time.perf_counter_ns() - started)
+        asyncio.create_task(self._read_loop())
+
+        for _ in range(self.args.pings):
+            await self.command("PING")
+        await self.command("LIST_ROOMS")
+
+        if self.is_creator:
+            response, _ = await self.command("CREATE_ROOM", {"room_id": self.plan.room_id})
+            if response is not None:
+                self.plan.group = (response["data"]["ip"], response["data"]["port"])
+            self.plan.created.set()
+        else:
+            await self.plan.created.wait()
+        # Vào group trước khi JOIN để nhận cả delta do chính lượt join của mình tạo ra
+        if self.plan.group is not None:
+            self._open_group(*self.plan.group)
+
+        response, join_started = await self.command("JOIN_ROOM", {"room_id": self.plan.room_id, "player_name": self.name})
+        if response is None:
+            return False
+        data = response["data"]
+        self.player_id = data.get("player_id")
+        self.plan.join_sent_ns[data["snapshot"]["version"]] = join_started
+        if self.udp_sock is None:
+            self._open_group(data["multicast_ip"], data["port"])
+
+        await self.command("SYNC_STATE", {"room_id": self.plan.room_id, "version": data["snapshot"]["version"]})
+        return True
+
+    async def run(self, start_delay: float):
+        await asyncio.sleep(start_delay)
+        joined = False
+        try:
+            joined = await self.setup()
+        finally:
+            if not joined:
+                self._close_group()
+            # Bot lỗi vẫn phải qua hàng rào để các bot cùng phòng không bị treo
+            try:
+                await asyncio.wait_for(self.plan.barrier.wait(), self.args.timeout * 4)
+            except (asyncio.TimeoutError, asyncio.BrokenBarrierError):
+                pass
+
+        if joined:
+            self.stats.udp_expected += self.args.udp_commands * (self.args.room_size - 1)
+            await self.udp_phase()
+            await asyncio.sleep(self.args.drain)
+            self._close_group()
+            await self.command("LEAVE_ROOM", {"room_id": self.plan.room_id, "player_id": self.player_id})
+
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+
+
+# ======================================================================
+# 4️⃣ CHẠY & BÁO CÁO
+# ======================================================================
+async def run_load(args) -> dict:
+    stats = LoadStats()
+    run_tag = uuid.uuid4().hex[:6]
+    room_count = math.ceil(args.bots / args.room_size)
+    plans = [RoomPlan(f"LOAD_{run_tag}_{r}", min(args.room_size, args.bots - r * args.room_size))
+             for r in range(room_count)]
+    bots = [LoadBot(i, plans[i // args.room_size], i % args.room_size == 0, stats, args) for i in range(args.bots)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.run(i / args.ramp) for i, bot in enumerate(bots)))
+    elapsed = time.perf_counter() - started
+
+    # state_fanout: khớp delta nhận được với thời điểm gửi JOIN tạo ra version đó
+    for plan in plans:
+        for version, recv_ns in plan.delta_recv:
+            sent_ns = plan.join_sent_ns.get(version)
+            if sent_ns is not None:
+                stats.record("state_fanout", recv_ns - sent_ns)
+
+    udp = stats.ops["udp_delivery"]
+    lost = max(0, stats.udp_expected - udp.count)
+    return {
+        "config": {
+            "bots": args.bots,
+            "room_size": args.room_size,
+            "pings": args.pings,
+            "udp_commands": args.udp_commands,
+            "udp_interval": args.udp_interval,
+            "ramp": args.ramp,
+        },
+        "host": {"cpus": os.cpu_count(), "python": platform.python_version()},
+        "elapsed_s": round(elapsed, 3),
+        "cmd_per_s": round(stats.commands / elapsed, 1),
+        "udp_expected": stats.udp_expected,
+        "udp_loss_rate": round(lost / stats.udp_expected, 4) if stats.udp_expected else 0.0,
+        "ops": {op: hist.summary() for op, hist in stats.ops.items() if hist.count or hist.errors},
+    }
+
+
+def compare_to_baseline(result: dict, baseline: dict) -> list:
+    """Danh sách regression (chuỗi mô tả) của result so với baseline."""
+    regressions = []
+    if result["cmd_per_s"] < baseline["cmd_per_s"] * THROUGHPUT_RATIO:
+        regressions.append(f"cmd/s {result['cmd_per_s']} < {THROUGHPUT_RATIO} × {baseline['cmd_per_s']}")
+    if result["udp_loss_rate"] > baseline.get("udp_loss_rate", 0.0) + ERROR_RATE_DELTA:
+        regressions.append(f"udp loss {result['udp_loss_rate']:.2%} (baseline {baseline.get('udp_loss_rate', 0.0):.2%})")
+    for op, now in result["ops"].items():
+        base = baseline["ops"].get(op)
+        if base is None:
+            continue
+        if now["p99_ms"] > base["p99_ms"] * P99_RATIO + P99_SLACK_MS:
+            regressions.append(f"{op}: p99 {now['p99_ms']}ms (baseline {base['p99_ms']}ms)")
+        if now["error_rate"] > base["error_rate"] + ERROR_RATE_DELTA:
+            regressions.append(f"{op}: error rate {now['error_rate']:.2%} (baseline {base['error_rate']:.2%})")
+    return regressions
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"{'op':<14}{'count':>9}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'max ms':>10}",
+        "-" * 71,
+    ]
+    for op, s in result["ops"].items():
+        lines.append(f"{op:<14}{s['count']:>9}{s['errors']:>8}{s['p50_ms']:>10.3f}{s['p99_ms']:>10.3f}"
+                     f"{s['p999_ms']:>10.3f}{s['max_ms']:>10.3f}")
+    lines.append("-" * 71)
+    lines.append(f"bots={result['config']['bots']} room_size={result['config']['room_size']} "
+                 f"elapsed={result['elapsed_s']}s  cmd/s={result['cmd_per_s']}  "
+                 f"udp loss={result['udp_loss_rate']:.2%}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test server Monopoly (TCP + multicast, loopback).")
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--room-size", type=int, default=4, help="Số bot mỗi phòng")
+    parser.add_argument("--pings", type=int, default=5, help="Số lệnh PING mỗi bot")
+    parser.add_argument("--udp-commands", type=int, default=10, help="Số lệnh game mỗi bot gửi vào group")
+    parser.add_argument("--udp-interval", type=float, default=0.05, help="Khoảng cách giữa 2 lệnh UDP (s)")
+    parser.add_argument("--ramp", type=float, default=500.0, help="Số bot bắt đầu mỗi giây")
+    parser.add_argument("--drain", type=float, default=0.5, help="Thời gian chờ gói UDP trễ trước khi rời phòng (s)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout mỗi lệnh TCP (s)")
+    parser.add_argument("--server", help="host:port của server đang chạy (mặc định: tự chạy server trên loopback)")
+    parser.add_argument("--mcast-if", default="127.0.0.1", help="Interface cho multicast")
+    parser.add_argument("--server-logs", action="store_true", help="Giữ log của server tự chạy")
+    parser.add_argument("--json", action="store_true", help="In kết quả dạng JSON")
+    parser.add_argument("--write-baseline", action="store_true", help=f"Ghi kết quả vào {os.path.basename(BASELINE_PATH)}")
+    parser.add_argument("--check", action="store_true", help="Exit code 1 nếu có regression so với baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server_proc = None
+    if args.server:
+        args.host, port = args.server.rsplit(":", 1)
+        args.port = int(port)
+    else:
+        args.host, args.port = "127.0.0.1", _free_port("127.0.0.1")
+        server_proc = multiprocessing.Process(
+            target=_serve, args=(args.host, args.port, args.mcast_if, args.server_logs), daemon=True)
+        server_proc.start()
+
+    try:
+        asyncio.run(_wait_for_server(args.host, args.port))
+        result = asyncio.run(run_load(args))
+    finally:
+        if server_proc is not None:
+            server_proc.terminate()
+            server_proc.join(5)
+            if server_proc.is_alive():
+                server_proc.kill()
+
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
+
+    if args.write_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"baseline → {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        return 0
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != result["config"]:
+        print("ℹ️  config khác baseline — so sánh chỉ mang tính tham khảo")
+    regressions = compare_to_baseline(result, baseline)
+    for line in regressions:
+        print(f"⚠️  {line}")
+    if not regressions:
+        print("✅ không có regression so với baseline")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
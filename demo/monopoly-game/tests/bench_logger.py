@@ -0,0 +1,63 @@
+# tests/bench_logger.py
+"""
+Microbenchmark Logger: số lần gọi log / giây trước và sau khi chuyển sang hàng đợi + thread ghi nền.
+- before: bản sao tối giản của Logger cũ (mở 2 file + print trên mỗi lần gọi, giữ lock).
+- after: Logger hiện tại (caller chỉ enqueue; đo cả thời gian flush hết hàng đợi).
+- filtered: Logger với level="INFO" gọi debug() → record bị bỏ qua trước khi format.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_logger
+"""
+import contextlib
+import io
+import tempfile
+import time
+
+from src.server.utils.logger import Logger
+from tests.conftest import LegacyLogger
+
+CALLS = 20_000
+
+
+def measure(fn):
+    started = time.perf_counter()
+    fn()
+    return CALLS / (time.perf_counter() - started)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        Logger.LOG_DIR = log_dir
+        legacy = LegacyLogger(log_dir)
+        queued = Logger("bench")
+        filtered = Logger("bench_filtered", level="INFO")
+
+        def run_legacy():
+            for i in range(CALLS):
+                legacy.info(f"packet {i} sent")
+
+        def run_queued_enqueue_only():
+            for i in range(CALLS):
+                queued.info(f"packet {i} sent")
+
+        def run_queued_with_flush():
+            run_queued_enqueue_only()
+            queued.flush(timeout=60)
+
+        def run_filtered():
+            for i in range(CALLS):
+                filtered.debug(f"packet {i} sent")
+
+        results = {
+            "before (open+write per call)": measure(run_legacy),
+            "after  (enqueue only)": measure(run_queued_enqueue_only),
+            "after  (enqueue + flush)": measure(run_queued_with_flush),
+            "after  (debug filtered by level)": measure(run_filtered),
+        }
+
+    for name, rate in results.items():
+        print(f"{name:<34} {rate:>12.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# tests/bench_multicast_alloc.py
+"""
+Benchmark cấp phát địa chỉ multicast khi tạo / hủy phòng.
+- legacy : thuật toán cũ của _get_next_available_group (duyệt IP × port × mọi group hiện có),
+           đo một lần tạo phòng khi đã có N group đang sống.
+- alloc  : MulticastAllocator — 100.000 lần tạo + hủy, giữ một cửa sổ phòng đang sống.
+- manager: MulticastManager.create_group / remove_group (có tạo / đóng socket thật) cho cùng
+           100.000 phòng, để thấy phần cấp phát không còn đáng kể so với syscall socket.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_multicast_alloc [--rooms 100000] [--live 1000]
+"""
+import argparse
+import time
+from collections import deque
+
+from src.server.network.multicast_allocator import MulticastAllocator
+from src.server.network.multiplecast_manager import MulticastManager
+from tests.conftest import QuietLogger
+
+
+def legacy_next_group(groups: dict, base_ip="239.0.0.0", base_port=5000):
+    """Bản sao thuật toán cũ (tham chiếu)."""
+    prefix = ".".join(base_ip.split(".")[:3])
+    for ip in [f"{prefix}.{i}" for i in range(1, 254)]:
+        for port in range(base_port, base_port + 1000):
+            if all((g["ip"], g["port"]) != (ip, port) for g in groups.values()):
+                return ip, port
+    raise RuntimeError("Không còn IP/Port multicast khả dụng!")
+
+
+def bench_legacy(live: int, samples: int = 5) -> float:
+    groups = {}
+    for i in range(live):
+        ip, port = legacy_next_group(groups) if i < 50 else ("239.0.0.1", 5000 + i)  # dựng nhanh N group
+        groups[f"R{i}"] = {"ip": ip, "port": port}
+    started = time.perf_counter()
+    for _ in range(samples):
+        legacy_next_group(groups)
+    return (time.perf_counter() - started) / samples * 1e6
+
+
+def churn(create, destroy, rooms: int, live: int):
+    """Tạo `rooms` phòng, giữ tối đa `live` phòng sống (hủy phòng cũ nhất). Trả về (tổng giây, p99 µs)."""
+    window = deque()
+    samples = []
+    started = time.perf_counter()
+    for i in range(rooms):
+        t0 = time.perf_counter()
+        window.append(create(f"ROOM_{i}"))
+        if len(window) > live:
+            destroy(window.popleft())
+        samples.append(time.perf_counter() - t0)
+    while window:
+        destroy(window.popleft())
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return elapsed, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=100_000)
+    parser.add_argument("--live", type=int, default=1_000, help="số phòng sống cùng lúc")
+    args = parser.parse_args()
+
+    print("legacy: µs cho một lần tạo phòng khi đã có N group")
+    for live in (10, 100, 500, 999):
+        print(f"  N={live:<6}{bench_legacy(live):>12.1f} µs")
+
+    alloc = MulticastAllocator("239.0.0.0/16", lease_ttl=300.0)
+    elapsed, p99 = churn(alloc.allocate, alloc.release, args.rooms, args.live)
+    print(f"\nalloc  : {args.rooms} phòng tạo + hủy trong {elapsed:.2f}s "
+          f"({args.rooms / elapsed:,.0f} phòng/s, p99 tạo {p99:.1f} µs, {alloc.capacity:,} địa chỉ)")
+
+    manager = MulticastManager(QuietLogger(), base_ip="239.0.0.0/16", lease_ttl=300.0)
+
+    def create(room_id):
+        manager.create_group(room_id)
+        return room_id
+
+    elapsed, p99 = churn(create, manager.remove_group, args.rooms, args.live)
+    print(f"manager: {args.rooms} phòng tạo + hủy trong {elapsed:.2f}s "
+          f"({args.rooms / elapsed:,.0f} phòng/s, p99 tạo {p99:.1f} µs, còn {manager.allocator.in_use} lease)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# tests/bench_packet_builder.py
+"""
+Benchmark PacketBuilder: packet dựng / dựng + mã hóa mỗi giây cho từng classmethod.
+- legacy: cách cũ — uuid4() + utcnow().isoformat() mỗi packet, json.dumps cả dict khi gửi.
+- build:  PacketBuilder hiện tại (packet_id đếm theo phòng, timestamp mili giây).
+- +json:  build rồi mã hóa bằng codec JSON của phòng (ghép template + payload).
+- +bin1:  build rồi mã hóa bằng codec nhị phân bin1.
+Cuối cùng so sánh heartbeat của main_loop: dict + strftime mỗi phòng so với PacketBuilder.heartbeat.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_packet_builder
+"""
+import inspect
+import json
+import time
+import uuid
+from datetime import datetime
+
+from src.server.network.packet_builder import PacketBuilder
+from src.shared import wire_codec
+
+ROOM = "ROOM_01"
+ITERATIONS = 20_000
+PLAYER = "10.0.0.1:51000"
+TILE = {"id": 6, "name": "Oriental Avenue", "type": "property"}
+
+ARGS = {
+    "join_room": (ROOM, {"id": PLAYER, "name": "Player1"}),
+    "leave_room": (ROOM, PLAYER),
+    "start_game": (ROOM, PLAYER),
+    "player_move": (ROOM, PLAYER, 17, (3, 4)),
+    "player_buy_property": (ROOM, PLAYER, 6, 100, {"success": True, "balance": 1400}),
+    "player_pay_tax": (ROOM, PLAYER, 200, {"success": True, "balance": 1300}),
+    "player_transfer": (ROOM, PLAYER, "10.0.0.2:52000", 50, {"success": True}),
+    "update_balance": (ROOM, PLAYER, 1380),
+    "broadcast_state": (ROOM, {"status": "playing", "turn": 3}),
+    "draw_card": (ROOM, PLAYER, "chance", {"id": 4, "text": "Advance to GO"}),
+    "error": (ROOM, PLAYER, "Không đủ tiền"),
+    "build": ("custom_event", {"value": 1}, ROOM, PLAYER),
+    "roll_result": (ROOM, PLAYER, (6, 6), 12, True),
+    "player_move_complete": (ROOM, PLAYER, 17, TILE, False),
+    "next_turn": (ROOM, "10.0.0.2:52000"),
+    "prompt_buy_property": (ROOM, PLAYER, TILE, 100, "Mua ô đất?"),
+    "pay_rent": (ROOM, PLAYER, "10.0.0.2:52000", 50, "Trả tiền thuê"),
+    "own_property": (ROOM, PLAYER, 6, "Đất của bạn"),
+    "info_message": (ROOM, PLAYER, "Thông báo"),
+    "transfer_rent": (ROOM, PLAYER, "10.0.0.2:52000", 50, 1350, 1550),
+    "pass_go_bonus": (ROOM, PLAYER, 200, 1700),
+}
+
+
+def builder_classmethods():
+    """Tên các classmethod public dựng packet (bỏ _base_packet / reset_room / heartbeat_stamp)."""
+    names = [name for name, attr in vars(PacketBuilder).items()
+             if isinstance(attr, classmethod) and not name.startswith("_") and name not in ("reset_room", "heartbeat_stamp")]
+    missing = set(names) - set(ARGS)
+    assert not missing, f"Thiếu tham số benchmark cho: {sorted(missing)}"
+    return names
+
+
+def legacy_packet(packet: dict) -> dict:
+    """Dựng lại packet theo cách cũ (uuid4 + isoformat) từ packet mới cùng nội dung."""
+    return {
+        "packet_id": str(uuid.uuid4()),
+        "timestamp": datetime.utcnow().isoformat(),
+        "type": packet["type"],
+        "room_id": packet["room_id"],
+        "sender_id": packet["sender_id"],
+        "payload": packet["payload"],
+    }
+
+
+def per_second(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return ITERATIONS / (time.perf_counter() - started)
+
+
+def main():
+    json_codec = wire_codec.make_codec(wire_codec.JSON, ROOM, 1)
+    bin_codec = wire_codec.make_codec(wire_codec.BIN1, ROOM, 1)
+
+    print(f"Packet mỗi giây ({ITERATIONS} lần, nghìn packet/s)")
+    print(f"{'classmethod':<22}{'legacy+json':>12}{'build':>10}{'+json':>10}{'+bin1':>10}")
+    for name in builder_classmethods():
+        method, args = getattr(PacketBuilder, name), ARGS[name]
+        sample = method(*args)
+        legacy = per_second(lambda: json.dumps(legacy_packet(sample)).encode("utf-8"))
+        built = per_second(lambda: method(*args))
+        as_json = per_second(lambda: json_codec.encode(method(*args)))
+        as_bin = per_second(lambda: bin_codec.encode(method(*args)))
+        print(f"{name:<22}{legacy / 1e3:>12.1f}{built / 1e3:>10.1f}{as_json / 1e3:>10.1f}{as_bin / 1e3:>10.1f}")
+    PacketBuilder.reset_room(ROOM)
+
+    players = [{"id": f"p{i}", "balance": 1500, "position": i} for i in range(4)]
+
+    def legacy_heartbeat():
+        return {
+            "header": {"room_id": ROOM, "type": "STATE", "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "command": {"action": "HEARTBEAT"},
+            "payload": {"players": players, "active_rooms": 12},
+        }
+
+    print("\nHeartbeat (nghìn packet/s)")
+    print(f"{'legacy dict + strftime':<26}{per_second(legacy_heartbeat) / 1e3:>10.1f}")
+    print(f"{'PacketBuilder.heartbeat':<26}{per_second(lambda: PacketBuilder.heartbeat(ROOM, players, 12)) / 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
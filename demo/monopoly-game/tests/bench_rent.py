@@ -0,0 +1,82 @@
+# tests/bench_rent.py
+"""
+Microbenchmark tính tiền thuê trên bàn cờ cuối ván (mọi ô mua được đều đã có chủ).
+- legacy : quét properties_owned + danh sách tile để đếm ga / tiện ích / ô cùng nhóm màu.
+- indexed: bộ đếm theo loại / nhóm màu của Bank (O(1)).
+Mỗi lượt tính tiền thuê cho ô đích ngẫu nhiên: ga, tiện ích hoặc đất (kiểm tra monopoly).
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_rent
+"""
+import random
+import time
+
+from src.server.game.board import Board
+
+LOOKUPS = 200_000
+PLAYER_COUNT = 4
+
+
+def build_board() -> Board:
+    board = Board()
+    buyable = [t for t in board.tiles if hasattr(t, "properties")]
+    rng = random.Random(3)
+    for tile in buyable:
+        board.bank.set_property_owner(tile.tile_id, f"p{rng.randrange(PLAYER_COUNT)}")
+    # Vài nhóm màu trọn bộ để nhánh monopoly được dùng tới
+    for tile in buyable:
+        if getattr(tile, "colour", None) in ("brown", "dark_blue", "orange"):
+            board.bank.set_property_owner(tile.tile_id, "p0")
+    return board
+
+
+def legacy_rent(board: Board, tile, owner_id: str, dice_roll: int) -> int:
+    owned = [tid for tid, owner in board.bank.properties_owned.items() if owner == owner_id]
+    owned_tiles = [t for t in board.tiles if t.tile_id in owned]
+    if tile.tile_type == "railroad":
+        count = sum(1 for t in owned_tiles if t.tile_type == "railroad")
+        return tile.properties.calculate_rent(railroad_count=count)
+    if tile.tile_type == "utility":
+        count = sum(1 for t in owned_tiles if t.tile_type == "utility")
+        return tile.properties.calculate_rent(utility_count=count, dice_roll=dice_roll)
+    group = [t for t in board.tiles if getattr(t, "colour", None) == tile.colour]
+    is_monopoly = all(board.bank.get_owner_id(t.tile_id) == owner_id for t in group)
+    return tile.properties.calculate_rent(is_monopoly=is_monopoly)
+
+
+def indexed_rent(board: Board, tile, owner_id: str, dice_roll: int) -> int:
+    if tile.tile_type == "railroad":
+        return tile.calculate_rent(board, owner_id)
+    if tile.tile_type == "utility":
+        return tile.calculate_rent(board, owner_id, dice_roll)
+    return tile.calculate_rent(board, owner_id)
+
+
+def bench(rent_fn, board: Board, lookups) -> float:
+    started = time.perf_counter()
+    for tile, owner_id, dice_roll in lookups:
+        rent_fn(board, tile, owner_id, dice_roll)
+    return (time.perf_counter() - started) / len(lookups) * 1e6
+
+
+def main():
+    board = build_board()
+    rng = random.Random(1)
+    buyable = [t for t in board.tiles if hasattr(t, "properties")]
+    lookups = []
+    for _ in range(LOOKUPS):
+        tile = rng.choice(buyable)
+        lookups.append((tile, board.bank.get_owner_id(tile.tile_id), rng.randint(2, 12)))
+
+    for tile, owner_id, dice_roll in lookups[:2_000]:
+        assert legacy_rent(board, tile, owner_id, dice_roll) == indexed_rent(board, tile, owner_id, dice_roll)
+
+    legacy_us = bench(legacy_rent, board, lookups)
+    indexed_us = bench(indexed_rent, board, lookups)
+    print(f"legacy : {legacy_us:>7.2f} µs/rent")
+    print(f"indexed: {indexed_us:>7.2f} µs/rent")
+    print(f"speed-up: {legacy_us / indexed_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# tests/bench_room_actors.py
+"""
+Benchmark xử lý hành động khi có một phòng chậm.
+- inline: như listen_loop cũ — một coroutine lấy packet từ hàng đợi và await handle_action
+          ngay tại chỗ, nên mọi phòng chờ phòng chậm.
+- actors: listen_loop chỉ đưa hành động vào RoomActor của phòng; mỗi phòng một task.
+Mỗi hành động của phòng chậm await `--slow-ms` (vd. I/O), phòng khác xử lý ngay.
+Phần xử lý bằng CPU vẫn chạy trên cùng event loop — actor không song song hóa được phần đó.
+In ra độ trễ (nhận → xử lý xong) của phòng thường và phòng chậm, cùng metrics inbox của phòng chậm.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_room_actors [--rooms 100] [--actions 5000] [--slow-ms 60]
+"""
+import argparse
+import asyncio
+import time
+
+from src.server.rooms.room_actor import RoomActor
+
+SLOW_ROOM = "ROOM_000"
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1e3 if ordered else 0.0
+
+
+async def produce(inbox: asyncio.Queue, rooms: int, actions: int, rate: float):
+    """Packet đến đều đặn, xoay vòng qua các phòng (giống listen_loop nhận từ nhiều socket)."""
+    interval = 1 / rate
+    start = time.perf_counter()
+    for i in range(actions):
+        room_id = f"ROOM_{i % rooms:03d}"
+        await inbox.put((room_id, time.perf_counter()))
+        delay = start + (i + 1) * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    await inbox.put(None)
+
+
+async def run(mode: str, rooms: int, actions: int, rate: float, slow_ms: float, inbox_size: int):
+    latencies = {"normal": [], "slow": []}
+
+    async def handle_action(room_id: str, received_at: float):
+        if room_id == SLOW_ROOM:
+            await asyncio.sleep(slow_ms / 1e3)
+        latencies["slow" if room_id == SLOW_ROOM else "normal"].append(time.perf_counter() - received_at)
+
+    inbox = asyncio.Queue()
+    producer = asyncio.ensure_future(produce(inbox, rooms, actions, rate))
+    actors = {}
+    if mode == "actors":
+        for i in range(rooms):
+            room_id = f"ROOM_{i:03d}"
+            actors[room_id] = RoomActor(room_id, lambda item, rid=room_id: handle_action(rid, item),
+                                        maxsize=inbox_size, policy="drop_oldest")
+
+    started = time.perf_counter()
+    while True:
+        message = await inbox.get()
+        if message is None:
+            break
+        room_id, received_at = message
+        if mode == "inline":
+            await handle_action(room_id, received_at)
+        else:
+            actors[room_id].submit(received_at)
+    await producer
+    for actor in actors.values():
+        await actor.close(drain=True)
+    elapsed = time.perf_counter() - started
+    slow_metrics = actors[SLOW_ROOM].metrics() if actors else None
+    return latencies, elapsed, slow_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--actions", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000.0, help="hành động đến mỗi giây")
+    parser.add_argument("--slow-ms", type=float, default=60.0,
+                        help="mặc định 60 ms × 20 hành động/s: phòng chậm bị quá tải")
+    parser.add_argument("--inbox", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{args.rooms} phòng, {args.actions} hành động @ {args.rate:g}/s, "
+          f"{SLOW_ROOM} chậm {args.slow_ms:g} ms/hành động, inbox {args.inbox}\n")
+    print(f"{'mode':<8}{'elapsed s':>10}{'normal p50':>12}{'normal p99':>12}{'slow p50':>10}{'slow p99':>10}{'handled':>9}")
+    for mode in ("inline", "actors"):
+        latencies, elapsed, slow_metrics = asyncio.run(
+            run(mode, args.rooms, args.actions, args.rate, args.slow_ms, args.inbox))
+        normal, slow = latencies["normal"], latencies["slow"]
+        print(f"{mode:<8}{elapsed:>10.2f}{percentile(normal, 0.5):>12.2f}{percentile(normal, 0.99):>12.2f}"
+              f"{percentile(slow, 0.5):>10.1f}{percentile(slow, 0.99):>10.1f}{len(normal) + len(slow):>9}")
+        if slow_metrics:
+            print(f"{'':<8}{SLOW_ROOM} inbox: max_depth={slow_metrics['max_depth']} "
+                  f"dropped={slow_metrics['dropped']} "
+                  f"queue_wait p99={slow_metrics['queue_wait']['p99_ms']} ms "
+                  f"processing avg={slow_metrics['processing']['avg_ms']} ms")
+    print("\n(độ trễ tính bằng ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# tests/bench_room_create.py
+"""
+Benchmark tạo 10.000 phòng (Board + Bank + RoomState với 1 người chơi).
+- legacy  : mỗi phòng đọc lại board_config.json và tạo đủ 40 tile + tài sản riêng
+            (BoardTemplate.load() cho từng phòng — tương đương _create_board trước đây).
+- template: BoardTemplate dùng chung; mỗi phòng chỉ có overlay tài sản + ô rút bài.
+Đo thời gian tạo trung bình và bộ nhớ còn giữ (tracemalloc) cho mỗi phòng.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_room_create
+"""
+import contextlib
+import io
+import time
+import tracemalloc
+
+from src.server.game.board import Board
+from src.server.game.board_template import BoardTemplate, get_board_template
+from src.server.game.player import Player
+from src.server.rooms.room_state import RoomState
+from tests.conftest import QuietLogger
+
+ROOMS = 10_000
+
+
+def create_room(index: int, template: BoardTemplate) -> RoomState:
+    room_id = f"ROOM_{index}"
+    board = Board(template)
+    host = Player(f"h{index}", "Host Player", board.bank, room_id)
+    return RoomState(room_id, host.id, network=None, logger=QuietLogger(), players=[host], board=board)
+
+
+def run(make_template):
+    rooms = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(ROOMS):
+            rooms.append(create_room(index, make_template()))
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed / ROOMS * 1e6, retained / ROOMS
+
+
+def main():
+    get_board_template()  # nạp một lần cho process (ngoài phần đo)
+    legacy_us, legacy_bytes = run(BoardTemplate.load)
+    shared_us, shared_bytes = run(get_board_template)
+    print(f"legacy  : {legacy_us:>8.1f} µs/room  {legacy_bytes / 1024:>6.1f} KiB/room")
+    print(f"template: {shared_us:>8.1f} µs/room  {shared_bytes / 1024:>6.1f} KiB/room")
+    print(f"speed-up: {legacy_us / shared_us:.1f}x, memory: {legacy_bytes / shared_bytes:.1f}x smaller "
+          f"({ROOMS} rooms)")
+
+
+if __name__ == "__main__":
+    main()
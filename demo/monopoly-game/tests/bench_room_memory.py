@@ -0,0 +1,90 @@
+# tests/bench_room_memory.py
+"""
+Benchmark bộ nhớ mỗi phòng (tracemalloc) cho các object mô hình game.
+- dict  : cùng tập thuộc tính như trước, nhưng là object thường (__dict__) — Board, Bank (dict số dư),
+          tile + tài sản từng phòng, Player kèm một PacketBuilder() riêng.
+- slots : Board / Bank / tile / tài sản / Player dùng __slots__, trạng thái nóng trong RoomStore
+          (struct-of-arrays: owners, houses, flags, revisions, positions, balances).
+Cả hai đều dùng BoardTemplate và định nghĩa thẻ chung; mỗi phòng 4 người chơi, 2 bộ bài.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_room_memory
+"""
+import tracemalloc
+
+from src.server.game.board import Board
+from src.server.game.board_template import get_board_template
+from src.server.game.cardDeck import create_room_decks
+from src.server.game.player import Player
+from src.server.network.packet_builder import PacketBuilder
+
+ROOMS = 10_000
+PLAYER_COUNT = 4
+
+
+class Obj:
+    """Object thường có __dict__ (bố cục trước khi dùng __slots__)."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def dict_room(index: int, template):
+    tiles = []
+    for spec in template.specs:
+        if spec.shared_tile is not None:
+            tiles.append(spec.shared_tile)
+            continue
+        props = Obj(spec=spec.property_spec, revision=0, _owner=None, _is_mortgaged=False)
+        if "rents" in spec.property_spec:
+            props.__dict__.update(_houses=0, _has_hotel=False)
+        tiles.append(Obj(tile_id=spec.tile_id, name=spec.name, position=spec.position, tile_type=spec.tile_type,
+                         _dict_cache=None, _dict_revision=0, properties=props, colour=spec.colour))
+    bank = Obj(cash_pool=100_000, free_parking_pool=0, player_balances={}, properties_owned={},
+               _tiles_by_owner={}, _type_counts={}, _group_counts={},
+               _tile_catalog=template.ownership_catalog, _group_sizes=template.group_sizes,
+               available_houses=32, available_hotels=12)
+    players = []
+    for i in range(PLAYER_COUNT):
+        player_id = f"r{index}p{i}"
+        bank.player_balances[player_id] = 1500
+        players.append(Obj(id=player_id, name=f"Player {i}", position=0, in_jail=False, jail_turns=0,
+                           is_bankrupt=False, has_rolled_and_moved=False, consecutive_doubles=0,
+                           room_id=f"ROOM_{index}", bank=bank, packet_builder=PacketBuilder()))
+    return Obj(template=template, tiles=tiles, decks=create_room_decks(index), bank=bank,
+               _players=players, _players_by_id={p.id: p for p in players}, board_path=template.path,
+               _tiles_by_position=tiles, _index_by_id=template.index_by_id,
+               _positions_by_type=template.positions_by_type, _jail_tile=tiles[10])
+
+
+def slots_room(index: int, template):
+    board = Board(template, seed=index)
+    board.players = [Player(f"r{index}p{i}", f"Player {i}", board.bank, f"ROOM_{index}")
+                     for i in range(PLAYER_COUNT)]
+    return board
+
+
+def bytes_per_room(create_room) -> float:
+    template = get_board_template()
+    rooms = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(ROOMS):
+        rooms.append(create_room(index, template))
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained / ROOMS
+
+
+def main():
+    get_board_template()
+    dict_bytes = bytes_per_room(dict_room)
+    slots_bytes = bytes_per_room(slots_room)
+    print(f"dict  : {dict_bytes:>8.0f} B/room")
+    print(f"slots : {slots_bytes:>8.0f} B/room")
+    print(f"saving: {1 - slots_bytes / dict_bytes:.0%} ({(dict_bytes - slots_bytes) * ROOMS / 2**20:.1f} MiB "
+          f"per {ROOMS} rooms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# tests/bench_room_serialize.py
+"""
+Benchmark RoomState.serialize() + JSON encode cho mỗi lần đồng bộ.
+- legacy: board = json.dumps(board_state, indent=4) lồng trong dict rồi encode lần nữa
+          (chuỗi bị escape, pretty-print), mỗi tile dựng lại to_dict() mỗi lần.
+- single: board là dict có cấu trúc, tile dict lấy từ cache (chỉ dựng lại ô vừa đổi
+          chủ / nhà / cầm cố), encode JSON đúng một lần.
+Giữa hai lần sync có một thay đổi nhỏ (đi quân, xây nhà) như một lượt chơi thật.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_room_serialize
+"""
+import json
+import time
+from datetime import datetime
+
+from src.server.game.board import Board
+from src.server.game.player import Player
+from src.server.rooms.room_state import RoomState
+from tests.conftest import QuietLogger
+
+SYNCS = 2_000
+PLAYER_COUNT = 4
+
+
+def build_room() -> RoomState:
+    board = Board()
+    players = [Player(f"p{i}", f"Player {i}", board.bank, "ROOM_BENCH") for i in range(PLAYER_COUNT)]
+    board.players = players
+    # Giữa ván: mỗi người sở hữu vài ô đất
+    buyable = [t for t in board.tiles if hasattr(t, "properties")]
+    for i, tile in enumerate(buyable[:16]):
+        board.bank.buy_property(players[i % PLAYER_COUNT], tile)
+    return RoomState("ROOM_BENCH", "p0", network=None, logger=QuietLogger(), players=players, board=board)
+
+
+def legacy_serialize(state: RoomState) -> dict:
+    """Bản serialize trước đây (current_turn đổi sang id để encode được)."""
+    board_state = {
+        "tiles": [tile._build_dict() for tile in state.board.tiles],
+        "bank": state.board.bank.serialize_dict(),
+    }
+    current = state.turn_manager.get_current_player()
+    return {
+        "room_id": state.room_id,
+        "status": state.status,
+        "winner": state.winner,
+        "current_turn": current.id if current else None,
+        "start_time": None,
+        "end_time": None,
+        "players": [p.serialize() for p in state.players],
+        "board": json.dumps(board_state, indent=4),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def play_step(state: RoomState, step: int):
+    player = state.players[step % PLAYER_COUNT]
+    player.position = (player.position + 7) % len(state.board.tiles)
+    owned = [t for t in state.board.tiles if getattr(t, "owner", None) == player.id and hasattr(t.properties, "houses")]
+    if owned:
+        tile = owned[step % len(owned)]
+        tile.properties.houses = (tile.properties.houses + 1) % 5
+
+
+def run(state: RoomState, serialize) -> tuple:
+    total_ns, total_bytes = 0, 0
+    for step in range(SYNCS):
+        play_step(state, step)
+        started = time.perf_counter_ns()
+        packet = {"type": "ROOM_STATE_UPDATE", "room_id": state.room_id, "data": serialize(state)}
+        encoded = json.dumps(packet).encode("utf-8")
+        total_ns += time.perf_counter_ns() - started
+        total_bytes += len(encoded)
+    return total_ns / SYNCS / 1000, total_bytes / SYNCS
+
+
+def main():
+    state = build_room()
+    results = {
+        "legacy": run(state, legacy_serialize),
+        "single": run(state, RoomState.serialize),
+    }
+    for name, (us, size) in results.items():
+        print(f"{name:<7}: {us:>8.1f} µs/sync  {size:>8.0f} B/sync")
+    legacy_us, legacy_size = results["legacy"]
+    single_us, single_size = results["single"]
+    print(f"speed-up: {legacy_us / single_us:.1f}x, payload: {single_size / legacy_size:.0%} of legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# tests/bench_send_batch.py
+"""
+Benchmark đường gửi datagram của MulticastManager (datagram/s).
+- broadcast: heartbeat cho ROOMS phòng mỗi tick, pool 4 socket dùng chung (user-022).
+- role     : một phòng CLIENTS client, fan-out unicast theo vai trò "player" mỗi tick.
+Ba cách gửi:
+- legacy  : udp_send cho từng người nhận (encode lại packet mỗi lần, mỗi datagram một sendto).
+- sendto  : DatagramBatcher (mặc định), encode một lần, xả mỗi vòng loop bằng sendto từng datagram.
+- sendmmsg: DatagramBatcher(use_sendmmsg=True), xả bằng sendmmsg (Linux) — tối đa 1024 datagram
+            mỗi syscall; chỉ nên bật mặc định khi cột này nhanh hơn sendto.
+Đích là loopback (không ai đọc) nên số đo là chi phí phía gửi. Cuối cùng là "raw": chỉ đường syscall
+(datagram đã encode sẵn, 1000 group trên một socket) để tách chi phí encode khỏi chi phí gửi.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_send_batch
+"""
+import asyncio
+import time
+
+from src.server.network import network_utils
+from src.server.network.multiplecast_manager import MulticastManager
+from src.server.network.packet_builder import PacketBuilder
+from src.server.network.send_batch import DatagramBatcher, _sendmmsg
+from tests.conftest import QuietLogger
+
+ROOMS = 1_000
+CLIENTS = 256
+TICKS = 20
+
+
+def legacy_send(manager: MulticastManager, room_id: str, packet: dict, target="all", role=None):
+    """send_packet trước đây: udp_send (encode + sendto) cho từng người nhận."""
+    group = manager.groups[room_id]
+    if target == "all":
+        network_utils.udp_send(group["socket"], packet, (group["ip"], group["port"]), codec=group["codec"])
+        return
+    for cid, info in group["clients"].items():
+        if cid == target or (role and info["role"] == role):
+            network_utils.udp_send(group["socket"], packet, info["addr"], codec=group["codec"])
+
+
+async def run(mode: str, scenario: str) -> float:
+    manager = MulticastManager(QuietLogger(), base_ip="239.5.0.0/16", base_port=48000,
+                               interface_ip="127.0.0.1", socket_pool_size=4)
+    if mode != "legacy":
+        manager.sender = DatagramBatcher(use_sendmmsg=(mode == "sendmmsg"))
+    send = (lambda *a, **kw: legacy_send(manager, *a, **kw)) if mode == "legacy" else manager.send_packet
+
+    if scenario == "broadcast":
+        rooms = [f"ROOM_{i}" for i in range(ROOMS)]
+        for room_id in rooms:
+            manager.create_group(room_id)
+        players = [{"id": f"p{i}", "balance": 1500, "position": i} for i in range(4)]
+        calls = [(room_id, PacketBuilder.heartbeat(room_id, players, ROOMS), {}) for room_id in rooms]
+        per_tick = ROOMS
+    else:
+        manager.create_group("ROOM_0")
+        for i in range(CLIENTS):
+            manager.register_client("ROOM_0", f"c{i}", ("127.0.0.1", 49000 + i), role="player")
+        calls = [("ROOM_0", PacketBuilder.next_turn("ROOM_0", "c1"), {"target": None, "role": "player"})]
+        per_tick = CLIENTS
+
+    started = time.perf_counter()
+    for _ in range(TICKS):
+        for room_id, packet, kwargs in calls:
+            send(room_id, packet, **kwargs)
+        await asyncio.sleep(0)  # vòng loop kế: batcher xả
+    elapsed = time.perf_counter() - started
+    syscalls = manager.sender.stats["syscalls"] if mode != "legacy" else per_tick * TICKS
+    manager.pool.close()
+    return per_tick * TICKS / elapsed, syscalls / TICKS
+
+
+def run_raw(mode: str) -> float:
+    manager = MulticastManager(QuietLogger(), base_ip="239.5.0.0/16", base_port=48000,
+                               interface_ip="127.0.0.1", socket_pool_size=1)
+    sock = manager.pool.sockets[0]
+    addrs = [manager.allocator.address_of(i) for i in range(ROOMS)]
+    data = b"x" * 120
+    batcher = DatagramBatcher(use_sendmmsg=(mode == "sendmmsg"))
+    started = time.perf_counter()
+    for _ in range(TICKS):
+        if mode == "legacy":
+            for addr in addrs:
+                sock.sendto(data, addr)
+        else:
+            batcher.queue_many(sock, data, addrs)
+            batcher.flush()
+    elapsed = time.perf_counter() - started
+    manager.pool.close()
+    return ROOMS * TICKS / elapsed
+
+
+def main():
+    network_utils.logger = QuietLogger()  # udp_send log DEBUG từng packet — tắt để chỉ đo đường gửi
+    modes = ["legacy", "sendto"] + (["sendmmsg"] if _sendmmsg is not None else [])
+    print(f"{'scenario':<24}{'mode':<10}{'datagram/s':>14}{'syscall/tick':>14}")
+    for scenario, label in (("broadcast", f"broadcast {ROOMS} phòng"), ("role", f"role {CLIENTS} client")):
+        for mode in modes:
+            rate, syscalls = asyncio.run(run(mode, scenario))
+            print(f"{label:<24}{mode:<10}{rate:>14,.0f}{syscalls:>14,.0f}")
+    for mode in modes:
+        print(f"{'raw ' + str(ROOMS) + ' group':<24}{mode:<10}{run_raw(mode):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# tests/bench_snapshot_history.py
+"""
+Benchmark bộ nhớ lịch sử snapshot của RoomState trong một ván 1.000 hành động.
+- legacy : mỗi thay đổi append copy.deepcopy(serialize()) vào list, không bao giờ xóa.
+- store  : SnapshotStore (keyframe + patch, structural sharing), với retention khác nhau.
+Đo bằng tracemalloc: bộ nhớ còn giữ sau ván đấu và thời gian commit trung bình.
+Kiểm tra thêm rebuild(version) khớp với trạng thái thật ở mọi version còn được giữ.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_snapshot_history
+"""
+import copy
+import json
+import random
+import time
+import tracemalloc
+
+from src.server.game.board import Board
+from src.server.game.player import Player
+from src.server.rooms.room_state import RoomState
+from tests.conftest import QuietLogger
+
+ACTIONS = 1_000
+PLAYER_COUNT = 4
+
+
+def build_room(history_size: int, keyframe_interval: int = 32) -> RoomState:
+    board = Board()
+    players = [Player(f"p{i}", f"Player {i}", board.bank, "ROOM_BENCH") for i in range(PLAYER_COUNT)]
+    board.players = players
+    return RoomState("ROOM_BENCH", "p0", network=None, logger=QuietLogger(), players=players, board=board,
+                     history_size=history_size, keyframe_interval=keyframe_interval)
+
+
+def play_action(state: RoomState, step: int, rng: random.Random):
+    """Một hành động: đi quân, mua đất hoặc xây nhà khi có thể."""
+    board, bank = state.board, state.board.bank
+    player = state.players[step % PLAYER_COUNT]
+    player.position = (player.position + rng.randint(2, 12)) % len(board.tiles)
+    tile = board.tiles[player.position]
+    if hasattr(tile, "properties") and bank.get_owner_id(tile.tile_id) is None:
+        bank.buy_property(player, tile)
+    elif getattr(tile, "owner", None) == player.id and hasattr(tile.properties, "houses"):
+        if tile.properties.houses < 4:
+            bank.build_house(player, tile)
+    else:
+        bank.pay_player(player, 10)
+
+
+def run(record, history_size: int = ACTIONS, verify: dict = None):
+    state = build_room(history_size)
+    rng = random.Random(7)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    commit_ns = 0
+    for step in range(ACTIONS):
+        play_action(state, step, rng)
+        started = time.perf_counter_ns()
+        record(state)
+        commit_ns += time.perf_counter_ns() - started
+        if verify is not None:
+            verify[state.version] = json.dumps(state.sync_state(), sort_keys=True)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return state, retained, commit_ns / ACTIONS / 1000
+
+
+def main():
+    legacy_snapshots = []
+    _, legacy_bytes, legacy_us = run(lambda state: legacy_snapshots.append(copy.deepcopy(state.serialize())))
+    print(f"legacy deepcopy list : {legacy_bytes / 1024:>9.0f} KiB  {legacy_us:>7.1f} µs/commit  "
+          f"({len(legacy_snapshots)} snapshots)")
+
+    for history_size in (ACTIONS, 256, 64):
+        state, store_bytes, store_us = run(RoomState.commit_sync_state, history_size)
+        print(f"store retention={history_size:<5}: {store_bytes / 1024:>9.0f} KiB  {store_us:>7.1f} µs/commit  "
+              f"({len(state.history)} versions, v{state.history.oldest_version}..v{state.version})")
+
+    expected = {}
+    state, _, _ = run(RoomState.commit_sync_state, 256, verify=expected)
+    for version in range(state.history.oldest_version, state.version + 1):
+        assert json.dumps(state.state_at(version), sort_keys=True) == expected[version], f"v{version} mismatch"
+    assert state.state_at(state.history.oldest_version - 1) is None
+    print(f"rebuild check        : v{state.history.oldest_version}..v{state.version} OK")
+
+
+if __name__ == "__main__":
+    main()
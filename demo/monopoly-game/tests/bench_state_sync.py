@@ -0,0 +1,181 @@
+# tests/bench_state_sync.py
+"""
+Benchmark số byte đồng bộ trạng thái phòng qua multicast trong một ván 200 lượt.
+- legacy  : mỗi hành động gửi ROOM_STATE_UPDATE chứa toàn bộ RoomState.serialize()
+            (board là chuỗi JSON indent=4 lồng trong JSON).
+- snapshot: mỗi hành động gửi snapshot đầy đủ có cấu trúc (ROOM_STATE_SNAPSHOT).
+- delta   : mỗi hành động chỉ gửi patch theo trường (ROOM_STATE_DELTA).
+Client giả lập áp dụng từng delta (qua JSON) và phải khớp trạng thái server ở mọi version.
+
+Trạng thái được dựng theo đúng cấu trúc RoomState.sync_state() từ board_config.json,
+với luật rút gọn: đổ xúc xắc, qua GO, mua đất, trả thuê, thuế, vào tù, xây nhà.
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_state_sync
+"""
+import copy
+import json
+import random
+from datetime import datetime
+from pathlib import Path
+
+from src.shared.state_delta import apply_patch, diff_state
+
+TURNS = 200
+PLAYER_COUNT = 4
+ROOM_ID = "ROOM_BENCH"
+BOARD_CONFIG = Path(__file__).resolve().parents[1] / "src" / "server" / "game" / "board_config.json"
+
+
+def build_tiles() -> list:
+    config = json.loads(BOARD_CONFIG.read_text(encoding="utf-8"))
+    tiles = []
+    for data in config["tiles"]:
+        tile = {"id": data["id"], "name": data["name"], "position": data["id"], "type": data["type"]}
+        info = data.get("property_info") or {}
+        if data["type"] == "property":
+            tile.update({
+                "price": info.get("purchase_price", 200),
+                "rent": info.get("base_rent", 25),
+                "owner_id": None,
+                "colour": data.get("color"),
+            })
+        elif data["type"] == "tax":
+            tile["tax_amount"] = data["amount"]
+        tiles.append(tile)
+    return tiles
+
+
+def new_game() -> dict:
+    players = [
+        {"id": f"p{i}", "name": f"Player {i}", "position": 0, "balance": 1500, "owned_tiles": [],
+         "in_jail": False, "jail_turns": 0, "is_bankrupt": False}
+        for i in range(PLAYER_COUNT)
+    ]
+    return {
+        "room_id": ROOM_ID,
+        "status": "ingame",
+        "winner": None,
+        "current_turn": players[0]["id"],
+        "start_time": datetime(2025, 1, 1).isoformat(),
+        "end_time": None,
+        "players": players,
+        "board": {
+            "tiles": build_tiles(),
+            "bank": {
+                "cash_pool": 100_000,
+                "free_parking_pool": 0,
+                "player_balances": {p["id"]: p["balance"] for p in players},
+                "properties_owned": {},
+                "available_houses": 32,
+                "available_hotels": 12,
+            },
+        },
+    }
+
+
+def set_balance(state: dict, player: dict, delta: int):
+    player["balance"] += delta
+    state["board"]["bank"]["player_balances"][player["id"]] = player["balance"]
+
+
+def play(state: dict, rng: random.Random):
+    """Sinh lần lượt trạng thái sau mỗi hành động (roll, buy, build, end_turn)."""
+    tiles = state["board"]["tiles"]
+    bank = state["board"]["bank"]
+    players = {p["id"]: p for p in state["players"]}
+    order = [p["id"] for p in state["players"]]
+
+    for turn in range(TURNS):
+        player = players[order[turn % len(order)]]
+        state["current_turn"] = player["id"]
+
+        # 🎲 roll_dice
+        if player["in_jail"]:
+            player["jail_turns"] += 1
+            if player["jail_turns"] >= 3:
+                player["in_jail"], player["jail_turns"] = False, 0
+        else:
+            steps = rng.randint(1, 6) + rng.randint(1, 6)
+            if player["position"] + steps >= len(tiles):
+                set_balance(state, player, 200)
+                bank["cash_pool"] -= 200
+            player["position"] = (player["position"] + steps) % len(tiles)
+            tile = tiles[player["position"]]
+            if tile["type"] == "tax":
+                set_balance(state, player, -tile["tax_amount"])
+                bank["free_parking_pool"] += tile["tax_amount"]
+            elif tile["type"] == "goto_jail":
+                player["position"], player["in_jail"] = 10, True
+            elif tile["type"] == "property" and tile["owner_id"] not in (None, player["id"]):
+                set_balance(state, player, -tile["rent"])
+                set_balance(state, players[tile["owner_id"]], tile["rent"])
+        yield "roll_dice"
+
+        # 🏠 buy_property
+        tile = tiles[player["position"]]
+        if tile["type"] == "property" and tile["owner_id"] is None and player["balance"] > tile["price"]:
+            set_balance(state, player, -tile["price"])
+            tile["owner_id"] = player["id"]
+            player["owned_tiles"].append(tile["id"])
+            bank["properties_owned"][str(tile["id"])] = player["id"]
+            yield "buy_property"
+
+        # 🏗️ xây nhà định kỳ trên đất đã sở hữu
+        if turn % 10 == 9 and player["owned_tiles"] and bank["available_houses"]:
+            target = tiles[rng.choice(player["owned_tiles"])]
+            target["rent"] *= 2
+            bank["available_houses"] -= 1
+            set_balance(state, player, -50)
+            yield "build_house"
+
+        # ⏭️ end_turn
+        state["current_turn"] = order[(turn + 1) % len(order)]
+        yield "end_turn"
+
+
+def legacy_packet(state: dict) -> dict:
+    data = dict(state, board=json.dumps(state["board"], indent=4), timestamp=datetime.now().isoformat())
+    return {"type": "ROOM_STATE_UPDATE", "room_id": ROOM_ID, "timestamp": datetime.now().isoformat(), "data": data}
+
+
+def wire_size(packet: dict) -> int:
+    return len(json.dumps(packet, ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    state = new_game()
+    synced, version = copy.deepcopy(state), 0
+    client_state = json.loads(json.dumps(synced))
+
+    totals = {"legacy": 0, "snapshot": 0, "delta": 0}
+    actions = 0
+    for _ in play(state, random.Random(42)):
+        current = copy.deepcopy(state)
+        patch = diff_state(synced, current)
+        if not patch:
+            continue
+        version += 1
+        actions += 1
+
+        delta = {"type": "ROOM_STATE_DELTA", "room_id": ROOM_ID,
+                 "base_version": version - 1, "version": version, "patch": patch}
+        snapshot = {"type": "ROOM_STATE_SNAPSHOT", "room_id": ROOM_ID, "version": version, "state": current}
+        totals["legacy"] += wire_size(legacy_packet(current))
+        totals["snapshot"] += wire_size(snapshot)
+        totals["delta"] += wire_size(delta)
+
+        # Client nhận delta qua mạng (JSON) và phải tái tạo đúng version mới
+        client_state = apply_patch(client_state, json.loads(json.dumps(delta))["patch"])
+        assert client_state == json.loads(json.dumps(current)), f"client diverged at v{version}"
+        synced = current
+
+    print(f"{TURNS} turns, {actions} state versions, {PLAYER_COUNT} players")
+    for name, total in totals.items():
+        print(f"{name:<9}: {total:>10,} bytes  ({total / actions:>8.1f} B/update)")
+    print(f"delta vs legacy  : {totals['legacy'] / totals['delta']:.1f}x fewer bytes")
+    print(f"delta vs snapshot: {totals['snapshot'] / totals['delta']:.1f}x fewer bytes")
+
+
+if __name__ == "__main__":
+    main()
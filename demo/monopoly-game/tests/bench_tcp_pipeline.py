@@ -0,0 +1,70 @@
+# tests/bench_tcp_pipeline.py
+"""
+Benchmark throughput kênh điều khiển TCP (main_server.handle_tcp_client).
+- Lock-step: gửi 1 lệnh → chờ phản hồi → gửi lệnh tiếp theo.
+- Pipelined: gửi cả lô PIPELINE_DEPTH lệnh (mỗi lệnh có req_id) rồi mới đọc phản hồi.
+Đo số lệnh / giây với lệnh PING (không phụ thuộc RoomManager).
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_tcp_pipeline
+"""
+import asyncio
+import json
+import time
+
+from src.server import main_server
+from tests.conftest import QuietLogger
+
+TOTAL_COMMANDS = 20_000
+PIPELINE_DEPTH = 50
+
+
+def encode(cmd: str, req_id: int) -> bytes:
+    return (json.dumps({"cmd": cmd, "data": {}, "req_id": req_id}) + "\n").encode("utf-8")
+
+
+async def lock_step(port: int) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    started = time.perf_counter()
+    for i in range(TOTAL_COMMANDS):
+        writer.write(encode("PING", i))
+        await writer.drain()
+        await reader.readuntil(b"\n")
+    elapsed = time.perf_counter() - started
+    writer.close()
+    await writer.wait_closed()
+    return TOTAL_COMMANDS / elapsed
+
+
+async def pipelined(port: int) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    started = time.perf_counter()
+    for base in range(0, TOTAL_COMMANDS, PIPELINE_DEPTH):
+        writer.write(b"".join(encode("PING", base + i) for i in range(PIPELINE_DEPTH)))
+        await writer.drain()
+        pending = set(range(base, base + PIPELINE_DEPTH))
+        while pending:
+            response = json.loads(await reader.readuntil(b"\n"))
+            pending.discard(response["req_id"])
+    elapsed = time.perf_counter() - started
+    writer.close()
+    await writer.wait_closed()
+    return TOTAL_COMMANDS / elapsed
+
+
+async def main():
+    main_server.logger = QuietLogger()
+    server = await asyncio.start_server(main_server.handle_tcp_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    async with server:
+        lock_step_rate = await lock_step(port)
+        pipelined_rate = await pipelined(port)
+
+    print(f"lock-step : {lock_step_rate:>10.0f} cmd/s")
+    print(f"pipelined : {pipelined_rate:>10.0f} cmd/s (depth={PIPELINE_DEPTH})")
+    print(f"speed-up  : {pipelined_rate / lock_step_rate:>10.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+# tests/bench_wire_codec.py
+"""
+Benchmark codec datagram (shared.wire_codec): JSON so với bin1 (và bin1+msgpack nếu có cài msgpack).
+- Kích thước datagram theo từng loại packet nóng.
+- Thời gian encode / decode mỗi packet (µs).
+
+Chạy từ thư mục demo/monopoly-game:
+    python -m tests.bench_wire_codec
+"""
+import time
+
+from src.server.network.packet_builder import PacketBuilder
+from src.shared import wire_codec
+from src.shared.reliable_udp import ReliableChannel
+
+ROOM = "ROOM_01"
+ITERATIONS = 20_000
+
+
+def hot_packets() -> dict:
+    client_cmd = {
+        "header": {"packet_id": "1b4e28ba-2fa1-11d2-883f-0016d3cca427", "room_id": ROOM, "sender": "Player123",
+                   "target": "SERVER", "type": "COMMAND", "timestamp": "2026-10-18T09:30:01.250000Z", "version": "1.0"},
+        "command": {"action": "roll_dice", "args": {}},
+        "payload": {},
+    }
+    players = [{"id": f"10.0.0.{i}:5{i}000", "name": f"Player{i}", "balance": 1500 - 37 * i, "position": 7 * i,
+                "in_jail": False, "properties": [1, 3, 6]} for i in range(4)]
+    return {
+        "player_move": PacketBuilder.player_move(ROOM, "10.0.0.1:51000", 17, (3, 4)),
+        "update_balance": PacketBuilder.update_balance(ROOM, "10.0.0.1:51000", 1380),
+        "roll_dice_result": PacketBuilder.roll_result(ROOM, "10.0.0.1:51000", (6, 6), 12, True),
+        "heartbeat": {
+            "header": {"room_id": ROOM, "type": "STATE", "timestamp": "2026-10-18T09:30:00Z"},
+            "command": {"action": "HEARTBEAT"},
+            "payload": {"players": players, "active_rooms": 12},
+        },
+        "client_command": client_cmd,
+        "reliable_command": ReliableChannel("Player123").send(client_cmd, reliable=True),
+        "ack": {"header": {"type": "ACK", "sender": "SERVER", "target": "Player123"},
+                "meta": {"ack": True, "session": 123456789, "seq_id": 41, "sack": [43]}},
+        "state_delta": {"type": "ROOM_STATE_DELTA", "room_id": ROOM, "base_version": 41, "version": 42,
+                        "patch": [["set", ["players", "10.0.0.1:51000", "position"], 17],
+                                  ["set", ["players", "10.0.0.1:51000", "balance"], 1380]]},
+    }
+
+
+def per_op_us(fn, arg) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(arg)
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+def main():
+    codecs = [wire_codec.make_codec(name, ROOM, room_no=1) for name in reversed(wire_codec.available_codecs())]
+    names = [c.name for c in codecs]
+    packets = hot_packets()
+
+    print("Kích thước datagram (bytes)")
+    print(f"{'packet':<18}" + "".join(f"{n:>15}" for n in names))
+    totals = [0] * len(codecs)
+    for label, packet in packets.items():
+        sizes = [len(c.encode(packet)) for c in codecs]
+        totals = [t + s for t, s in zip(totals, sizes)]
+        print(f"{label:<18}" + "".join(f"{s:>15}" for s in sizes))
+    print(f"{'tổng':<18}" + "".join(f"{t:>9} ({t / totals[0]:>3.0%})" for t in totals))
+
+    print(f"\nEncode / decode (µs mỗi packet, {ITERATIONS} lần)")
+    print(f"{'packet':<18}" + "".join(f"{n:>22}" for n in names))
+    for label, packet in packets.items():
+        cells = []
+        for codec in codecs:
+            data = codec.encode(packet)
+            cells.append(f"{per_op_us(codec.encode, packet):>9.2f} / {per_op_us(codec.decode, data):>6.2f}")
+        print(f"{label:<18}" + "".join(f"{c:>22}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
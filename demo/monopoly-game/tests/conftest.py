@@ -0,0 +1,70 @@
+# tests/conftest.py
+"""
+Cấu hình + helper dùng chung cho tests/ (chạy từ thư mục demo/monopoly-game: `python -m pytest tests`).
+- Test dùng fixture `quiet_logger` / `fake_clock`.
+- Benchmark (chạy bằng `python -m tests.bench_x`, không qua pytest) import thẳng lớp:
+      from tests.conftest import QuietLogger
+"""
+import datetime
+import json
+import os
+import threading
+
+import pytest
+
+# test_build.py là script thủ công (không có hàm test, đọc JSON theo đường dẫn tính từ gốc repo
+# ngay khi import) — không để nó làm hỏng cả lượt collect
+collect_ignore = ["test_build.py"]
+
+
+class QuietLogger:
+    """Logger rỗng: không I/O (test / benchmark không bị chi phối bởi log), chỉ giữ lại các lỗi."""
+
+    def __init__(self):
+        self.errors = []
+
+    def error(self, message, *args, **kwargs):
+        self.errors.append(message % args if args else message)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class FakeClock:
+    """Đồng hồ điều khiển tay (thay time.monotonic trong test)."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LegacyLogger:
+    """Cách ghi log cũ (tham chiếu cho bench_logger): mở file JSON + TXT và print cho mỗi record."""
+
+    def __init__(self, log_dir):
+        self.log_file = os.path.join(log_dir, "legacy.log.json")
+        self.log_txt_file = os.path.join(log_dir, "legacy.log.txt")
+        self.lock = threading.Lock()
+
+    def info(self, message):
+        entry = {"timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 "level": "INFO", "room_id": None, "message": message}
+        print(f"[INFO] [GLOBAL] {message}")
+        with self.lock:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+                f.write("\n")
+            with open(self.log_txt_file, "a", encoding="utf-8") as f:
+                f.write(f"[{entry['timestamp']}] [INFO] [GLOBAL] {message}\n")
+
+
+@pytest.fixture
+def quiet_logger():
+    return QuietLogger()
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
@@ -0,0 +1,77 @@
+# tests/test_board_indexes.py
+"""Chỉ mục O(1) của Board / Bank / RoomState luôn khớp khi người chơi vào/ra và khi đổi chủ."""
+from src.server.game.board import Board
+from src.server.game.player import Player
+from src.server.rooms.room_state import RoomState
+
+
+def make_room(logger):
+    board = Board()
+    host = Player("p1", "Alice", board.bank, "R1")
+    state = RoomState("R1", "p1", network=None, logger=logger, players=[host], board=board)
+    return state, board, host
+
+
+def test_tile_indexes():
+    board = Board()
+    assert board.get_tile(39).name == "Boardwalk"
+    assert board.get_tile_at(10) is board.get_jail_tile()
+    assert board.get_positions_by_type("railroad") == [5, 15, 25, 35]
+    assert board.find_nearest_tile(7, "railroad") == 15
+    assert board.find_nearest_tile(36, "railroad") == 5
+    assert board.get_tile(99) is None and board.get_tile_at(-1) is None
+
+
+def test_player_index_follows_join_and_leave(quiet_logger):
+    state, board, host = make_room(quiet_logger)
+    guest = Player("p2", "Bob", board.bank, "R1")
+    state.add_player(guest)
+    assert state.get_player("p2") is guest and board.get_player_by_id("p2") is guest
+
+    state.remove_player("p1")
+    assert state.get_player("p1") is None and board.get_player_by_id("p1") is None
+    assert [p.id for p in state.players] == [p.id for p in board.players] == ["p2"]
+
+    state.players = [host, guest]
+    assert board.get_player_by_id("p1") is host
+
+
+def test_ownership_index_follows_bank(quiet_logger):
+    state, board, host = make_room(quiet_logger)
+    bank = board.bank
+    bank.buy_property(host, board.get_tile(1))
+    bank.set_property_owner(3, "p1")
+    bank.set_property_owner(5, "p1")
+    assert [t.tile_id for t in board.get_tiles_owned_by("p1")] == [1, 3, 5]
+
+    bank.set_property_owner(3, "p2")
+    bank.remove_property_player_sell(5, "p1")
+    assert bank.get_tile_ids_by_owner("p1") == [1]
+    assert bank.get_tile_ids_by_owner("p2") == [3]
+
+    bank.reset_property_owner("p1")
+    assert bank.get_tile_ids_by_owner("p1") == [] and bank.properties_owned == {3: "p2"}
+
+
+def test_owner_counts_drive_rent():
+    board = Board()
+    bank = board.bank
+    for tile_id in (5, 15, 25):
+        bank.set_property_owner(tile_id, "p1")
+    assert bank.count_owned("p1", "railroad") == 3
+    assert board.get_tile(5).calculate_rent(board, "p1") == 100
+
+    bank.set_property_owner(12, "p1")
+    bank.set_property_owner(28, "p1")
+    assert board.get_tile(12).calculate_rent(board, "p1", 7) == 70
+
+    bank.set_property_owner(1, "p1")
+    assert not bank.owns_color_group("p1", "brown")
+    bank.set_property_owner(3, "p1")
+    assert bank.owns_color_group("p1", "brown")
+    assert board.get_tile(1).calculate_rent(board, "p1") == board.get_tile(1).properties.base_rent * 2
+
+    bank.set_property_owner(3, "p2")
+    assert bank.count_owned_in_group("p1", "brown") == 1 and bank.count_owned_in_group("p2", "brown") == 1
+    bank.reset_property_owner("p1")
+    assert bank.count_owned("p1", "railroad") == 0 and not bank.owns_color_group("p1", "brown")
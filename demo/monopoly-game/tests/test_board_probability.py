@@ -0,0 +1,33 @@
+# tests/test_board_probability.py
+"""Xác suất dừng ô: Monte Carlo vector hóa khớp chuỗi Markov chính xác, báo cáo ROI đủ nhóm màu."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.server.analytics.board_probability import BoardModel, markov_steady_state, rent_report, simulate
+
+
+def test_monte_carlo_matches_markov():
+    model = BoardModel()
+    assert model.card_destination({"action": "move_back", "steps": 3}, 7) == 4
+    assert model.card_destination({"action": "nearest_railroad"}, 36) == 5
+
+    in_jail = {}
+    for strategy in ("long", "short"):
+        exact = markov_steady_state(strategy, model)["distribution"]
+        in_jail[strategy] = exact[model.jail_state]
+        assert exact.sum() == pytest.approx(1.0) and exact[30] == 0
+        result = simulate(games=20_000, throws=60, burn_in=20, seed=5, jail_strategy=strategy, model=model)
+        measured = result["counts"] / result["counts"].sum()
+        assert np.abs(measured - exact).max() < 0.003
+    assert in_jail["long"] > in_jail["short"]
+
+
+def test_rent_report_covers_colour_groups():
+    model = BoardModel()
+    landings = markov_steady_state(model=model)
+    report = rent_report(landings["distribution"] * landings["throws_per_turn"], level="hotel", model=model)
+    groups = report["groups"]
+    assert {"brown", "dark-blue", "railroad", "utility"} <= {group["group"] for group in groups}
+    assert all(group["roi_per_round"] > 0 for group in groups)
+    assert [g["roi_per_round"] for g in groups] == sorted((g["roi_per_round"] for g in groups), reverse=True)
@@ -0,0 +1,33 @@
+# tests/test_board_serialize.py
+"""Cache to_dict() của tile: dùng lại khi không đổi, làm mới khi đổi chủ / nhà / cầm cố."""
+import json
+
+from src.server.game.board import Board
+from src.server.game.player import Player
+
+
+def test_tile_dict_cache_invalidation():
+    board = Board()
+    player = Player("p1", "Alice", board.bank, "R1")
+    tile = board.get_tile(1)
+
+    cached = tile.to_dict()
+    assert tile.to_dict() is cached
+
+    board.bank.buy_property(player, tile)
+    assert tile.to_dict()["owner_id"] == "p1"
+
+    tile.properties.houses = 2
+    assert tile.to_dict()["rent"] == tile.properties.rents["2_houses"]
+
+    tile.properties.is_mortgaged = True
+    assert tile.to_dict()["rent"] == 0
+    assert board.get_tile(3).to_dict() is board.get_tile(3).to_dict()
+
+
+def test_board_serialized_once():
+    board = Board()
+    state = board.serialize_dict()
+    assert isinstance(state["tiles"][0], dict)
+    encoded = json.dumps({"board": state})
+    assert "\\n" not in encoded and "\\\"" not in encoded
@@ -0,0 +1,38 @@
+# tests/test_board_template.py
+"""BoardTemplate dùng chung: không đọc file khi tạo phòng, phần tĩnh chia sẻ, overlay tách biệt giữa các phòng."""
+import pytest
+
+from src.server.game import board_template
+from src.server.game.board import Board
+
+
+def test_rooms_share_static_data_but_not_state(monkeypatch):
+    first = Board()
+
+    def no_io(path):
+        raise AssertionError("board config re-read on room creation")
+
+    monkeypatch.setattr(board_template, "load_property_data_from_file", no_io)
+    second = Board()
+
+    assert first.template is second.template
+    assert first.get_tile(0) is second.get_tile(0)            # GO: ô tĩnh dùng chung
+    assert first.get_tile(4) is second.get_tile(4)            # Tax
+    boardwalk_a, boardwalk_b = first.get_tile(39), second.get_tile(39)
+    assert boardwalk_a is not boardwalk_b
+    assert boardwalk_a.properties.spec is boardwalk_b.properties.spec
+
+    first.bank.set_property_owner(39, "p1")
+    boardwalk_a.properties.houses = 3
+    assert boardwalk_b.properties.owner is None and boardwalk_b.properties.houses == 0
+    assert second.bank.get_owner_id(39) is None
+
+
+def test_static_data_is_read_only():
+    prop = Board().get_tile(1).properties
+    with pytest.raises(TypeError):
+        prop.spec["purchase_price"] = 1
+    with pytest.raises(TypeError):
+        prop.rents["hotel"] = 1
+    with pytest.raises(AttributeError):
+        prop.purchase_price = 1
@@ -0,0 +1,35 @@
+# tests/test_card_deck.py
+"""Bộ bài theo phòng: định nghĩa thẻ dùng chung, xáo theo seed, rút O(1), giữ / trả thẻ ra tù."""
+from src.server.game.board import Board
+from src.server.game.card_manager2 import JAIL_CARD_ACTION
+
+
+def draw_ids(deck, count, player_id="p1"):
+    return [deck.draw(player_id)["id"] for _ in range(count)]
+
+
+def test_decks_share_definitions_and_are_seeded():
+    first, second, other = Board(seed=42), Board(seed=42), Board(seed=7)
+    assert first.decks["chance"].cards is other.decks["chance"].cards
+    assert len(first.decks["chance"].cards) > 0 and len(first.decks["community"].cards) > 0
+    assert first.get_tile(7) is other.get_tile(7)   # ô Chance không giữ trạng thái → dùng chung
+
+    assert draw_ids(first.decks["chance"], 5, None) == draw_ids(second.decks["chance"], 5, None)
+    assert draw_ids(first.decks["community"], 5, None) != draw_ids(other.decks["community"], 5, None)
+
+
+def test_cards_cycle_and_jail_card_is_held():
+    board = Board(seed=1)
+    deck = board.decks["chance"]
+    size = len(deck)
+    drawn = [deck.draw("p1") for _ in range(size)]
+    jail_cards = [card for card in drawn if card["action"] == JAIL_CARD_ACTION]
+
+    assert len(jail_cards) == 1 and deck.holds_jail_card("p1")
+    assert len(deck) == size - 1
+    assert JAIL_CARD_ACTION not in {deck.draw("p2")["action"] for _ in range(2 * size)}
+
+    board.players = []
+    board.remove_player("p1")          # không có trong phòng → không đổi gì
+    assert deck.return_jail_card("p1") and not deck.holds_jail_card("p1")
+    assert len(deck) == size
@@ -0,0 +1,159 @@
+# tests/test_client_commands.py
+"""Client TCP: response ghép với lệnh đang chờ theo req_id (không có req_id → lệnh chờ lâu nhất)."""
+import asyncio
+import json
+
+from src.client.network.multicast_manager import MonopolyMulticastClient
+
+
+class FakeServerStream:
+    """Hai đầu của kết nối TCP giả: client ghi vào writer, test trả lời qua reader."""
+
+    def __init__(self):
+        self.reader = asyncio.StreamReader()
+        self.requests = []
+
+    # --- StreamWriter phía client ---
+    def write(self, data):
+        self.requests.extend(json.loads(line) for line in data.splitlines())
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+    # --- phía server ---
+    def reply(self, response):
+        self.reader.feed_data((json.dumps(response) + "\n").encode("utf-8"))
+
+    async def wait_requests(self, count):
+        while len(self.requests) < count:
+            await asyncio.sleep(0)
+        return self.requests
+
+
+async def connect(stream):
+    client = MonopolyMulticastClient()
+    client.reader, client.writer = stream.reader, stream
+    client.connected = True
+    client._tcp_task = asyncio.create_task(client.receive_tcp_messages())
+    return client
+
+
+def test_responses_resolve_futures_by_req_id():
+    async def scenario():
+        stream = FakeServerStream()
+        client = await connect(stream)
+        first = asyncio.create_task(client.send_tcp_command("LIST_ROOMS"))
+        second = asyncio.create_task(client.send_tcp_command("PING"))
+        first_req, second_req = await stream.wait_requests(2)
+        assert first_req["req_id"] != second_req["req_id"]
+
+        # Trả lời ngược thứ tự gửi, kèm một response với req_id không ai chờ
+        stream.reply({"cmd": "UNRELATED", "status": "OK", "req_id": 999})
+        stream.reply({"cmd": "PONG", "status": "OK", "req_id": second_req["req_id"]})
+        stream.reply({"cmd": "ROOM_LIST", "status": "OK", "data": {}, "req_id": first_req["req_id"]})
+        results = await asyncio.gather(first, second)
+        assert client._pending_commands == {}
+        await client.cleanup()
+        return results
+
+    first, second = asyncio.run(scenario())
+    assert first["cmd"] == "ROOM_LIST" and second["cmd"] == "PONG"
+
+
+def test_response_without_req_id_resolves_oldest_pending_command():
+    async def scenario():
+        stream = FakeServerStream()
+        client = await connect(stream)
+        oldest = asyncio.create_task(client.send_tcp_command("PING"))
+        await stream.wait_requests(1)
+        newest = asyncio.create_task(client.send_tcp_command("PING"))
+        _, newest_req = await stream.wait_requests(2)
+
+        stream.reply({"cmd": "PONG", "status": "OK", "data": {"n": "legacy"}})  # server cũ: không gắn req_id
+        assert (await oldest)["data"] == {"n": "legacy"}
+        assert not newest.done()
+        stream.reply({"cmd": "PONG", "status": "OK", "data": {"n": "tagged"}, "req_id": newest_req["req_id"]})
+        assert (await newest)["data"] == {"n": "tagged"}
+        await client.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_room_created_handler_task_is_tracked_until_done():
+    async def scenario():
+        stream = FakeServerStream()
+        client = await connect(stream)
+        create = asyncio.create_task(client.send_tcp_command("CREATE_ROOM", {"room_id": "R1"}))
+        (create_req,) = await stream.wait_requests(1)
+        stream.reply({"cmd": "ROOM_CREATED", "status": "OK", "data": {"room_id": "R1"},
+                      "req_id": create_req["req_id"]})
+        await create
+
+        # Handler tự gửi JOIN_ROOM và chờ response trong task nền được client giữ tham chiếu
+        _, join_req = await stream.wait_requests(2)
+        assert join_req["cmd"] == "JOIN_ROOM" and join_req["data"]["room_id"] == "R1"
+        (handler,) = client._handler_tasks
+        assert not handler.done()
+
+        stream.reply({"cmd": "ERROR", "status": "ERROR", "message": "full", "req_id": join_req["req_id"]})
+        await handler
+        await asyncio.sleep(0)
+        assert client._handler_tasks == set() and client.is_host
+        await client.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_cleanup_stops_pending_handler_tasks():
+    async def scenario():
+        stream = FakeServerStream()
+        client = await connect(stream)
+        stream.reply({"cmd": "ROOM_CREATED", "status": "OK", "data": {"room_id": "R1"}})
+        await stream.wait_requests(1)  # JOIN_ROOM đã gửi, chưa có response
+        (handler,) = client._handler_tasks
+        await client.cleanup()
+        return handler, client
+
+    handler, client = asyncio.run(scenario())
+    assert handler.done() and client._handler_tasks == set()
+
+
+def test_disconnect_returns_none_to_pending_commands():
+    async def scenario():
+        stream = FakeServerStream()
+        client = await connect(stream)
+        pending = [asyncio.create_task(client.send_tcp_command("PING")) for _ in range(2)]
+        await stream.wait_requests(2)
+        stream.reader.feed_eof()  # server đóng kết nối khi lệnh còn đang chờ
+        results = await asyncio.gather(*pending)
+        assert not client.connected and client._pending_commands == {}
+        await client.cleanup()
+        return results
+
+    assert asyncio.run(scenario()) == [None, None]
+
+
+def test_same_name_clients_get_distinct_reliable_ids():
+    async def scenario():
+        clients = []
+        for port in (40001, 40002):
+            client = MonopolyMulticastClient()
+            client.player_name = "Alice"  # hai client trùng tên
+            client.receive_multicast_messages = lambda: asyncio.sleep(0)
+            await client.handle_join_success({"room_id": "R1", "multicast_ip": "239.9.0.1", "port": 0,
+                                              "player_id": f"127.0.0.1:{port}"})
+            assert client.in_room
+            clients.append(client)
+        ids = [(c.reliable.channel.local_id, c.make_packet("ROLL_DICE")["header"]["sender"]) for c in clients]
+        for client in clients:
+            await client.leave_room()
+            assert client.player_id is None
+        return ids
+
+    assert asyncio.run(scenario()) == [("127.0.0.1:40001",) * 2, ("127.0.0.1:40002",) * 2]
@@ -0,0 +1,153 @@
+# tests/test_framing.py
+"""Framing TCP: NDJSON / length-prefixed đọc từ StreamReader, frame bị cắt / gộp / quá lớn, NEGOTIATE_FRAMING."""
+import asyncio
+import json
+
+import pytest
+
+from src.server import main_server
+from src.server.network.framing import FrameTooLargeError, LengthPrefixedFraming, NDJSONFraming
+
+PING = {"cmd": "PING", "req_id": 1}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def read_all(framing, reader, count):
+    return [await framing.read_frame(reader) for _ in range(count)]
+
+
+@pytest.mark.parametrize("framing_cls", [NDJSONFraming, LengthPrefixedFraming])
+def test_frame_split_across_chunks(framing_cls):
+    async def scenario():
+        framing, reader = framing_cls(), asyncio.StreamReader()
+        data = framing.encode(PING)
+        pending = asyncio.ensure_future(framing.read_frame(reader))
+        for i in range(len(data)):  # từng byte một, kể cả giữa header 4 byte
+            reader.feed_data(data[i:i + 1])
+            await asyncio.sleep(0)
+            assert pending.done() == (i == len(data) - 1)
+        return json.loads(pending.result())
+
+    assert run(scenario()) == PING
+
+
+@pytest.mark.parametrize("framing_cls", [NDJSONFraming, LengthPrefixedFraming])
+def test_several_frames_in_one_chunk_then_eof(framing_cls):
+    async def scenario():
+        framing, reader = framing_cls(), asyncio.StreamReader()
+        messages = [{"cmd": "PING", "req_id": i, "data": {"text": "xin chào"}} for i in range(3)]
+        reader.feed_data(b"".join(framing.encode(m) for m in messages))
+        reader.feed_eof()
+        frames = await read_all(framing, reader, 4)
+        return messages, frames
+
+    messages, frames = run(scenario())
+    assert [json.loads(f) for f in frames[:3]] == messages
+    assert frames[3] is None
+
+
+def test_ndjson_partial_line_at_eof_is_last_message():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"cmd": "PING"}')
+        reader.feed_eof()
+        return await read_all(NDJSONFraming(), reader, 2)
+
+    assert run(scenario()) == [b'{"cmd": "PING"}', None]
+
+
+def test_oversize_frames_raise():
+    async def length_prefixed():
+        framing, reader = LengthPrefixedFraming(max_frame_size=16), asyncio.StreamReader()
+        reader.feed_data(framing.HEADER.pack(17) + b"x" * 17)
+        await framing.read_frame(reader)
+
+    async def ndjson():
+        reader = asyncio.StreamReader(limit=16)
+        reader.feed_data(b"x" * 32 + b"\n")
+        await NDJSONFraming().read_frame(reader)
+
+    with pytest.raises(FrameTooLargeError):
+        run(length_prefixed())
+    with pytest.raises(FrameTooLargeError):
+        run(ndjson())
+
+
+def test_length_prefixed_cancel_between_header_and_body_keeps_length():
+    async def scenario():
+        framing, reader = LengthPrefixedFraming(), asyncio.StreamReader()
+        data = framing.encode(PING)
+        reader.feed_data(data[:framing.HEADER.size + 3])  # header + một phần body
+        pending = asyncio.ensure_future(framing.read_frame(reader))
+        await asyncio.sleep(0)
+        pending.cancel()  # vd. asyncio.timeout của vòng đọc hết hạn
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert framing._pending_length == len(data) - framing.HEADER.size
+
+        # Header đã bị tiêu thụ: lần đọc sau chỉ đọc body, không hiểu nhầm body là header
+        reader.feed_data(data[framing.HEADER.size + 3:])
+        frame = await framing.read_frame(reader)
+        assert framing._pending_length is None
+        return frame
+
+    assert json.loads(run(scenario())) == PING
+
+
+class RecordingWriter:
+    """StreamWriter giả: giữ lại mọi byte server ghi ra."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 50000)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.data += chunk
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def test_negotiate_framing_switches_after_reply(monkeypatch, quiet_logger):
+    monkeypatch.setattr(main_server, "logger", quiet_logger)
+    monkeypatch.setattr(main_server, "running", True)
+    ndjson, length_prefixed = NDJSONFraming(), LengthPrefixedFraming()
+
+    async def scenario():
+        reader, writer = asyncio.StreamReader(), RecordingWriter()
+        # Lệnh thương lượng và lệnh tiếp theo (đã ở framing mới) trong cùng một chunk
+        reader.feed_data(ndjson.encode({"cmd": "NEGOTIATE_FRAMING", "data": {"framing": "length_prefixed"},
+                                        "req_id": 1})
+                         + length_prefixed.encode({"cmd": "PING", "req_id": 2}))
+        reader.feed_eof()
+        await asyncio.wait_for(main_server.handle_tcp_client(reader, writer), timeout=1.0)
+
+        # Phản hồi thương lượng vẫn là NDJSON, phản hồi sau đó là length-prefixed
+        out = asyncio.StreamReader()
+        out.feed_data(bytes(writer.data))
+        out.feed_eof()
+        first = json.loads(await ndjson.read_frame(out))
+        second = json.loads(await length_prefixed.read_frame(out))
+        return first, second, await length_prefixed.read_frame(out)
+
+    first, second, rest = run(scenario())
+    assert (first["cmd"], first["req_id"], first["data"]) == ("FRAMING_OK", 1, {"framing": "length_prefixed"})
+    assert (second["cmd"], second["req_id"]) == ("PONG", 2)
+    assert rest is None
+    assert quiet_logger.errors == []
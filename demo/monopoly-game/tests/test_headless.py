@@ -0,0 +1,36 @@
+# tests/test_headless.py
+"""Chế độ headless: ván đấu theo seed tái lập được, không vi phạm bất biến, đi qua các nhánh luật chính."""
+from src.server.game.board import Board
+from src.server.game.headless import HeadlessGame, run_simulation
+from src.server.game.player import Player
+
+
+def test_offer_then_buy_through_board():
+    board = Board(seed=1, room_id="R1")
+    player = Player("p1", "Alice", board.bank, "R1")
+    board.players = [player]
+    event = board.move_player_and_trigger(player, 1)
+    assert event["offer"] == {"property_id": 1, "price": board.get_tile(1).price}
+    assert board.bank.get_owner_id(1) is None          # apply_tile_effect không tự mua
+
+    balance, cash = player.balance, board.bank.cash_pool
+    assert board.handle_buy_property(player, 1)["event"] == "buy_property"
+    assert board.bank.get_owner_id(1) == "p1"
+    assert player.balance == balance - board.get_tile(1).price and board.bank.cash_pool > cash
+
+    event = board.move_player_and_trigger(player, 29)   # ô 30: Go To Jail
+    assert event["event"] == "goto_jail" and player.is_in_jail and player.position == 10
+
+
+def test_seeded_games_are_reproducible_and_clean():
+    first = HeadlessGame(7, ("greedy", "random", "greedy", "random")).play()
+    second = HeadlessGame(7, ("greedy", "random", "greedy", "random")).play()
+    assert first["error"] is None
+    assert (first["turns"], first["winner"], first["paths"]) == (second["turns"], second["winner"], second["paths"])
+
+    report = run_simulation(games=20, workers=0, max_turns=300)
+    assert report["failures"] == []
+    paths = report["paths"]
+    for path in ("land_on_property:buy", "land_on_property:pay_rent", "TAX_PAYMENT", "goto_jail",
+                 "DRAW_CARD:move_to", "jail_fine_paid", "build_house"):
+        assert paths.get(path, 0) > 0, path
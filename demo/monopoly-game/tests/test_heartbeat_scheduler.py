@@ -0,0 +1,172 @@
+# tests/test_heartbeat_scheduler.py
+"""HeartbeatScheduler: hạn rải đều trong tick, bỏ heartbeat thừa khi phòng có traffic, backoff khi nhàn rỗi."""
+import asyncio
+import json
+import socket
+
+from src.server.network.network_manager import NetworkManager
+from src.server.network.packet_builder import PacketBuilder
+from src.server.rooms.heartbeat_scheduler import HeartbeatScheduler
+
+
+def run_until(scheduler, clock, end, step=0.05):
+    while clock.now < end:
+        scheduler.run_due()
+        clock.now = round(clock.now + step, 6)
+
+
+def test_first_beats_spread_across_interval(fake_clock):
+    clock = fake_clock
+    beats = []
+    scheduler = HeartbeatScheduler(5.0, beat=lambda room_id: beats.append((clock.now, room_id)) or 1, clock=clock)
+    for i in range(1000):
+        scheduler.add_room(f"ROOM_{i}")
+
+    run_until(scheduler, clock, 5.0)
+    assert len(beats) == 1000
+    # Không còn cả nghìn phòng phát cùng một tick: mỗi giây của cửa sổ nhận khoảng 1/5 số phòng
+    per_second = [sum(1 for t, _ in beats if s <= t < s + 1) for s in range(5)]
+    assert max(per_second) < 300
+
+
+def test_recent_traffic_suppresses_heartbeat(fake_clock):
+    clock = fake_clock
+    activity = {"busy": None}
+    beats = []
+    scheduler = HeartbeatScheduler(5.0, beat=lambda room_id: beats.append(clock.now) or 4,
+                                   activity=activity.get, clock=clock)
+    scheduler.add_room("busy")
+
+    # Phòng gửi packet mỗi giây → heartbeat không bao giờ cần thiết
+    for second in range(30):
+        activity["busy"] = second + 0.01
+        run_until(scheduler, clock, second + 1)
+    assert beats == []
+    assert scheduler.stats["suppressed"] > 0
+
+    # Hết traffic: heartbeat quay lại trong vòng một interval
+    run_until(scheduler, clock, 36)
+    assert beats and beats[0] <= 29 + 5.0 + 0.1
+
+
+def test_idle_and_empty_rooms_back_off(fake_clock):
+    clock = fake_clock
+    beats = {"idle": [], "empty": []}
+    listeners = {"idle": 3, "empty": 0}
+    scheduler = HeartbeatScheduler(5.0, beat=lambda room_id: beats[room_id].append(clock.now) or listeners[room_id],
+                                   max_backoff=8, clock=clock)
+    scheduler.add_room("idle")
+    scheduler.add_room("empty")
+
+    run_until(scheduler, clock, 200)
+    gaps = [b - a for a, b in zip(beats["idle"], beats["idle"][1:])]
+    assert [round(g) for g in gaps[:3]] == [10, 20, 40]
+    assert max(gaps) <= 40 + 0.1
+    # Phòng trống nhảy thẳng lên interval tối đa
+    assert all(round(b - a) == 40 for a, b in zip(beats["empty"], beats["empty"][1:]))
+
+    scheduler.remove_room("idle")
+    count = len(beats["idle"])
+    run_until(scheduler, clock, 300)
+    assert len(beats["idle"]) == count
+
+
+def test_failed_beat_is_not_counted_and_retried(fake_clock, quiet_logger):
+    calls = []
+
+    def beat(room_id):
+        calls.append(fake_clock.now)
+        raise AttributeError("boom")
+
+    scheduler = HeartbeatScheduler(5.0, beat=beat, clock=fake_clock, logger=quiet_logger)
+    scheduler.add_room("R")
+    run_until(scheduler, fake_clock, 20)
+    assert scheduler.stats["sent"] == 0 and scheduler.stats["backed_off"] == 0
+    assert scheduler.stats["errors"] == len(calls) == len(quiet_logger.errors) >= 3
+    # Không backoff trên heartbeat chưa từng gửi: thử lại đúng sau mỗi interval
+    assert all(abs(b - a - 5.0) <= 0.1 for a, b in zip(calls, calls[1:]))
+
+
+def test_send_heartbeat_for_real_room_with_players(monkeypatch, quiet_logger):
+    from src.server import main_server
+
+    monkeypatch.setattr(main_server, "logger", quiet_logger)
+    for name in ("room_manager", "network_manager", "heartbeats"):
+        monkeypatch.setattr(main_server, name, None)
+    monkeypatch.setitem(main_server.SERVER_CONFIG, "multicast_interface", "127.0.0.1")
+    monkeypatch.setitem(main_server.SERVER_CONFIG, "multicast_range", "239.6.0.0/24")
+
+    async def scenario():
+        await main_server.initialize_system()
+        network = main_server.network_manager
+        try:
+            await main_server.room_manager.add_player("ROOM_01", "10.0.0.1:5000", "Alice")
+            sent = []
+            send_packet = network.send_packet
+            monkeypatch.setattr(network, "send_packet",
+                                lambda room_id, packet, **kw: sent.append((room_id, packet)) or send_packet(room_id, packet, **kw))
+
+            players = main_server.room_manager.rooms["ROOM_01"]["state"].players
+            assert main_server.send_heartbeat("ROOM_01") == len(players) == 2
+            room_id, packet = sent[-1]
+            assert room_id == "ROOM_01" and packet["command"]["action"] == "HEARTBEAT"
+            assert packet["payload"]["players"] == [p.serialize() for p in players]
+            assert main_server.send_heartbeat("NO_SUCH_ROOM") == 0
+
+            # Qua scheduler: mọi phòng của server đều thật sự được gửi, không có lỗi nào bị nuốt
+            scheduler = main_server.heartbeats
+            scheduler.run_due(now=scheduler.clock() + 2 * main_server.SERVER_CONFIG["tick_rate"])
+            assert scheduler.stats["sent"] == len(main_server.room_manager.rooms)
+            assert scheduler.stats["errors"] == 0 and quiet_logger.errors == []
+        finally:
+            network.multicast.close_all_multicast_groups()
+
+    asyncio.run(scenario())
+
+
+def test_own_heartbeat_echo_does_not_count_as_room_traffic(quiet_logger):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.6.1.0/24")
+        group = network.multicast.create_group("IDLE")
+        echoes = []
+
+        async def on_packet(packet):
+            echoes.append(packet)
+
+        network.register_listener("on_packet", on_packet)
+        listener = asyncio.create_task(network.listen_loop())
+
+        def beat(room_id):
+            network.send_packet(room_id, PacketBuilder.heartbeat(room_id, [], 1))
+            return 1
+
+        scheduler = HeartbeatScheduler(0.1, beat=beat, activity=network.multicast.last_activity, max_backoff=8)
+        scheduler.add_room("IDLE")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 1.6
+        while loop.time() < deadline:
+            await asyncio.sleep(min(scheduler.run_due(), 0.05))
+        timer = scheduler.rooms["IDLE"]
+
+        # Heartbeat vọng lại socket của phòng (IP_MULTICAST_LOOP) nhưng phòng vẫn backoff: 0.1 → 0.2 → 0.4 → 0.8
+        assert echoes and all(p["command"]["action"] == "HEARTBEAT" for p in echoes)
+        assert timer.level == 3 and scheduler.stats["sent"] <= 5 and scheduler.stats["suppressed"] == 0
+
+        # Packet từ client thì vẫn là traffic: phòng về interval gốc
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton("127.0.0.1"))
+        client.sendto(json.dumps({"header": {"sender": "p1", "type": "COMMAND"}}).encode(), (group["ip"], group["port"]))
+        for _ in range(100):
+            if network.multicast.last_activity("IDLE") > timer.last_beat:
+                break
+            await asyncio.sleep(0.01)
+        scheduler.run_due(now=timer.due)
+        assert timer.level == 0
+
+        client.close()
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        network.multicast.close_all_multicast_groups()
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
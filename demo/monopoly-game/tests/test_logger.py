@@ -0,0 +1,82 @@
+# tests/test_logger.py
+"""Logger: ngưỡng cấp độ và xoay vòng file theo kích thước (cả file JSON lẫn TXT)."""
+import json
+
+import pytest
+
+from src.server.utils.logger import Logger
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Logger, "LOG_DIR", str(tmp_path))
+    return tmp_path
+
+
+def read_messages(path):
+    return [json.loads(line)["message"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_level_threshold_filters_records(log_dir):
+    logger = Logger("threshold", level="WARNING", console=False)
+    logger.debug("debug")
+    logger.info("info")
+    logger.success("success")
+    logger.warning("warning %s", 1)
+    logger.error("error")
+    logger.flush()
+    assert read_messages(log_dir / "threshold.log.json") == ["warning 1", "error"]
+
+    logger.set_level("DEBUG")
+    assert logger.is_enabled("DEBUG")
+    logger.debug("debug again")
+    logger.flush()
+    assert read_messages(log_dir / "threshold.log.json")[-1] == "debug again"
+
+
+def test_rotation_bounds_json_and_txt_files(log_dir):
+    max_bytes = 2000
+    logger = Logger("rotate", console=False, max_bytes=max_bytes, backup_count=2)
+    for i in range(200):
+        # extra chỉ nằm trong file JSON → file JSON lớn hơn nhiều so với TXT
+        logger.info("message %s", i, payload="x" * 40)
+    logger.flush()
+
+    for name in ("rotate.log.json", "rotate.log.txt"):
+        current = log_dir / name
+        backups = [log_dir / f"{name}.{i}" for i in (1, 2)]
+        assert current.exists() and all(b.exists() for b in backups)
+        assert not (log_dir / f"{name}.3").exists()  # backup_count = 2
+        # Một record có thể vượt ngưỡng trước khi xoay vòng, nhưng không nhiều hơn thế
+        for path in [current] + backups:
+            assert path.stat().st_size < max_bytes + 200
+
+    # Record mới nhất nằm trong file hiện tại, thứ tự giữ nguyên qua các file
+    messages = read_messages(log_dir / "rotate.log.json.1") + read_messages(log_dir / "rotate.log.json")
+    assert messages[-1] == "message 199"
+    assert messages == [f"message {i}" for i in range(200 - len(messages), 200)]
+
+
+class Unprintable:
+    def __str__(self):
+        raise RuntimeError("dictionary changed size during iteration")
+
+    __repr__ = __str__
+
+
+def test_message_formatted_at_call_time_and_bad_records_are_isolated(log_dir):
+    logger = Logger("snapshot", console=False)
+    state = {"players": ["p1"]}
+    logger.info("state %s", state)
+    state["players"].append("p2")  # caller sửa object ngay sau lời gọi log
+    logger.info("bad args %s", Unprintable())
+    logger.info("bad extra", payload=Unprintable())
+    logger.info("after")
+    logger.flush()
+
+    messages = read_messages(log_dir / "snapshot.log.json")
+    assert messages[0] == "state {'players': ['p1']}"
+    assert messages[1].startswith("bad args %s [format error:")
+    assert messages[2:] == ["bad extra", "after"]  # record lỗi không kéo theo cả lô của logger
+    lines = (log_dir / "snapshot.log.json").read_text(encoding="utf-8").splitlines()
+    assert "extra_error" in json.loads(lines[2])
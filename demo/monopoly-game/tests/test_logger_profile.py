@@ -0,0 +1,83 @@
+# tests/test_logger_profile.py
+"""
+Profiling Logger.debug trên hot path (mỗi packet gửi/nhận).
+- DEBUG tắt: không lấy frame, không format message (kể cả lambda / %-args).
+- capture_caller chỉ bật khi được yêu cầu và dùng sys._getframe thay cho inspect.stack().
+In chi phí trung bình mỗi lần gọi (chạy với `pytest -s` để xem bảng).
+"""
+import inspect
+import time
+
+import pytest
+
+from src.server.utils.logger import Logger
+
+CALLS = 20_000
+LEGACY_CALLS = 200  # inspect.stack() rất chậm, chỉ cần vài trăm lần để ước lượng
+
+
+class ExplodingStr:
+    """Đối số không được phép bị format khi DEBUG tắt."""
+
+    def __str__(self):
+        raise AssertionError("message was formatted although DEBUG is disabled")
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Logger, "LOG_DIR", str(tmp_path))
+    return tmp_path
+
+
+def per_call_ns(fn, calls: int = CALLS) -> float:
+    started = time.perf_counter_ns()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter_ns() - started) / calls
+
+
+def test_disabled_debug_is_not_formatted(log_dir):
+    logger = Logger("profile_disabled", level="INFO", console=False, capture_caller=True)
+
+    def must_not_run():
+        raise AssertionError("lazy message evaluated although DEBUG is disabled")
+
+    logger.debug(must_not_run)
+    logger.debug("value=%s", ExplodingStr())
+    logger.flush()
+    assert (log_dir / "profile_disabled.log.txt").exists() is False
+
+
+def test_caller_capture_is_opt_in(log_dir):
+    plain = Logger("profile_plain", console=False)
+    traced = Logger("profile_traced", console=False, capture_caller=True)
+
+    plain.debug("packet %s", 1)
+    traced.debug(lambda: "packet 2")
+    plain.flush()
+
+    assert (log_dir / "profile_plain.log.txt").read_text(encoding="utf-8").strip().endswith("packet 1")
+    traced_line = (log_dir / "profile_traced.log.txt").read_text(encoding="utf-8")
+    assert "packet 2 (Thread: MainThread, Func: test_caller_capture_is_opt_in)" in traced_line
+
+
+def test_debug_per_call_cost(log_dir):
+    disabled = Logger("profile_cost_off", level="INFO", console=False)
+    enabled = Logger("profile_cost_on", console=False)
+    traced = Logger("profile_cost_traced", console=False, capture_caller=True)
+
+    costs = {
+        "legacy inspect.stack()[1]": per_call_ns(lambda i: inspect.stack()[1].function, LEGACY_CALLS),
+        "debug disabled": per_call_ns(lambda i: disabled.debug("packet %s sent", i)),
+        "debug enabled (%-args)": per_call_ns(lambda i: enabled.debug("packet %s sent", i)),
+        "debug enabled + caller": per_call_ns(lambda i: traced.debug("packet %s sent", i)),
+    }
+    enabled.flush(timeout=60)
+
+    print()
+    for name, cost in costs.items():
+        print(f"{name:<28} {cost / 1000:>8.2f} µs/call")
+
+    # Bỏ qua hoàn toàn khi tắt: rẻ hơn rất nhiều so với việc dựng toàn bộ stack
+    assert costs["debug disabled"] * 20 < costs["legacy inspect.stack()[1]"]
+    assert costs["debug enabled + caller"] * 5 < costs["legacy inspect.stack()[1]"]
@@ -0,0 +1,82 @@
+# tests/test_multicast_allocator.py
+"""MulticastAllocator: cấp / trả O(1), dải IP cấu hình được, lease hết hạn thu hồi phòng chết."""
+import asyncio
+
+import pytest
+
+from src.server.network.multicast_allocator import AddressExhausted, MulticastAllocator, parse_ip_ranges
+from src.server.network.multiplecast_manager import MulticastManager
+from src.server.network.network_manager import NetworkManager
+from src.server.rooms.room_manager import RoomManager
+
+
+def test_allocate_release_and_exhaustion():
+    alloc = MulticastAllocator("239.0.0.0/30", base_port=6000, port_count=2)
+    assert alloc.capacity == 3 * 2
+    leases = [alloc.allocate(f"r{i}") for i in range(alloc.capacity)]
+    assert [(l.ip, l.port) for l in leases[:3]] == [("239.0.0.1", 6000), ("239.0.0.1", 6001), ("239.0.0.2", 6000)]
+    assert len({(l.ip, l.port) for l in leases}) == alloc.capacity
+    with pytest.raises(AddressExhausted):
+        alloc.allocate("full")
+
+    assert alloc.release(leases[2]) and not alloc.release(leases[2])
+    alloc.release(leases[0])
+    # Slot trả về được dùng lại theo thứ tự FIFO
+    assert (alloc.allocate("a").ip, alloc.allocate("b").ip) == ("239.0.0.2", "239.0.0.1")
+
+
+def test_ip_ranges_beyond_one_slash24():
+    assert parse_ip_ranges("239.0.0.0") == [(0xEF000001, 253)]
+    alloc = MulticastAllocator(["239.1.0.0/16", "239.9.9.0/24"], port_count=1)
+    assert alloc.ip_count == 65535 + 255
+    assert alloc.address_of(65535 - 1) == ("239.1.255.255", 5000)
+    assert alloc.address_of(65535) == ("239.9.9.1", 5000)
+    with pytest.raises(ValueError):
+        parse_ip_ranges("10.0.0.0/8")
+
+
+def test_expired_lease_reclaims_group_of_dead_room(quiet_logger, fake_clock):
+    clock = fake_clock
+    manager = MulticastManager(quiet_logger, base_ip="239.0.0.0", lease_ttl=30.0)
+    manager.allocator.clock = clock
+    manager.create_group("alive")
+    manager.create_group("dead")
+
+    for _ in range(3):
+        clock.now += 20.0
+        manager.renew_lease("alive")
+        manager.reap_expired()
+
+    assert set(manager.groups) == {"alive"}
+    assert manager.allocator.stats["expired"] == 1
+    manager.remove_group("alive")
+    assert manager.allocator.in_use == 0
+
+
+def test_expired_lease_removes_room_from_room_manager(quiet_logger, fake_clock):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.0.1.0/24",
+                                 multicast_lease_ttl=30.0)
+        network.multicast.allocator.clock = fake_clock
+        rooms = RoomManager(network, quiet_logger)
+        await rooms.create_room("DEAD", host_id="p1")
+        await rooms.create_room("ALIVE", host_id="p2")
+
+        fake_clock.now += 40.0
+        network.multicast.renew_lease("ALIVE")
+        network.multicast.reap_expired()
+        assert "DEAD" not in network.multicast.groups
+        # Trong lúc chờ remove_room chạy, join vào phòng vừa mất group không được ném KeyError
+        assert await rooms.add_player("DEAD", "p3", "Carol") == {"error": "Room not found"}
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert set(rooms.rooms) == {"ALIVE"} and set(rooms.actors) == {"ALIVE"}
+        assert await rooms.create_room("DEAD", host_id="p1")  # tạo lại được với group mới
+        assert (await rooms.add_player("DEAD", "p3", "Carol"))["room_id"] == "DEAD"
+        for room_id in list(rooms.rooms):
+            await rooms.remove_room(room_id)
+        assert network.multicast.allocator.in_use == 0
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
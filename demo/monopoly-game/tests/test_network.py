@@ -1 +1,69 @@
- 
+# tests/test_network.py
+"""NetworkManager.listen_loop: socket phòng đăng ký với event loop, phòng im lặng không chặn phòng bận."""
+import asyncio
+import json
+import socket
+
+from src.server.network.network_manager import NetworkManager
+
+
+def make_sender():
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton("127.0.0.1"))
+    return sender
+
+
+async def wait_until(predicate, timeout=1.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+def test_silent_room_does_not_block_busy_room(quiet_logger):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.8.0.0/24")
+        multicast = network.multicast
+        busy = multicast.create_group("BUSY")  # tạo trước listen_loop → được gắn lúc khởi động
+        received = []
+
+        async def on_packet(packet):
+            received.append((packet["room_id"], packet["data"]["n"]))
+
+        network.register_listener("on_packet", on_packet)
+        listener = asyncio.create_task(network.listen_loop())
+        await asyncio.sleep(0.02)
+        multicast.create_group("SILENT")  # tạo sau → gắn qua watcher on_group_created
+        late = multicast.create_group("LATE")
+        assert set(network._readers) == {"BUSY", "SILENT", "LATE"}
+
+        sender = make_sender()
+        total = NetworkManager.RECV_BATCH * 2  # nhiều hơn một lượt đọc của socket
+        for n in range(total):
+            sender.sendto(json.dumps({"data": {"n": n}}).encode(), (busy["ip"], busy["port"]))
+        assert await wait_until(lambda: len(received) == total)
+        # SILENT không gửi gì mà BUSY vẫn nhận đủ, đúng thứ tự
+        assert received == [("BUSY", n) for n in range(total)]
+
+        sender.sendto(json.dumps({"data": {"n": -1}}).encode(), (late["ip"], late["port"]))
+        assert await wait_until(lambda: len(received) == total + 1)
+        assert received[-1] == ("LATE", -1)
+
+        # Xóa group → reader được gỡ trước khi socket đóng; datagram tới group cũ không còn được phát
+        multicast.remove_group("BUSY")
+        assert set(network._readers) == {"SILENT", "LATE"}
+        sender.sendto(json.dumps({"data": {"n": -2}}).encode(), (busy["ip"], busy["port"]))
+        await asyncio.sleep(0.05)
+        assert len(received) == total + 1
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        assert network._readers == {} and not network._listening
+        multicast.create_group("AFTER")  # loop đã dừng → không gắn reader nữa
+        assert network._readers == {}
+        sender.close()
+        multicast.close_all_multicast_groups()
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
@@ -0,0 +1,42 @@
+# tests/test_packet_builder.py
+"""PacketBuilder: packet_id tăng dần theo phòng, timestamp mili giây, bytes ghép từ template == json.dumps."""
+import json
+
+from src.server.network.packet_builder import PacketBuilder, now_ms
+from src.shared import wire_codec
+
+
+def test_ids_are_per_room_counters_and_timestamps_are_epoch_ms():
+    PacketBuilder.reset_room("R1")
+    PacketBuilder.reset_room("R2")
+    before = now_ms()
+    first = PacketBuilder.player_move("R1", "p1", 5, (2, 3))
+    second = PacketBuilder.update_balance("R1", "p1", 1400)
+    other = PacketBuilder.next_turn("R2", "p2")
+
+    assert (first["packet_id"], second["packet_id"], other["packet_id"]) == (1, 2, 1)
+    assert before <= first["timestamp"] <= now_ms()
+    PacketBuilder.reset_room("R1")
+    assert PacketBuilder.start_game("R1", "p1")["packet_id"] == 1
+
+
+def test_template_bytes_match_json_dumps():
+    codec = wire_codec.make_codec(wire_codec.JSON, "R1", 1)
+    packets = [
+        PacketBuilder.player_move("R1", "p1", 5, (2, 3)),
+        PacketBuilder.pay_rent("R1", "p1", "p2", 50, 'Trả "tiền" thuê'),
+        PacketBuilder.info_message("R1", None, "xin chào"),
+        PacketBuilder.build("custom", {"nested": {"a": [1, 2.5, None]}}, "R1"),
+    ]
+    for packet in packets:
+        assert codec.encode(packet) == json.dumps(packet).encode("utf-8")
+
+    # Sửa phần tĩnh sau khi tạo → mã hóa lại toàn bộ, không dùng template cũ
+    changed = PacketBuilder.player_move("R1", "p1", 5, (2, 3))
+    changed["sender_id"] = "p9"
+    changed["extra"] = True
+    assert json.loads(codec.encode(changed)) == json.loads(json.dumps(changed))
+    # Payload được ghép lúc gửi nên sửa payload vẫn dùng template
+    changed = PacketBuilder.update_balance("R1", "p1", 1400)
+    changed["payload"]["balance"] = 10
+    assert json.loads(codec.encode(changed))["payload"] == {"balance": 10}
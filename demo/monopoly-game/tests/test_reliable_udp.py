@@ -0,0 +1,143 @@
+# tests/test_reliable_udp.py
+"""
+Reliable UDP trên mạng multicast giả lập: đồng hồ ảo, mất gói / lặp gói / đảo thứ tự có seed.
+LossyNetwork là harness dùng chung: mỗi packet phát ra được JSON hóa (như trên dây) rồi giao
+cho mọi endpoint khác trong group với xác suất mất `loss`, trễ ngẫu nhiên trong [delay, delay + jitter].
+"""
+import heapq
+import json
+import random
+
+from src.shared.reliable_udp import ReliableChannel, is_transport_packet
+
+
+class LossyNetwork:
+    def __init__(self, loss=0.0, duplicate=0.0, delay=0.005, jitter=0.0, seed=0):
+        self.now = 0.0
+        self.loss = loss
+        self.duplicate = duplicate
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.channels = {}
+        self.inbox = {}
+        self.queue = []  # heap (thời điểm đến, thứ tự, đích, bytes)
+        self._order = 0
+        self.datagrams = 0
+
+    def clock(self):
+        return self.now
+
+    def join(self, name, **kwargs):
+        channel = ReliableChannel(name, clock=self.clock, **kwargs)
+        self.channels[name] = channel
+        self.inbox[name] = []
+        return channel
+
+    def transmit(self, src, packet):
+        data = json.dumps(packet).encode("utf-8")
+        self.datagrams += 1
+        for dst in self.channels:
+            if dst == src or self.rng.random() < self.loss:
+                continue
+            copies = 2 if self.rng.random() < self.duplicate else 1
+            for _ in range(copies):
+                arrival = self.now + self.delay + self.rng.random() * self.jitter
+                self._order += 1
+                heapq.heappush(self.queue, (arrival, self._order, dst, data))
+
+    def send(self, src, packet, reliable=True):
+        out = self.channels[src].send(packet, reliable)
+        if out is not None:
+            self.transmit(src, out)
+
+    def run(self, until=60.0):
+        """Chạy mô phỏng tới khi không còn gói trên dây và không còn timer nào (hoặc hết giờ)."""
+        while self.now < until:
+            timers = [(c.next_timeout(), name) for name, c in self.channels.items() if c.next_timeout() is not None]
+            next_timer = min(timers)[0] if timers else None
+            next_packet = self.queue[0][0] if self.queue else None
+            if next_timer is None and next_packet is None:
+                return
+            if next_packet is not None and (next_timer is None or next_packet <= next_timer):
+                self.now, _, dst, data = heapq.heappop(self.queue)
+                self.inbox[dst].extend(self.channels[dst].receive(json.loads(data)))
+            else:
+                self.now = max(self.now, next_timer)
+            for name, channel in self.channels.items():
+                for packet in channel.poll():
+                    self.transmit(name, packet)
+
+
+def command(i):
+    return {"header": {"sender": "alice", "type": "COMMAND"}, "command": {"action": "roll_dice"}, "payload": {"i": i}}
+
+
+def test_reliable_packets_arrive_once_and_in_order_under_loss():
+    net = LossyNetwork(loss=0.3, duplicate=0.1, delay=0.01, jitter=0.02, seed=7)
+    alice = net.join("alice")
+    for name in ("bob", "server"):
+        net.join(name)
+        alice.add_peer(name)
+
+    for i in range(200):
+        net.send("alice", command(i))
+        net.now += 0.002
+    net.run()
+
+    for name in ("bob", "server"):
+        assert [p["payload"]["i"] for p in net.inbox[name]] == list(range(200))
+    assert not alice.pending
+    assert alice.stats["retransmits"] > 0
+    assert net.channels["bob"].stats["duplicates"] > 0
+    assert alice.stats["peers_lost"] == 0
+
+
+def test_unreliable_packets_are_untouched_and_never_retransmitted():
+    net = LossyNetwork(loss=0.5, seed=1)
+    alice, bob = net.join("alice"), net.join("bob")
+    heartbeat = {"header": {"sender": "alice", "type": "STATE"}, "command": {"action": "HEARTBEAT"}}
+
+    assert alice.send(heartbeat) is heartbeat
+    assert not is_transport_packet(heartbeat)
+    for _ in range(100):
+        net.send("alice", heartbeat, reliable=False)
+    net.run()
+
+    assert net.datagrams == 100
+    assert 20 < len(net.inbox["bob"]) < 80
+    assert all(p == heartbeat for p in net.inbox["bob"])
+    assert not alice.pending and not bob.incoming
+
+
+def test_rto_tracks_measured_rtt():
+    net = LossyNetwork(delay=0.05, seed=2)
+    alice = net.join("alice", initial_rto=1.0)
+    net.join("bob", ack_delay=0.0)
+    alice.add_peer("bob")
+
+    for i in range(50):
+        net.send("alice", command(i))
+        net.run()
+
+    assert abs(alice.rtt.srtt - 0.1) < 0.005  # 2 × trễ một chiều
+    assert alice.rtt.rto < 0.2
+    assert alice.stats["retransmits"] == 0
+
+
+def test_silent_peer_is_dropped_after_max_retries():
+    net = LossyNetwork(seed=3)
+    alice = net.join("alice", max_retries=4)
+    net.join("bob")
+    alice.add_peer("bob")
+    alice.add_peer("ghost")  # đã rời phòng nhưng chưa được báo
+    lost = []
+    alice.on_peer_lost = lost.append
+
+    net.send("alice", command(0))
+    net.run()
+
+    assert lost == ["ghost"]
+    assert alice.peers == {"bob"}
+    assert not alice.pending
+    assert [p["payload"]["i"] for p in net.inbox["bob"]] == [0]
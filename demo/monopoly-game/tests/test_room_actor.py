@@ -0,0 +1,164 @@
+# tests/test_room_actor.py
+"""RoomActor: tuần tự trong phòng, song song giữa phòng, inbox giới hạn với drop / backpressure, metrics."""
+import asyncio
+import json
+import socket
+
+import pytest
+
+from src.server.network.network_manager import NetworkManager
+from src.server.rooms.room_actor import RoomActor
+from src.server.rooms.room_manager import RoomManager
+
+
+def test_actions_serialized_per_room_and_rooms_run_concurrently():
+    async def scenario():
+        log = []
+
+        async def slow(item):
+            log.append(("slow", item, "start"))
+            await asyncio.sleep(0.05)
+            log.append(("slow", item, "end"))
+
+        async def fast(item):
+            log.append(("fast", item))
+
+        slow_room, fast_room = RoomActor("SLOW", slow), RoomActor("FAST", fast)
+        for i in range(3):
+            slow_room.submit(i)
+        for i in range(3):
+            fast_room.submit(i)
+        await asyncio.sleep(0.01)
+        # Phòng nhanh xong hết trong khi phòng chậm vẫn đang ở hành động đầu tiên
+        assert [e for e in log if e[0] == "fast"] == [("fast", 0), ("fast", 1), ("fast", 2)]
+        assert log.count(("slow", 0, "start")) == 1 and ("slow", 0, "end") not in log
+
+        await slow_room.close(drain=True)
+        await fast_room.close()
+        slow_events = [e[1:] for e in log if e[0] == "slow"]
+        assert slow_events == [(i, step) for i in range(3) for step in ("start", "end")]
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_newest", [0, 1]), ("drop_oldest", [2, 3])])
+def test_overflow_drop_policies(policy, kept):
+    async def scenario():
+        handled = []
+
+        async def handler(item):
+            handled.append(item)
+
+        actor = RoomActor("R", handler, maxsize=2, policy=policy)
+        accepted = [actor.submit(i) for i in range(4)]  # chưa nhường loop: inbox đầy ở item thứ 3
+        await actor.close(drain=True)
+        assert handled == kept
+        assert actor.stats["dropped"] == 2
+        assert accepted == ([True, True, False, False] if policy == "drop_newest" else [True] * 4)
+
+    asyncio.run(scenario())
+
+
+def test_block_policy_applies_backpressure_and_reports_metrics():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def handler(item):
+            await release.wait()
+
+        actor = RoomActor("R", handler, maxsize=1, policy="block")
+        await actor.put("a")
+        await asyncio.sleep(0)     # "a" đang được xử lý, inbox trống
+        await actor.put("b")       # inbox đầy
+        producer = asyncio.ensure_future(actor.put("c"))
+        await asyncio.sleep(0.01)
+        assert not producer.done() and actor.depth == 1
+
+        release.set()
+        assert await producer
+        await actor.close(drain=True)
+        metrics = actor.metrics()
+        assert metrics["processed"] == 3 and metrics["dropped"] == 0
+        assert metrics["max_depth"] == 1 and metrics["depth"] == 0
+        assert metrics["queue_wait"]["max_ms"] >= 10
+
+    asyncio.run(scenario())
+
+
+def test_remove_room_cancels_running_action_before_teardown(quiet_logger):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.7.0.0/24")
+        rooms = RoomManager(network, quiet_logger)
+        await rooms.create_room("R", host_id="p1")
+        seen = {}
+
+        async def slow_action(room_id, player_id, action):
+            seen["started"] = True
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                # Lúc bị hủy, phòng và group vẫn còn nguyên: teardown chỉ chạy sau khi actor dừng
+                seen["room_alive"] = room_id in rooms.rooms and room_id in network.multicast.groups
+                raise
+            rooms.rooms[room_id]  # không được tới đây
+
+        rooms.handle_action = slow_action
+        await rooms.handle_network_packet({"room_id": "R", "data": {"player_id": "p1", "action": "roll_dice"}})
+        await rooms.handle_network_packet({"room_id": "R", "data": {"player_id": "p1", "action": "end_turn"}})
+        await asyncio.sleep(0.01)
+        actor = rooms.actors["R"]
+
+        assert await rooms.remove_room("R")
+        assert seen == {"started": True, "room_alive": True}
+        assert "R" not in rooms.rooms and "R" not in rooms.actors and "R" not in network.multicast.groups
+        assert actor.closed and actor.stats["dropped"] == 1 and actor.stats["errors"] == 0
+        assert not await rooms.remove_room("R")
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
+
+
+def test_block_policy_backpressure_reaches_udp_sockets(quiet_logger):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.7.1.0/24",
+                                 inbox_limit=8)
+        rooms = RoomManager(network, quiet_logger, inbox_size=2, inbox_policy="block")
+        await rooms.create_room("R", host_id="p1")
+        group = network.multicast.groups["R"]
+        release, handled = asyncio.Event(), []
+
+        async def slow_action(room_id, player_id, action):
+            await release.wait()
+            handled.append(action)
+
+        rooms.handle_action = slow_action
+        listener = asyncio.create_task(network.listen_loop())
+        await asyncio.sleep(0.02)
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton("127.0.0.1"))
+        total = 100
+        for n in range(1, total + 1):
+            sender.sendto(json.dumps({"data": {"player_id": "p1", "action": n}}).encode(), (group["ip"], group["port"]))
+        await asyncio.sleep(0.1)
+
+        # Actor đầy → dispatch chờ → hàng đợi nhận chạm inbox_limit → socket ngừng được đọc,
+        # phần còn lại nằm trong buffer kernel thay vì dồn vào bộ nhớ của server
+        assert network.inbox_pauses >= 1 and network._paused
+        assert network._inbox.qsize() <= network.inbox_limit
+        assert rooms.actors["R"].stats["dropped"] == 0
+
+        release.set()
+        for _ in range(200):
+            if len(handled) == total:
+                break
+            await asyncio.sleep(0.01)
+        assert handled == list(range(1, total + 1)) and not network._paused
+
+        sender.close()
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await rooms.remove_room("R")
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
@@ -0,0 +1,41 @@
+# tests/test_room_store.py
+"""Object game dùng __slots__, trạng thái nóng nằm trong RoomStore mà API object cũ vẫn giữ nguyên."""
+import pytest
+
+from src.server.game.board import Board
+from src.server.game.player import Player
+
+
+def test_models_have_no_instance_dict():
+    board = Board()
+    player = Player("p1", "Alice", board.bank, "R1")
+    for obj in (board, board.bank, player, board.get_tile(1), board.get_tile(1).properties, board.get_tile(0)):
+        assert not hasattr(obj, "__dict__"), type(obj).__name__
+    with pytest.raises(AttributeError):
+        player.nickname = "A"
+
+
+def test_object_api_reads_and_writes_store():
+    board = Board()
+    store = board.store
+    alice = Player("p1", "Alice", board.bank, "R1")
+    bob = Player("p2", "Bob", board.bank, "R1")
+
+    alice.position = 24
+    assert store.positions[alice.slot] == 24 and bob.position == 0
+    board.bank.pay_player(bob, 200)
+    assert bob.balance == 1700 == store.balances[bob.slot] == board.bank.player_balances["p2"]
+
+    tile = board.get_tile(39)
+    board.bank.set_property_owner(39, "p1")
+    assert tile.owner == "p1" == store.owners[39]
+    tile.properties.houses = 2
+    tile.properties.has_hotel = True
+    tile.properties.is_mortgaged = True
+    assert store.houses[39] == 2 and tile.properties.has_hotel and tile.properties.is_mortgaged
+    tile.properties.is_mortgaged = False
+    assert tile.properties.has_hotel and not tile.properties.is_mortgaged
+
+    board.bank.reset_property_owner("p1")
+    assert tile.owner is None and store.owners[39] is None
+    assert Board().get_tile(39).properties.houses == 0
@@ -0,0 +1,83 @@
+# tests/test_send_batch.py
+"""DatagramBatcher: datagram gom theo socket, xả một lần mỗi vòng loop, không mất / đảo thứ tự."""
+import asyncio
+import socket
+
+import pytest
+
+from src.server.network.send_batch import DatagramBatcher, _sendmmsg
+
+MODES = [False] + ([True] if _sendmmsg is not None else [])
+
+
+def receivers(count):
+    socks = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(1.0)
+        socks.append(sock)
+    return socks
+
+
+@pytest.mark.parametrize("use_sendmmsg", MODES)
+def test_fan_out_is_flushed_once_per_loop_iteration(use_sendmmsg):
+    sinks = receivers(8)
+    addrs = [s.getsockname() for s in sinks]
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    batcher = DatagramBatcher(use_sendmmsg=use_sendmmsg)
+
+    async def tick():
+        batcher.queue_many(sender, b"turn", addrs)
+        for i, addr in enumerate(addrs):
+            batcher.queue(sender, b"private-%d" % i, addr)
+        assert batcher.stats["datagrams"] == 0  # chưa gửi trong vòng loop hiện tại
+        await asyncio.sleep(0)
+
+    asyncio.run(tick())
+    assert batcher.stats["datagrams"] == 16 and batcher.stats["flushes"] == 1
+    assert batcher.stats["syscalls"] == (1 if use_sendmmsg else 16)
+    for i, sink in enumerate(sinks):
+        assert [sink.recv(64), sink.recv(64)] == [b"turn", b"private-%d" % i]
+        sink.close()
+    sender.close()
+
+
+def test_without_running_loop_sends_immediately():
+    sink, = receivers(1)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    batcher = DatagramBatcher()
+    batcher.queue(sender, b"now", sink.getsockname())
+    assert sink.recv(64) == b"now"
+    sender.close()
+    # socket đã đóng: datagram còn chờ bị bỏ, không ném lỗi
+    batcher.queues[sender] = [(b"late", sink.getsockname())]
+    batcher.flush()
+    assert batcher.stats["dropped"] == 1
+    sink.close()
+
+
+@pytest.mark.parametrize("use_sendmmsg", MODES)
+def test_bad_destination_only_drops_its_own_datagram(use_sendmmsg):
+    sinks = receivers(2)
+    first, other = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
+    batcher = DatagramBatcher(use_sendmmsg=use_sendmmsg)
+    port = sinks[0].getsockname()[1]
+
+    async def tick():
+        batcher.queue(first, b"bad-port", ("127.0.0.1", 70000))   # không dựng được sockaddr
+        batcher.queue(first, b"by-name", ("localhost", port))     # tên host: đường sendto tự phân giải
+        batcher.queue(first, b"numeric", ("127.0.0.1", port))
+        batcher.queue(other, b"other", sinks[1].getsockname())     # socket khác trong cùng lô
+        await asyncio.sleep(0)
+
+    asyncio.run(tick())
+    assert batcher.stats["dropped"] == 1 and batcher.stats["datagrams"] == 3
+    assert sorted([sinks[0].recv(64), sinks[0].recv(64)]) == [b"by-name", b"numeric"]
+    assert sinks[1].recv(64) == b"other"
+    for sock in sinks + [first, other]:
+        sock.close()
+
+
+def test_sendto_is_the_default():
+    assert DatagramBatcher().use_sendmmsg is False
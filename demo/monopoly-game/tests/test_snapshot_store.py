@@ -0,0 +1,108 @@
+# tests/test_snapshot_store.py
+"""SnapshotStore: rebuild khớp trạng thái đã ghi, version bị bỏ trả None, structural sharing không dùng chung object bị sửa."""
+import copy
+import json
+import random
+
+from src.server.rooms.snapshot_store import SnapshotStore
+from src.shared.state_delta import diff_state
+
+
+def initial_state():
+    return {
+        "players": [{"id": f"p{i}", "position": 0, "balance": 1500, "properties": []} for i in range(4)],
+        "board": {"tiles": [{"id": t, "owner": None, "houses": 0} for t in range(40)]},
+        "turn": {"current": "p0", "round": 0},
+    }
+
+
+def play(state, step, rng):
+    """Một hành động: đổi vài nhánh, các nhánh còn lại giữ nguyên."""
+    state = copy.deepcopy(state)
+    player = state["players"][step % 4]
+    player["position"] = (player["position"] + rng.randint(2, 12)) % 40
+    tile = state["board"]["tiles"][player["position"]]
+    if tile["owner"] is None:
+        tile["owner"] = player["id"]
+        player["properties"].append(tile["id"])
+        player["balance"] -= 100
+    elif tile["owner"] == player["id"] and tile["houses"] < 4:
+        tile["houses"] += 1
+    state["turn"] = {"current": f"p{(step + 1) % 4}", "round": step // 4}
+    return state
+
+
+def record_game(store, actions, gap_at=()):
+    """Ghi `actions` version; version trong gap_at được ghi không kèm patch (vd. resync → keyframe mới)."""
+    rng = random.Random(11)
+    previous, expected = initial_state(), {}
+    for version in range(1, actions + 1):
+        state = play(previous, version, rng)
+        expected[version] = json.dumps(state, sort_keys=True)
+        store.record(version, state, None if version in gap_at else diff_state(previous, state))
+        previous = state
+    return expected
+
+
+def container_ids(tree, ids=None):
+    ids = set() if ids is None else ids
+    if isinstance(tree, (dict, list)):
+        ids.add(id(tree))
+        for child in tree.values() if isinstance(tree, dict) else tree:
+            container_ids(child, ids)
+    return ids
+
+
+def test_rebuild_matches_every_retained_version():
+    store = SnapshotStore(max_versions=1000, keyframe_interval=8)
+    expected = record_game(store, 100, gap_at={30, 31, 57})
+    assert len(store) == 100 and store.oldest_version == 1 and store.latest_version == 100
+    for version, state in expected.items():
+        assert version in store
+        assert json.dumps(store.rebuild(version), sort_keys=True) == state, version
+    assert json.dumps(store.latest(), sort_keys=True) == expected[100]
+
+
+def test_evicted_versions_return_none():
+    store = SnapshotStore(max_versions=20, keyframe_interval=8)
+    expected = record_game(store, 100)
+    oldest = store.oldest_version
+    # Giữ ít nhất max_versions, và không quá max_versions + keyframe_interval - 1
+    assert 20 <= len(store) <= 20 + 8 - 1 and len(store) == 100 - oldest + 1
+    for version in range(1, oldest):
+        assert version not in store and store.rebuild(version) is None
+    for version in range(oldest, 101):
+        assert json.dumps(store.rebuild(version), sort_keys=True) == expected[version]
+    assert store.rebuild(0) is None and store.rebuild(101) is None
+
+
+def test_structural_sharing_does_not_alias_mutable_state():
+    store = SnapshotStore(max_versions=1000, keyframe_interval=4)
+    expected = record_game(store, 12)
+
+    # Nhánh không đổi được dùng chung giữa hai version liên tiếp (không deepcopy cả cây)
+    before = store.latest()
+    state = copy.deepcopy(before)
+    state["turn"]["round"] += 1
+    shared = store.record(13, state, diff_state(before, state))
+    expected[13] = json.dumps(state, sort_keys=True)
+    assert shared["board"] is before["board"] and shared["players"] is before["players"]
+    assert shared["turn"] is not before["turn"] and before["turn"]["round"] == state["turn"]["round"] - 1
+
+    # rebuild trả bản sao độc lập: không chung object nào với store hay với lần rebuild khác
+    stored = container_ids(store.latest())
+    rebuilt = {version: store.rebuild(version) for version in expected}
+    seen = set()
+    for version, tree in rebuilt.items():
+        ids = container_ids(tree)
+        assert not ids & stored and not ids & seen, version
+        seen |= ids
+
+    # Sửa bản rebuild (kể cả nhánh dùng chung giữa các version) không ảnh hưởng version nào trong store
+    for tree in rebuilt.values():
+        tree["board"]["tiles"][0]["owner"] = "hacker"
+        tree["players"].clear()
+        tree["turn"]["round"] = -1
+    for version, state_json in expected.items():
+        assert json.dumps(store.rebuild(version), sort_keys=True) == state_json, version
+    assert json.dumps(store.latest(), sort_keys=True) == expected[13]
@@ -0,0 +1,117 @@
+# tests/test_socket_pool.py
+"""SocketPool: 10.000 phòng trong ngân sách FD cố định; datagram được tách về đúng phòng."""
+import asyncio
+import json
+import os
+import socket
+import sys
+
+import pytest
+
+from src.server.network.multiplecast_manager import MulticastManager
+from src.server.network.network_manager import NetworkManager
+from src.shared import wire_codec
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="đếm FD qua /proc/self/fd")
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_10k_rooms_run_within_fixed_fd_budget(quiet_logger):
+    before = open_fds()
+    manager = MulticastManager(quiet_logger, base_ip="239.3.0.0/16", base_port=47000,
+                               interface_ip="127.0.0.1", socket_pool_size=4)
+    budget = manager.pool.fd_count
+    assert open_fds() - before == budget == 5
+
+    for i in range(10_000):
+        manager.create_group(f"ROOM_{i}")
+    assert open_fds() - before == budget
+    assert len(manager.groups) == 10_000
+    assert {g["port"] for g in manager.groups.values()} == {47000, 47001, 47002, 47003}
+    pool = manager.pool
+    assert pool.stats["joined"] + pool.stats["uplink_only"] == 10_000
+    assert all(n <= pool.max_memberships for n in pool.memberships)
+
+    for i in range(10_000):
+        manager.remove_group(f"ROOM_{i}")
+    assert open_fds() - before == budget
+    assert not pool.attached and not any(pool.memberships)
+    pool.close()
+    assert open_fds() == before
+
+
+def test_shared_sockets_demux_by_group_room_no_and_header(quiet_logger):
+    async def scenario():
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.4.0.0/24",
+                                 socket_pool_size=2)
+        pool = network.multicast.pool
+        pool.max_memberships = 1  # mỗi socket chỉ join 1 group → phòng thứ 3 trở đi chỉ nhận qua uplink
+        rooms = [network.multicast.create_group(f"R{i}") for i in range(3)]
+        assert [g["uplink"] for g in rooms] == [False, False, True]
+
+        received = []
+
+        async def on_packet(packet):
+            received.append(packet)
+
+        network.register_listener("on_packet", on_packet)
+        listener = asyncio.create_task(network.listen_loop())
+        await asyncio.sleep(0.05)
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton("127.0.0.1"))
+        uplink = ("127.0.0.1", pool.uplink_port)
+        # 1) vào group (IP_PKTINFO), 2) uplink + header JSON, 3) uplink + room_no bin1
+        sender.sendto(json.dumps({"data": {"n": 0}}).encode(), (rooms[1]["ip"], rooms[1]["port"]))
+        sender.sendto(json.dumps({"header": {"room_id": "R2"}, "data": {"n": 1}}).encode(), uplink)
+        codec = wire_codec.make_codec(wire_codec.BIN1, "R0", rooms[0]["room_no"])
+        delta = {"type": "ROOM_STATE_DELTA", "room_id": "R0", "base_version": 1, "version": 2, "patch": []}
+        sender.sendto(codec.encode(delta), uplink)
+        sender.sendto(json.dumps({"data": {"n": 9}}).encode(), uplink)  # không rõ phòng → bỏ
+
+        for _ in range(100):
+            if len(received) >= 3 and pool.stats["unknown"]:
+                break
+            await asyncio.sleep(0.01)
+        listener.cancel()
+        sender.close()
+        pool.close()
+        return received, pool.stats["unknown"]
+
+    received, unknown = asyncio.run(scenario())
+    by_room = {p["room_id"]: p for p in received}
+    assert set(by_room) == {"R0", "R1", "R2"}
+    assert by_room["R1"]["data"] == {"n": 0} and by_room["R2"]["data"] == {"n": 1}
+    assert by_room["R0"]["version"] == 2
+    assert unknown == 1
+
+
+def test_close_all_groups_in_pool_mode_closes_shared_sockets_once(quiet_logger):
+    async def scenario():
+        before = open_fds()
+        network = NetworkManager(quiet_logger, multicast_interface="127.0.0.1", multicast_range="239.4.1.0/24",
+                                 socket_pool_size=2)
+        multicast, pool = network.multicast, network.multicast.pool
+        for i in range(5):
+            multicast.create_group(f"R{i}")
+        listener = asyncio.create_task(network.listen_loop())
+        await asyncio.sleep(0.02)
+        assert len(network._pool_fds) == pool.fd_count
+        multicast.send_packet("R0", {"type": "BYE"})  # còn trong hàng đợi gửi lúc tắt
+
+        multicast.close_all_multicast_groups()
+        assert not multicast.groups and multicast.allocator.in_use == 0
+        assert not pool.attached and not any(pool.memberships)
+        assert network._pool_fds == []
+        assert all(sock.fileno() == -1 for sock in pool.sockets + [pool.uplink])
+        assert multicast.sender.stats["datagrams"] == 1 and multicast.sender.stats["dropped"] == 0
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)  # finally của listen_loop không đụng fd đã đóng
+        assert open_fds() == before
+
+    asyncio.run(scenario())
+    assert quiet_logger.errors == []
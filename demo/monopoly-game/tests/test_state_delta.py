@@ -0,0 +1,69 @@
+# tests/test_state_delta.py
+"""Patch theo trường giữa hai version trạng thái phòng: diff (server) → JSON → apply (client)."""
+import copy
+import json
+
+import pytest
+
+from src.shared.state_delta import PatchError, apply_patch, diff_state
+
+
+def make_state():
+    return {
+        "room_id": "R1",
+        "current_turn": "p1",
+        "players": [
+            {"id": "p1", "position": 0, "balance": 1500, "owned_tiles": []},
+            {"id": "p2", "position": 0, "balance": 1500, "owned_tiles": []},
+        ],
+        "board": {
+            "tiles": [{"id": i, "owner_id": None, "rent": 10} for i in range(40)],
+            "bank": {"cash_pool": 100_000, "properties_owned": {}},
+        },
+    }
+
+
+def roundtrip(old, new):
+    patch = json.loads(json.dumps(diff_state(old, new)))
+    return patch, apply_patch(json.loads(json.dumps(old)), patch)
+
+
+def test_field_level_patch():
+    old = make_state()
+    new = copy.deepcopy(old)
+    new["players"][0].update(position=6, balance=1400, owned_tiles=[6])
+    new["board"]["tiles"][6]["owner_id"] = "p1"
+    new["board"]["bank"]["properties_owned"]["6"] = "p1"
+    new["current_turn"] = "p2"
+
+    patch, rebuilt = roundtrip(old, new)
+    assert rebuilt == new
+    assert ["set", ["board", "tiles", 6, "owner_id"], "p1"] in patch
+    assert ["set", ["players", "p1", "position"], 6] in patch
+    assert len(json.dumps(patch)) < len(json.dumps(new)) / 5
+
+
+def test_players_added_removed_and_reordered():
+    old = make_state()
+    joined = copy.deepcopy(old)
+    joined["players"].append({"id": "p3", "position": 0, "balance": 1500, "owned_tiles": []})
+    patch, rebuilt = roundtrip(old, joined)
+    assert rebuilt == joined and patch[0][0] == "add"
+
+    left = copy.deepcopy(joined)
+    del left["players"][0]
+    assert roundtrip(joined, left)[1] == left
+
+    reordered = copy.deepcopy(joined)
+    reordered["players"].reverse()
+    patch, rebuilt = roundtrip(joined, reordered)
+    assert rebuilt == reordered and patch == [["set", ["players"], reordered["players"]]]
+
+
+def test_no_change_and_wrong_base():
+    state = make_state()
+    assert diff_state(state, copy.deepcopy(state)) == []
+
+    patch = diff_state(state, {**state, "players": state["players"][:1]})
+    with pytest.raises(PatchError):
+        apply_patch({"players": []}, patch)
@@ -0,0 +1,84 @@
+# tests/test_tcp_pipeline.py
+"""Kênh điều khiển TCP: lệnh gửi pipeline nhận đúng req_id; lỗi khi flush phản hồi đóng kết nối."""
+import asyncio
+import json
+
+import pytest
+
+from src.server import main_server
+
+
+@pytest.fixture
+def server_module(monkeypatch, quiet_logger):
+    monkeypatch.setattr(main_server, "logger", quiet_logger)
+    monkeypatch.setattr(main_server, "running", True)
+    return main_server
+
+
+def test_pipelined_requests_come_back_tagged_in_order(server_module, quiet_logger):
+    async def scenario():
+        server = await asyncio.start_server(server_module.handle_tcp_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            requests = [{"cmd": "PING", "data": {}, "req_id": i} for i in (7, 3, 42)]
+            requests.append({"cmd": "NO_SUCH_CMD", "req_id": "abc"})
+            requests.append({"cmd": "NEGOTIATE_FRAMING", "data": {}, "req_id": 5})  # thiếu field bắt buộc
+            requests.append({"cmd": "PING"})  # không req_id → phản hồi không gắn
+            # Cả lô trong một lần ghi: server đọc liền các frame rồi mới flush
+            writer.write(b"".join((json.dumps(r) + "\n").encode() for r in requests) + b"{broken\n")
+            await writer.drain()
+            responses = [json.loads(await reader.readuntil(b"\n")) for _ in range(len(requests) + 1)]
+            writer.close()
+            await writer.wait_closed()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert [r.get("req_id") for r in responses] == [7, 3, 42, "abc", 5, None, None]
+    assert [r["cmd"] for r in responses] == ["PONG"] * 3 + ["ERROR"] * 2 + ["PONG", "ERROR"]
+    assert responses[3]["message"] == "Unknown command: NO_SUCH_CMD"
+    assert responses[-1]["message"] == "Invalid JSON format"
+
+
+class BrokenWriter:
+    """StreamWriter giả: drain() lỗi như khi client đã đứt kết nối."""
+
+    def __init__(self):
+        self.written = []
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 50000)
+
+    def writelines(self, data):
+        self.written.extend(data)
+
+    async def drain(self):
+        raise ConnectionResetError("Connection reset by peer")
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def test_flush_failure_logs_and_closes_connection(server_module, quiet_logger):
+    async def scenario():
+        reader = asyncio.StreamReader()
+        writer = BrokenWriter()
+        handler = asyncio.create_task(server_module.handle_tcp_client(reader, writer))
+        reader.feed_data(b'{"cmd": "PING", "req_id": 1}\n')
+        await asyncio.sleep(0.01)
+        # Client vẫn tiếp tục gửi, nhưng kết nối đã hỏng: handler phải tự kết thúc, không chờ EOF
+        reader.feed_data(b'{"cmd": "PING", "req_id": 2}\n' * 3)
+        await asyncio.wait_for(handler, timeout=1.0)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.closed
+    assert len(writer.written) == 1  # phản hồi sau lỗi không được ghi vào kết nối hỏng
+    assert len(quiet_logger.errors) == 1 and "Failed to flush 1 responses" in quiet_logger.errors[0]
@@ -0,0 +1,74 @@
+# tests/test_wire_codec.py
+"""Codec datagram: bin1 giải mã ra đúng dict như JSON, tự nhận dạng JSON / bin1, thương lượng theo phòng."""
+import json
+
+import pytest
+
+from src.server.network.packet_builder import PacketBuilder
+from src.shared import wire_codec
+from src.shared.reliable_udp import ReliableChannel
+from src.server.utils.packet_format import PacketFormat
+
+ROOM = "ROOM_01"
+
+
+def sample_packets():
+    channel = ReliableChannel("alice")
+    client_cmd = {
+        "header": {"packet_id": "1b4e28ba-2fa1-11d2-883f-0016d3cca427", "room_id": ROOM, "sender": "alice",
+                   "target": "SERVER", "type": "COMMAND", "timestamp": "2026-10-18T09:30:01.250000Z", "version": "1.0"},
+        "command": {"action": "roll_dice", "args": {}},
+        "payload": {},
+    }
+    return [
+        PacketBuilder.player_move(ROOM, "p1", 17, (3, 4)),
+        PacketBuilder.update_balance(ROOM, "p1", -120),
+        PacketBuilder.roll_result(ROOM, "p1", (6, 6), 12, True),
+        PacketBuilder.next_turn(ROOM, "p2"),
+        PacketBuilder.pay_rent(ROOM, "p1", "p2", 50, "Trả tiền thuê"),
+        {
+            "header": {"room_id": ROOM, "type": "STATE", "timestamp": "2026-10-18T09:30:00Z"},
+            "command": {"action": "HEARTBEAT"},
+            "payload": {"players": [{"id": "p1", "balance": 1500}], "active_rooms": 3},
+        },
+        client_cmd,
+        channel.send(client_cmd, reliable=True),
+        PacketFormat.create_packet("EVENT", ROOM, "bob", "ALL", "CHAT", {"message": "xin chào"}, seq_id=9),
+        {"header": {"type": "ACK", "sender": "SERVER", "target": "alice"},
+         "meta": {"ack": True, "session": 12345, "seq_id": 7, "sack": [9, 10]}},
+        {"type": "ROOM_STATE_DELTA", "room_id": ROOM, "base_version": 4, "version": 5,
+         "patch": [["set", ["players", "p1", "position"], 17]]},
+        {"type": "TEST", "message": "ping", "room_id": ROOM},
+    ]
+
+
+@pytest.mark.parametrize("name", [n for n in wire_codec.available_codecs() if n != wire_codec.JSON])
+def test_binary_roundtrip_matches_json_and_is_smaller(name):
+    codec = wire_codec.make_codec(name, ROOM, room_no=7)
+    for packet in sample_packets():
+        expected = json.loads(json.dumps(packet))
+        data = codec.encode(packet)
+        assert codec.decode(data) == expected
+        # Bên nhận đang dùng JSON vẫn đọc được datagram nhị phân của phòng
+        assert wire_codec.make_codec(wire_codec.JSON, ROOM, 7).decode(data) == expected
+        assert len(data) < len(json.dumps(packet).encode("utf-8")) or data[2] == wire_codec.PT_GENERIC
+
+
+def test_hot_packets_use_fixed_layouts():
+    codec = wire_codec.make_codec(wire_codec.BIN1, ROOM, room_no=7)
+    move = codec.encode(PacketBuilder.player_move(ROOM, "p1", 17, (3, 4)))
+    assert move[2] == wire_codec.PT_EVENT
+    assert len(move) == wire_codec.HEADER.size + len("player_move") + 1 + 3 + 1 + 3
+    # Packet của phòng khác (room_no khác) bị từ chối
+    with pytest.raises(wire_codec.CodecError):
+        wire_codec.make_codec(wire_codec.BIN1, ROOM, room_no=8).decode(move)
+    with pytest.raises(wire_codec.CodecError):
+        codec.decode(move[:-2])
+
+
+def test_negotiation_falls_back_to_json_for_legacy_members():
+    best = wire_codec.available_codecs()[0]
+    assert wire_codec.negotiate([]) == best
+    assert wire_codec.negotiate([wire_codec.available_codecs(), ["bin1", "json"]]) == "bin1"
+    assert wire_codec.negotiate([wire_codec.available_codecs(), None]) == "json"
+    assert wire_codec.negotiate([["bin9"]]) == "json"